@@ -20,8 +20,10 @@ import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 import pandas as pd
 
@@ -280,6 +282,215 @@ class ConditionEvaluator:
             return True
 
 
+# 每次从 hilog 文件读取的文本块大小（字符数，按行对齐）
+HILOG_BLOCK_SIZE = 8 * 1024 * 1024
+# detail 模式下「其他」条目的名称
+OTHER_MATCHES_KEY = '其他'
+
+
+def required_literal(regex_pattern: str) -> Optional[str]:
+    """正则任何匹配中都必然出现的最长 ASCII 字面量（小写），无法确定时返回 None
+
+    只取顶层连续的普通字符，分支、分组、重复中的内容一律视为不确定。
+    """
+    try:
+        parsed = re._parser.parse(regex_pattern)
+        literal_op = re._constants.LITERAL
+    except Exception:
+        return None
+    best = ''
+    run = []
+    for op, value in [*parsed, (None, None)]:
+        if op is literal_op and 32 <= value < 127:
+            run.append(chr(value))
+            continue
+        if len(run) > len(best):
+            best = ''.join(run)
+        run = []
+    return best.lower() or None
+
+
+@dataclass
+class HilogPattern:
+    """编译后的 hilog 匹配规则，keyword 为预过滤用的必含字面量"""
+
+    name: str
+    regex: re.Pattern
+    groups: list
+    conditions: Union[list, str]
+    keyword: Optional[str] = None
+
+
+@dataclass
+class HilogScanResult:
+    """单个（或一批）hilog 文件的扫描结果，可按文件顺序合并
+
+    - results: 规则名 -> 通过条件的分组值列表
+    - matched: 规则名 -> 通过条件的完整匹配字符串（仅 detail 模式）
+    - regex_match_strings / matched_strings: 计算「其他」用的全部正则匹配 / 至少通过一个规则的匹配（仅 detail 模式）
+    """
+
+    results: dict[str, list] = field(default_factory=dict)
+    matched: dict[str, list] = field(default_factory=dict)
+    regex_match_strings: set = field(default_factory=set)
+    matched_strings: set = field(default_factory=set)
+
+    def merge(self, other: 'HilogScanResult'):
+        for pattern_name, values in other.results.items():
+            self.results.setdefault(pattern_name, []).extend(values)
+        for pattern_name, strings in other.matched.items():
+            self.matched.setdefault(pattern_name, []).extend(strings)
+        self.regex_match_strings |= other.regex_match_strings
+        self.matched_strings |= other.matched_strings
+
+    def detail_data(self) -> dict:
+        detail_data = {pattern_name: {'matched': strings} for pattern_name, strings in self.matched.items()}
+        # 「其他」：所有正则匹配到但任一规则条件均未通过的（去重）
+        detail_data[OTHER_MATCHES_KEY] = sorted(self.regex_match_strings - self.matched_strings)
+        return detail_data
+
+
+class HilogScanner:
+    """按行流式扫描 hilog 文件
+
+    文件按行对齐分块读取；每个块先用各规则的必含关键字（小写子串查找）定位候选行，
+    同一关键字在块内只查找一次，再只对候选行执行对应规则的正则。提取不到关键字的规则对整块执行正则。
+    匹配以行为单位，规则的正则不应跨行。
+    """
+
+    def __init__(self, patterns: list[HilogPattern], detail: bool = False):
+        self.patterns = patterns
+        self.detail = detail
+
+    def new_result(self) -> HilogScanResult:
+        result = HilogScanResult(results={pattern.name: [] for pattern in self.patterns})
+        if self.detail:
+            result.matched = {pattern.name: [] for pattern in self.patterns}
+        return result
+
+    def scan_file(self, file_path: Path) -> HilogScanResult:
+        result = self.new_result()
+        if not file_path.exists():
+            return result
+        try:
+            with open(file_path, encoding='utf-8', errors='ignore') as f:
+                tail = ''
+                while chunk := f.read(HILOG_BLOCK_SIZE):
+                    block = tail + chunk
+                    cut = block.rfind('\n') + 1
+                    tail = block[cut:]
+                    if cut:
+                        self.scan_block(block[:cut], result)
+                if tail:
+                    self.scan_block(tail, result)
+        except Exception as e:
+            logging.warning(f'Error analyzing file {file_path}: {str(e)}')
+        return result
+
+    def scan_block(self, block: str, result: HilogScanResult):
+        lowered = block.lower()
+        # 个别字符小写后长度会变化，此时偏移无法对应，整块执行正则
+        if len(lowered) != len(block):
+            lowered = None
+        candidate_lines: dict[str, list[tuple[int, int]]] = {}
+
+        for pattern in self.patterns:
+            if pattern.keyword is None or lowered is None:
+                for match_obj in pattern.regex.finditer(block):
+                    self._handle_match(pattern, match_obj, result)
+                continue
+
+            lines = candidate_lines.get(pattern.keyword)
+            if lines is None:
+                lines = candidate_lines[pattern.keyword] = self._find_lines(lowered, pattern.keyword)
+            for start, end in lines:
+                for match_obj in pattern.regex.finditer(block, start, end):
+                    self._handle_match(pattern, match_obj, result)
+
+    @staticmethod
+    def _find_lines(lowered: str, keyword: str) -> list[tuple[int, int]]:
+        """包含关键字的各行 (起始偏移, 结束偏移)，不含换行符"""
+        lines = []
+        pos = lowered.find(keyword)
+        while pos != -1:
+            start = lowered.rfind('\n', 0, pos) + 1
+            end = lowered.find('\n', pos)
+            if end == -1:
+                end = len(lowered)
+            lines.append((start, end))
+            pos = lowered.find(keyword, end)
+        return lines
+
+    def _match_value(self, match_obj: re.Match):
+        """与 findall() 一致：多个分组返回元组，一个分组返回该分组，无分组返回整个匹配；
+        detail 模式下有分组时总是返回元组"""
+        if self.detail:
+            captured = match_obj.groups()
+            return captured if captured else match_obj.group(0)
+        captured = match_obj.groups('')
+        if len(captured) > 1:
+            return captured
+        return captured[0] if captured else match_obj.group(0)
+
+    def _handle_match(self, pattern: HilogPattern, match_obj: re.Match, result: HilogScanResult):
+        extracted_values = self._extract_values(pattern.groups, self._match_value(match_obj))
+        conditions_met = self._conditions_met(pattern, extracted_values)
+
+        # Handle detail mode: save matched strings
+        # 规则：匹配且条件通过 -> 加入该规则 matched；若匹配多个规则，每个规则都包含
+        # 「其他」= 所有正则匹配中，未被任一规则条件通过的（统一去重，避免重复）
+        full_match_string = match_obj.group(0)
+        if self.detail and full_match_string:
+            result.regex_match_strings.add(full_match_string)
+            if conditions_met:
+                result.matched[pattern.name].append(full_match_string)
+                result.matched_strings.add(full_match_string)
+
+        # Only add to results if conditions are met (or no conditions)
+        if conditions_met and extracted_values:
+            result.results[pattern.name].append(extracted_values)
+
+    @staticmethod
+    def _extract_values(groups: list, match) -> list:
+        """Extract specified groups from a match"""
+        if isinstance(match, tuple):
+            # Multiple groups captured
+            extracted_values = []
+            for group_idx in groups:
+                if group_idx == 0:
+                    extracted_values.append(match)  # Full match (tuple)
+                elif 1 <= group_idx <= len(match):
+                    extracted_values.append(match[group_idx - 1])  # Group index starts from 1
+                else:
+                    extracted_values.append(None)  # Invalid group index
+            return extracted_values
+        # Single group or no groups
+        if 0 in groups or groups == [1]:
+            return [match]
+        return []
+
+    @staticmethod
+    def _conditions_met(pattern: HilogPattern, extracted_values: list) -> bool:
+        conditions = pattern.conditions
+        if not extracted_values or not conditions:
+            return True
+        # 如果 conditions 是字符串且包含 $，使用表达式评估器
+        if isinstance(conditions, str) and '$' in conditions:
+            # 使用表达式评估（支持分组值的数学运算和比较）
+            return ExpressionEvaluator.evaluate_expression(conditions, extracted_values)
+        if isinstance(conditions, list):
+            # 使用传统的条件数组方式（向后兼容）
+            # Check if all conditions are satisfied (AND logic)
+            for value, condition in zip(extracted_values, conditions):
+                if condition:
+                    value_str = str(value) if value is not None else ''
+                    if not ConditionEvaluator.evaluate_condition(value_str, condition):
+                        return False
+            return True
+        logging.warning(f'Pattern "{pattern.name}": Invalid conditions type: {type(conditions)}')
+        return False
+
+
 class HilogAction:
     """Handles hilog analysis and statistics generation"""
 
@@ -406,9 +617,6 @@ class HilogAction:
         self, hilog_dir: str, patterns: list, detail: bool = False
     ) -> tuple[dict[str, list], dict]:
         """Analyze decrypted hilog files and extract pattern matches with groups"""
-        results = {}
-        detail_data = {} if detail else None
-
         try:
             hilog_path = Path(hilog_dir)
 
@@ -417,151 +625,70 @@ class HilogAction:
 
             logging.info(f'Found {len(hilog_files)} hilog files to analyze')
 
-            # Initialize pattern results
-            pattern_configs = {}
-            for pattern in patterns:
-                # All patterns should be dict format from config
-                pattern_name = pattern.get('name', str(pattern))
-                regex_pattern = pattern.get('regex', str(pattern))
-                groups = pattern.get('groups', [0])
-                conditions = pattern.get('conditions', [])
-
-                # 兼容旧的 expression 配置（已废弃，建议使用 conditions）
-                if 'expression' in pattern:
-                    expression = pattern.get('expression')
-                    if conditions:
-                        logging.warning(
-                            f'Pattern "{pattern_name}": Both "expression" and "conditions" are specified. '
-                            f'Using "expression" and ignoring "conditions". '
-                            f'Note: "expression" is deprecated, please use "conditions" instead.'
-                        )
-                        conditions = []
-                    else:
-                        # 将 expression 转换为 conditions 字符串格式
-                        conditions = expression
-                        logging.warning(
-                            f'Pattern "{pattern_name}": "expression" is deprecated, please use "conditions" instead.'
-                        )
+            scanner = HilogScanner(self._compile_patterns(patterns), detail)
+            scan_result = scanner.new_result()
+            for file_result in self._scan_files(scanner, hilog_files):
+                scan_result.merge(file_result)
 
-                pattern_configs[pattern_name] = {'regex': regex_pattern, 'groups': groups, 'conditions': conditions}
-                results[pattern_name] = []
-                if detail:
-                    detail_data[pattern_name] = {'matched': []}  # 仅保留 matched，unmatched 统一放入「其他」
-
-            # 用于计算「其他」：所有正则匹配到的字符串 - 至少被一个规则条件通过的字符串
-            all_regex_match_strings = set()
-            all_matched_strings = set()
-
-            for file_path in hilog_files:
-                if not file_path.exists():
-                    continue
-
-                try:
-                    with open(file_path, encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    # Extract matches for each pattern
-                    for pattern_name, config in pattern_configs.items():
-                        regex_pattern = config['regex']
-                        groups = config['groups']
-                        conditions = config['conditions']
-
-                        try:
-                            # Compile regex and find matches
-                            regex = re.compile(regex_pattern, re.IGNORECASE | re.MULTILINE)
-
-                            if detail:
-                                # Use finditer to get full match strings
-                                matches_with_strings = []
-                                for match_obj in regex.finditer(content):
-                                    full_match_string = match_obj.group(0)  # Full matched string
-                                    match_tuple = match_obj.groups() if match_obj.groups() else full_match_string
-                                    matches_with_strings.append((match_tuple, full_match_string))
-                                matches = [m[0] for m in matches_with_strings]
-                            else:
-                                matches = regex.findall(content)
-                                matches_with_strings = None
-
-                            # Extract specified groups from matches and apply conditions
-                            for idx, match in enumerate(matches):
-                                # Get full match string for detail mode
-                                full_match_string = (
-                                    matches_with_strings[idx][1] if (detail and matches_with_strings) else None
-                                )
-
-                                if isinstance(match, tuple):
-                                    # Multiple groups captured
-                                    extracted_values = []
-                                    for group_idx in groups:
-                                        if group_idx == 0:
-                                            extracted_values.append(match)  # Full match (tuple)
-                                        elif 1 <= group_idx <= len(match):
-                                            extracted_values.append(match[group_idx - 1])  # Group index starts from 1
-                                        else:
-                                            extracted_values.append(None)  # Invalid group index
-                                # Single group or no groups
-                                elif 0 in groups:
-                                    extracted_values = [match]  # Full match
-                                elif groups == [1]:
-                                    extracted_values = [match]  # Single captured group
-                                else:
-                                    extracted_values = []
-
-                                # Apply conditions filtering
-                                conditions_met = True
-                                if extracted_values and conditions:
-                                    # 如果 conditions 是字符串且包含 $，使用表达式评估器
-                                    if isinstance(conditions, str) and '$' in conditions:
-                                        # 使用表达式评估（支持分组值的数学运算和比较）
-                                        conditions_met = ExpressionEvaluator.evaluate_expression(
-                                            conditions, extracted_values
-                                        )
-                                    elif isinstance(conditions, list):
-                                        # 使用传统的条件数组方式（向后兼容）
-                                        # Check if all conditions are satisfied (AND logic)
-                                        for i, (value, condition) in enumerate(zip(extracted_values, conditions)):
-                                            if i < len(conditions) and condition:
-                                                value_str = str(value) if value is not None else ''
-                                                if not ConditionEvaluator.evaluate_condition(value_str, condition):
-                                                    conditions_met = False
-                                                    break
-                                    else:
-                                        logging.warning(
-                                            f'Pattern "{pattern_name}": Invalid conditions type: {type(conditions)}'
-                                        )
-                                        conditions_met = False
-
-                                # Handle detail mode: save matched strings
-                                # 规则：匹配且条件通过 -> 加入该规则 matched；若匹配多个规则，每个规则都包含
-                                # 「其他」= 所有正则匹配中，未被任一规则条件通过的（统一去重，避免重复）
-                                if detail and full_match_string:
-                                    all_regex_match_strings.add(full_match_string)
-                                    if conditions_met:
-                                        detail_data[pattern_name]['matched'].append(full_match_string)
-                                        all_matched_strings.add(full_match_string)
-
-                                # Only add to results if conditions are met (or no conditions)
-                                if conditions_met and extracted_values:
-                                    results[pattern_name].append(extracted_values)
-
-                        except re.error as e:
-                            logging.warning(f'Invalid regex pattern "{regex_pattern}": {str(e)}')
-                            continue
-
-                except Exception as e:
-                    logging.warning(f'Error analyzing file {file_path}: {str(e)}')
-                    continue
-
-            # 「其他」：所有正则匹配到但任一规则条件均未通过的（去重）
-            if detail and detail_data is not None:
-                detail_data['其他'] = sorted(all_regex_match_strings - all_matched_strings)
-
-            return results, detail_data
+            return scan_result.results, scan_result.detail_data() if detail else None
 
         except Exception as e:
             logging.error(f'Error analyzing hilog files: {str(e)}')
             return {}, {} if detail else {}
 
+    @staticmethod
+    def _compile_patterns(patterns: list) -> list[HilogPattern]:
+        """Compile pattern configs; invalid regexes are reported once and match nothing"""
+        compiled = {}
+        for pattern in patterns:
+            # All patterns should be dict format from config
+            pattern_name = pattern.get('name', str(pattern))
+            regex_pattern = pattern.get('regex', str(pattern))
+            groups = pattern.get('groups', [0])
+            conditions = pattern.get('conditions', [])
+
+            # 兼容旧的 expression 配置（已废弃，建议使用 conditions）
+            if 'expression' in pattern:
+                expression = pattern.get('expression')
+                if conditions:
+                    logging.warning(
+                        f'Pattern "{pattern_name}": Both "expression" and "conditions" are specified. '
+                        f'Using "expression" and ignoring "conditions". '
+                        f'Note: "expression" is deprecated, please use "conditions" instead.'
+                    )
+                    conditions = []
+                else:
+                    # 将 expression 转换为 conditions 字符串格式
+                    conditions = expression
+                    logging.warning(
+                        f'Pattern "{pattern_name}": "expression" is deprecated, please use "conditions" instead.'
+                    )
+
+            try:
+                regex = re.compile(regex_pattern, re.IGNORECASE | re.MULTILINE)
+            except re.error as e:
+                logging.warning(f'Invalid regex pattern "{regex_pattern}": {str(e)}')
+                # 保留规则名，结果为空
+                regex = re.compile(r'(?!)')
+            # 同名规则以最后一条为准
+            compiled[pattern_name] = HilogPattern(
+                pattern_name, regex, groups, conditions, required_literal(regex_pattern)
+            )
+        return list(compiled.values())
+
+    @staticmethod
+    def _scan_files(scanner: HilogScanner, hilog_files: list[Path]) -> list[HilogScanResult]:
+        """Scan files in a process pool (hilog.workers, 0 = CPU count), results in file order"""
+        workers = int(Config.get('hilog.workers', 0) or 0) or os.cpu_count() or 1
+        workers = min(workers, len(hilog_files))
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(scanner.scan_file, hilog_files))
+            except Exception as e:
+                logging.warning(f'Parallel hilog scan failed, scanning sequentially: {str(e)}')
+        return [scanner.scan_file(file_path) for file_path in hilog_files]
+
     def _generate_excel_report(self, scene_name: str, results: dict[str, list], output_file: str):
         """Generate Excel report from analysis results"""
         try:
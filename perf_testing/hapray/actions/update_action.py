@@ -20,7 +20,6 @@ import os
 import shutil
 import subprocess
 import time
-from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
@@ -35,6 +34,7 @@ from hapray.core.common.device_app_packages import (
 )
 from hapray.core.common.report_paths import find_testcase_dirs_under_report_root
 from hapray.core.common.root_cause_integration import run_root_cause_for_case
+from hapray.core.common.scene_scheduler import SceneScheduler
 from hapray.core.common.symbol_recovery_bridge import (
     ENV_SO_DIR,
     ENV_SYMBOL_RECOVERY_EXE,
@@ -70,6 +70,9 @@ from hapray.mode.simple_mode import (
     update_load_excel_with_recovered_symbols,
 )
 
+# 各场景报告生成/符号恢复耗时汇总（位于报告根目录）
+SCENE_TIMING_SUMMARY_FILENAME = 'scene_timing_summary.json'
+
 
 class UpdateAction:
     """Handles report update actions for existing performance reports."""
@@ -1519,6 +1522,9 @@ class UpdateAction:
     ):
         """Processes reports using parallel execution.
 
+        Scene reports are generated by a SceneScheduler (process pool by default, see the ``update`` config);
+        symbol recovery for a scene starts as soon as its report is ready.
+
         Args:
             testcase_dirs: List of test case directories to process
             report_dir: Root report directory
@@ -1563,61 +1569,55 @@ class UpdateAction:
             enable_thread_analysis=enable_thread_analysis,
         )
 
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = []
+        root_cause_enabled = bool(Config.get('root_cause_enabled', False))
 
-            for case_dir in testcase_dirs:
-                scene_name = os.path.basename(case_dir)
-                logging.info('Updating report: %s', scene_name)
-                if time_ranges:
-                    logging.info('Using time ranges for %s: %s', scene_name, time_ranges)
-                future = executor.submit(report_generator.update_report, case_dir, time_ranges)
-                futures.append(future)
-
-            # Monitor completion status
-            for future in futures:
-                try:
-                    if future.result():
-                        logging.info('Report updated successfully')
-                    else:
-                        logging.error('Report update failed')
-                except Exception as e:
-                    logging.error('Error updating report: %s', str(e))
+        def recover_symbols(case_dir: str):
+            """符号恢复需要在 report 生成之后执行，因为它需要 report 中的产物"""
+            UpdateAction._run_symbol_recovery_for_case(
+                case_dir=case_dir,
+                effective_so=effective_so,
+                top_n=top_n,
+                stat_method=stat_method,
+                agent_mode=agent_mode,
+                llm_env_configured=llm_env_configured,
+            )
+            # 若随后还要跑 root-cause，则其结束后会再做一次 refresh（同样会嵌入增强火焰图），
+            # 这里就跳过本次 refresh，避免对百 MB 级 trace 数据做重复的 clean+压缩+生成 HTML（一次可省数十秒）。
+            if root_cause_enabled:
+                return
+            logging.info('Refreshing composite hapray_report.html for %s to embed enhanced flame graphs...', case_dir)
+            try:
+                report_generator.refresh_hapray_report_after_symbol_recovery(case_dir)
+            except Exception as e:
+                logging.error('Failed to refresh hapray_report.html for %s: %s', case_dir, e)
 
-        # 在所有报告更新完成后，执行符号恢复
-        # 符号恢复需要在 report 生成之后执行，因为它需要 report 中的产物
+        # 场景报告并发生成；启用符号恢复时，某个场景的报告生成完成后即开始它的符号恢复（pipeline），
+        # 与其他场景的报告生成重叠执行
+        scheduler = SceneScheduler()
         if should_run_symbol_recovery:
             logging.info('=' * 80)
-            logging.info('Starting symbol recovery for all test cases')
+            logging.info('Symbol recovery will run for each test case after its report is updated')
             logging.info('=' * 80)
-
-            for case_dir in testcase_dirs:
-                UpdateAction._run_symbol_recovery_for_case(
-                    case_dir=case_dir,
-                    effective_so=effective_so,
-                    top_n=top_n,
-                    stat_method=stat_method,
-                    agent_mode=agent_mode,
-                    llm_env_configured=llm_env_configured,
-                )
-
+            if root_cause_enabled:
+                logging.info('Deferring composite refresh: root-cause pass will regenerate hapray_report.html once.')
+        scheduler.run(
+            testcase_dirs,
+            report_generator,
+            time_ranges,
+            post_report=recover_symbols if should_run_symbol_recovery else None,
+        )
+        if should_run_symbol_recovery:
             logging.info('=' * 80)
             logging.info('Symbol recovery completed for all test cases')
             logging.info('=' * 80)
 
-            # 若随后还要跑 root-cause，则其结束后会再做一次 refresh（同样会嵌入增强火焰图），
-            # 这里就跳过本次 refresh，避免对百 MB 级 trace 数据做重复的 clean+压缩+生成 HTML（一次可省数十秒）。
-            if bool(Config.get('root_cause_enabled', False)):
-                logging.info('Deferring composite refresh: root-cause pass will regenerate hapray_report.html once.')
-            else:
-                logging.info('Refreshing composite hapray_report.html to embed enhanced flame graphs...')
-                for case_dir in testcase_dirs:
-                    try:
-                        report_generator.refresh_hapray_report_after_symbol_recovery(case_dir)
-                    except Exception as e:
-                        logging.error('Failed to refresh hapray_report.html for %s: %s', case_dir, e)
-
-        if bool(Config.get('root_cause_enabled', False)):
+        scheduler.log_summary()
+        try:
+            scheduler.save_summary(os.path.join(report_dir, SCENE_TIMING_SUMMARY_FILENAME))
+        except OSError as e:
+            logging.warning('Failed to save scene timing summary: %s', e)
+
+        if root_cause_enabled:
             logging.info('=' * 80)
             logging.info('Starting root-cause analysis for all test cases')
             logging.info('=' * 80)
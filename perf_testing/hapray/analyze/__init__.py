@@ -13,19 +13,39 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import contextvars
 import importlib
 import json
 import logging
 import os
 import re
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Optional
+
+from hapray.analyze.analysis_cache import AnalysisCache
 from hapray.analyze.base_analyzer import BaseAnalyzer
-from hapray.core.common.exe_utils import ExeUtils
+from hapray.analyze.report_db_writer import ReportDbWriter
+from hapray.core.common import profiler
+from hapray.core.common.conversion_scheduler import ConversionScheduler, StepDatabases
+from hapray.core.common.step_context import APP_PIDS, StepContext
+from hapray.core.config.config import Config, ConfigObject
 
 # Configuration constants
 MAX_WORKERS = 8  # Optimal for I/O-bound tasks
+STEP_EXECUTOR_THREAD = 'thread'
+STEP_EXECUTOR_PROCESS = 'process'
+# Key of the worker's profiling data in the step states returned from process-pool workers
+PROFILE_STATE_KEY = '__profile__'
 ANALYZER_CLASSES = [
     'ComponentReusableAnalyzer',
     'PerfAnalyzer',
@@ -70,6 +90,26 @@ def analyze_data(
         export_comparison: Export comparison Excel for memory analysis
         enable_thread_analysis: Enable redundant thread analysis (ThreadAnalyzer). Default True; set False to skip.
     """
+    with profiler.profiling_run() as run_profiler:
+        result = _analyze_scene(
+            scene_dir, time_ranges, use_refined_lib_symbol, export_comparison, enable_thread_analysis
+        )
+        if run_profiler is not None:
+            try:
+                run_profiler.export(os.path.join(scene_dir, 'report'))
+            except Exception as e:
+                logging.warning('Failed to export analysis profile: %s', str(e))
+    return result
+
+
+def _analyze_scene(
+    scene_dir: str,
+    time_ranges: Optional[list[dict]],
+    use_refined_lib_symbol: bool,
+    export_comparison: bool,
+    enable_thread_analysis: bool,
+) -> dict:
+    """Run the three analysis phases for one scene under the caller's profiling run."""
     total_start_time = time.time()
     logging.info('=== Starting data analysis pipeline for %s ===', scene_dir)
     if use_refined_lib_symbol:
@@ -93,13 +133,14 @@ def analyze_data(
 
     # Phase 1: Initialize analyzers
     init_start_time = time.time()
-    analyzers = _initialize_analyzers(
-        scene_dir,
-        time_ranges,
-        use_refined_lib_symbol=use_refined_lib_symbol,
-        export_comparison=export_comparison,
-        enable_thread_analysis=enable_thread_analysis,
-    )
+    analyzer_options = {
+        'time_ranges': time_ranges,
+        'use_refined_lib_symbol': use_refined_lib_symbol,
+        'export_comparison': export_comparison,
+        'enable_thread_analysis': enable_thread_analysis,
+    }
+    with profiler.span('initialize'):
+        analyzers = _initialize_analyzers(scene_dir, **analyzer_options)
     init_time = time.time() - init_start_time
     logging.info('Phase 1: Analyzer initialization completed in %.2f seconds (%d analyzers)', init_time, len(analyzers))
 
@@ -111,7 +152,8 @@ def analyze_data(
     try:
         processing_start_time = time.time()
         logging.info('Phase 2: Starting parallel step processing...')
-        _process_steps_parallel(scene_dir, analyzers)
+        with profiler.span('process_steps'):
+            _process_steps_parallel(scene_dir, analyzers, analyzer_options)
         processing_time = time.time() - processing_start_time
         logging.info('Phase 2: Parallel processing completed in %.2f seconds', processing_time)
     except Exception as e:
@@ -122,7 +164,8 @@ def analyze_data(
     try:
         finalize_start_time = time.time()
         logging.info('Phase 3: Starting report finalization...')
-        result = _finalize_analyzers(analyzers)
+        with profiler.span('finalize'):
+            result = _finalize_analyzers(analyzers)
         finalize_time = time.time() - finalize_start_time
         logging.info('Phase 3: Report finalization completed in %.2f seconds', finalize_time)
     except Exception as e:
@@ -139,7 +182,6 @@ def analyze_data(
         processing_time if 'processing_time' in locals() else 0,
         finalize_time if 'finalize_time' in locals() else 0,
     )
-
     return result
 
 
@@ -198,14 +240,8 @@ def _initialize_analyzers(
     return analyzers
 
 
-def _process_steps_parallel(scene_dir: str, analyzers: list[BaseAnalyzer]):
-    """Process all steps in parallel using a thread pool.
-
-    Args:
-        scene_dir: Root scene directory
-        analyzers: List of analyzer instances
-    """
-    # Collect step directories from steps.json
+def _load_step_dirs(scene_dir: str) -> list[str]:
+    """Collect step directory names from steps.json, falling back to step1."""
     step_dirs = []
     steps_json_path = os.path.join(scene_dir, 'steps.json')
     if os.path.exists(steps_json_path):
@@ -222,20 +258,86 @@ def _process_steps_parallel(scene_dir: str, analyzers: list[BaseAnalyzer]):
     else:
         logging.warning('steps.json not found, falling back to default step1')
         step_dirs = ['step1']
+    return step_dirs
 
+
+def _process_steps_parallel(scene_dir: str, analyzers: list[BaseAnalyzer], analyzer_options: Optional[dict] = None):
+    """Process all steps in parallel using a thread pool or a process pool.
+
+    trace.htrace/perf.data conversions of all steps are queued up front on a ConversionScheduler;
+    each step's analysis is submitted as soon as its databases are ready.
+
+    The executor is selected by ``analyze.step_executor`` in config. In process mode every worker
+    builds its own analyzer instances (and therefore its own trace.db/perf.db connections and
+    FrameCacheManager); per-step results are shipped back and merged into ``analyzers`` so that
+    report finalization (including hapray_report.db writes) happens once in the parent.
+
+    Args:
+        scene_dir: Root scene directory
+        analyzers: List of analyzer instances
+        analyzer_options: Keyword arguments used to build ``analyzers``, needed to rebuild them in workers
+    """
+    step_dirs = _load_step_dirs(scene_dir)
     if not step_dirs:
         logging.warning('No valid step directories found')
         return
 
-    logging.info('Processing %d steps with %d workers', len(step_dirs), MAX_WORKERS)
+    use_process = Config.get('analyze.step_executor', STEP_EXECUTOR_THREAD) == STEP_EXECUTOR_PROCESS
+    if use_process and len(step_dirs) > 1:
+        max_workers = int(Config.get('analyze.max_workers', 0) or 0) or os.cpu_count() or 1
+        max_workers = min(max_workers, len(step_dirs))
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_step_worker,
+            initargs=(scene_dir, analyzer_options or {}, Config.snapshot(), logging.getLogger().level),
+        )
+    else:
+        use_process = False
+        max_workers = MAX_WORKERS
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    logging.info(
+        'Processing %d steps with %d %s workers',
+        len(step_dirs),
+        max_workers,
+        STEP_EXECUTOR_PROCESS if use_process else STEP_EXECUTOR_THREAD,
+    )
+    with ConversionScheduler() as conversion_scheduler:
+        conversions = conversion_scheduler.schedule_steps(scene_dir, step_dirs)
+        step_times = _run_step_futures(executor, conversions, analyzers, use_process)
+
+    if step_times:
+        # Sort by processing time, slowest first
+        step_times.sort(key=lambda x: x[1], reverse=True)
+        total_step_time = sum(time for _, time in step_times)
+        avg_step_time = total_step_time / len(step_times)
+
+        logging.info('Step processing time summary:')
+        logging.info('  Total time: %.2f seconds, Average: %.2f seconds', total_step_time, avg_step_time)
+        logging.info('  Step times (slowest first):')
+        for step_dir, step_time in step_times:
+            percentage = (step_time / total_step_time) * 100 if total_step_time > 0 else 0
+            logging.info('    %s: %.2f seconds (%.1f%%)', step_dir, step_time, percentage)
+
 
-    # Create a thread pool executor
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # Prepare futures for all steps
+def _run_step_futures(
+    executor: Executor, conversions: dict[str, Future], analyzers: list[BaseAnalyzer], use_process: bool
+) -> list[tuple[str, float]]:
+    """Submit each step once its conversion finishes, merge worker results and collect per-step wall times."""
+    with executor:
+        # Submit steps in the order their databases become ready
         futures = {}
-        for step_dir in step_dirs:
-            future = executor.submit(_process_single_step, step_dir, scene_dir, analyzers)
-            futures[future] = step_dir
+        conversion_steps = {future: step_dir for step_dir, future in conversions.items()}
+        for conversion_future in as_completed(conversion_steps):
+            step_dbs = conversion_future.result()
+            if use_process:
+                future = executor.submit(_process_step_in_worker, step_dbs)
+            else:
+                # 分析线程继承本次运行的 Profiler
+                future = executor.submit(
+                    contextvars.copy_context().run, _timed_process_single_step, step_dbs, analyzers
+                )
+            futures[future] = step_dbs.step_dir
 
         # Process completed futures with timing
         success_count = 0
@@ -244,104 +346,111 @@ def _process_steps_parallel(scene_dir: str, analyzers: list[BaseAnalyzer]):
 
         for future in as_completed(futures):
             step_dir = futures[future]
-            step_start = time.time()
             try:
-                future.result()  # Will re-raise any exceptions
+                step_time, step_states = future.result()  # Will re-raise any exceptions
+                if step_states:
+                    _merge_step_states(analyzers, step_dir, step_states)
                 success_count += 1
-                step_time = time.time() - step_start
                 step_times.append((step_dir, step_time))
                 logging.info('Step %s processed successfully in %.2f seconds', step_dir, step_time)
             except Exception as e:
                 error_count += 1
-                step_time = time.time() - step_start
-                step_times.append((step_dir, step_time))
-                logging.error('Step %s processing failed after %.2f seconds: %s', step_dir, step_time, str(e))
+                logging.error('Step %s processing failed: %s', step_dir, str(e))
 
     # Log step processing summary
     logging.info('Step processing completed: %d successes, %d errors', success_count, error_count)
+    return step_times
 
-    if step_times:
-        # Sort by processing time, slowest first
-        step_times.sort(key=lambda x: x[1], reverse=True)
-        total_step_time = sum(time for _, time in step_times)
-        avg_step_time = total_step_time / len(step_times)
 
-        logging.info('Step processing time summary:')
-        logging.info('  Total time: %.2f seconds, Average: %.2f seconds', total_step_time, avg_step_time)
-        logging.info('  Step times (slowest first):')
-        for step_dir, step_time in step_times:
-            percentage = (step_time / total_step_time) * 100 if total_step_time > 0 else 0
-            logging.info('    %s: %.2f seconds (%.1f%%)', step_dir, step_time, percentage)
+def _timed_process_single_step(
+    step_dbs: StepDatabases, analyzers: list[BaseAnalyzer]
+) -> tuple[float, Optional[dict[str, Any]]]:
+    """Run _process_single_step in-process and return (elapsed seconds including conversion, None)."""
+    start_time = time.time()
+    _process_single_step(step_dbs, analyzers)
+    return time.time() - start_time + step_dbs.conversion_time, None
+
+
+# Analyzer instances owned by the current worker process (process-pool mode only)
+_worker_analyzers: list[BaseAnalyzer] = []
+
 
+def _init_step_worker(scene_dir: str, analyzer_options: dict, config_data: ConfigObject, log_level: int):
+    """Process-pool initializer: restore runtime config and build this worker's analyzers."""
+    global _worker_analyzers
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    Config.restore(config_data)
+    profiler.start_profiler()
+    _worker_analyzers = _initialize_analyzers(scene_dir, **analyzer_options)
 
-def _process_single_step(step_dir: str, scene_dir: str, analyzers: list[BaseAnalyzer]):
+
+def _process_step_in_worker(step_dbs: StepDatabases) -> tuple[float, dict[str, dict[str, Any]]]:
+    """Process one step inside a worker process and detach the results for the parent.
+
+    Returns:
+        Tuple of (elapsed seconds including conversion, {analyzer class name: state from pop_step_state()}).
+        The worker's profiling data travels under PROFILE_STATE_KEY.
+    """
+    start_time = time.time()
+    _process_single_step(step_dbs, _worker_analyzers)
+    step_states = {
+        type(analyzer).__name__: analyzer.pop_step_state(step_dbs.step_dir) for analyzer in _worker_analyzers
+    }
+    worker_profiler = profiler.get_profiler()
+    if worker_profiler is not None:
+        step_states[PROFILE_STATE_KEY] = worker_profiler.drain()
+    return time.time() - start_time + step_dbs.conversion_time, step_states
+
+
+def _merge_step_states(analyzers: list[BaseAnalyzer], step_dir: str, step_states: dict[str, dict[str, Any]]):
+    """Merge per-analyzer state returned by a worker into the parent's analyzers."""
+    profile = step_states.pop(PROFILE_STATE_KEY, None)
+    run_profiler = profiler.get_profiler()
+    if profile and run_profiler is not None:
+        run_profiler.merge(profile)
+    for analyzer in analyzers:
+        state = step_states.get(type(analyzer).__name__)
+        if state:
+            analyzer.merge_step_state(step_dir, state)
+
+
+def _process_single_step(step_dbs: StepDatabases, analyzers: list[BaseAnalyzer]):
     """Process a single step directory with all analyzers.
+
+    The step's databases are produced beforehand by ConversionScheduler.
+
     Args:
-        step_dir: Step directory name
-        scene_dir: Root scene directory
+        step_dbs: Step directory name and its converted database paths
         analyzers: List of analyzer instances
     """
+    step_dir = step_dbs.step_dir
     step_start_time = time.time()
     logging.info('Starting processing for step %s', step_dir)
 
-    htrace_file = os.path.join(scene_dir, 'htrace', step_dir, 'trace.htrace')
-    trace_db = os.path.join(scene_dir, 'htrace', step_dir, 'trace.db')
-    perf_file = os.path.join(scene_dir, 'hiperf', step_dir, 'perf.data')
-    perf_db = os.path.join(scene_dir, 'hiperf', step_dir, 'perf.db')
-
-    # Data conversion phase
-    conversion_start_time = time.time()
-
-    if not os.path.exists(perf_db) and os.path.exists(perf_file):
-        logging.info('Converting perf to db for %s...', step_dir)
-        perf_convert_start = time.time()
-        if not ExeUtils.convert_data_to_db(perf_file, perf_db):
-            logging.error('Failed to convert perf to db for %s', step_dir)
-        else:
-            perf_convert_time = time.time() - perf_convert_start
-            logging.info('Perf conversion for %s completed in %.2f seconds', step_dir, perf_convert_time)
-
-    if not os.path.exists(trace_db) and os.path.exists(htrace_file):
-        logging.info('Converting htrace to db for %s...', step_dir)
-        trace_convert_start = time.time()
-        if not ExeUtils.convert_data_to_db(htrace_file, trace_db):
-            logging.error('Failed to convert htrace to db for %s', step_dir)
-        else:
-            trace_convert_time = time.time() - trace_convert_start
-            logging.info('Htrace conversion for %s completed in %.2f seconds', step_dir, trace_convert_time)
-
-    # If trace_db exists but perf_db doesn't, create a hard link
-    if not os.path.exists(perf_db) and os.path.exists(trace_db):
-        logging.info('Creating hard link from perf_db to trace_db for %s...', step_dir)
-        perf_db_dir = os.path.dirname(perf_db)
-        if not os.path.exists(perf_db_dir):
-            os.makedirs(perf_db_dir, exist_ok=True)
-        try:
-            os.link(trace_db, perf_db)
-            logging.info('Hard link created: %s -> %s', perf_db, trace_db)
-        except OSError as e:
-            logging.error('Failed to create hard link from %s to %s: %s', perf_db, trace_db, e)
-
-    conversion_total_time = time.time() - conversion_start_time
-    logging.info('Data conversion phase for %s completed in %.2f seconds', step_dir, conversion_total_time)
-
     # Analysis phase
     analysis_start_time = time.time()
-    _run_analyzers(analyzers, step_dir, trace_db, perf_db)
+    with profiler.span(step_dir, 'step', conversion_seconds=round(step_dbs.conversion_time, 3)):
+        _run_analyzers(analyzers, step_dir, step_dbs.trace_db, step_dbs.perf_db)
     analysis_time = time.time() - analysis_start_time
 
     step_total_time = time.time() - step_start_time
     logging.info(
         'Step %s processing completed in %.2f seconds (conversion: %.2f, analysis: %.2f)',
         step_dir,
-        step_total_time,
-        conversion_total_time,
+        step_total_time + step_dbs.conversion_time,
+        step_dbs.conversion_time,
         analysis_time,
     )
 
 
 def _run_analyzers(analyzers: list[BaseAnalyzer], step_dir: str, trace_db: str, perf_db: str):
-    """Execute all analyzers for a given step.
+    """Execute all analyzers for a given step as a dependency DAG.
+
+    Datasets declared in ``requires`` are built once into a StepContext shared by the step's analyzers.
+    An analyzer starts as soon as the analyzers named in its ``depends_on`` have finished, and independent
+    analyzers run concurrently on ``analyze.analyzer_workers`` threads. With ``analyze.incremental`` enabled,
+    analyzers whose inputs, code and options are unchanged since the last run reuse their cached step results.
 
     Args:
         analyzers: List of analyzer instances
@@ -349,44 +458,64 @@ def _run_analyzers(analyzers: list[BaseAnalyzer], step_dir: str, trace_db: str,
         trace_db: Path to trace database
         perf_db: Path to perf database
     """
+    if not analyzers:
+        return
     total_start_time = time.time()
     analyzer_times = []
 
-    logging.info('Starting analysis for step %s with %d analyzers', step_dir, len(analyzers))
-
-    for i, analyzer in enumerate(analyzers, 1):
-        analyzer_name = type(analyzer).__name__
-        start_time = time.time()
+    scene_dir = analyzers[0].scene_dir
+    cache = AnalysisCache(scene_dir, step_dir, trace_db, perf_db) if AnalysisCache.enabled() else None
+    cache_keys = _analyzer_cache_keys(cache, analyzers) if cache is not None else {}
+    pending = [
+        analyzer
+        for analyzer in analyzers
+        if cache is None or not cache.is_fresh(analyzer, cache_keys[type(analyzer).__name__])
+    ]
+    if cache is not None:
+        logging.info(
+            'Incremental analysis for step %s: %d of %d analyzers up to date',
+            step_dir,
+            len(analyzers) - len(pending),
+            len(analyzers),
+        )
+
+    context = StepContext(scene_dir, step_dir, trace_db, perf_db)
+    if pending:
+        context.prefetch(sorted({APP_PIDS}.union(*(analyzer.requires for analyzer in pending))))
+    for dataset, elapsed_time in context.build_times.items():
+        logging.info('Built shared dataset %s for step %s in %.2f seconds', dataset, step_dir, elapsed_time)
+
+    sorter = _analyzer_graph(analyzers)
+    max_workers = int(Config.get('analyze.analyzer_workers', 0) or 0) or min(4, os.cpu_count() or 1)
+    logging.info('Starting analysis for step %s with %d analyzers (%d workers)', step_dir, len(analyzers), max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running: dict[Future, int] = {}
+        while sorter.is_active():
+            for i in sorter.get_ready():
+                analyzer = analyzers[i]
+                cache_key = cache_keys.get(type(analyzer).__name__)
+                future = executor.submit(
+                    contextvars.copy_context().run,
+                    _run_analyzer,
+                    context,
+                    analyzer,
+                    i + 1,
+                    len(analyzers),
+                    cache=cache,
+                    cache_key=cache_key,
+                )
+                running[future] = i
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                analyzer_times.append(future.result())
+                sorter.done(running.pop(future))
 
+    if cache is not None:
         try:
-            logging.info('[%d/%d] Starting %s for step %s...', i, len(analyzers), analyzer_name, step_dir)
-            analyzer.analyze(step_dir, trace_db, perf_db)
-
-            elapsed_time = time.time() - start_time
-            analyzer_times.append((analyzer_name, elapsed_time))
-
-            logging.info(
-                '[%d/%d] Completed %s for step %s in %.2f seconds',
-                i,
-                len(analyzers),
-                analyzer_name,
-                step_dir,
-                elapsed_time,
-            )
-
-        except Exception as e:
-            elapsed_time = time.time() - start_time
-            analyzer_times.append((analyzer_name, elapsed_time))
-
-            logging.error(
-                '[%d/%d] Analyzer %s failed on %s after %.2f seconds: %s',
-                i,
-                len(analyzers),
-                analyzer_name,
-                step_dir,
-                elapsed_time,
-                str(e),
-            )
+            cache.save_manifest()
+        except OSError as e:
+            logging.warning('Failed to save analysis cache manifest for step %s: %s', step_dir, str(e))
 
     total_elapsed = time.time() - total_start_time
 
@@ -394,13 +523,136 @@ def _run_analyzers(analyzers: list[BaseAnalyzer], step_dir: str, trace_db: str,
     logging.info('Analysis completed for step %s in %.2f seconds total', step_dir, total_elapsed)
     logging.info('Analyzer execution times for step %s:', step_dir)
 
-    # 按执行时间排序，最慢的在前面
+    # 按执行时间排序，最慢的在前面；并发执行时各分析器耗时之和可能超过总耗时
     analyzer_times.sort(key=lambda x: x[1], reverse=True)
     for analyzer_name, elapsed_time in analyzer_times:
         percentage = (elapsed_time / total_elapsed) * 100 if total_elapsed > 0 else 0
         logging.info('  %s: %.2f seconds (%.1f%%)', analyzer_name, elapsed_time, percentage)
 
 
+def _analyzer_graph(analyzers: list[BaseAnalyzer]) -> TopologicalSorter:
+    """Build the prepared dependency graph over analyzer indices.
+
+    Dependencies on analyzers that are not enabled are ignored. A dependency cycle is logged and the
+    analyzers fall back to running one after another in list order.
+    """
+    index_by_name = {type(analyzer).__name__: i for i, analyzer in enumerate(analyzers)}
+    sorter = TopologicalSorter()
+    for i, analyzer in enumerate(analyzers):
+        sorter.add(i, *(index_by_name[name] for name in analyzer.depends_on if name in index_by_name))
+    try:
+        sorter.prepare()
+    except CycleError as e:
+        cycle = ' -> '.join(type(analyzers[i]).__name__ for i in e.args[1])
+        logging.error('Analyzer dependency cycle %s, running analyzers sequentially', cycle)
+        sorter = TopologicalSorter({i: {i - 1} for i in range(1, len(analyzers))})
+        sorter.add(0)
+        sorter.prepare()
+    return sorter
+
+
+def _analyzer_cache_keys(cache: AnalysisCache, analyzers: list[BaseAnalyzer]) -> dict[str, Optional[str]]:
+    """Compute the incremental-analysis cache key of every analyzer, dependencies first.
+
+    Analyzers that are not cacheable, or depend on one that is not, get None.
+    """
+    by_name = {type(analyzer).__name__: analyzer for analyzer in analyzers}
+    keys: dict[str, Optional[str]] = {}
+
+    def key_of(name: str, visiting: frozenset) -> Optional[str]:
+        if name in keys or name in visiting:
+            return keys.get(name)
+        analyzer = by_name[name]
+        dependency_keys = {
+            dependency: key_of(dependency, visiting | {name})
+            for dependency in analyzer.depends_on
+            if dependency in by_name
+        }
+        keys[name] = cache.analyzer_key(analyzer, dependency_keys)
+        return keys[name]
+
+    for name in by_name:
+        key_of(name, frozenset())
+    return keys
+
+
+def _run_analyzer(
+    context: StepContext,
+    analyzer: BaseAnalyzer,
+    position: int,
+    total: int,
+    *,
+    cache: Optional[AnalysisCache] = None,
+    cache_key: Optional[str] = None,
+) -> tuple[str, float]:
+    """Run one analyzer with the step context active and publish its step result.
+
+    When the incremental-analysis cache holds a result for ``cache_key`` it is restored instead of running
+    the analyzer; otherwise a successful result is stored for the next run.
+
+    Returns:
+        Tuple of (analyzer class name, elapsed seconds)
+    """
+    analyzer_name = type(analyzer).__name__
+    step_dir = context.step_dir
+    with profiler.span(analyzer_name, 'analyzer', step=step_dir) as span_args:
+        elapsed_time, cached = _execute_analyzer(context, analyzer, position, total, cache=cache, cache_key=cache_key)
+        span_args['cached'] = cached
+
+    context.publish_result(analyzer_name, analyzer.results.get(step_dir))
+    return analyzer_name, elapsed_time
+
+
+def _execute_analyzer(
+    context: StepContext,
+    analyzer: BaseAnalyzer,
+    position: int,
+    total: int,
+    *,
+    cache: Optional[AnalysisCache],
+    cache_key: Optional[str],
+) -> tuple[float, bool]:
+    """Restore or run one analyzer, returning (elapsed seconds, whether the cached result was reused)."""
+    analyzer_name = type(analyzer).__name__
+    step_dir = context.step_dir
+    start_time = time.time()
+
+    if cache is not None and cache.restore(analyzer, cache_key):
+        elapsed_time = time.time() - start_time
+        logging.info(
+            '[%d/%d] Reused cached %s result for step %s (%.2f seconds)',
+            position,
+            total,
+            analyzer_name,
+            step_dir,
+            elapsed_time,
+        )
+        return elapsed_time, True
+
+    try:
+        logging.info('[%d/%d] Starting %s for step %s...', position, total, analyzer_name, step_dir)
+        with context.activate():
+            analyzer.analyze(step_dir, context.trace_db_path, context.perf_db_path)
+        elapsed_time = time.time() - start_time
+        logging.info(
+            '[%d/%d] Completed %s for step %s in %.2f seconds', position, total, analyzer_name, step_dir, elapsed_time
+        )
+        if cache is not None:
+            cache.store(analyzer, cache_key, elapsed_time)
+    except Exception as e:
+        elapsed_time = time.time() - start_time
+        logging.error(
+            '[%d/%d] Analyzer %s failed on %s after %.2f seconds: %s',
+            position,
+            total,
+            analyzer_name,
+            step_dir,
+            elapsed_time,
+            str(e),
+        )
+    return elapsed_time, False
+
+
 def _finalize_analyzers(analyzers: list[BaseAnalyzer]) -> dict:
     """Finalize all analyzers and write reports."""
     result = {}
@@ -415,7 +667,8 @@ def _finalize_analyzers(analyzers: list[BaseAnalyzer]) -> dict:
 
         try:
             logging.info('[%d/%d] Generating report for %s...', i, len(analyzers), analyzer_name)
-            analyzer.write_report(result)
+            with profiler.span(analyzer_name, 'report'):
+                analyzer.write_report(result)
 
             elapsed_time = time.time() - start_time
             report_times.append((analyzer_name, elapsed_time))
@@ -437,6 +690,16 @@ def _finalize_analyzers(analyzers: list[BaseAnalyzer]) -> dict:
                 str(e),
             )
 
+    # 关闭本场景报告数据库的写者：创建延迟的索引、合并 WAL，并输出写入吞吐统计
+    # （同一进程中并发分析的其他场景的写者不受影响）
+    db_paths = {analyzer.get_db_path() for analyzer in analyzers}
+    with profiler.span('close_report_db', 'report'):
+        for db_path, summary in ReportDbWriter.close_writers(db_paths).items():
+            profiler.record_timings(
+                f'ReportDbWriter({os.path.basename(db_path)})',
+                {'insert_seconds': float(summary['insert_seconds']), 'index_seconds': float(summary['index_seconds'])},
+            )
+
     total_elapsed = time.time() - total_start_time
 
     # 记录报告生成时间统计
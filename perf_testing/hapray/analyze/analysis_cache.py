@@ -0,0 +1,193 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.core.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIRNAME = '.analysis_cache'
+MANIFEST_FILENAME = 'manifest.json'
+CACHE_FORMAT_VERSION = 1
+
+
+def file_fingerprint(path: Optional[str]) -> Optional[list]:
+    """文件名、大小、mtime 指纹；文件不存在时返回 None"""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [os.path.basename(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _hapray_module_files(module_name: str) -> list[str]:
+    """模块及其（传递）引用的 hapray 模块源文件，按路径排序"""
+    files = set()
+    pending = [module_name]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        module = sys.modules.get(name)
+        if name in seen or module is None:
+            continue
+        seen.add(name)
+        path = getattr(module, '__file__', None)
+        if path:
+            files.add(path)
+        for value in vars(module).values():
+            referenced = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+            if isinstance(referenced, str) and referenced.startswith('hapray.') and referenced not in seen:
+                pending.append(referenced)
+    return sorted(files)
+
+
+@functools.cache
+def code_fingerprint(analyzer_class: type) -> str:
+    """分析器代码指纹：分析器类所在模块及其引用的 hapray 模块源码内容，加上 cache_version"""
+    digest = hashlib.sha1(f'{analyzer_class.__name__}\0{analyzer_class.cache_version}\n'.encode())
+    for path in _hapray_module_files(analyzer_class.__module__):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """单个步骤的增量分析缓存
+
+    report/.analysis_cache/<step_dir>/manifest.json 记录每个分析器上次成功结果对应的 key，
+    结果本身（snapshot_step_state() 的返回值）保存在同目录下的 <分析器类名>.pkl。
+    key 由输入数据库指纹、pids.json 指纹、分析器声明的其他输入文件指纹（cache_input_files()）、分析器代码指纹、
+    分析器配置（cache_config()）、so_dir 以及所依赖分析器的 key 共同决定，任一项变化都会重新分析。
+    只有声明了 cacheable 的分析器参与缓存；依赖了不可缓存分析器的分析器也不缓存（key 为 None）。
+    """
+
+    def __init__(self, scene_dir: str, step_dir: str, trace_db_path: str, perf_db_path: str):
+        self.step_dir = step_dir
+        self.cache_dir = os.path.join(scene_dir, 'report', CACHE_DIRNAME, step_dir)
+        self.inputs = {
+            'trace_db': file_fingerprint(trace_db_path),
+            'perf_db': file_fingerprint(perf_db_path),
+            'pids': file_fingerprint(os.path.join(scene_dir, 'hiperf', step_dir, 'pids.json')),
+            'so_dir': Config.get('so_dir', None) or None,
+        }
+        self.manifest: dict[str, dict[str, Any]] = self._load_manifest()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(Config.get('analyze.incremental', False))
+
+    def _load_manifest(self) -> dict[str, dict[str, Any]]:
+        path = os.path.join(self.cache_dir, MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning('Failed to read analysis cache manifest %s: %s', path, str(e))
+            return {}
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            return {}
+        return data.get('analyzers', {})
+
+    def save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, MANIFEST_FILENAME)
+        with self._lock:
+            data = {'version': CACHE_FORMAT_VERSION, 'analyzers': dict(self.manifest)}
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def analyzer_key(self, analyzer: BaseAnalyzer, dependency_keys: dict[str, Optional[str]]) -> Optional[str]:
+        """分析器的缓存 key；分析器不可缓存或依赖了不可缓存的分析器时返回 None"""
+        analyzer_class = type(analyzer)
+        dependencies = {
+            name: dependency_keys.get(name) for name in analyzer_class.depends_on if name in dependency_keys
+        }
+        if not analyzer.cacheable or None in dependencies.values():
+            return None
+        payload = {
+            'inputs': self.inputs,
+            'files': [[path, file_fingerprint(path)] for path in sorted(analyzer.cache_input_files(self.step_dir))],
+            'code': code_fingerprint(analyzer_class),
+            'config': analyzer.cache_config(),
+            'dependencies': dependencies,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _state_path(self, analyzer_name: str) -> str:
+        return os.path.join(self.cache_dir, f'{analyzer_name}.pkl')
+
+    def is_fresh(self, analyzer: BaseAnalyzer, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        analyzer_name = type(analyzer).__name__
+        entry = self.manifest.get(analyzer_name)
+        return bool(entry) and entry.get('key') == key and os.path.exists(self._state_path(analyzer_name))
+
+    def restore(self, analyzer: BaseAnalyzer, key: Optional[str]) -> bool:
+        """key 与上次结果一致时把缓存的步骤结果恢复到分析器，返回是否命中"""
+        if not self.is_fresh(analyzer, key):
+            return False
+        analyzer_name = type(analyzer).__name__
+        try:
+            with open(self._state_path(analyzer_name), 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning('Failed to load cached %s result for %s: %s', analyzer_name, self.step_dir, str(e))
+            return False
+        analyzer.restore_step_state(self.step_dir, state)
+        return True
+
+    def store(self, analyzer: BaseAnalyzer, key: Optional[str], elapsed_time: float):
+        """保存分析器本步骤的结果；不可缓存、没有结果或分析失败时删除旧记录"""
+        analyzer_name = type(analyzer).__name__
+        result = analyzer.results.get(self.step_dir)
+        if key is None or result is None or (isinstance(result, dict) and 'error' in result):
+            with self._lock:
+                self.manifest.pop(analyzer_name, None)
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._state_path(analyzer_name)
+            tmp_path = f'{path}.tmp{os.getpid()}'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(analyzer.snapshot_step_state(self.step_dir), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning('Failed to cache %s result for %s: %s', analyzer_name, self.step_dir, str(e))
+            with self._lock:
+                self.manifest.pop(analyzer_name, None)
+            return
+        with self._lock:
+            self.manifest[analyzer_name] = {
+                'key': key,
+                'elapsed': round(elapsed_time, 3),
+                'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
@@ -19,8 +19,12 @@ import os
 import sqlite3
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from typing import Any, Optional
 
+from hapray.analyze.report_db_writer import ReportDbWriter
+from hapray.core.common.step_context import APP_PIDS, StepContext
+
 
 class BaseModel:
     """Database model base class
@@ -82,6 +86,22 @@ class BaseAnalyzer(ABC):
     Abstract base class for all data analyzers.
     """
 
+    # Names of instance dict attributes (besides self.results) that hold per-step results keyed by step_dir.
+    # In process-pool mode they are detached in the worker and merged back into the parent's analyzer.
+    step_state_attrs: tuple[str, ...] = ()
+    # Shared step datasets (see hapray.core.common.step_context) this analyzer reads; the scheduler builds them
+    # once per step before any analyzer that needs them starts.
+    requires: tuple[str, ...] = ()
+    # Class names of analyzers whose step results this analyzer reads; it is scheduled after them.
+    depends_on: tuple[str, ...] = ()
+    # Opt in to incremental re-analysis (see hapray.analyze.analysis_cache). Only analyzers whose step results are
+    # determined by the step databases, pids.json, cache_config() and cache_input_files() may set this; analyzers
+    # that run for their side effects (external tools, files written next to the inputs) must not.
+    cacheable: bool = False
+    # Bump to invalidate step results cached by incremental re-analysis (see hapray.analyze.analysis_cache)
+    # when behavior changes in code that the analyzer module does not import directly.
+    cache_version: str = '1'
+
     def __init__(self, scene_dir: str, report_path: str):
         """Initialize base analyzer.
 
@@ -113,7 +133,11 @@ class BaseAnalyzer(ABC):
         """
         try:
             start_time = time.time()
-            pids = AnalyzerHelper.get_app_pids(self.scene_dir, step_dir)
+            context = StepContext.current_for(step_dir, trace_db_path)
+            if context is not None:
+                pids = context.get(APP_PIDS)
+            else:
+                pids = AnalyzerHelper.get_app_pids(self.scene_dir, step_dir)
             result = self._analyze_impl(step_dir, trace_db_path, perf_db_path, pids)
             if result:
                 self.results[step_dir] = result
@@ -142,6 +166,81 @@ class BaseAnalyzer(ABC):
             Analysis results as a dictionary
         """
 
+    def pop_step_state(self, step_dir: str) -> dict[str, Any]:
+        """Detach the state produced by analyze() for one step.
+
+        Used by worker processes to ship per-step results back to the parent analyzer.
+
+        Args:
+            step_dir: Identifier for the step
+
+        Returns:
+            Dictionary mapping attribute name to the step's value
+        """
+        state = {}
+        for attr in ('results', *self.step_state_attrs):
+            values = getattr(self, attr)
+            if step_dir in values:
+                state[attr] = values.pop(step_dir)
+        return state
+
+    def merge_step_state(self, step_dir: str, state: dict[str, Any]):
+        """Merge state returned by pop_step_state() of a worker-side analyzer.
+
+        Args:
+            step_dir: Identifier for the step
+            state: Dictionary returned by pop_step_state()
+        """
+        for attr, value in state.items():
+            getattr(self, attr)[step_dir] = value
+
+    def snapshot_step_state(self, step_dir: str) -> dict[str, Any]:
+        """Copy out the state produced by analyze() for one step without detaching it.
+
+        Used by incremental re-analysis to cache the step's results.
+
+        Args:
+            step_dir: Identifier for the step
+
+        Returns:
+            Dictionary mapping attribute name to the step's value
+        """
+        state = {}
+        for attr in ('results', *self.step_state_attrs):
+            values = getattr(self, attr)
+            if step_dir in values:
+                state[attr] = values[step_dir]
+        return state
+
+    def restore_step_state(self, step_dir: str, state: dict[str, Any]):
+        """Restore state returned by snapshot_step_state() in place of running analyze() for the step.
+
+        Args:
+            step_dir: Identifier for the step
+            state: Dictionary returned by snapshot_step_state()
+        """
+        self.merge_step_state(step_dir, state)
+
+    def cache_config(self) -> dict[str, Any]:
+        """Analyzer options (including every Config key read) that affect step results.
+
+        Part of the incremental re-analysis cache key.
+        """
+        return {}
+
+    def cache_input_files(self, step_dir: str) -> list[str]:
+        """Input files besides trace.db, perf.db and pids.json that the step results are computed from.
+
+        Their fingerprints are part of the incremental re-analysis cache key.
+
+        Args:
+            step_dir: Identifier for the step
+
+        Returns:
+            List of file paths (missing files are fingerprinted as absent)
+        """
+        return []
+
     def write_report(self, result: dict):
         """Write analysis results to JSON report."""
         if not self.results:
@@ -179,8 +278,28 @@ class BaseAnalyzer(ABC):
             self._db_path = os.path.join(report_dir, f'{self._db_name}.db')
         return self._db_path
 
+    def get_db_writer(self) -> ReportDbWriter:
+        """Get the shared single-writer service of the report database
+
+        All writes (tables, indexes, rows) go through it so that the database has one writer connection.
+
+        Returns:
+            ReportDbWriter for this analyzer's database file
+        """
+        return ReportDbWriter.shared(self.get_db_path())
+
+    def flush_db_writes(self, checkpoint: bool = False):
+        """Wait for queued writes of the report database and commit them
+
+        Args:
+            checkpoint: Whether to also merge the WAL file into the main database file
+        """
+        writer = ReportDbWriter.existing(self.get_db_path())
+        if writer is not None:
+            writer.flush(checkpoint)
+
     def get_db_connection(self) -> sqlite3.Connection:
-        """Get or create database connection
+        """Get or create database connection (used for queries; writes go through get_db_writer())
 
         Returns:
             SQLite database connection object
@@ -206,6 +325,8 @@ class BaseAnalyzer(ABC):
     def exec_sql(self, sql: str, params: Optional[tuple] = None) -> sqlite3.Cursor:
         """Execute SQL statement (no return value)
 
+        Queued writes of the report database writer are flushed first, so the statement sees them.
+
         Args:
             sql: SQL statement
             params: Parameter tuple (optional)
@@ -213,11 +334,24 @@ class BaseAnalyzer(ABC):
         Returns:
             Cursor object after execution
         """
+        self.flush_db_writes()
         conn = self.get_db_connection()
         if params:
             return conn.execute(sql, params)
         return conn.execute(sql)
 
+    def exec_sql_async(self, sql: str, params: Optional[tuple] = None) -> Future:
+        """Queue a write SQL statement on the report database writer
+
+        Args:
+            sql: SQL statement
+            params: Parameter tuple (optional)
+
+        Returns:
+            Future resolving to the statement's lastrowid
+        """
+        return self.get_db_writer().execute(sql, params or ())
+
     def query_sql(self, sql: str, params: Optional[tuple] = None) -> list[sqlite3.Row]:
         """Execute SQL query statement
 
@@ -228,6 +362,8 @@ class BaseAnalyzer(ABC):
         Returns:
             Query result list
         """
+        # Make queued writes visible to the query connection
+        self.flush_db_writes()
         conn = self.get_db_connection()
         cursor = conn.cursor()
         if params:
@@ -237,7 +373,8 @@ class BaseAnalyzer(ABC):
         return cursor.fetchall()
 
     def commit(self):
-        """Commit database transaction"""
+        """Commit database transaction (including writes queued on the report database writer)"""
+        self.flush_db_writes()
         if self._db_conn:
             self._db_conn.commit()
 
@@ -282,23 +419,23 @@ class BaseAnalyzer(ABC):
         """
         if_not_exists_clause = 'IF NOT EXISTS' if if_not_exists else ''
         sql = f'CREATE TABLE {if_not_exists_clause} {table_name} ({schema})'
-        self.exec_sql(sql)
-        self.commit()
+        self.exec_sql_async(sql)
         self.logger.debug('Created table: %s', table_name)
 
     def create_index(self, index_name: str, table_name: str, columns: str, unique: bool = False):
         """Create index
 
+        Non-unique indexes are deferred until the report database writer is closed, so that they are built once
+        over the bulk-loaded rows instead of being maintained on every insert. Unique indexes are created right
+        away because INSERT OR REPLACE relies on them.
+
         Args:
             index_name: Index name
             table_name: Table name
             columns: Column names (can be multiple columns, comma-separated)
             unique: Whether to create unique index
         """
-        unique_clause = 'UNIQUE' if unique else ''
-        sql = f'CREATE {unique_clause} INDEX IF NOT EXISTS {index_name} ON {table_name}({columns})'
-        self.exec_sql(sql)
-        self.commit()
+        self.get_db_writer().create_index(index_name, table_name, columns, unique)
         self.logger.debug('Created index: %s on %s(%s)', index_name, table_name, columns)
 
     def insert_data(self, table_name: str, data: dict, replace: bool = False) -> int:
@@ -317,12 +454,10 @@ class BaseAnalyzer(ABC):
         action = 'INSERT OR REPLACE' if replace else 'INSERT'
         sql = f'{action} INTO {table_name} ({columns}) VALUES ({placeholders})'
 
-        cursor = self.exec_sql(sql, tuple(data.values()))
-        self.commit()
-        return cursor.lastrowid
+        return self.exec_sql_async(sql, tuple(data.values())).result()
 
     def batch_insert_data(self, table_name: str, data_list: list[dict], replace: bool = False):
-        """Batch insert data into table
+        """Batch insert data into table (queued on the report database writer)
 
         Args:
             table_name: Table name
@@ -332,27 +467,12 @@ class BaseAnalyzer(ABC):
         if not data_list:
             return
 
-        # Get union of all dictionary keys
-        all_keys = set()
-        for data in data_list:
-            all_keys.update(data.keys())
+        # Union of all dictionary keys, in first-seen order; missing keys are written as NULL
+        columns = list(dict.fromkeys(key for data in data_list for key in data))
+        values_list = [tuple(data.get(key) for key in columns) for data in data_list]
 
-        columns = list(all_keys)
-        columns_str = ', '.join(columns)
-        placeholders = ', '.join(['?' for _ in columns])
-        action = 'INSERT OR REPLACE' if replace else 'INSERT'
-        sql = f'{action} INTO {table_name} ({columns_str}) VALUES ({placeholders})'
-
-        conn = self.get_db_connection()
-        # Prepare data, ensure all dictionaries have the same keys
-        values_list = []
-        for data in data_list:
-            values = [data.get(key) for key in columns]
-            values_list.append(tuple(values))
-
-        conn.executemany(sql, values_list)
-        self.commit()
-        self.logger.debug('Batch inserted %d rows into %s', len(data_list), table_name)
+        self.get_db_writer().insert_rows(table_name, columns, values_list, replace)
+        self.logger.debug('Queued %d rows for %s', len(data_list), table_name)
 
     def save_data(self, step_id: int, data: dict, replace: bool = False) -> int:
         """Save data to analyzer table (automatically adds step_id)
@@ -490,17 +610,14 @@ class BaseAnalyzer(ABC):
         if not models:
             return
 
-        # Get table name from first model (assume all models are of the same type)
-        table_name = models[0].get_table_name()
+        # Get table name and columns from first model (assume all models are of the same type)
+        model_class = type(models[0])
+        columns = [key for key in model_class.get_fields() if key not in BaseModel.BASE_FIELDS]
+        # Typed rows straight from model attributes (unset attributes are written as NULL)
+        rows = [(*(getattr(model, key, None) for key in columns), step_id) for model in models]
 
-        # Convert to list of dictionaries
-        data_list = []
-        for model in models:
-            data = model.to_dict()
-            data['step_id'] = step_id
-            data_list.append(data)
-
-        self.batch_insert_data(table_name, data_list, replace)
+        self.get_db_writer().insert_rows(model_class.get_table_name(), [*columns, 'step_id'], rows, replace)
+        self.logger.debug('Queued %d rows for %s', len(rows), model_class.get_table_name())
 
 
 class AnalyzerHelper:
@@ -577,3 +694,6 @@ class AnalyzerHelper:
         except Exception as e:
             logging.error('Failed to get app PIDs: %s', str(e))
             return []
+
+
+StepContext.register_dataset(APP_PIDS, lambda context: AnalyzerHelper.get_app_pids(context.scene_dir, context.step_dir))
@@ -27,6 +27,7 @@ class ComponentReusableAnalyzer(BaseAnalyzer):
     """
 
     pattern = re.compile(r'^H:CustomNode:BuildItem\s*\[([^\]]*)\]')
+    cacheable = True
 
     def __init__(self, scene_dir: str):
         super().__init__(scene_dir, 'trace/componentReuse')
@@ -15,18 +15,24 @@ limitations under the License.
 
 import json
 import os
-import re
 import sqlite3
 from typing import Any, Optional
 
 from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.analyze.fault_tree_metrics import MetricPlanner
+from hapray.core.common.step_context import PROCESS_THREAD_MAPS, StepContext
 
 
 class FaultTreeAnalyzer(BaseAnalyzer):
     """Analyzer for cold start redundant file analysis"""
 
+    requires = (PROCESS_THREAD_MAPS,)
+    # ipc_binder 指标取自同一步骤的 IpcBinderAnalyzer 结果
+    depends_on = ('IpcBinderAnalyzer',)
+
     def __init__(self, scene_dir: str):
         super().__init__(scene_dir, 'trace/fault_tree')
+        self._planner = MetricPlanner()
 
     def _analyze_impl(
         self, step_dir: str, trace_db_path: str, perf_db_path: str, app_pids: list
@@ -59,386 +65,46 @@ class FaultTreeAnalyzer(BaseAnalyzer):
             },
         }
 
+        context = StepContext.current_for(step_dir, trace_db_path)
         try:
-            with sqlite3.connect(trace_db_path) as _conn:
-                _conn.row_factory = sqlite3.Row
-                cursor = _conn.cursor()
-                result['arkui']['animator'] = self._collect_app_invoke_times(cursor, '%ohos.animator%', app_pids)
-                result['arkui']['HandleOnAreaChangeEvent'] = self._collect_app_invoke_times(
-                    cursor, '%H:HandleOnAreaChangeEvent%', app_pids
-                )
-                result['arkui']['HandleVisibleAreaChangeEvent'] = self._collect_app_invoke_times(
-                    cursor, '%H:HandleVisibleAreaChangeEvent%', app_pids
-                )
-                result['arkui']['GetDefaultDisplay'] = self._collect_app_invoke_times(
-                    cursor, '%GetDefaultDisplay%', app_pids
-                )
-                result['arkui']['MarshRSTransactionData'] = self._collect_app_invoke_times(
-                    cursor, '%H:MarshRSTransactionData cmdCount%', app_pids
-                )
-
-                result['RS']['ProcessedNodes'] = self._collect_rs_max_processed_node(cursor)
-                result['RS']['DisplayNodeSkipTimes'] = self._collect_rs_invoke_times(cursor, '%DisplayNode skip|%')
-                result['RS']['UnMarshRSTransactionData'] = self._collect_rs_invoke_times(
-                    cursor, '%H:UnMarsh RSTransactionData: data size:%'
-                )
-                result['RS']['AnimateSize'] = self._collect_rs_animate_nodes(cursor)
-
-                result['av_codec']['soft_decoder'] = self._collect_av_codec_soft_decoder(cursor)
-                result['av_codec']['BroadcastControlInstructions'] = self._collect_broadcast_control_instructions(
-                    cursor
-                )
-                result['av_codec']['VideoDecodingInputFrameCount'] = self._collect_video_decoding_input_frames(cursor)
-                result['av_codec']['VideoDecodingConsumptionFrame'] = self._collect_video_decoding_consumption_frames(
-                    cursor
-                )
-
-                # 音频分析
-                result['Audio']['AudioWriteCB'] = self._collect_audio_write_cb_instructions(cursor)
-                result['Audio']['AudioReadCB'] = self._collect_audio_read_cb_instructions(cursor)
-                result['Audio']['AudioPlayCb'] = self._collect_audio_play_cb_instructions(cursor)
-                result['Audio']['AudioRecCb'] = self._collect_audio_rec_cb_instructions(cursor)
-
-                # IPC Binder 分析
-                ipc_binder_data = self._extract_ipc_binder_metrics(step_dir)
-                if ipc_binder_data:
-                    result['ipc_binder'] = ipc_binder_data
-
+            maps = context.get(PROCESS_THREAD_MAPS) if context is not None else None
+            with sqlite3.connect(trace_db_path) as conn:
+                # 所有 callstack / perf_sample 指标由规划器按数据源表合并查询，见 fault_tree_metrics
+                for key, value in self._planner.evaluate(conn, app_pids, maps).items():
+                    section, name = key.split('.', 1)
+                    result[section][name] = value
         except sqlite3.Error as e:
             self.logger.error('FaultTreeAnalyzer _analyze_impl Database error: %s', str(e))
 
-        return result
-
-    def _collect_app_invoke_times(self, cursor, name_match: str, app_pids: list) -> int:
-        return self._collect_invoke_times(cursor, name_match, f'pid in ({",".join(map(str, app_pids))})')
-
-    def _collect_rs_invoke_times(self, cursor, name_match: str) -> int:
-        return self._collect_invoke_times(cursor, name_match, "name = 'render_service'")
-
-    def _collect_invoke_times(self, cursor, name_match: str, process_match: str) -> int:
-        try:
-            cursor.execute(f"""
-                SELECT count(*) FROM callstack
-                WHERE
-                name LIKE '{name_match}'
-                and callid in (
-                    SELECT id FROM thread
-                    where
-                        ipid in (
-                            SELECT ipid
-                            FROM process
-                            where {process_match}
-                        )
-                    )
-            """)
-
-            rows = cursor.fetchall()
-            return rows[0][0]
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer invoke Database error: %s', str(e))
-        return 0
-
-    @staticmethod
-    def _collect_rs_max_processed_node(cursor) -> dict:
-        cursor.execute('select start_ts, end_ts from trace_range')
-        start_ts = cursor.fetchall()[0][0]
-
-        cursor.execute("""
-            select ts, name from callstack
-            where
-            name like '%ProcessedNodes%'
-            and callid in (
-                SELECT id FROM thread
-                where
-                    ipid in (
-                        SELECT ipid FROM process  where name = 'render_service'
-                    )
-           )""")
-
-        max_processed = {'ts': 0, 'count': 0}
-        for row in cursor.fetchall():
-            match = re.search(r'ProcessedNodes:\s*(\d+)', row[1])
-            if match:
-                nodes = int(match.group(1))
-                if nodes > max_processed['count']:
-                    max_processed['count'] = nodes
-                    max_processed['ts'] = (row[0] - start_ts) / 1e9
-        return max_processed
-
-    @staticmethod
-    def _collect_rs_animate_nodes(cursor) -> dict:
-        cursor.execute("""
-                    select name from callstack
-                    where
-                    name like '%H:Animate [nodeSize, totalAnimationSize]%'
-                    and callid in (
-                        SELECT id FROM thread
-                        where
-                            ipid in (
-                                SELECT ipid FROM process  where name = 'render_service'
-                            )
-                   )""")
-        node_size = 0
-        total_animation_size = 0
-
-        for row in cursor.fetchall():
-            match = re.search(r'\[(\d+),\s*(\d+)\]', row[0])
-            if match:
-                node_size += int(match.group(1))
-                total_animation_size += int(match.group(2))
-
-        return {'nodeSizeSum': node_size, 'totalAnimationSizeSum': total_animation_size}
-
-    def _collect_av_codec_soft_decoder(self, cursor) -> bool:
-        try:
-            cursor.execute("""
-                select count(*) from callstack
-                   where
-                   (name like '%hevcdecoder%'
-                   or name like '%H:Fcodec%')
-                   and callid in (
-                       SELECT id FROM thread
-                       where
-                           ipid in (
-                               SELECT ipid FROM process  where name like 'av_codec_servic%'
-                           )
-                   )
-        """)
-            rows = cursor.fetchall()
-            return rows[0][0] > 0
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer av_codec Database error: %s', str(e))
-        return False
-
-    def _collect_broadcast_control_instructions(self, cursor) -> int:
-        """
-        4.2 播控框架指令数高
-        统计 av_session 进程中 OS_AVSessionHdl 线程的性能采样事件数
-        """
-        try:
-            cursor.execute("""
-                SELECT sum(event_count)
-                FROM perf_sample
-                WHERE callchain_id IN (
-                    SELECT id
-                    FROM thread
-                    WHERE ipid IN (
-                        SELECT ipid
-                        FROM process
-                        WHERE name LIKE '%av_session%'
-                    )
-                    AND name LIKE '%OS_AVSessionHdl%'
-                )
-            """)
-            rows = cursor.fetchall()
-            result = rows[0][0] if rows and rows[0][0] is not None else 0
-            self.logger.debug('Broadcast control instructions count: %d', result)
-            return result
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer broadcast_control Database error: %s', str(e))
-            return 0
-
-    def _collect_video_decoding_input_frames(self, cursor) -> int:
-        """
-        4.3 视频解码输入帧
-        统计 av_codec_service 进程中 OnQueueInputBuffer 调用次数
-        """
-        try:
-            cursor.execute("""
-                SELECT count(name)
-                FROM callstack
-                WHERE name LIKE '%OnQueueInputBuffer%'
-                AND callid IN (
-                    SELECT id FROM thread
-                    WHERE ipid IN (
-                        SELECT ipid FROM process
-                        WHERE name LIKE 'av_codec_servic%'
-                    )
-                )
-            """)
-            rows = cursor.fetchall()
-            result = rows[0][0] if rows and rows[0][0] is not None else 0
-            self.logger.debug('Video decoding input frames count: %d', result)
-            return result
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer video_input_frames Database error: %s', str(e))
-            return 0
-
-    def _collect_video_decoding_consumption_frames(self, cursor) -> int:
-        """
-        4.4 视频解码消费帧
-        统计 av_codec_service 进程中 OnRenderOutputBuffer 和 OnReleaseOutputBuffer 调用次数
-        """
-        try:
-            cursor.execute("""
-                SELECT count(name)
-                FROM callstack
-                WHERE (name LIKE '%OnRenderOutputBuffer%' OR name LIKE '%OnReleaseOutputBuffer%')
-                AND callid IN (
-                    SELECT id FROM thread
-                    WHERE ipid IN (
-                        SELECT ipid FROM process
-                        WHERE name LIKE 'av_codec_servic%'
-                    )
-                )
-            """)
-            rows = cursor.fetchall()
-            result = rows[0][0] if rows and rows[0][0] is not None else 0
-            self.logger.debug('Video decoding consumption frames count: %d', result)
-            return result
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer video_consumption_frames Database error: %s', str(e))
-            return 0
-
-    # ==================== 公共方法 ====================
-
-    def _collect_thread_event_count(self, cursor, thread_name_pattern: str, description: str = '') -> int:
-        """
-        通用方法：根据线程名模式统计性能采样事件数
-
-        Args:
-            cursor: 数据库游标
-            thread_name_pattern: 线程名匹配模式
-            description: 描述信息，用于日志
-
-        Returns:
-            int: 事件总数
-        """
-        try:
-            cursor.execute(
-                """
-                SELECT sum(event_count)
-                FROM perf_sample
-                WHERE callchain_id IN (
-                    SELECT id
-                    FROM thread
-                    WHERE name LIKE ?
-                )
-            """,
-                (thread_name_pattern,),
-            )
-
-            rows = cursor.fetchall()
-            result = rows[0][0] if rows and rows[0][0] is not None else 0
-            self.logger.debug('%s thread event count: %d', description or thread_name_pattern, result)
-            return result
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer thread_event_count Database error: %s', str(e))
-            return 0
-
-    def _collect_function_event_count(self, cursor, function_name_pattern: str, description: str = '') -> int:
-        """
-        通用方法：根据函数名模式统计性能采样事件数
-
-        Args:
-            cursor: 数据库游标
-            function_name_pattern: 函数名匹配模式
-            description: 描述信息，用于日志
-
-        Returns:
-            int: 事件总数
-        """
-        try:
-            cursor.execute(
-                """
-                SELECT count(event_count)
-                FROM perf_sample
-                WHERE callchain_id IN (
-                    SELECT callchain_id
-                    FROM perf_callchain cc
-                    JOIN data_dict dd ON cc.name = dd.id
-                    WHERE dd.data LIKE ?
-                )
-            """,
-                (function_name_pattern,),
-            )
-
-            rows = cursor.fetchall()
-            result = rows[0][0] if rows and rows[0][0] is not None else 0
-            self.logger.debug('%s function event count: %d', description or function_name_pattern, result)
-            return result
-        except sqlite3.Error as e:
-            self.logger.error('FaultTreeAnalyzer function_event_count Database error: %s', str(e))
-            return 0
-
-    # ==================== 音频分析方法 ====================
-
-    def _collect_audio_write_cb_instructions(self, cursor) -> int:
-        """
-        1、应用进程的OS_AudioWriteCB线程指令数 - RendererInClientInner::OnWriteData函数指令数
-        """
-        thread_count = self._collect_thread_event_count(cursor, '%OS_AudioWriteCB%', 'AudioWriteCB thread')
-        function_count = self._collect_function_event_count(
-            cursor, '%RendererInClientInner::OnWriteData%', 'RendererInClientInner::OnWriteData function'
-        )
-
-        # 返回线程事件数，函数事件数作为补充信息记录在日志中
-        self.logger.debug('AudioWriteCB - Thread events: %d, Function events: %d', thread_count, function_count)
-        return thread_count
-
-    def _collect_audio_read_cb_instructions(self, cursor) -> int:
-        """
-        2、应用进程的OS_AudioReadCB线程指令数 - CapturerInClientInner::OnReadData函数指令数
-        """
-        thread_count = self._collect_thread_event_count(cursor, '%OS_AudioReadCB%', 'AudioReadCB thread')
-        function_count = self._collect_function_event_count(
-            cursor, '%CapturerInClientInner::OnReadData%', 'CapturerInClientInner::OnReadData function'
-        )
-
-        self.logger.debug('AudioReadCB - Thread events: %d, Function events: %d', thread_count, function_count)
-        return thread_count
-
-    def _collect_audio_play_cb_instructions(self, cursor) -> int:
-        """
-        3、应用进程的OS_AudioPlayCb线程指令数 - AudioProcessInClient::CallClientHandleCurrent函数指令数
-        """
-        thread_count = self._collect_thread_event_count(cursor, '%OS_AudioPlayCb%', 'AudioPlayCb thread')
-        function_count = self._collect_function_event_count(
-            cursor,
-            '%AudioProcessInClient::CallClientHandleCurrent%',
-            'AudioProcessInClient::CallClientHandleCurrent function',
-        )
-
-        self.logger.debug('AudioPlayCb - Thread events: %d, Function events: %d', thread_count, function_count)
-        return thread_count
+        # IPC Binder 分析
+        ipc_binder_data = self._extract_ipc_binder_metrics(step_dir, context)
+        if ipc_binder_data:
+            result['ipc_binder'] = ipc_binder_data
 
-    def _collect_audio_rec_cb_instructions(self, cursor) -> int:
-        """
-        4、应用进程的OS_AudioRecCb线程指令数 - AudioProcessInClient::CallClientHandleCurrent函数指令数
-        """
-        thread_count = self._collect_thread_event_count(cursor, '%OS_AudioRecCb%', 'AudioRecCb thread')
-        function_count = self._collect_function_event_count(
-            cursor,
-            '%AudioProcessInClient::CallClientHandleCurrent%',
-            'AudioProcessInClient::CallClientHandleCurrent function',
-        )
-
-        self.logger.debug('AudioRecCb - Thread events: %d, Function events: %d', thread_count, function_count)
-        return thread_count
+        return result
 
     # ==================== IPC Binder 分析方法 ====================
 
-    def _extract_ipc_binder_metrics(self, step_dir: str) -> Optional[dict]:
+    def _extract_ipc_binder_metrics(self, step_dir: str, context: Optional[StepContext] = None) -> Optional[dict]:
         """从 IPC Binder 分析结果中提取故障树指标
 
+        优先使用步骤上下文中 IpcBinderAnalyzer 的本步骤结果；没有上下文（或未启用该分析器）时
+        回退读取 report/trace_ipc_binder.json。
+
         Args:
             step_dir: 步骤目录名（如 'step1'）
+            context: 当前步骤的共享上下文
 
         Returns:
             IPC Binder 指标字典，如果没有数据则返回 None
         """
-        ipc_file = os.path.join(self.scene_dir, 'report', 'trace_ipc_binder.json')
-
-        if not os.path.exists(ipc_file):
-            self.logger.debug('IPC Binder report file not found: %s', ipc_file)
-            return None
-
         try:
-            with open(ipc_file, encoding='utf-8') as f:
-                ipc_data = json.load(f)
+            if context is not None and context.has_result('IpcBinderAnalyzer'):
+                step_data = context.result_of('IpcBinderAnalyzer')
+            else:
+                step_data = self._load_ipc_binder_report(step_dir)
 
-            step_data = ipc_data.get(step_dir)
-            if not step_data:
+            if not step_data or 'error' in step_data:
                 self.logger.debug('No IPC Binder data for step: %s', step_dir)
                 return None
 
@@ -510,3 +176,15 @@ class FaultTreeAnalyzer(BaseAnalyzer):
         except Exception as e:
             self.logger.error('Failed to extract IPC Binder metrics: %s', str(e))
             return None
+
+    def _load_ipc_binder_report(self, step_dir: str) -> Optional[dict]:
+        """读取 report/trace_ipc_binder.json 中该步骤的 IPC Binder 结果"""
+        ipc_file = os.path.join(self.scene_dir, 'report', 'trace_ipc_binder.json')
+
+        if not os.path.exists(ipc_file):
+            self.logger.debug('IPC Binder report file not found: %s', ipc_file)
+            return None
+
+        with open(ipc_file, encoding='utf-8') as f:
+            ipc_data = json.load(f)
+        return ipc_data.get(step_dir)
@@ -0,0 +1,372 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+故障树指标注册表与查询规划器。
+
+每个指标只是一条声明（数据源表 + 名称匹配模式 + 进程/线程范围 + 归约方式），
+MetricPlanner 按数据源表把所有指标合并：
+  - process / thread 表各读一次，在内存中求出每个进程范围对应的线程
+  - callstack 表一次扫描：所有指标的 LIKE 模式 OR 在一起、限定在涉及的线程上，
+    命中的行再按指标逐个归约
+  - perf_callchain 一次扫描求出函数名模式对应的 callchain_id
+  - perf_sample 一次按 callchain_id 分组聚合，各指标对各自的 id 集合求和
+所有查询均为参数化查询，单步骤的查询次数与指标数量无关。
+"""
+
+import logging
+import re
+import sqlite3
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from hapray.core.common.step_context import ProcessThreadMaps
+
+logger = logging.getLogger(__name__)
+
+
+def like_to_regex(pattern: str) -> re.Pattern:
+    """将 SQLite LIKE 模式转换为等价的正则（% / _ 通配，仅 ASCII 字母大小写不敏感）"""
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts), re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+def _like(regex: re.Pattern, value: Optional[str]) -> bool:
+    return value is not None and regex.fullmatch(value) is not None
+
+
+@dataclass(frozen=True)
+class ProcessScope:
+    """进程范围：进程名精确匹配 / 进程名 LIKE 匹配 / 应用进程（app_pids）"""
+
+    name_equals: Optional[str] = None
+    name_like: Optional[str] = None
+    app: bool = False
+
+    def matches(self, pid: Optional[int], name: Optional[str], app_pids: set[int]) -> bool:
+        if self.app:
+            return pid in app_pids
+        if self.name_equals is not None:
+            return name == self.name_equals
+        return _like(like_to_regex(self.name_like), name)
+
+
+APP_PROCESS = ProcessScope(app=True)
+RENDER_SERVICE = ProcessScope(name_equals='render_service')
+AV_CODEC_SERVICE = ProcessScope(name_like='av_codec_servic%')
+AV_SESSION = ProcessScope(name_like='%av_session%')
+
+
+# ==================== 归约函数 ====================
+# callstack 指标的归约函数入参：命中的 (ts, name) 行列表、trace 起始时间
+
+
+def count_rows(rows: list[tuple[int, str]], _start_ts: int) -> int:
+    return len(rows)
+
+
+def any_rows(rows: list[tuple[int, str]], _start_ts: int) -> bool:
+    return len(rows) > 0
+
+
+def max_processed_nodes(rows: list[tuple[int, str]], start_ts: int) -> dict:
+    """ProcessedNodes 最大值及其出现时间（相对 trace 起始，秒）"""
+    max_processed = {'ts': 0, 'count': 0}
+    for ts, name in rows:
+        match = re.search(r'ProcessedNodes:\s*(\d+)', name)
+        if match:
+            nodes = int(match.group(1))
+            if nodes > max_processed['count']:
+                max_processed['count'] = nodes
+                max_processed['ts'] = (ts - start_ts) / 1e9
+    return max_processed
+
+
+def sum_animate_sizes(rows: list[tuple[int, str]], _start_ts: int) -> dict:
+    """H:Animate [nodeSize, totalAnimationSize] 两项分别求和"""
+    node_size = 0
+    total_animation_size = 0
+    for _ts, name in rows:
+        match = re.search(r'\[(\d+),\s*(\d+)\]', name)
+        if match:
+            node_size += int(match.group(1))
+            total_animation_size += int(match.group(2))
+    return {'nodeSizeSum': node_size, 'totalAnimationSizeSum': total_animation_size}
+
+
+# ==================== 指标声明 ====================
+
+
+@dataclass(frozen=True)
+class CallstackMetric:
+    """callstack 指标：scope 进程的线程上、名称匹配任一 LIKE 模式的切片，经 reduce 归约"""
+
+    key: str  # 结果中的位置，'.' 分隔，如 'arkui.animator'
+    name_patterns: tuple[str, ...]
+    scope: ProcessScope
+    reduce: Callable[[list[tuple[int, str]], int], Any] = count_rows
+
+
+@dataclass(frozen=True)
+class PerfSampleMetric:
+    """perf_sample 指标：callchain_id 属于线程集合（线程名 LIKE + 进程范围）或函数集合（函数名 LIKE）的采样
+
+    aggregate 为 'sum'（sum(event_count)）或 'count'（count(event_count)）；
+    report 为 False 的指标只记录 debug 日志，不写入结果。
+    """
+
+    key: str
+    thread_like: Optional[str] = None
+    scope: Optional[ProcessScope] = None
+    function_like: Optional[str] = None
+    aggregate: str = 'sum'
+    report: bool = True
+
+
+def _audio_metrics(key: str, thread_like: str, function_like: str) -> tuple[PerfSampleMetric, PerfSampleMetric]:
+    """音频线程指令数（写入结果）+ 对应回调函数的采样数（仅记录日志）"""
+    return (
+        PerfSampleMetric(key, thread_like=thread_like),
+        PerfSampleMetric(f'{key}.function', function_like=function_like, aggregate='count', report=False),
+    )
+
+
+CALLSTACK_METRICS: tuple[CallstackMetric, ...] = (
+    CallstackMetric('arkui.animator', ('%ohos.animator%',), APP_PROCESS),
+    CallstackMetric('arkui.HandleOnAreaChangeEvent', ('%H:HandleOnAreaChangeEvent%',), APP_PROCESS),
+    CallstackMetric('arkui.HandleVisibleAreaChangeEvent', ('%H:HandleVisibleAreaChangeEvent%',), APP_PROCESS),
+    CallstackMetric('arkui.GetDefaultDisplay', ('%GetDefaultDisplay%',), APP_PROCESS),
+    CallstackMetric('arkui.MarshRSTransactionData', ('%H:MarshRSTransactionData cmdCount%',), APP_PROCESS),
+    CallstackMetric('RS.ProcessedNodes', ('%ProcessedNodes%',), RENDER_SERVICE, max_processed_nodes),
+    CallstackMetric('RS.DisplayNodeSkipTimes', ('%DisplayNode skip|%',), RENDER_SERVICE),
+    CallstackMetric('RS.UnMarshRSTransactionData', ('%H:UnMarsh RSTransactionData: data size:%',), RENDER_SERVICE),
+    CallstackMetric(
+        'RS.AnimateSize', ('%H:Animate [nodeSize, totalAnimationSize]%',), RENDER_SERVICE, sum_animate_sizes
+    ),
+    CallstackMetric('av_codec.soft_decoder', ('%hevcdecoder%', '%H:Fcodec%'), AV_CODEC_SERVICE, any_rows),
+    # 4.3 视频解码输入帧
+    CallstackMetric('av_codec.VideoDecodingInputFrameCount', ('%OnQueueInputBuffer%',), AV_CODEC_SERVICE),
+    # 4.4 视频解码消费帧
+    CallstackMetric(
+        'av_codec.VideoDecodingConsumptionFrame',
+        ('%OnRenderOutputBuffer%', '%OnReleaseOutputBuffer%'),
+        AV_CODEC_SERVICE,
+    ),
+)
+
+PERF_SAMPLE_METRICS: tuple[PerfSampleMetric, ...] = (
+    # 4.2 播控框架指令数：av_session 进程中 OS_AVSessionHdl 线程
+    PerfSampleMetric('av_codec.BroadcastControlInstructions', thread_like='%OS_AVSessionHdl%', scope=AV_SESSION),
+    # 音频线程指令数 - 对应回调函数指令数
+    *_audio_metrics('Audio.AudioWriteCB', '%OS_AudioWriteCB%', '%RendererInClientInner::OnWriteData%'),
+    *_audio_metrics('Audio.AudioReadCB', '%OS_AudioReadCB%', '%CapturerInClientInner::OnReadData%'),
+    *_audio_metrics('Audio.AudioPlayCb', '%OS_AudioPlayCb%', '%AudioProcessInClient::CallClientHandleCurrent%'),
+    *_audio_metrics('Audio.AudioRecCb', '%OS_AudioRecCb%', '%AudioProcessInClient::CallClientHandleCurrent%'),
+)
+
+
+# ==================== 查询规划 ====================
+
+
+@dataclass
+class _ThreadTable:
+    """thread / process 表的内存副本"""
+
+    # thread id -> (ipid, 线程名)
+    threads: dict[int, tuple[Optional[int], Optional[str]]] = field(default_factory=dict)
+    # ipid -> (pid, 进程名)
+    processes: dict[int, tuple[Optional[int], Optional[str]]] = field(default_factory=dict)
+
+    @classmethod
+    def from_maps(cls, maps: ProcessThreadMaps) -> '_ThreadTable':
+        table = cls()
+        for thread_id, info in maps.thread_by_id.items():
+            table.threads[thread_id] = (info['ipid'], info['name'])
+        for ipid, info in maps.proc_by_ipid.items():
+            table.processes[ipid] = (info['pid'], info['name'])
+        return table
+
+    def scope_threads(self, scope: ProcessScope, app_pids: set[int]) -> set[int]:
+        ipids = {ipid for ipid, (pid, name) in self.processes.items() if scope.matches(pid, name, app_pids)}
+        return {tid for tid, (ipid, _name) in self.threads.items() if ipid in ipids}
+
+
+class MetricPlanner:
+    """按数据源表合并指标，每张表只扫描一次"""
+
+    def __init__(
+        self,
+        callstack_metrics: Iterable[CallstackMetric] = CALLSTACK_METRICS,
+        perf_sample_metrics: Iterable[PerfSampleMetric] = PERF_SAMPLE_METRICS,
+    ):
+        self.callstack_metrics = tuple(callstack_metrics)
+        self.perf_sample_metrics = tuple(perf_sample_metrics)
+
+    def evaluate(
+        self, conn: sqlite3.Connection, app_pids: list, maps: Optional[ProcessThreadMaps] = None
+    ) -> dict[str, Any]:
+        """计算所有指标
+
+        数据源表查询失败时记录错误，该表的指标不出现在结果中（调用方保留默认值）。
+        maps 为步骤上下文中已加载的进程/线程映射，为 None 时从 conn 读取。
+
+        Returns:
+            dict: {metric.key: value}，只包含 report 为 True 的指标
+        """
+        values: dict[str, Any] = {}
+        try:
+            table = _ThreadTable.from_maps(maps) if maps is not None else self._load_thread_table(conn)
+        except sqlite3.Error as e:
+            logger.error('FaultTreeAnalyzer thread/process Database error: %s', str(e))
+            return values
+
+        app_pid_set = {int(pid) for pid in app_pids}
+        try:
+            values.update(self._evaluate_callstack(conn, table, app_pid_set))
+        except sqlite3.Error as e:
+            logger.error('FaultTreeAnalyzer callstack Database error: %s', str(e))
+        try:
+            values.update(self._evaluate_perf_sample(conn, table, app_pid_set))
+        except sqlite3.Error as e:
+            logger.error('FaultTreeAnalyzer perf_sample Database error: %s', str(e))
+        return values
+
+    @staticmethod
+    def _load_thread_table(conn: sqlite3.Connection) -> _ThreadTable:
+        table = _ThreadTable()
+        for tid, ipid, name in conn.execute('SELECT id, ipid, name FROM thread'):
+            table.threads[tid] = (ipid, name)
+        for ipid, pid, name in conn.execute('SELECT ipid, pid, name FROM process'):
+            table.processes[ipid] = (pid, name)
+        return table
+
+    @staticmethod
+    def _fill_temp_ids(conn: sqlite3.Connection, table_name: str, ids: Iterable[int]) -> None:
+        conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS {table_name} (id INTEGER PRIMARY KEY)')
+        conn.execute(f'DELETE FROM {table_name}')
+        conn.executemany(f'INSERT OR IGNORE INTO {table_name} (id) VALUES (?)', ((i,) for i in ids))
+
+    def _evaluate_callstack(self, conn: sqlite3.Connection, table: _ThreadTable, app_pids: set[int]) -> dict:
+        if not self.callstack_metrics:
+            return {}
+        scope_threads = {
+            scope: table.scope_threads(scope, app_pids) for scope in {m.scope for m in self.callstack_metrics}
+        }
+        patterns = list(dict.fromkeys(p for m in self.callstack_metrics for p in m.name_patterns))
+
+        rows: list[tuple[int, int, str]] = []
+        all_threads = set().union(*scope_threads.values())
+        if all_threads:
+            self._fill_temp_ids(conn, 'fault_tree_threads', all_threads)
+            name_filter = ' OR '.join(['name LIKE ?'] * len(patterns))
+            rows = conn.execute(
+                f"""
+                SELECT callid, ts, name FROM callstack
+                WHERE ({name_filter})
+                AND callid IN (SELECT id FROM temp.fault_tree_threads)
+                """,
+                patterns,
+            ).fetchall()
+            conn.execute('DROP TABLE temp.fault_tree_threads')
+
+        start_ts = 0
+        if any(m.reduce is max_processed_nodes for m in self.callstack_metrics):
+            start_ts = conn.execute('SELECT start_ts FROM trace_range').fetchall()[0][0]
+
+        regexes = {pattern: like_to_regex(pattern) for pattern in patterns}
+        values = {}
+        for metric in self.callstack_metrics:
+            threads = scope_threads[metric.scope]
+            metric_regexes = [regexes[p] for p in metric.name_patterns]
+            matched = [
+                (ts, name)
+                for callid, ts, name in rows
+                if callid in threads and any(_like(regex, name) for regex in metric_regexes)
+            ]
+            values[metric.key] = metric.reduce(matched, start_ts)
+        return values
+
+    def _metric_callchain_ids(
+        self, conn: sqlite3.Connection, table: _ThreadTable, app_pids: set[int]
+    ) -> dict[str, set[int]]:
+        """每个 perf_sample 指标对应的 callchain_id 集合"""
+        ids: dict[str, set[int]] = {}
+        function_patterns = list(
+            dict.fromkeys(m.function_like for m in self.perf_sample_metrics if m.function_like is not None)
+        )
+        function_ids: dict[str, set[int]] = {pattern: set() for pattern in function_patterns}
+        if function_patterns:
+            regexes = {pattern: like_to_regex(pattern) for pattern in function_patterns}
+            name_filter = ' OR '.join(['dd.data LIKE ?'] * len(function_patterns))
+            for callchain_id, data in conn.execute(
+                f"""
+                SELECT DISTINCT cc.callchain_id, dd.data
+                FROM perf_callchain cc
+                JOIN data_dict dd ON cc.name = dd.id
+                WHERE {name_filter}
+                """,
+                function_patterns,
+            ):
+                for pattern, regex in regexes.items():
+                    if _like(regex, data):
+                        function_ids[pattern].add(callchain_id)
+
+        for metric in self.perf_sample_metrics:
+            if metric.function_like is not None:
+                ids[metric.key] = function_ids[metric.function_like]
+                continue
+            thread_regex = like_to_regex(metric.thread_like)
+            candidates = table.scope_threads(metric.scope, app_pids) if metric.scope else table.threads.keys()
+            ids[metric.key] = {tid for tid in candidates if _like(thread_regex, table.threads[tid][1])}
+        return ids
+
+    def _evaluate_perf_sample(self, conn: sqlite3.Connection, table: _ThreadTable, app_pids: set[int]) -> dict:
+        if not self.perf_sample_metrics:
+            return {}
+        metric_ids = self._metric_callchain_ids(conn, table, app_pids)
+
+        # callchain_id -> (sum(event_count), count(event_count))
+        totals: dict[int, tuple[Optional[int], int]] = {}
+        all_ids = set().union(*metric_ids.values())
+        if all_ids:
+            self._fill_temp_ids(conn, 'fault_tree_callchains', all_ids)
+            for callchain_id, event_sum, event_count in conn.execute(
+                """
+                SELECT callchain_id, sum(event_count), count(event_count)
+                FROM perf_sample
+                WHERE callchain_id IN (SELECT id FROM temp.fault_tree_callchains)
+                GROUP BY callchain_id
+                """
+            ):
+                totals[callchain_id] = (event_sum, event_count)
+            conn.execute('DROP TABLE temp.fault_tree_callchains')
+
+        values = {}
+        for metric in self.perf_sample_metrics:
+            groups = [totals[i] for i in metric_ids[metric.key] if i in totals]
+            if metric.aggregate == 'count':
+                value = sum(count for _sum, count in groups)
+            else:
+                value = sum(event_sum for event_sum, _count in groups if event_sum is not None)
+            logger.debug('%s event count: %d', metric.key, value)
+            if metric.report:
+                values[metric.key] = value
+        return values
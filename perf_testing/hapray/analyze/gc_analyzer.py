@@ -27,6 +27,7 @@ class GCAnalyzer(BaseAnalyzer):
     """
 
     pattern = re.compile(r'H:(FullGC|SharedFullGC|SharedGC|PartialGC)::RunPhases')
+    cacheable = True
 
     def __init__(self, scene_dir: str):
         super().__init__(scene_dir, 'trace/gc_thread')
@@ -16,20 +16,188 @@ limitations under the License.
 import contextlib
 import os
 import sqlite3
-from collections import defaultdict
-from statistics import mean
+from collections.abc import Callable
+from dataclasses import dataclass
 from typing import Any, Optional
 
+import numpy as np
+import pandas as pd
+
 from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.core.common.step_context import PROCESS_THREAD_MAPS, StepContext, load_process_thread_maps
 
 # 哪些事件认为是"请求端"，哪些是"响应端"
 REQUEST_EVENT_KEYWORDS = ('binder transaction async', 'binder transaction')
 RESPONSE_EVENT_KEYWORDS = ('binder async rcv', 'binder reply')
+# 需要从 args 中读取的字段：事务号、接口 code、请求端/响应端线程与进程
+BINDER_ARG_KEYS = ('transaction id', 'code', 'calling tid', 'destination thread', 'destination process')
+
+
+@dataclass
+class BinderEvents:
+    """binder 事件（列式）：每个数组下标对应一个 callstack 事件"""
+
+    ids: np.ndarray
+    ts: np.ndarray
+    role: np.ndarray  # 'request' / 'response' / 'other'
+    callid: np.ndarray
+    args: dict[str, np.ndarray]  # 字段名 -> 取值（缺失为 None）
+    has_arg: dict[str, np.ndarray]  # 字段名 -> 是否存在该字段
+
+    def take(self, indices: np.ndarray) -> 'BinderEvents':
+        return BinderEvents(
+            ids=self.ids[indices],
+            ts=self.ts[indices],
+            role=self.role[indices],
+            callid=self.callid[indices],
+            args={key: values[indices] for key, values in self.args.items()},
+            has_arg={key: values[indices] for key, values in self.has_arg.items()},
+        )
+
+
+@dataclass
+class BinderTransactions:
+    """按事务号配对后的通信记录：请求/响应事件下标，缺失为 -1"""
+
+    transaction_ids: np.ndarray
+    request: np.ndarray
+    response: np.ndarray
+
+
+@dataclass
+class BinderPairs:
+    """同时有请求和响应的通信记录（列式）"""
+
+    caller_proc: np.ndarray
+    caller_tid: np.ndarray
+    caller_thread_name: np.ndarray
+    callee_proc: np.ndarray
+    callee_tid: np.ndarray
+    callee_thread_name: np.ndarray
+    code: np.ndarray
+    request_ts: np.ndarray
+    latency: np.ndarray
+
+
+def _classify_event_name(name) -> str:
+    """根据 name 判断是请求侧还是响应侧 / 或其他。"""
+    lname = (name or '').lower()
+    role = 'other'
+    for kw in REQUEST_EVENT_KEYWORDS:
+        if kw in lname:
+            role = 'request'
+            break
+    for kw in RESPONSE_EVENT_KEYWORDS:
+        if kw in lname:
+            # 响应关键字优先覆盖
+            role = 'response'
+            break
+    return role
+
+
+def _parse_code(value):
+    """安全解析 code 字段：支持 "0x0 Java Layer Dependent" 这类格式，
+    仅提取前面形如 0x.. 的部分尝试按 16 进制转换，失败则保持原值。"""
+    text = str(value).strip()
+    first_part = text.split()[0] if text else ''
+    if first_part.startswith('0x'):
+        with contextlib.suppress(ValueError):
+            return int(first_part, 16)
+    return value
+
+
+def _object_array(items) -> np.ndarray:
+    array = np.empty(len(items), dtype=object)
+    array[:] = items
+    return array
+
+
+def _map_values(values: np.ndarray, func: Callable[[Any], Any]) -> np.ndarray:
+    """对每个不同取值只调用一次 func（None 也作为一个取值），按原位置展开为 object 数组"""
+    codes, uniques = pd.factorize(values)
+    # factorize 把 None 编码为 -1，正好对应末尾追加的 func(None)
+    return _object_array([func(value) for value in uniques] + [func(None)])[codes]
+
+
+def _is_none(values: np.ndarray) -> np.ndarray:
+    return np.fromiter((value is None for value in values), dtype=bool, count=len(values))
+
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    return np.fromiter((bool(value) for value in values), dtype=bool, count=len(values))
+
+
+def _proc_labels(proc_names: np.ndarray, pids: np.ndarray) -> np.ndarray:
+    """进程名为空时使用 pid=xxx"""
+    return np.where(_truthy(proc_names), proc_names, _map_values(pids, lambda pid: f'pid={pid}'))
+
+
+def _group_ids(*columns: np.ndarray) -> np.ndarray:
+    """多列组合分组，组号按首次出现顺序编号（与 dict 插入顺序一致，None 也是有效取值）"""
+    group = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        codes, uniques = pd.factorize(column)
+        codes = np.where(codes < 0, len(uniques), codes)
+        group, _ = pd.factorize(group * (len(uniques) + 1) + codes)
+    return group
+
+
+def _latency_stats(groups: np.ndarray, latency: np.ndarray, request_ts: np.ndarray):
+    """按组计算耗时统计，按组号顺序产出 (组内第一条记录下标, 统计字典)"""
+    if not len(groups):
+        return
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    latencies = latency[order]
+    times = request_ts[order]
+    totals = np.add.reduceat(latencies, starts)
+    min_latency = np.minimum.reduceat(latencies, starts)
+    max_latency = np.maximum.reduceat(latencies, starts)
+    time_span_ns = np.maximum.reduceat(times, starts) - np.minimum.reduceat(times, starts)
+
+    for k, start in enumerate(starts):
+        count = int(counts[k])
+        qps = None
+        avg_interval_ms = None
+        if count > 1 and time_span_ns[k] > 0:
+            qps = count / (time_span_ns[k] / 1_000_000_000.0)
+            # 平均调用间隔（毫秒）：排序后相邻间隔之和即首尾跨度
+            avg_interval_ms = float(time_span_ns[k] / 1_000_000.0 / (count - 1))
+        yield (
+            int(order[start]),
+            {
+                'count': count,
+                'avg_latency': float(totals[k] / count),
+                'min_latency': float(min_latency[k]),
+                'max_latency': float(max_latency[k]),
+                'qps': qps,
+                'avg_interval_ms': avg_interval_ms,
+            },
+        )
+
+
+def _top_values(groups: np.ndarray, values: np.ndarray) -> tuple[list, list]:
+    """每组内出现次数最多的取值（次数相同取先出现的）及不同取值个数"""
+    group_count = int(groups.max()) + 1 if len(groups) else 0
+    pair_ids = _group_ids(groups, values)
+    _, first_index, pair_counts = np.unique(pair_ids, return_index=True, return_counts=True)
+    pair_groups = groups[first_index]
+    order = np.lexsort((first_index, -pair_counts, pair_groups))
+    top = [None] * group_count
+    for pair in order[::-1]:
+        top[pair_groups[pair]] = values[first_index[pair]]
+    variety = np.bincount(pair_groups, minlength=group_count).tolist()
+    return top, variety
 
 
 class IpcBinderAnalyzer(BaseAnalyzer):
     """Analyzer for IPC binder transaction analysis"""
 
+    requires = (PROCESS_THREAD_MAPS,)
+    cacheable = True
+
     def __init__(self, scene_dir: str):
         super().__init__(scene_dir, 'trace/ipc_binder')
 
@@ -62,47 +230,40 @@ class IpcBinderAnalyzer(BaseAnalyzer):
 
             # 2. 加载进程/线程映射
             self.logger.info('加载进程/线程映射...')
-            proc_by_pid, thread_by_id, thread_by_tid = self._load_process_and_thread_maps(conn)
+            proc_by_pid, thread_by_id, thread_by_tid = self._load_process_and_thread_maps(conn, step_dir, trace_db_path)
             self.logger.info('加载了 %d 个进程, %d 个线程', len(proc_by_pid), len(thread_by_id))
 
             # 3. 加载 binder 事件（如果提供了 app_pids，则只加载相关事件）
             self.logger.info('加载 binder 事件...')
             events = self._load_binder_events(conn, id_to_name, thread_by_id, app_pids)
-            self.logger.info('总共 binder 事件数: %d', len(events))
+            self.logger.info('总共 binder 事件数: %d', len(events.ids) if events is not None else 0)
 
-            if not events:
+            if events is None:
                 conn.close()
                 return None
 
             # 4. 按 transaction id 聚合成通信记录
             self.logger.info('按 transaction id 配对通信记录...')
             transactions = self._build_transactions(events, key_txn_id)
-            self.logger.info('推导出通信记录条数: %d', len(transactions))
+            self.logger.info('推导出通信记录条数: %d', len(transactions.request))
 
-            if not transactions:
+            if not len(transactions.request):
                 conn.close()
                 return None
 
             # 5. 补充进程/线程信息并计算耗时
             self.logger.info('补充进程/线程信息并计算耗时（使用 callid 关联 thread 表，并解析 data_dict）...')
-            enriched = self._enrich_with_proc_thread_info(
-                transactions,
-                thread_by_id,
-                thread_by_tid,
-                proc_by_pid,
-                id_to_name=id_to_name,
-            )
+            pairs = self._enrich_with_proc_thread_info(events, transactions, thread_by_id, thread_by_tid, proc_by_pid)
 
-            # 6. 做聚合统计（按进程，耗时单位：毫秒）
+            # 6. 做聚合统计（进程对 / 线程对 / 接口，耗时单位：毫秒）
             self.logger.info('开始聚合统计...')
-            process_agg = self._aggregate_stats(enriched)
-            self.logger.info('进程对统计完成，共 %d 条记录', len(process_agg))
-
-            thread_agg = self._aggregate_by_thread(enriched)
-            self.logger.info('线程对统计完成，共 %d 条记录', len(thread_agg))
-
-            interface_agg = self._aggregate_by_interface(enriched)
-            self.logger.info('接口统计完成，共 %d 条记录', len(interface_agg))
+            process_agg, thread_agg, interface_agg = self._aggregate(pairs)
+            self.logger.info(
+                '统计完成：进程对 %d 条，线程对 %d 条，接口 %d 条',
+                len(process_agg),
+                len(thread_agg),
+                len(interface_agg),
+            )
 
             conn.close()
 
@@ -129,59 +290,25 @@ class IpcBinderAnalyzer(BaseAnalyzer):
             id_to_name[row['id']] = row['data']
         return id_to_name
 
-    def _load_process_and_thread_maps(self, conn):
+    def _load_process_and_thread_maps(self, conn, step_dir: str, trace_db_path: str):
         """
-        加载进程/线程映射表，便于把 pid/tid 转成名字。
+        加载进程/线程映射表，便于把 pid/tid 转成名字；步骤上下文中已构建时直接复用。
         返回:
           - proc_by_pid:  {pid -> {name, ipid}}
           - thread_by_id: {thread.id -> {tid, name, ipid, proc_pid, proc_name}}
           - thread_by_tid: {tid -> 同上}
         """
-        proc_by_pid = {}
-        proc_by_ipid = {}
-        cur = conn.cursor()
-        cur.execute('SELECT pid, name, ipid FROM process')
-        for row in cur.fetchall():
-            pid = row['pid']
-            name = row['name']
-            ipid = row['ipid']
-            proc_by_pid[pid] = {'name': name, 'ipid': ipid}
-            if ipid is not None:
-                proc_by_ipid[ipid] = {'pid': pid, 'name': name}
-
-        # thread_by_id: 通过 thread.id (即 callstack.callid) 查找线程信息
-        thread_by_id = {}
-        # thread_by_tid: 通过 thread.tid 查找线程信息（保留作为备用）
-        thread_by_tid = {}
-        cur.execute('SELECT id, tid, name, ipid FROM thread')
-        for row in cur.fetchall():
-            thread_id = row['id']
-            tid = row['tid']
-            name = row['name']
-            ipid = row['ipid']
-            proc_info = proc_by_ipid.get(ipid, {}) if ipid is not None else {}
-            thread_by_id[thread_id] = {
-                'tid': tid,
-                'name': name,
-                'ipid': ipid,
-                'proc_pid': proc_info.get('pid'),
-                'proc_name': proc_info.get('name'),
-            }
-            if tid is not None:
-                thread_by_tid[tid] = {
-                    'id': thread_id,
-                    'name': name,
-                    'ipid': ipid,
-                    'proc_pid': proc_info.get('pid'),
-                    'proc_name': proc_info.get('name'),
-                }
+        context = StepContext.current_for(step_dir, trace_db_path)
+        maps = context.get(PROCESS_THREAD_MAPS) if context is not None else load_process_thread_maps(conn)
+        return maps.proc_by_pid, maps.thread_by_id, maps.thread_by_tid
 
-        return proc_by_pid, thread_by_id, thread_by_tid
-
-    def _load_binder_events(self, conn, id_to_name, thread_by_id=None, app_pids=None):
+    def _load_binder_events(self, conn, id_to_name, thread_by_id=None, app_pids=None) -> Optional[BinderEvents]:
         """
-        读取所有 binder 相关 callstack 事件及其 args。
-        如果提供了 app_pids，则只加载与这些进程相关的事件（通过 callid 关联到进程）。
+        读取所有 binder 相关 callstack 事件及其 args（列式）。
+        如果提供了 app_pids，则只保留与这些进程相关的事件（通过 callid 关联到进程）。
+
+        args 只读取配对、补充信息与接口统计用到的字段（BINDER_ARG_KEYS），
+        datatype 为 1 的取值通过 data_dict 解析，同一字段出现多次时以最后一条为准。
 
         Args:
             conn: 数据库连接
@@ -190,536 +317,286 @@ class IpcBinderAnalyzer(BaseAnalyzer):
             app_pids: 应用进程 ID 列表，如果提供则只加载相关事件
 
         Returns:
-            dict[call_id] = { id, ts, dur, name, cat, callid, args: {key: (value, datatype)} }
+            BinderEvents，没有事件时返回 None
         注意: callid 对应 thread.id，用于关联线程和进程信息
         """
         cur = conn.cursor()
-
-        # 如果提供了 app_pids，构建过滤条件
-        app_pids_set = set(app_pids) if app_pids else None
-
-        # 如果提供了 app_pids，先找出相关的 thread.id 集合
-        relevant_thread_ids = None
-        if app_pids_set and thread_by_id:
-            relevant_thread_ids = set()
-            for thread_id, thread_info in thread_by_id.items():
-                proc_pid = thread_info.get('proc_pid')
-                if proc_pid in app_pids_set:
-                    relevant_thread_ids.add(thread_id)
-            self.logger.info('找到 %d 个与 app_pids 相关的线程', len(relevant_thread_ids))
-
-        cur.execute("""
-            SELECT
-              c.id,
-              c.ts,
-              c.dur,
-              c.name,
-              c.cat,
-              c.callid,
-              a.key,
-              a.value,
-              a.datatype
-            FROM callstack AS c
-            LEFT JOIN args AS a
-              ON c.argsetid = a.argset
-            WHERE c.name LIKE '%binder%'
-        """)
-
-        events = {}
-        filtered_count = 0
-        total_count = 0
-        # 临时存储每个事件的 args，用于后续过滤判断
-        event_args_temp = {}
-
-        for row in cur.fetchall():
-            total_count += 1
-            call_id = row['id']
-            callid = row['callid']
-
-            # 先收集所有 args 信息
-            if call_id not in events:
-                events[call_id] = {
-                    'id': call_id,
-                    'ts': row['ts'],
-                    'dur': row['dur'],
-                    'name': row['name'],
-                    'cat': row['cat'],
-                    'callid': callid,
-                    'args': {},
-                }
-                event_args_temp[call_id] = {}
-            ev = events[call_id]
-            args_temp = event_args_temp[call_id]
-
-            key = row['key']
-            if key is not None:
-                key_name = id_to_name.get(key)
-                if key_name is None:
-                    continue
-
-                value = row['value']
-                datatype = row['datatype']
-
-                value_parsed = id_to_name.get(value, value) if datatype == 1 else value
-
-                args_temp[key_name] = value_parsed
-
-                # 安全解析 code 字段：支持 "0x0 Java Layer Dependent" 这类格式，
-                # 仅提取前面形如 0x.. 的部分尝试按 16 进制转换，失败则保持原值。
-                if key_name == 'code':
-                    text = str(value_parsed).strip()
-                    first_part = text.split()[0] if text else ''
-                    if first_part.startswith('0x'):
-                        with contextlib.suppress(ValueError):
-                            # 解析失败则不修改原始字符串，避免抛异常
-                            value_parsed = int(first_part, 16)
-
-                ev['args'][key_name] = value_parsed
+        cur.execute("SELECT c.id, c.ts, c.name, c.callid FROM callstack AS c WHERE c.name LIKE '%binder%'")
+        rows = cur.fetchall()
+        if not rows:
+            return None
+        event_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        events = BinderEvents(
+            ids=event_ids,
+            ts=np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows)),
+            role=_map_values(_object_array([row[2] for row in rows]), _classify_event_name),
+            callid=_object_array([row[3] for row in rows]),
+            args={},
+            has_arg={},
+        )
+        total_count = len(rows)
+
+        key_ids = [key_id for key_id, name in id_to_name.items() if name in BINDER_ARG_KEYS]
+        arg_rows = []
+        if key_ids:
+            cur.execute(
+                f"""
+                SELECT c.id, a.key, a.value, a.datatype
+                FROM callstack AS c
+                JOIN args AS a
+                  ON c.argsetid = a.argset
+                WHERE c.name LIKE '%binder%'
+                  AND a.key IN ({','.join('?' * len(key_ids))})
+                """,
+                key_ids,
+            )
+            arg_rows = cur.fetchall()
+        self._fill_event_args(events, arg_rows, id_to_name)
 
         # 如果提供了 app_pids，进行过滤
-        if app_pids_set and relevant_thread_ids is not None:
-            events_to_remove = []
-            for call_id, ev in events.items():
-                callid = ev.get('callid')
-                ev.get('name', '').lower()
-                args = event_args_temp.get(call_id, {})
-
-                # 检查事件是否与 app_pids 相关
-                is_relevant = False
-
-                # 1. 检查 callid 对应的进程是否在 app_pids 中
-                if callid is not None and callid in relevant_thread_ids:
-                    is_relevant = True
-
-                # 2. 对于响应事件，检查 destination process 是否在 app_pids 中
-                if not is_relevant:
-                    dest_process = args.get('destination process')
-                    if dest_process is not None and dest_process in app_pids_set:
-                        is_relevant = True
-
-                # 3. 对于请求事件，检查 calling tid 对应的进程是否在 app_pids 中
-                if not is_relevant and thread_by_id:
-                    calling_tid = args.get('calling tid')
-                    if calling_tid is not None:
-                        # 通过 tid 查找线程，再查找进程
-                        for _, thread_info in thread_by_id.items():
-                            if thread_info.get('tid') == calling_tid:
-                                if thread_info.get('proc_pid') in app_pids_set:
-                                    is_relevant = True
-                                break
-
-                if not is_relevant:
-                    events_to_remove.append(call_id)
-                    filtered_count += 1
-
-            # 移除不相关的事件
-            for call_id in events_to_remove:
-                del events[call_id]
-
+        if app_pids and thread_by_id:
+            app_pids_set = set(app_pids)
+            relevant_thread_ids = {
+                thread_id
+                for thread_id, thread_info in thread_by_id.items()
+                if thread_info.get('proc_pid') in app_pids_set
+            }
+            self.logger.info('找到 %d 个与 app_pids 相关的线程', len(relevant_thread_ids))
+            # 同一 tid 对应多个线程时取 thread 表中的第一个
+            first_proc_pid_by_tid = {}
+            for thread_info in thread_by_id.values():
+                first_proc_pid_by_tid.setdefault(thread_info.get('tid'), thread_info.get('proc_pid'))
+
+            # 1. callid 对应的进程在 app_pids 中
+            relevant = _map_values(events.callid, lambda callid: callid in relevant_thread_ids).astype(bool)
+            # 2. 响应事件的 destination process 在 app_pids 中
+            relevant |= _map_values(
+                events.args['destination process'], lambda pid: pid is not None and pid in app_pids_set
+            ).astype(bool)
+            # 3. 请求事件的 calling tid 对应的进程在 app_pids 中
+            relevant |= _map_values(
+                events.args['calling tid'],
+                lambda tid: tid is not None and first_proc_pid_by_tid.get(tid) in app_pids_set,
+            ).astype(bool)
+
+            events = events.take(np.flatnonzero(relevant))
             self.logger.info(
                 '过滤后保留 %d/%d 个 binder 事件（过滤掉 %d 个）',
-                len(events),
+                len(events.ids),
                 total_count,
-                filtered_count,
+                total_count - len(events.ids),
             )
 
-        return events
-
-    def _classify_event(self, ev):
-        """根据 name 判断是请求侧还是响应侧 / 或其他。"""
-        name = ev['name'] or ''
-        lname = name.lower()
-        role = 'other'
-        for kw in REQUEST_EVENT_KEYWORDS:
-            if kw in lname:
-                role = 'request'
-                break
-        for kw in RESPONSE_EVENT_KEYWORDS:
-            if kw in lname:
-                # 响应关键字优先覆盖
-                role = 'response'
-                break
-        return role
-
-    def _build_transactions(self, events, key_txn_id):
+        return events if len(events.ids) else None
+
+    @staticmethod
+    def _fill_event_args(events: BinderEvents, arg_rows: list, id_to_name: dict) -> None:
+        """把 args 行按字段展开为与事件对齐的列（缺失为 None），并记录字段是否存在"""
+        count = len(events.ids)
+        for key_name in BINDER_ARG_KEYS:
+            events.args[key_name] = np.full(count, None, dtype=object)
+            events.has_arg[key_name] = np.zeros(count, dtype=bool)
+        if not arg_rows:
+            return
+
+        positions = pd.Index(events.ids).get_indexer(np.fromiter((row[0] for row in arg_rows), dtype=np.int64))
+        key_names = _map_values(_object_array([row[1] for row in arg_rows]), id_to_name.get)
+        values = _object_array([row[2] for row in arg_rows])
+        is_dict_ref = np.fromiter((row[3] == 1 for row in arg_rows), dtype=bool, count=len(arg_rows))
+        values[is_dict_ref] = _map_values(values[is_dict_ref], lambda value: id_to_name.get(value, value))
+
+        for key_name in BINDER_ARG_KEYS:
+            rows = np.flatnonzero((key_names == key_name) & (positions >= 0))
+            if not len(rows):
+                continue
+            # 同一事件同一字段出现多次时取最后一条
+            _, last = np.unique(positions[rows][::-1], return_index=True)
+            rows = rows[::-1][last]
+            key_values = values[rows]
+            if key_name == 'code':
+                key_values = _map_values(key_values, _parse_code)
+            events.args[key_name][positions[rows]] = key_values
+            events.has_arg[key_name][positions[rows]] = True
+
+    def _build_transactions(self, events: BinderEvents, key_txn_id) -> BinderTransactions:
         """
-        根据事务号把事件配对成通信记录。
-        返回:
-          txns: list[dict]，每个 dict 描述一条通信记录（含发起/接收事件）
+        根据事务号把事件配对成通信记录：每个事务取 ts 最小的请求事件和 ts 最大的响应事件。
+        事务按事务号首次出现的顺序排列，没有请求也没有响应的事务不计入。
         """
-        tx_groups = defaultdict(list)
-        # 记录缺少 transaction id 的事件，便于后续排查
-        no_txn_event = []
-
-        for ev in events.values():
-            args = ev['args']
-            txn_id = args.get(key_txn_id) if args else None
-            if txn_id is None:
-                no_txn_event.append(ev)
-                continue
-            tx_groups[txn_id].append(ev)
-
-        transactions = []
-        for transaction_id, ev_list in tx_groups.items():
-            requests = [e for e in ev_list if self._classify_event(e) == 'request']
-            responses = [e for e in ev_list if self._classify_event(e) == 'response']
-
-            if not requests and not responses:
-                continue
-
-            req = min(requests, key=lambda e: e['ts']) if requests else None
-            rsp = max(responses, key=lambda e: e['ts']) if responses else None
-
-            transactions.append(
-                {
-                    'transaction_id': transaction_id,
-                    'request_event': req,
-                    'response_event': rsp,
-                }
-            )
-
-        if no_txn_event:
+        txn_values = events.args[key_txn_id]
+        has_txn = ~_is_none(txn_values)
+        no_txn_count = len(txn_values) - int(has_txn.sum())
+        if no_txn_count:
             self.logger.warning(
                 '共 %d 条 binder 事件缺少 transaction id，对应 callstack.id 列表示例（前 50 条）',
-                len(no_txn_event),
+                no_txn_count,
             )
-            self.logger.debug('缺少 transaction id 的事件示例: %s', [e['id'] for e in no_txn_event[:50]])
+            self.logger.debug('缺少 transaction id 的事件示例: %s', events.ids[~has_txn][:50].tolist())
+
+        event_idx = np.flatnonzero(has_txn)
+        txn_codes, txn_ids = pd.factorize(txn_values[event_idx])
+        request = np.full(len(txn_ids), -1, dtype=np.int64)
+        response = np.full(len(txn_ids), -1, dtype=np.int64)
+        for role, slots, ts_sign in (('request', request, 1), ('response', response, -1)):
+            role_idx = np.flatnonzero(events.role[event_idx] == role)
+            if not len(role_idx):
+                continue
+            # 同一事务内按 ts（响应取反）再按事件顺序排序，取每个事务的第一条
+            order = np.lexsort((role_idx, ts_sign * events.ts[event_idx[role_idx]], txn_codes[role_idx]))
+            sorted_codes = txn_codes[role_idx][order]
+            first = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            slots[sorted_codes[first]] = event_idx[role_idx[order[first]]]
 
-        return transactions
+        keep = np.flatnonzero((request >= 0) | (response >= 0))
+        return BinderTransactions(_object_array(list(txn_ids))[keep], request[keep], response[keep])
 
     def _enrich_with_proc_thread_info(
         self,
-        transactions,
+        events: BinderEvents,
+        transactions: BinderTransactions,
         thread_by_id,
         thread_by_tid,
         proc_by_pid,
-        id_to_name=None,
-    ):
+    ) -> BinderPairs:
         """
-        为每条通信补充：
-          - 发起/接收的 tid/pid 以及进程名/线程名；
-          - caller 和 callee 的 args 字典（包含 code 等信息）。
+        为同时有请求和响应的通信补充发起/接收的 tid/pid 以及进程名/线程名，并计算耗时。
+        只有请求、只有响应的通信没有耗时，不参与任何统计。
 
         优先使用 callstack.callid -> thread.id 来获取线程和进程信息（更准确）。
-        如果 callid 不可用，则回退到使用 args 中的 calling tid / destination thread。
+        如果 callid 无法得到进程名，则回退到使用 args 中的 calling tid / destination thread / destination process。
         """
-        enriched = []
-
-        def extract_from_callid(ev, thread_by_id):
-            """
-            通过 callid (对应 thread.id) 获取线程和进程信息。
-            这是最准确的方式。
-            """
-            if ev is None:
-                return {'pid': None, 'tid': None, 'proc_name': None, 'thread_name': None, 'ipid': None}
-
-            callid = ev.get('callid')
-            if callid is not None:
-                thread_info = thread_by_id.get(callid, {})
-                return {
-                    'pid': thread_info.get('proc_pid'),
-                    'tid': thread_info.get('tid'),
-                    'proc_name': thread_info.get('proc_name'),
-                    'thread_name': thread_info.get('name'),
-                    'ipid': thread_info.get('ipid'),
-                }
-            return {'pid': None, 'tid': None, 'proc_name': None, 'thread_name': None, 'ipid': None}
-
-        def extract_from_args(ev, thread_by_tid, proc_by_pid, is_request=True):
-            """
-            从 args 中提取线程/进程信息（备用方案）。
-            """
-            if ev is None:
-                return {'pid': None, 'tid': None, 'proc_name': None, 'thread_name': None}
-
-            args = ev['args'] or {}
-            if is_request:
-                # 请求端：使用 calling tid
-                tid = args.get('calling tid')
-                thread = thread_by_tid.get(tid, {}) if tid is not None else {}
-                pid = thread.get('proc_pid')
-                return {
-                    'pid': pid,
-                    'tid': tid,
-                    'proc_name': thread.get('proc_name'),
-                    'thread_name': thread.get('name'),
-                }
-            # 响应端：优先使用 destination thread，其次 destination process
-            tid = args.get('destination thread')
-            pid = args.get('destination process')
-            thread = thread_by_tid.get(tid, {}) if tid is not None else {}
-            proc = proc_by_pid.get(pid, {}) if pid is not None else {}
+        paired = (transactions.request >= 0) & (transactions.response >= 0)
+        req = transactions.request[paired]
+        rsp = transactions.response[paired]
+
+        def from_callid(event_idx):
+            callid = events.callid[event_idx]
             return {
-                'pid': pid or thread.get('proc_pid'),
-                'tid': tid,
-                'proc_name': proc.get('name') or thread.get('proc_name'),
-                'thread_name': thread.get('name'),
+                field: _map_values(callid, lambda c, key=key: thread_by_id.get(c, {}).get(key))
+                for field, key in (
+                    ('pid', 'proc_pid'),
+                    ('tid', 'tid'),
+                    ('proc_name', 'proc_name'),
+                    ('thread_name', 'name'),
+                )
             }
 
-        for tx in transactions:
-            transaction_id = tx['transaction_id']
-            req = tx['request_event']
-            rsp = tx['response_event']
-
-            # 优先使用 callid 方式获取信息
-            caller = extract_from_callid(req, thread_by_id)
-            callee = extract_from_callid(rsp, thread_by_id)
-
-            # 如果 callid 方式没有获取到完整信息，尝试从 args 补充
-            if caller.get('proc_name') is None and req is not None:
-                caller_fallback = extract_from_args(req, thread_by_tid, proc_by_pid, is_request=True)
-                if caller_fallback.get('proc_name'):
-                    caller.update(caller_fallback)
-
-            if callee.get('proc_name') is None and rsp is not None:
-                callee_fallback = extract_from_args(rsp, thread_by_tid, proc_by_pid, is_request=False)
-                if callee_fallback.get('proc_name'):
-                    callee.update(callee_fallback)
-
-            # 将事件名和参数添加到 caller 和 callee 字典中
-            if req is not None:
-                caller['event'] = req['name']
-                caller['args'] = req.get('args') or {}
-            if rsp is not None:
-                callee['event'] = rsp['name']
-                callee['args'] = rsp.get('args') or {}
-
-            # 计算耗时：ts 为纳秒，这里统一换算为毫秒
-            latency = (rsp['ts'] - req['ts']) / 1000000.0 if req is not None and rsp is not None else None
-
-            enriched.append(
-                {
-                    'transaction_id': transaction_id,
-                    'caller': caller,
-                    'callee': callee,
-                    'request_ts': req['ts'] if req else None,
-                    'response_ts': rsp['ts'] if rsp else None,
-                    'latency': latency,
-                }
-            )
-
-        return enriched
-
-    def _aggregate_stats(self, enriched_txns):
+        def thread_field(tids, key):
+            return _map_values(tids, lambda tid: thread_by_tid.get(tid, {}).get(key) if tid is not None else None)
+
+        def apply_fallback(info, fallback):
+            replace = _is_none(info['proc_name']) & _truthy(fallback['proc_name'])
+            for field, values in fallback.items():
+                info[field] = np.where(replace, values, info[field])
+
+        # 请求端：使用 calling tid
+        caller = from_callid(req)
+        calling_tid = events.args['calling tid'][req]
+        apply_fallback(
+            caller,
+            {
+                'pid': thread_field(calling_tid, 'proc_pid'),
+                'tid': calling_tid,
+                'proc_name': thread_field(calling_tid, 'proc_name'),
+                'thread_name': thread_field(calling_tid, 'name'),
+            },
+        )
+
+        # 响应端：优先使用 destination thread，其次 destination process
+        callee = from_callid(rsp)
+        dest_tid = events.args['destination thread'][rsp]
+        dest_pid = events.args['destination process'][rsp]
+        dest_proc_name = _map_values(
+            dest_pid, lambda pid: proc_by_pid.get(pid, {}).get('name') if pid is not None else None
+        )
+        apply_fallback(
+            callee,
+            {
+                'pid': np.where(_truthy(dest_pid), dest_pid, thread_field(dest_tid, 'proc_pid')),
+                'tid': dest_tid,
+                'proc_name': np.where(_truthy(dest_proc_name), dest_proc_name, thread_field(dest_tid, 'proc_name')),
+                'thread_name': thread_field(dest_tid, 'name'),
+            },
+        )
+
+        # 接口 code 优先从请求端 args 中取，其次响应端
+        caller_has_code = events.has_arg['code'][req]
+        code = np.where(caller_has_code, events.args['code'][req], events.args['code'][rsp])
+
+        # 计算耗时：ts 为纳秒，这里统一换算为毫秒
+        return BinderPairs(
+            caller_proc=_proc_labels(caller['proc_name'], caller['pid']),
+            caller_tid=caller['tid'],
+            caller_thread_name=caller['thread_name'],
+            callee_proc=_proc_labels(callee['proc_name'], callee['pid']),
+            callee_tid=callee['tid'],
+            callee_thread_name=callee['thread_name'],
+            code=code,
+            request_ts=events.ts[req],
+            latency=(events.ts[rsp] - events.ts[req]) / 1000000.0,
+        )
+
+    @staticmethod
+    def _aggregate(pairs: BinderPairs) -> tuple[list, list, list]:
         """
-        按"调用进程 -> 被调进程"做聚合统计：
-          - 通信次数
-          - 平均/最小/最大耗时（毫秒）
-          - 调用频率（QPS：每秒调用次数）
-          - 平均调用间隔（毫秒）
+        一次按"进程对 / 线程对 / 接口"分组统计（耗时单位：毫秒）：
+          - 通信次数、平均/最小/最大耗时
+          - 调用频率（QPS：每秒调用次数）、平均调用间隔
+          - 接口维度额外统计调用方/被调方进程分布（取最常见的）
+        各维度按通信次数降序排列，次数相同时保持首次出现的顺序。
         """
-        stats = defaultdict(list)
-
-        for tx in enriched_txns:
-            caller_proc = tx['caller']['proc_name'] or f'pid={tx["caller"]["pid"]}'
-            callee_proc = tx['callee']['proc_name'] or f'pid={tx["callee"]["pid"]}'
-            key = (caller_proc, callee_proc)
-            if tx['latency'] is not None:
-                stats[key].append(
-                    {
-                        'latency': tx['latency'],
-                        'request_ts': tx.get('request_ts'),
-                    }
-                )
-
-        agg = []
-        for (caller_proc, callee_proc), items in stats.items():
-            latencies = [item['latency'] for item in items]
-            request_times = [item['request_ts'] for item in items if item['request_ts'] is not None]
-
-            # 计算频率：QPS（每秒调用次数）
-            qps = None
-            avg_interval_ms = None
-            if len(request_times) > 1:
-                time_span_ns = max(request_times) - min(request_times)
-                if time_span_ns > 0:
-                    time_span_sec = time_span_ns / 1_000_000_000.0
-                    qps = len(request_times) / time_span_sec
-                    # 平均调用间隔（毫秒）
-                    intervals = []
-                    sorted_times = sorted(request_times)
-                    for i in range(1, len(sorted_times)):
-                        intervals.append((sorted_times[i] - sorted_times[i - 1]) / 1_000_000.0)
-                    if intervals:
-                        avg_interval_ms = mean(intervals)
-
-            agg.append(
-                {
-                    'caller_proc': caller_proc,
-                    'callee_proc': callee_proc,
-                    'count': len(latencies),
-                    'avg_latency': mean(latencies),
-                    'min_latency': min(latencies),
-                    'max_latency': max(latencies),
-                    'qps': qps,
-                    'avg_interval_ms': avg_interval_ms,
-                }
+        process_groups = _group_ids(pairs.caller_proc, pairs.callee_proc)
+        thread_groups = _group_ids(
+            pairs.caller_proc,
+            pairs.caller_tid,
+            pairs.caller_thread_name,
+            pairs.callee_proc,
+            pairs.callee_tid,
+            pairs.callee_thread_name,
+        )
+
+        process_agg = []
+        for first, stats in _latency_stats(process_groups, pairs.latency, pairs.request_ts):
+            process_agg.append(
+                {'caller_proc': pairs.caller_proc[first], 'callee_proc': pairs.callee_proc[first], **stats}
             )
 
-        agg.sort(key=lambda x: x['count'], reverse=True)
-        return agg
-
-    def _aggregate_by_thread(self, enriched_txns):
-        """
-        按"调用线程 -> 被调线程"做聚合统计：
-          - 维度：caller_proc/caller_tid -> callee_proc/callee_tid
-          - 指标：通信次数、平均/最小/最大耗时（毫秒）
-          - 调用频率（QPS：每秒调用次数）
-          - 平均调用间隔（毫秒）
-        """
-        stats = defaultdict(list)
-
-        for tx in enriched_txns:
-            caller_proc = tx['caller']['proc_name'] or f'pid={tx["caller"]["pid"]}'
-            callee_proc = tx['callee']['proc_name'] or f'pid={tx["callee"]["pid"]}'
-            caller_tid = tx['caller']['tid']
-            callee_tid = tx['callee']['tid']
-            caller_thread_name = tx['caller']['thread_name']
-            callee_thread_name = tx['callee']['thread_name']
-            key = (caller_proc, caller_tid, caller_thread_name, callee_proc, callee_tid, callee_thread_name)
-            if tx['latency'] is not None:
-                stats[key].append(
-                    {
-                        'latency': tx['latency'],
-                        'request_ts': tx.get('request_ts'),
-                    }
-                )
-
-        agg = []
-        for (
-            caller_proc,
-            caller_tid,
-            caller_thread_name,
-            callee_proc,
-            callee_tid,
-            callee_thread_name,
-        ), items in stats.items():
-            latencies = [item['latency'] for item in items]
-            request_times = [item['request_ts'] for item in items if item['request_ts'] is not None]
-
-            # 计算频率：QPS（每秒调用次数）
-            qps = None
-            avg_interval_ms = None
-            if len(request_times) > 1:
-                time_span_ns = max(request_times) - min(request_times)
-                if time_span_ns > 0:
-                    time_span_sec = time_span_ns / 1_000_000_000.0
-                    qps = len(request_times) / time_span_sec
-                    # 平均调用间隔（毫秒）
-                    intervals = []
-                    sorted_times = sorted(request_times)
-                    for i in range(1, len(sorted_times)):
-                        intervals.append((sorted_times[i] - sorted_times[i - 1]) / 1_000_000.0)
-                    if intervals:
-                        avg_interval_ms = mean(intervals)
-
-            agg.append(
+        thread_agg = []
+        for first, stats in _latency_stats(thread_groups, pairs.latency, pairs.request_ts):
+            thread_agg.append(
                 {
-                    'caller_proc': caller_proc,
-                    'caller_tid': caller_tid,
-                    'caller_thread_name': caller_thread_name,
-                    'callee_proc': callee_proc,
-                    'callee_tid': callee_tid,
-                    'callee_thread_name': callee_thread_name,
-                    'count': len(latencies),
-                    'avg_latency': mean(latencies),
-                    'min_latency': min(latencies),
-                    'max_latency': max(latencies),
-                    'qps': qps,
-                    'avg_interval_ms': avg_interval_ms,
+                    'caller_proc': pairs.caller_proc[first],
+                    'caller_tid': pairs.caller_tid[first],
+                    'caller_thread_name': pairs.caller_thread_name[first],
+                    'callee_proc': pairs.callee_proc[first],
+                    'callee_tid': pairs.callee_tid[first],
+                    'callee_thread_name': pairs.callee_thread_name[first],
+                    **stats,
                 }
             )
 
-        # 按通信次数排序
-        agg.sort(key=lambda x: x['count'], reverse=True)
-        return agg
-
-    def _aggregate_by_interface(self, enriched_txns):
-        """
-        按接口维度（code）做聚合统计：
-          - 通信次数
-          - 平均/最小/最大耗时（毫秒）
-          - 调用方/被调方进程信息
-          - 调用频率（QPS：每秒调用次数）
-          - 平均调用间隔（毫秒）
-        code 从 caller_args 或 callee_args 中获取
-        """
-        stats = defaultdict(list)
-
-        for tx in enriched_txns:
-            # 优先从 caller.args 中取 code，如果没有则从 callee.args 中取
-            code = None
-            caller_args = tx.get('caller', {}).get('args') or {}
-            callee_args = tx.get('callee', {}).get('args') or {}
-
-            if 'code' in caller_args:
-                code = caller_args['code']
-            elif 'code' in callee_args:
-                code = callee_args['code']
-
-            # 如果 code 为 None，跳过这条记录
-            if code is None:
-                continue
-
-            if tx['latency'] is not None:
-                stats[code].append(
-                    {
-                        'latency': tx['latency'],
-                        'caller_proc': tx['caller']['proc_name'] or f'pid={tx["caller"]["pid"]}',
-                        'callee_proc': tx['callee']['proc_name'] or f'pid={tx["callee"]["pid"]}',
-                        'request_ts': tx.get('request_ts'),
-                    }
-                )
-
-        agg = []
-        for code_key, items in stats.items():
-            latencies = [item['latency'] for item in items]
-            request_times = [item['request_ts'] for item in items if item['request_ts'] is not None]
-
-            # 统计调用方/被调方进程分布（取最常见的）
-            caller_procs = defaultdict(int)
-            callee_procs = defaultdict(int)
-            for item in items:
-                caller_procs[item['caller_proc']] += 1
-                callee_procs[item['callee_proc']] += 1
-
-            top_caller = max(caller_procs.items(), key=lambda x: x[1])[0] if caller_procs else 'unknown'
-            top_callee = max(callee_procs.items(), key=lambda x: x[1])[0] if callee_procs else 'unknown'
-
-            # 计算频率：QPS（每秒调用次数）
-            qps = None
-            avg_interval_ms = None
-            if len(request_times) > 1:
-                time_span_ns = max(request_times) - min(request_times)
-                if time_span_ns > 0:
-                    time_span_sec = time_span_ns / 1_000_000_000.0
-                    qps = len(request_times) / time_span_sec
-                    # 平均调用间隔（毫秒）
-                    intervals = []
-                    sorted_times = sorted(request_times)
-                    for i in range(1, len(sorted_times)):
-                        intervals.append((sorted_times[i] - sorted_times[i - 1]) / 1_000_000.0)
-                    if intervals:
-                        avg_interval_ms = mean(intervals)
-
-            # code 可能是整数（已解析的十六进制）或字符串
-            code_repr = f'0x{code_key:x}' if isinstance(code_key, int) else str(code_key)
-
-            agg.append(
+        # 没有 code 的通信不参与接口统计
+        with_code = np.flatnonzero(~_is_none(pairs.code))
+        codes = pairs.code[with_code]
+        interface_groups = _group_ids(codes)
+        top_callers, caller_variety = _top_values(interface_groups, pairs.caller_proc[with_code])
+        top_callees, callee_variety = _top_values(interface_groups, pairs.callee_proc[with_code])
+        interface_agg = []
+        for first, stats in _latency_stats(interface_groups, pairs.latency[with_code], pairs.request_ts[with_code]):
+            group = interface_groups[first]
+            code = codes[first]
+            interface_agg.append(
                 {
-                    'code': code_repr,
-                    'count': len(latencies),
-                    'avg_latency': mean(latencies),
-                    'min_latency': min(latencies),
-                    'max_latency': max(latencies),
-                    'qps': qps,
-                    'avg_interval_ms': avg_interval_ms,
-                    'top_caller_proc': top_caller,
-                    'top_callee_proc': top_callee,
-                    'caller_proc_variety': len(caller_procs),
-                    'callee_proc_variety': len(callee_procs),
+                    # code 可能是整数（已解析的十六进制）或字符串
+                    'code': f'0x{code:x}' if isinstance(code, int) else str(code),
+                    **stats,
+                    'top_caller_proc': top_callers[group],
+                    'top_callee_proc': top_callees[group],
+                    'caller_proc_variety': caller_variety[group],
+                    'callee_proc_variety': callee_variety[group],
                 }
             )
 
-        agg.sort(key=lambda x: x['count'], reverse=True)
-        return agg
+        for agg in (process_agg, thread_agg, interface_agg):
+            agg.sort(key=lambda x: x['count'], reverse=True)
+        return process_agg, thread_agg, interface_agg
@@ -0,0 +1,290 @@
+"""
+callgraph_store.py
+
+*.callgraph.json 的编译产物：CallgraphTraverser 首次使用时把所有 callgraph.json 编译为二进制调用图，
+写入源码目录下的 .callgraph_store/，之后按 callgraph.json 的文件名/大小/mtime 指纹校验并以 mmap 方式加载，
+不再逐个 json 解析。
+
+存储内容：
+  - names.json：驻留后的函数名表（id 即下标）
+  - keys.npy：可被查询命中的函数名 id（即原 _funcs 的 key，保持首次出现顺序）
+  - caller_indptr.npy / caller_indices.npy：反向边的 CSR 数组（callee id → caller id 列表，保持首次出现顺序）
+  - gram_names.json / gram_indptr.npy / gram_indices.npy：规范化名称（小写、去掉 . 和 _）的 3-gram → key 下标
+  - meta.json：版本与指纹
+
+匹配语义与原先逐个扫描 _funcs 完全一致：精确匹配通过名称 / 末段名称哈希查找，
+包含匹配先用 3-gram 求交得到候选，再逐个校验子串。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+STORE_DIRNAME = '.callgraph_store'
+STORE_VERSION = 1
+NGRAM_SIZE = 3
+# 包含匹配要求规范化查询词的最小长度
+MIN_PARTIAL_LENGTH = 6
+# 单次查询最多返回的匹配函数数
+MAX_MATCHES = 8
+
+_ARRAY_NAMES = ('keys', 'caller_indptr', 'caller_indices', 'gram_indptr', 'gram_indices')
+
+
+def normalize_name(name: str) -> str:
+    return name.lower().replace('.', '').replace('_', '')
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def _to_csr(rows: list[list[int]]) -> tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.fromiter((value for row in rows for value in row), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def callgraph_fingerprint(paths: list[Path]) -> str:
+    """callgraph.json 文件名、大小、mtime 的指纹，任一文件变化即失效"""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = path.stat()
+        digest.update(f'{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+    return digest.hexdigest()
+
+
+class _GraphBuilder:
+    """逐个读取 callgraph.json，驻留函数名并记录 key 与反向边（均保持首次出现顺序）"""
+
+    def __init__(self):
+        self.name_ids: dict[str, int] = {}
+        self.keys: dict[int, None] = {}
+        self.callers: dict[int, dict[int, None]] = {}
+
+    def intern(self, name: str) -> int:
+        return self.name_ids.setdefault(name, len(self.name_ids))
+
+    def add_caller(self, callee: str, caller: str) -> None:
+        self.callers.setdefault(self.intern(callee), {})[self.intern(caller)] = None
+
+    def load_file(self, path: Path) -> None:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            data = json.load(fh)
+
+        funcs: list[dict[str, Any]] = data.get('functions') or []
+        for fn in funcs:
+            name = fn.get('name') or ''
+            full_name = fn.get('full_name') or name
+            if not name:
+                continue
+            # 同时用 name 和 full_name 作为 key
+            self.keys[self.intern(name)] = None
+            if full_name != name:
+                self.keys[self.intern(full_name)] = None
+
+            # 如果 callers 字段已填充，直接建反向索引
+            for caller in fn.get('callers') or []:
+                self.add_caller(name, caller)
+                if full_name != name:
+                    self.add_caller(full_name, caller)
+
+        # 如果 callers 字段为空，从 call_sites 构建反向索引
+        needs_invert = all(not (fn.get('callers')) for fn in funcs[:20] if fn.get('call_sites'))
+        if needs_invert:
+            for fn in funcs:
+                caller_name = fn.get('name') or ''
+                for site in fn.get('call_sites') or []:
+                    callee = site.get('callee') or ''
+                    if callee:
+                        self.add_caller(callee, caller_name)
+
+    def compile(self) -> CallgraphStore:
+        names = list(self.name_ids)
+        keys = np.fromiter(self.keys, dtype=np.int32, count=len(self.keys))
+        caller_indptr, caller_indices = _to_csr([list(self.callers.get(i, ())) for i in range(len(names))])
+
+        grams: dict[str, list[int]] = {}
+        for pos, name_id in enumerate(self.keys):
+            for gram in _ngrams(normalize_name(names[name_id])):
+                grams.setdefault(gram, []).append(pos)
+        gram_names = list(grams)
+        gram_indptr, gram_indices = _to_csr([grams[gram] for gram in gram_names])
+
+        return CallgraphStore(
+            names,
+            gram_names,
+            {
+                'keys': keys,
+                'caller_indptr': caller_indptr,
+                'caller_indices': caller_indices,
+                'gram_indptr': gram_indptr,
+                'gram_indices': gram_indices,
+            },
+        )
+
+
+class CallgraphStore:
+    """编译后的调用图：驻留名称 + CSR 反向边 + 名称哈希 / 3-gram 索引"""
+
+    def __init__(self, names: list[str], gram_names: list[str], arrays: dict[str, np.ndarray]):
+        self.names = names
+        self.name_ids = {name: i for i, name in enumerate(names)}
+        self.keys = arrays['keys']
+        self.caller_indptr = arrays['caller_indptr']
+        self.caller_indices = arrays['caller_indices']
+        self.gram_indptr = arrays['gram_indptr']
+        self.gram_indices = arrays['gram_indices']
+        self.gram_ids = {gram: i for i, gram in enumerate(gram_names)}
+        self._gram_names = gram_names
+
+        # 精确匹配：key 全名 → key 下标；key 末段（rsplit('.')）→ key 下标列表
+        self.key_pos: dict[str, int] = {}
+        self.last_segment_pos: dict[str, list[int]] = {}
+        for pos, name_id in enumerate(self.keys.tolist()):
+            name = names[name_id]
+            self.key_pos[name] = pos
+            self.last_segment_pos.setdefault(name.rsplit('.', 1)[-1], []).append(pos)
+
+    # ── 构建与持久化 ────────────────────────────────────────────────────
+
+    @classmethod
+    def open(cls, source_root: Path) -> CallgraphStore:
+        """加载 source_root 下与 callgraph.json 一致的编译产物，不存在或已过期时重新编译并尝试写入"""
+        paths = sorted(source_root.glob('*.callgraph.json'))
+        fingerprint = callgraph_fingerprint(paths)
+        store_dir = source_root / STORE_DIRNAME
+        store = cls.load(store_dir, fingerprint)
+        if store is not None:
+            return store
+
+        builder = _GraphBuilder()
+        for path in paths:
+            with contextlib.suppress(Exception):
+                builder.load_file(path)
+        store = builder.compile()
+        if paths:
+            try:
+                store.save(store_dir, fingerprint)
+            except OSError as e:
+                logging.debug('写入调用图编译产物失败 (%s): %s', store_dir, e)
+        return store
+
+    def save(self, store_dir: Path, fingerprint: str) -> None:
+        """先写入临时目录再整体替换，避免并发读取到不完整的产物"""
+        tmp_dir = store_dir.with_name(f'{store_dir.name}.tmp{os.getpid()}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        try:
+            (tmp_dir / 'names.json').write_text(json.dumps(self.names, ensure_ascii=False), encoding='utf-8')
+            (tmp_dir / 'gram_names.json').write_text(json.dumps(self._gram_names, ensure_ascii=False), encoding='utf-8')
+            for array_name in _ARRAY_NAMES:
+                np.save(tmp_dir / f'{array_name}.npy', getattr(self, array_name))
+            meta = {
+                'version': STORE_VERSION,
+                'fingerprint': fingerprint,
+                'name_count': len(self.names),
+                'edge_count': len(self.caller_indices),
+            }
+            (tmp_dir / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+            shutil.rmtree(store_dir, ignore_errors=True)
+            tmp_dir.rename(store_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, store_dir: Path, fingerprint: str) -> CallgraphStore | None:
+        """以 mmap 方式加载编译产物；不存在、版本或指纹不符时返回 None"""
+        meta_path = store_dir / 'meta.json'
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if meta.get('version') != STORE_VERSION or meta.get('fingerprint') != fingerprint:
+                logging.info('调用图编译产物已过期，将重新编译: %s', store_dir)
+                return None
+            names = json.loads((store_dir / 'names.json').read_text(encoding='utf-8'))
+            gram_names = json.loads((store_dir / 'gram_names.json').read_text(encoding='utf-8'))
+            arrays = {name: np.load(store_dir / f'{name}.npy', mmap_mode='r') for name in _ARRAY_NAMES}
+        except (OSError, ValueError) as e:
+            logging.warning('读取调用图编译产物失败 (%s): %s', store_dir, e)
+            return None
+        return cls(names, gram_names, arrays)
+
+    # ── 查询 ────────────────────────────────────────────────────────────
+
+    def callers_of(self, name: str) -> list[str]:
+        """name 的直接调用者（首次出现顺序）"""
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            return []
+        start, end = self.caller_indptr[name_id], self.caller_indptr[name_id + 1]
+        return [self.names[i] for i in self.caller_indices[start:end].tolist()]
+
+    def key_name(self, pos: int) -> str:
+        return self.names[int(self.keys[pos])]
+
+    def exact_positions(self, query: str) -> set[int]:
+        """query 等于 key 或 key 的末段时命中"""
+        positions = set(self.last_segment_pos.get(query, ()))
+        pos = self.key_pos.get(query)
+        if pos is not None:
+            positions.add(pos)
+        return positions
+
+    def partial_positions(self, query: str) -> set[int]:
+        """规范化后的 query 是规范化 key 的子串（且长度不少于 MIN_PARTIAL_LENGTH）时命中"""
+        normalized = normalize_name(query)
+        if len(normalized) < MIN_PARTIAL_LENGTH:
+            return set()
+        postings = []
+        for gram in _ngrams(normalized):
+            gram_id = self.gram_ids.get(gram)
+            if gram_id is None:
+                return set()
+            postings.append(self.gram_indices[self.gram_indptr[gram_id] : self.gram_indptr[gram_id + 1]])
+        postings.sort(key=len)
+        candidates = set(postings[0].tolist())
+        for posting in postings[1:]:
+            candidates.intersection_update(posting.tolist())
+            if not candidates:
+                return set()
+        return {pos for pos in candidates if normalized in normalize_name(self.key_name(pos))}
+
+    def find_matching(self, symbol_name: str) -> list[str]:
+        """
+        查找与 symbol_name 匹配的函数名（支持部分名匹配）。
+        优先精确匹配，其次包含匹配，各自按 key 的首次出现顺序，最多 MAX_MATCHES 个。
+        """
+        if not symbol_name:
+            return []
+        # 清洗：把 "OwnerName.symbolName" 拆成多个查询词
+        queries = [symbol_name]
+        if '.' in symbol_name:
+            parts = symbol_name.split('.')
+            queries.extend([parts[-1], '_'.join(p for p in parts if p)])
+        queries = [q for q in queries if q]
+
+        matches = [(self.exact_positions(q), self.partial_positions(q)) for q in queries]
+        exact: list[int] = []
+        partial: list[int] = []
+        # 每个 key 由第一个命中它的查询词决定是精确还是包含匹配
+        for pos in sorted(set().union(*(e | p for e, p in matches))):
+            for exact_hits, partial_hits in matches:
+                if pos in exact_hits:
+                    exact.append(pos)
+                    break
+                if pos in partial_hits:
+                    partial.append(pos)
+                    break
+        return [self.key_name(pos) for pos in (exact + partial)[:MAX_MATCHES]]
@@ -20,16 +20,17 @@ callgraph.json 结构（由 hap_decompiler 生成）:
 }
 
 如果 callers 字段为空（部分版本未填充），则从 call_sites 自动构建反向索引。
+首次使用时编译为二进制调用图（见 callgraph_store.py），之后直接 mmap 加载。
 """
 
 from __future__ import annotations
 
-import contextlib
-import json
 import re
 from pathlib import Path
 from typing import Any
 
+from .callgraph_store import CallgraphStore
+
 # 生命周期入口函数名（正则）
 _LIFECYCLE_PATTERN = re.compile(
     r'(aboutToAppear|aboutToDisappear|onPageShow|onPageHide|'
@@ -81,11 +82,8 @@ class CallgraphTraverser:
 
     def __init__(self, source_root: str | Path):
         self.root = Path(source_root)
-        # name -> function record
-        self._funcs: dict[str, dict[str, Any]] = {}
-        # callee_name -> set of caller names（反向索引）
-        self._callers_of: dict[str, set[str]] = {}
-        self._loaded = False
+        # 编译后的调用图（函数名表 + 反向边 + 名称索引）
+        self._store: CallgraphStore | None = None
 
     # ── 公开接口 ────────────────────────────────────────────────────────
 
@@ -94,8 +92,7 @@ class CallgraphTraverser:
         从 symbol_name 向上追溯调用链，直到生命周期入口或无更多调用者。
         返回最多 max_chains 条链，优先返回以生命周期入口开头的链。
         """
-        self._ensure_loaded()
-        candidates = self._find_matching_functions(symbol_name)
+        candidates = self._ensure_loaded().find_matching(symbol_name)
         if not candidates:
             return []
 
@@ -112,8 +109,8 @@ class CallgraphTraverser:
         """
         返回直接或间接调用 symbol_name 的函数列表（最多 depth 层）。
         """
-        self._ensure_loaded()
-        candidates = self._find_matching_functions(symbol_name)
+        store = self._ensure_loaded()
+        candidates = store.find_matching(symbol_name)
         result: list[str] = []
         visited: set[str] = set(candidates)
 
@@ -121,7 +118,7 @@ class CallgraphTraverser:
         for _ in range(depth):
             next_level: list[str] = []
             for name in current_level:
-                for caller in self._callers_of.get(name, set()):
+                for caller in store.callers_of(name):
                     if caller not in visited:
                         visited.add(caller)
                         next_level.append(caller)
@@ -164,83 +161,12 @@ class CallgraphTraverser:
 
     # ── 加载与构建 ────────────────────────────────────────────────────
 
-    def _ensure_loaded(self) -> None:
-        if self._loaded:
-            return
-        for cg_path in self.root.glob('*.callgraph.json'):
-            with contextlib.suppress(Exception):
-                self._load_file(cg_path)
-        self._loaded = True
-
-    def _load_file(self, path: Path) -> None:
-        with open(path, encoding='utf-8', errors='replace') as fh:
-            data = json.load(fh)
-
-        funcs: list[dict[str, Any]] = data.get('functions') or []
-        for fn in funcs:
-            name = fn.get('name') or ''
-            full_name = fn.get('full_name') or name
-            if not name:
-                continue
-            # 同时用 name 和 full_name 作为 key
-            self._funcs[name] = fn
-            if full_name != name:
-                self._funcs[full_name] = fn
-
-            # 如果 callers 字段已填充，直接建反向索引
-            for caller in fn.get('callers') or []:
-                self._callers_of.setdefault(name, set()).add(caller)
-                if full_name != name:
-                    self._callers_of.setdefault(full_name, set()).add(caller)
-
-        # 如果 callers 字段为空，从 call_sites 构建反向索引
-        needs_invert = all(not (fn.get('callers')) for fn in funcs[:20] if fn.get('call_sites'))
-        if needs_invert:
-            for fn in funcs:
-                caller_name = fn.get('name') or ''
-                for site in fn.get('call_sites') or []:
-                    callee = site.get('callee') or ''
-                    if callee:
-                        self._callers_of.setdefault(callee, set()).add(caller_name)
-
-    # ── 搜索与遍历 ───────────────────────────────────────────────────
-
-    def _find_matching_functions(self, symbol_name: str) -> list[str]:
-        """
-        在函数名字典中查找与 symbol_name 匹配的函数（支持部分名匹配）。
-        优先精确匹配，其次包含匹配。
-        """
-        if not symbol_name:
-            return []
-        # 清洗：把 "OwnerName.symbolName" 拆成多个查询词
-        queries = [symbol_name]
-        if '.' in symbol_name:
-            parts = symbol_name.split('.')
-            queries.extend([parts[-1], '_'.join(p for p in parts if p)])
-
-        exact: list[str] = []
-        partial: list[str] = []
-
-        for key in self._funcs:
-            for q in queries:
-                if not q:
-                    continue
-                if q == key or q == key.rsplit('.', 1)[-1]:
-                    exact.append(key)
-                    break
-                q_lower = q.lower().replace('.', '').replace('_', '')
-                key_lower = key.lower().replace('.', '').replace('_', '')
-                if q_lower in key_lower and len(q_lower) >= 6:
-                    partial.append(key)
-                    break
-
-        seen: set[str] = set()
-        result: list[str] = []
-        for name in exact + partial:
-            if name not in seen:
-                seen.add(name)
-                result.append(name)
-        return result[:8]
+    def _ensure_loaded(self) -> CallgraphStore:
+        if self._store is None:
+            self._store = CallgraphStore.open(self.root)
+        return self._store
+
+    # ── 遍历 ─────────────────────────────────────────────────────────
 
     def _bfs_upward(self, start: str, max_chains: int) -> list[CallChain]:
         """
@@ -262,7 +188,7 @@ class CallgraphTraverser:
                 found.append(CallChain(chain, self._is_lifecycle(chain[0])))
                 continue
 
-            callers = self._callers_of.get(current, set())
+            callers = self._store.callers_of(current)
             if not callers:
                 # 无更多调用者：这是一个根节点
                 chain = list(reversed(path))
@@ -270,7 +196,7 @@ class CallgraphTraverser:
                 found.append(CallChain(chain, is_lc))
                 continue
 
-            for caller in list(callers)[:4]:  # 限制扇出，避免爆炸
+            for caller in callers[:4]:  # 限制扇出，避免爆炸
                 if caller in path:  # 避免环
                     continue
                 path_key = frozenset(path + [caller])
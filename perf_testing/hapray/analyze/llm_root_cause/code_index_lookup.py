@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import heapq
 import json
 import re
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Any
 
 from .proc_source_match import source_path_aligned
+from .symbol_search_index import SEARCH_INDEX_FILENAME, SymbolSearchIndex
 
 _CAMEL_TOKEN_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z]|\d|$)|[A-Z]?[a-z]+|\d+')
 _LIST_UI_KEYS = {'waterflow', 'lazyforeach', 'list', 'scroll', 'foreach'}
@@ -53,6 +56,20 @@ class CodeIndexLookup:
         self.index_dir = Path(index_dir)
         self.symbols = self._load_jsonl(self.index_dir / 'symbol_index.jsonl')
         self.ui_records = self._load_jsonl(self.index_dir / 'ui_index.jsonl')
+        # 以下结构在首次查询时构建
+        self._search_index: SymbolSearchIndex | None = None
+        self._static_ranking: list[tuple[tuple, int, int]] | None = None
+        self._ui_hits_by_symbol: dict[str, list[dict[str, Any]]] | None = None
+
+    @property
+    def search_index(self) -> SymbolSearchIndex:
+        """symbol 倒排索引：优先加载 index_builder 生成的 symbol_search_index.json，否则在内存中构建"""
+        if self._search_index is None:
+            symbol_index_path = self.index_dir / 'symbol_index.jsonl'
+            self._search_index = SymbolSearchIndex.load(
+                self.index_dir / SEARCH_INDEX_FILENAME, len(self.symbols), symbol_index_path.stat().st_size
+            ) or SymbolSearchIndex.build(self.symbols)
+        return self._search_index
 
     @staticmethod
     def _load_jsonl(path: Path) -> list[dict[str, Any]]:
@@ -143,7 +160,7 @@ class CodeIndexLookup:
         resolved = []
         for hypothesis in hypotheses:
             query = hypothesis.get('code_query', {})
-            candidates = self._match_candidates(query)
+            candidates = self._match_candidates(query, limit=limit)
             resolved.append(
                 {
                     **hypothesis,
@@ -198,9 +215,8 @@ class CodeIndexLookup:
         for name in ordered_names:
             owner_norm = self._norm(name)
             scored: list[dict[str, Any]] = []
-            for row in self.symbols:
-                if self._norm(row.get('owner_name')) != owner_norm:
-                    continue
+            for row_idx in self.search_index.rows_equal('owner_name', owner_norm):
+                row = self.symbols[row_idx]
                 symbol = self._norm(row.get('symbol_name'))
                 score = 0
                 reasons: list[str] = []
@@ -316,21 +332,25 @@ class CodeIndexLookup:
             'web_bias': any(token in topic_tokens for token in ('web', 'hybrid', 'h5')),
         }
 
-    def _match_candidates(self, query: dict[str, Any]) -> list[dict[str, Any]]:
+    def _match_candidates(self, query: dict[str, Any], limit: int | None = None) -> list[dict[str, Any]]:
+        """按查询关键字打分并返回去重、多样化后的候选
+
+        limit 给定时只消费凑够 limit 个候选所需的打分结果（返回列表的前 limit 项与不限制时一致）。
+        """
         owner_keywords = [self._norm(item) for item in query.get('owner_keywords', []) if item]
         module_keywords = [self._norm(item) for item in query.get('module_keywords', []) if item]
         ui_keywords = [self._norm(item) for item in query.get('ui_keywords', []) if item]
         symbol_keywords = [self._norm(item) for item in query.get('symbol_keywords', []) if item]
 
-        symbol_rows = self._score_symbols(owner_keywords, module_keywords, ui_keywords, symbol_keywords)
-        ui_by_symbol = self._collect_ui_hits(symbol_rows)
+        symbol_rows = self._iter_scored_symbols(owner_keywords, module_keywords, ui_keywords, symbol_keywords)
+        return self._dedupe_sorted_candidates(self._iter_symbol_candidates(symbol_rows), limit)
 
-        candidates = []
+    def _iter_symbol_candidates(self, symbol_rows: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
         for row in symbol_rows:
             symbol_id = row['id']
             score = row['_score']
             reasons = list(row['_reasons'])
-            ui_hits = ui_by_symbol.get(symbol_id, [])
+            ui_hits = self._ui_hits_for(symbol_id)
             ui_names = [item['ui_api'] for item in ui_hits]
             if ui_names:
                 reasons.append(f'UI命中: {", ".join(ui_names[:4])}')
@@ -351,25 +371,21 @@ class CodeIndexLookup:
             if symbol_name.lower().endswith(('abouttoappear', 'onpageshow', 'initialrender', 'build')):
                 cause_tags.append('lifecycle_entry')
 
-            candidates.append(
-                {
-                    'file': row.get('file'),
-                    'line_start': row.get('line_start'),
-                    'line_end': row.get('line_end'),
-                    'owner_name': owner_name,
-                    'owner_type': owner_type,
-                    'symbol_name': symbol_name,
-                    'module_path': module_path,
-                    'module_path_short': self._short_module_path(module_path),
-                    'ui_keywords': row.get('ui_keywords', []),
-                    'matched_ui_hits': ui_hits,
-                    'score': score,
-                    'reasons': self._dedupe_texts(reasons),
-                    'cause_tags': cause_tags,
-                }
-            )
-
-        return self._dedupe_candidates(candidates)
+            yield {
+                'file': row.get('file'),
+                'line_start': row.get('line_start'),
+                'line_end': row.get('line_end'),
+                'owner_name': owner_name,
+                'owner_type': owner_type,
+                'symbol_name': symbol_name,
+                'module_path': module_path,
+                'module_path_short': self._short_module_path(module_path),
+                'ui_keywords': row.get('ui_keywords', []),
+                'matched_ui_hits': ui_hits,
+                'score': score,
+                'reasons': self._dedupe_texts(reasons),
+                'cause_tags': cause_tags,
+            }
 
     def _match_proc_source_candidates(self, hint: dict[str, Any]) -> list[dict[str, Any]]:
         query = self._build_proc_source_query(hint)
@@ -501,112 +517,191 @@ class CodeIndexLookup:
         ui_keywords: list[str],
         symbol_keywords: list[str],
     ) -> list[dict[str, Any]]:
-        scored = []
-        for row in self.symbols:
-            owner_name = self._norm(row.get('owner_name'))
-            module_path = self._norm(row.get('module_path'))
-            symbol_name = self._norm(row.get('symbol_name'))
-            owner_type = self._norm(row.get('owner_type'))
-            ui_names = [self._norm(item) for item in row.get('ui_keywords', [])]
-            line_span = max(1, int((row.get('line_end') or 0) - (row.get('line_start') or 0) + 1))
-
-            score = 0
-            reasons: list[str] = []
-
-            for keyword in owner_keywords:
-                if keyword and keyword == owner_name:
-                    score += 8
-                    reasons.append(f'owner精确匹配 {row.get("owner_name")}')
-                elif keyword and keyword in owner_name:
-                    score += 6
-                    reasons.append(f'owner包含 {keyword}')
+        return list(self._iter_scored_symbols(owner_keywords, module_keywords, ui_keywords, symbol_keywords))
 
-            for keyword in module_keywords:
-                if keyword and keyword in module_path:
-                    score += 4
-                    reasons.append(f'module包含 {keyword}')
-
-            for keyword in symbol_keywords:
-                if keyword and keyword in symbol_name:
-                    score += 3
-                    reasons.append(f'symbol包含 {keyword}')
+    def _iter_scored_symbols(
+        self,
+        owner_keywords: list[str],
+        module_keywords: list[str],
+        ui_keywords: list[str],
+        symbol_keywords: list[str],
+    ) -> Iterator[dict[str, Any]]:
+        """按 (-score, file, line_start) 顺序惰性产出得分为正的 symbol 行
+
+        得分 = 关键字命中分 + 与查询无关的静态分（owner_type、生命周期、UI 数量、跨度、泛化惩罚）。
+        只有倒排索引中命中任一关键字的行需要按查询打分，其余行的得分就是静态分，
+        直接按预先排好序的静态排名与命中行归并，结果与逐行扫描全部 symbol 完全一致。
+        """
+        index = self.search_index
+        matched: set[int] = set()
+        for keyword in owner_keywords:
+            matched |= index.rows_containing('owner_name', keyword)
+        for keyword in module_keywords:
+            matched |= index.rows_containing('module_path', keyword)
+        for keyword in symbol_keywords:
+            matched |= index.rows_containing('symbol_name', keyword)
+        for keyword in ui_keywords:
+            matched.update(index.rows_with_ui(keyword))
+
+        matched_rows = []
+        for row_idx in matched:
+            row = self.symbols[row_idx]
+            score, reasons = self._score_symbol_row(row, owner_keywords, module_keywords, ui_keywords, symbol_keywords)
+            if score > 0:
+                matched_rows.append((self._symbol_rank_key(row, row_idx, score), row_idx, score, reasons))
+        matched_rows.sort()
+
+        static_rows = (
+            (rank_key, row_idx, score, None)
+            for rank_key, row_idx, score in self._get_static_ranking()
+            if row_idx not in matched
+        )
+        for _, row_idx, score, matched_reasons in heapq.merge(matched_rows, static_rows, key=lambda item: item[0]):
+            row = self.symbols[row_idx]
+            reasons = matched_reasons
+            if reasons is None:
+                _, reasons = self._score_symbol_row(row, [], [], [], [])
+            enriched = dict(row)
+            enriched['_score'] = score
+            enriched['_reasons'] = reasons
+            yield enriched
 
-            for keyword in ui_keywords:
-                if keyword and keyword in ui_names:
-                    score += 4
-                    reasons.append(f'UI关键字命中 {keyword}')
+    @staticmethod
+    def _symbol_rank_key(row: dict[str, Any], row_idx: int, score: int) -> tuple:
+        return -score, row.get('file', ''), row.get('line_start', 0), row_idx
+
+    def _get_static_ranking(self) -> list[tuple[tuple, int, int]]:
+        """静态分为正的行按排序键排好序（每个实例只计算一次）"""
+        if self._static_ranking is None:
+            ranking = []
+            for row_idx, row in enumerate(self.symbols):
+                score, _ = self._score_symbol_row(row, [], [], [], [])
+                if score > 0:
+                    ranking.append((self._symbol_rank_key(row, row_idx, score), row_idx, score))
+            ranking.sort()
+            self._static_ranking = ranking
+        return self._static_ranking
+
+    def _score_symbol_row(
+        self,
+        row: dict[str, Any],
+        owner_keywords: list[str],
+        module_keywords: list[str],
+        ui_keywords: list[str],
+        symbol_keywords: list[str],
+    ) -> tuple[int, list[str]]:
+        owner_name = self._norm(row.get('owner_name'))
+        module_path = self._norm(row.get('module_path'))
+        symbol_name = self._norm(row.get('symbol_name'))
+        owner_type = self._norm(row.get('owner_type'))
+        ui_names = [self._norm(item) for item in row.get('ui_keywords', [])]
+        line_span = max(1, int((row.get('line_end') or 0) - (row.get('line_start') or 0) + 1))
+
+        score = 0
+        reasons: list[str] = []
+
+        for keyword in owner_keywords:
+            if keyword and keyword == owner_name:
+                score += 8
+                reasons.append(f'owner精确匹配 {row.get("owner_name")}')
+            elif keyword and keyword in owner_name:
+                score += 6
+                reasons.append(f'owner包含 {keyword}')
 
-            if owner_type in {'component', 'view'}:
+        for keyword in module_keywords:
+            if keyword and keyword in module_path:
                 score += 4
-                reasons.append(f'owner_type={owner_type}')
-            elif owner_type == 'page':
-                score += 2
-                reasons.append('owner_type=page')
+                reasons.append(f'module包含 {keyword}')
 
-            if symbol_name.endswith(('initialrender', 'abouttoappear', 'onpageshow', 'build')):
+        for keyword in symbol_keywords:
+            if keyword and keyword in symbol_name:
                 score += 3
-                reasons.append('生命周期/渲染入口')
+                reasons.append(f'symbol包含 {keyword}')
 
-            if ui_names:
-                score += min(len(ui_names), 3)
+        for keyword in ui_keywords:
+            if keyword and keyword in ui_names:
+                score += 4
+                reasons.append(f'UI关键字命中 {keyword}')
 
-            if line_span > 5000:
-                score -= 8
-                reasons.append('跨度过大')
-            elif line_span > 500:
-                score -= 4
-                reasons.append('跨度较大')
+        if owner_type in {'component', 'view'}:
+            score += 4
+            reasons.append(f'owner_type={owner_type}')
+        elif owner_type == 'page':
+            score += 2
+            reasons.append('owner_type=page')
 
-            if symbol_name in _GENERIC_SYMBOLS:
-                score -= 5
-                reasons.append('符号过于泛化')
+        if symbol_name.endswith(('initialrender', 'abouttoappear', 'onpageshow', 'build')):
+            score += 3
+            reasons.append('生命周期/渲染入口')
 
-            if score <= 0:
-                continue
+        if ui_names:
+            score += min(len(ui_names), 3)
 
-            enriched = dict(row)
-            enriched['_score'] = score
-            enriched['_reasons'] = reasons
-            scored.append(enriched)
+        if line_span > 5000:
+            score -= 8
+            reasons.append('跨度过大')
+        elif line_span > 500:
+            score -= 4
+            reasons.append('跨度较大')
+
+        if symbol_name in _GENERIC_SYMBOLS:
+            score -= 5
+            reasons.append('符号过于泛化')
 
-        return sorted(scored, key=lambda x: (-x['_score'], x.get('file', ''), x.get('line_start', 0)))
+        return score, reasons
 
     def _collect_ui_hits(self, symbol_rows: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
         by_symbol: dict[str, list[dict[str, Any]]] = {}
-        wanted = {row['id'] for row in symbol_rows}
-        for item in self.ui_records:
-            symbol_id = item.get('symbol_id')
-            if symbol_id not in wanted:
-                continue
-            by_symbol.setdefault(symbol_id, []).append(
-                {
-                    'ui_api': item.get('ui_api'),
-                    'count': item.get('count'),
-                    'first_line': item.get('first_line'),
-                    'category': item.get('category'),
-                }
-            )
+        for row in symbol_rows:
+            ui_hits = self._ui_hits_for(row['id'])
+            if ui_hits:
+                by_symbol[row['id']] = ui_hits
         return by_symbol
 
+    def _ui_hits_for(self, symbol_id: str) -> list[dict[str, Any]]:
+        if self._ui_hits_by_symbol is None:
+            by_symbol: dict[str, list[dict[str, Any]]] = {}
+            for item in self.ui_records:
+                by_symbol.setdefault(item.get('symbol_id'), []).append(
+                    {
+                        'ui_api': item.get('ui_api'),
+                        'count': item.get('count'),
+                        'first_line': item.get('first_line'),
+                        'category': item.get('category'),
+                    }
+                )
+            self._ui_hits_by_symbol = by_symbol
+        return [dict(item) for item in self._ui_hits_by_symbol.get(symbol_id, [])]
+
     def _dedupe_candidates(self, candidates: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        exact_unique = []
-        seen = set()
-        for item in sorted(candidates, key=lambda x: (-x['score'], x.get('file') or '', x.get('line_start') or 0)):
-            key = (item.get('file'), item.get('line_start'), item.get('owner_name'), item.get('symbol_name'))
-            if key in seen:
-                continue
-            seen.add(key)
-            exact_unique.append(item)
+        return self._dedupe_sorted_candidates(
+            sorted(candidates, key=lambda x: (-x['score'], x.get('file') or '', x.get('line_start') or 0))
+        )
+
+    @staticmethod
+    def _dedupe_sorted_candidates(
+        candidates: Iterable[dict[str, Any]], limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """对已排序的候选去重并按归属多样化：每个归属先取 1 个，不足时再补第 2 个
 
+        limit 给定时，凑够 limit 个不同归属的候选即停止消费（此时前 limit 项已确定）。
+        """
+        seen = set()
         diversified = []
         deferred = []
         owner_counts: dict[str, int] = {}
 
-        for item in exact_unique:
+        for item in candidates:
+            key = (item.get('file'), item.get('line_start'), item.get('owner_name'), item.get('symbol_name'))
+            if key in seen:
+                continue
+            seen.add(key)
             owner_key = item.get('module_path') or item.get('owner_name') or item.get('file')
             if owner_counts.get(owner_key, 0) == 0:
                 diversified.append(item)
                 owner_counts[owner_key] = 1
+                if limit is not None and len(diversified) >= limit:
+                    return diversified
             else:
                 deferred.append(item)
 
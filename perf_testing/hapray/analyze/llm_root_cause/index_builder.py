@@ -5,24 +5,34 @@
 输出：
   - symbol_index.jsonl  每个函数/方法一个索引项
   - ui_index.jsonl      每个 symbol 内命中的 UI 关键字摘要
-  - file_index.json     每个文件的聚合摘要
+  - file_index.json     每个文件的聚合摘要（含 mtime_ns/size/sha1，供增量索引判断文件是否变化）
+  - symbol_search_index.json  symbol 倒排索引（CodeIndexLookup 查询用）
   - stats.json          全局统计信息
 
 示例：
   python index_builder.py \
-    --input /path/to/app_source
+    --input /path/to/app_source --workers 0 --incremental
+
+--workers N 使用 N 个进程并行扫描（0 表示按 CPU 核数）；--incremental 复用上次索引中
+mtime/大小（或内容 sha1）未变化文件的记录，只重新扫描变化的文件并按文件顺序拼接。
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
+import io
 import json
+import os
 import re
 from collections import Counter
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import TextIO
 
+from hapray.analyze.llm_root_cause.symbol_search_index import write_symbol_search_index
 from hapray.core.common.root_cause_source import collect_source_files
 
 RECOVERED_RE = re.compile(r'^\s*//\s*recovered from:\s*(.+?)\s*$')
@@ -103,6 +113,8 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description='构建 TS / ArkTS ETS 的规则索引')
     parser.add_argument('--input', required=True, help='源码目录，递归扫描 *.ts / *.ets')
     parser.add_argument('--output-dir', default=None, help='索引输出目录，默认写到 <input>/index')
+    parser.add_argument('--workers', type=int, default=1, help='并行扫描进程数，0 表示按 CPU 核数，默认 1（串行）')
+    parser.add_argument('--incremental', action='store_true', help='增量索引：只重新扫描变化的文件')
     return parser.parse_args()
 
 
@@ -414,6 +426,77 @@ def scan_file(file_path: Path, input_root: Path, symbol_writer: TextIO, ui_write
     }
 
 
+def file_fingerprint(file_path: Path) -> dict:
+    stat = file_path.stat()
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': file_sha1(file_path)}
+
+
+def file_sha1(file_path: Path) -> str:
+    digest = hashlib.sha1()
+    with file_path.open('rb') as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_file_to_text(file_path: Path, input_root: Path) -> tuple[dict, str, str]:
+    """scan_file 的缓冲版本：返回 (文件摘要含指纹, symbol 记录文本, ui 记录文本)，可在子进程中执行"""
+    symbol_buffer = io.StringIO()
+    ui_buffer = io.StringIO()
+    summary = scan_file(file_path, input_root, symbol_buffer, ui_buffer)
+    summary.update(file_fingerprint(file_path))
+    return summary, symbol_buffer.getvalue(), ui_buffer.getvalue()
+
+
+def load_previous_index(output_dir: Path) -> tuple[dict[str, dict], dict[str, list[str]], dict[str, list[str]]]:
+    """读取上次的索引输出，按文件分组：(file -> 摘要, file -> symbol 行, file -> ui 行)
+
+    任一输出缺失或无法解析时返回空结果（退化为全量扫描）。
+    """
+    file_index_path = output_dir / 'file_index.json'
+    symbol_index_path = output_dir / 'symbol_index.jsonl'
+    ui_index_path = output_dir / 'ui_index.jsonl'
+    if not (file_index_path.exists() and symbol_index_path.exists() and ui_index_path.exists()):
+        return {}, {}, {}
+    try:
+        summaries = {item['file']: item for item in json.loads(file_index_path.read_text(encoding='utf-8'))}
+        return summaries, _group_jsonl_lines(symbol_index_path), _group_jsonl_lines(ui_index_path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f'[warn] 无法读取上次的索引，改为全量扫描: {e}')
+        return {}, {}, {}
+
+
+def _group_jsonl_lines(path: Path) -> dict[str, list[str]]:
+    grouped: dict[str, list[str]] = {}
+    with path.open(encoding='utf-8') as handle:
+        for raw_line in handle:
+            if not raw_line.strip():
+                continue
+            line = raw_line if raw_line.endswith('\n') else raw_line + '\n'
+            grouped.setdefault(json.loads(line)['file'], []).append(line)
+    return grouped
+
+
+def is_unchanged(file_path: Path, previous: dict | None) -> bool:
+    """mtime 与大小都未变，或大小未变且内容 sha1 相同，则视为未变化"""
+    if not previous or 'size' not in previous:
+        return False
+    stat = file_path.stat()
+    if previous['size'] != stat.st_size:
+        return False
+    return previous.get('mtime_ns') == stat.st_mtime_ns or previous.get('sha1') == file_sha1(file_path)
+
+
+def iter_scanned_files(files: list[Path], input_root: Path, workers: int) -> Iterator[tuple[dict, str, str]]:
+    """按输入顺序产出 scan_file_to_text 的结果；workers > 1 时使用进程池并行扫描"""
+    scan = partial(scan_file_to_text, input_root=input_root)
+    if workers <= 1 or len(files) <= 1:
+        yield from map(scan, files)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(scan, files, chunksize=max(1, min(32, len(files) // (workers * 4))))
+
+
 def collect_ts_files(input_root: Path) -> list[Path]:
     """向后兼容别名。"""
     return collect_source_files(input_root)
@@ -423,10 +506,19 @@ def write_json(path: Path, data: object) -> None:
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
 
 
-def build_index(input_root: Path, output_dir: Path) -> dict:
+def build_index(input_root: Path, output_dir: Path, workers: int = 1, incremental: bool = False) -> dict:
+    """扫描源码树并写出索引
+
+    Args:
+        input_root: 源码目录
+        output_dir: 索引输出目录
+        workers: 并行扫描进程数，0 表示按 CPU 核数，1 表示串行
+        incremental: 复用上次索引中未变化文件的记录，只重新扫描变化的文件
+    """
     source_files = collect_source_files(input_root)
     if not source_files:
         raise FileNotFoundError(f'未在目录中找到 .ts/.ets 文件: {input_root}')
+    workers = workers or os.cpu_count() or 1
 
     output_dir.mkdir(parents=True, exist_ok=True)
     symbol_index_path = output_dir / 'symbol_index.jsonl'
@@ -434,6 +526,17 @@ def build_index(input_root: Path, output_dir: Path) -> dict:
     file_index_path = output_dir / 'file_index.json'
     stats_path = output_dir / 'stats.json'
 
+    previous_summaries, previous_symbols, previous_ui = load_previous_index(output_dir) if incremental else ({}, {}, {})
+    relative_files = [file_path.relative_to(input_root).as_posix() for file_path in source_files]
+    reused = {
+        relative
+        for relative, file_path in zip(relative_files, source_files)
+        if is_unchanged(file_path, previous_summaries.get(relative))
+    }
+    changed_files = [file_path for relative, file_path in zip(relative_files, source_files) if relative not in reused]
+    if incremental:
+        print(f'[incremental] 复用 {len(reused):,} 个未变化文件，重新扫描 {len(changed_files):,} 个文件')
+
     file_summaries = []
     total_lines = 0
     total_symbols = 0
@@ -442,12 +545,26 @@ def build_index(input_root: Path, output_dir: Path) -> dict:
     total_components = set()
     total_views = set()
 
+    # 先写临时文件：增量模式下需要读取旧索引，且失败时不破坏上次的输出
+    symbol_tmp_path = symbol_index_path.with_name(symbol_index_path.name + '.tmp')
+    ui_tmp_path = ui_index_path.with_name(ui_index_path.name + '.tmp')
+    scanned = iter_scanned_files(changed_files, input_root, workers)
     with (
-        symbol_index_path.open('w', encoding='utf-8') as symbol_writer,
-        ui_index_path.open('w', encoding='utf-8') as ui_writer,
+        symbol_tmp_path.open('w', encoding='utf-8') as symbol_writer,
+        ui_tmp_path.open('w', encoding='utf-8') as ui_writer,
     ):
-        for file_path in source_files:
-            summary = scan_file(file_path, input_root, symbol_writer, ui_writer)
+        for relative, file_path in zip(relative_files, source_files):
+            if relative in reused:
+                # 内容未变但 mtime 变化（如重新解包）时记录新的 mtime，下次无需再计算 sha1
+                summary = {**previous_summaries[relative], 'mtime_ns': file_path.stat().st_mtime_ns}
+                symbol_writer.writelines(previous_symbols.get(relative, []))
+                ui_writer.writelines(previous_ui.get(relative, []))
+                tag = 'reused'
+            else:
+                summary, symbol_text, ui_text = next(scanned)
+                symbol_writer.write(symbol_text)
+                ui_writer.write(ui_text)
+                tag = 'indexed'
             file_summaries.append(summary)
             total_lines += summary['line_count']
             total_symbols += summary['symbol_count']
@@ -456,15 +573,19 @@ def build_index(input_root: Path, output_dir: Path) -> dict:
             total_components.update(summary['components'])
             total_views.update(summary['views'])
             print(
-                f'[indexed] {summary["file"]} | lines={summary["line_count"]:,} | '
+                f'[{tag}] {summary["file"]} | lines={summary["line_count"]:,} | '
                 f'symbols={summary["symbol_count"]:,} | lifecycle={summary["lifecycle_count"]:,}'
             )
+    symbol_tmp_path.replace(symbol_index_path)
+    ui_tmp_path.replace(ui_index_path)
 
     write_json(file_index_path, file_summaries)
+    search_index_path = write_symbol_search_index(output_dir)
     stats = {
         'input_root': str(input_root),
         'output_dir': str(output_dir),
         'file_count': len(source_files),
+        'reused_file_count': len(reused),
         'total_lines': total_lines,
         'total_symbols': total_symbols,
         'total_lifecycle_symbols': total_lifecycle,
@@ -478,6 +599,7 @@ def build_index(input_root: Path, output_dir: Path) -> dict:
             'symbol_index': str(symbol_index_path),
             'ui_index': str(ui_index_path),
             'file_index': str(file_index_path),
+            'search_index': str(search_index_path),
             'stats': str(stats_path),
         },
     }
@@ -492,7 +614,7 @@ def main() -> None:
         raise FileNotFoundError(f'输入目录不存在: {input_root}')
 
     output_dir = Path(args.output_dir).resolve() if args.output_dir else input_root / 'index'
-    stats = build_index(input_root, output_dir)
+    stats = build_index(input_root, output_dir, workers=args.workers, incremental=args.incremental)
 
     print('\n索引完成：')
     print(f'- 文件数: {stats["file_count"]}')
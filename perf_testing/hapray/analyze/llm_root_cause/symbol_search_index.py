@@ -0,0 +1,170 @@
+"""
+symbol_index.jsonl 的倒排索引。
+
+CodeIndexLookup 的关键字打分只看 owner_name / module_path / symbol_name 的子串命中和 ui_keywords 的精确命中，
+逐行扫描全部 symbol 在大型工程（数十万 symbol）上每次查询都要数秒。本模块按字段建立：
+  - 去重后的规范化取值（小写）→ posting list（symbol 行号，升序）
+  - 取值的 3-gram → 取值编号，用于子串匹配：关键字的所有 3-gram 求交后再逐个校验 ``keyword in value``
+  - ui_keywords 规范化取值 → posting list
+
+index_builder.build_index 构建后写入 symbol_search_index.json，CodeIndexLookup 首次查询时加载；
+文件缺失或与 symbol_index.jsonl 不一致时在内存中重新构建。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+SEARCH_INDEX_FILENAME = 'symbol_search_index.json'
+SEARCH_INDEX_VERSION = 1
+SUBSTRING_FIELDS = ('owner_name', 'module_path', 'symbol_name')
+NGRAM_SIZE = 3
+
+
+def _norm(text: Any) -> str:
+    return str(text or '').lower()
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class _FieldIndex:
+    """单个字段的取值字典 + posting list + 3-gram 索引"""
+
+    def __init__(self, values: list[str], postings: list[list[int]], grams: dict[str, list[int]]):
+        self.values = values
+        self.postings = postings
+        self.grams = grams
+        self.value_ids = {value: vid for vid, value in enumerate(values)}
+
+    @classmethod
+    def build(cls, column: list[str]) -> _FieldIndex:
+        value_ids: dict[str, int] = {}
+        postings: list[list[int]] = []
+        for row_idx, value in enumerate(column):
+            vid = value_ids.setdefault(value, len(value_ids))
+            if vid == len(postings):
+                postings.append([])
+            postings[vid].append(row_idx)
+
+        values = list(value_ids)
+        grams: dict[str, list[int]] = {}
+        for vid, value in enumerate(values):
+            for gram in _ngrams(value):
+                grams.setdefault(gram, []).append(vid)
+        return cls(values, postings, grams)
+
+    def rows_equal(self, value: str) -> list[int]:
+        vid = self.value_ids.get(value)
+        return self.postings[vid] if vid is not None else []
+
+    def rows_containing(self, keyword: str) -> set[int]:
+        """取值包含 keyword 的所有行"""
+        if len(keyword) < NGRAM_SIZE:
+            candidate_ids = range(len(self.values))
+        else:
+            gram_postings = []
+            for gram in _ngrams(keyword):
+                posting = self.grams.get(gram)
+                if not posting:
+                    return set()
+                gram_postings.append(posting)
+            gram_postings.sort(key=len)
+            candidate_ids = set(gram_postings[0])
+            for posting in gram_postings[1:]:
+                candidate_ids.intersection_update(posting)
+                if not candidate_ids:
+                    return set()
+
+        rows: set[int] = set()
+        for vid in candidate_ids:
+            if keyword in self.values[vid]:
+                rows.update(self.postings[vid])
+        return rows
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'values': self.values, 'postings': self.postings, 'grams': self.grams}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> _FieldIndex:
+        return cls(data['values'], data['postings'], data['grams'])
+
+
+class SymbolSearchIndex:
+    """symbol 行的倒排索引（行号即 symbol_index.jsonl 中的顺序）"""
+
+    def __init__(self, symbol_count: int, fields: dict[str, _FieldIndex], ui_postings: dict[str, list[int]]):
+        self.symbol_count = symbol_count
+        self.fields = fields
+        self.ui_postings = ui_postings
+
+    @classmethod
+    def build(cls, symbols: list[dict[str, Any]]) -> SymbolSearchIndex:
+        fields = {field: _FieldIndex.build([_norm(row.get(field)) for row in symbols]) for field in SUBSTRING_FIELDS}
+        ui_postings: dict[str, list[int]] = {}
+        for row_idx, row in enumerate(symbols):
+            for name in row.get('ui_keywords', []):
+                posting = ui_postings.setdefault(_norm(name), [])
+                if not posting or posting[-1] != row_idx:
+                    posting.append(row_idx)
+        return cls(len(symbols), fields, ui_postings)
+
+    def rows_equal(self, field: str, value: str) -> list[int]:
+        """字段规范化取值等于 value 的行（升序）"""
+        return self.fields[field].rows_equal(value)
+
+    def rows_containing(self, field: str, keyword: str) -> set[int]:
+        """字段规范化取值包含 keyword 的行"""
+        return self.fields[field].rows_containing(keyword)
+
+    def rows_with_ui(self, keyword: str) -> list[int]:
+        """ui_keywords 中含有 keyword（规范化后精确相等）的行"""
+        return self.ui_postings.get(keyword, [])
+
+    def save(self, path: Path, source_size: int) -> None:
+        data = {
+            'version': SEARCH_INDEX_VERSION,
+            'symbol_count': self.symbol_count,
+            'source_size': source_size,
+            'fields': {field: index.to_dict() for field, index in self.fields.items()},
+            'ui_keywords': self.ui_postings,
+        }
+        path.write_text(json.dumps(data, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+
+    @classmethod
+    def load(cls, path: Path, symbol_count: int, source_size: int) -> SymbolSearchIndex | None:
+        """加载持久化的索引；不存在、版本不符或与 symbol_index.jsonl 不一致时返回 None"""
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logging.warning('读取 symbol 倒排索引失败 (%s): %s', path, e)
+            return None
+        if (
+            data.get('version') != SEARCH_INDEX_VERSION
+            or data.get('symbol_count') != symbol_count
+            or data.get('source_size') != source_size
+        ):
+            logging.info('symbol 倒排索引与 symbol_index.jsonl 不一致，将重新构建: %s', path)
+            return None
+        fields = {field: _FieldIndex.from_dict(data['fields'][field]) for field in SUBSTRING_FIELDS}
+        return cls(symbol_count, fields, data['ui_keywords'])
+
+
+def write_symbol_search_index(output_dir: Path) -> Path:
+    """根据 output_dir 下的 symbol_index.jsonl 构建并写入倒排索引"""
+    symbol_index_path = output_dir / 'symbol_index.jsonl'
+    symbols = []
+    with symbol_index_path.open(encoding='utf-8') as handle:
+        for raw_line in handle:
+            line = raw_line.strip()
+            if line:
+                symbols.append(json.loads(line))
+    search_index_path = output_dir / SEARCH_INDEX_FILENAME
+    SymbolSearchIndex.build(symbols).save(search_index_path, symbol_index_path.stat().st_size)
+    return search_index_path
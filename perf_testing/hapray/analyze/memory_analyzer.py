@@ -24,6 +24,7 @@ from hapray.analyze.base_analyzer import BaseAnalyzer, BaseModel
 from hapray.core.common.memory import MemoryAnalyzerCore, MemoryMeminfoParser
 from hapray.core.common.memory.memory_aggregator import MemoryAggregator
 from hapray.core.common.memory.memory_comparison_exporter import MemoryComparisonExporter
+from hapray.core.config.config import Config
 
 
 class MemoryResultModel(BaseModel):
@@ -162,6 +163,8 @@ class MemoryAnalyzer(BaseAnalyzer):
     3. Only processes trace.db files that contain native_hook table with data
     """
 
+    cacheable = True
+
     def __init__(
         self,
         scene_dir: str,
@@ -224,7 +227,11 @@ class MemoryAnalyzer(BaseAnalyzer):
             except Exception as e:
                 self.logger.warning('Failed to parse meminfo data: %s', str(e))
 
-        # 如果启用了对比导出，收集对比数据并添加步骤标记
+        self._collect_comparison_data(step_dir, result)
+        return result
+
+    def _collect_comparison_data(self, step_dir: str, result: Optional[dict]):
+        """如果启用了对比导出，收集该步骤的对比数据并添加步骤标记"""
         if self.export_comparison and result and 'original_records' in result:
             # 为原始记录添加步骤标记
             original_records = result.get('original_records', [])
@@ -245,14 +252,70 @@ class MemoryAnalyzer(BaseAnalyzer):
             callchain_cache = result.get('callchain_cache', {})
             self.all_comparison_data['callchain_cache'].update(callchain_cache)
 
-        return result
+    def pop_step_state(self, step_dir: str) -> dict[str, Any]:
+        """Detach step results plus the comparison data and app_pids collected in this process"""
+        state = super().pop_step_state(step_dir)
+        state['app_pids'] = self.app_pids
+        state['all_comparison_data'] = self.all_comparison_data
+        self.all_comparison_data = {
+            'original_records': [],
+            'refined_records': [],
+            'data_dict': {},
+            'callchain_cache': {},
+        }
+        return state
+
+    def merge_step_state(self, step_dir: str, state: dict[str, Any]):
+        """Merge worker-side step state, accumulating comparison data across steps"""
+        state = dict(state)
+        app_pids = state.pop('app_pids', None)
+        if app_pids:
+            self.app_pids = app_pids
+        comparison_data = state.pop('all_comparison_data', None)
+        if comparison_data:
+            self.all_comparison_data['original_records'].extend(comparison_data['original_records'])
+            self.all_comparison_data['refined_records'].extend(comparison_data['refined_records'])
+            self.all_comparison_data['data_dict'].update(comparison_data['data_dict'])
+            self.all_comparison_data['callchain_cache'].update(comparison_data['callchain_cache'])
+        super().merge_step_state(step_dir, state)
+
+    def snapshot_step_state(self, step_dir: str) -> dict[str, Any]:
+        """Copy step results plus app_pids (comparison data is rebuilt from the results on restore)"""
+        state = super().snapshot_step_state(step_dir)
+        state['app_pids'] = self.app_pids
+        return state
+
+    def restore_step_state(self, step_dir: str, state: dict[str, Any]):
+        """Restore cached step results and collect their comparison data as analyze() would"""
+        super().restore_step_state(step_dir, state)
+        self._collect_comparison_data(step_dir, self.results.get(step_dir))
+
+    def cache_config(self) -> dict[str, Any]:
+        return {
+            'time_ranges': self.time_ranges,
+            'use_refined_lib_symbol': self.use_refined_lib_symbol,
+            'export_comparison': self.export_comparison,
+            # 组件分类规则（MemoryClassifier）
+            'perf.kinds': Config.get('perf.kinds', []),
+        }
+
+    def cache_input_files(self, step_dir: str) -> list[str]:
+        """meminfo/<step>/ 下的 meminfo 采集文件"""
+        meminfo_dir = os.path.join(self.scene_dir, 'meminfo', step_dir)
+        if not os.path.isdir(meminfo_dir):
+            return []
+        return [
+            os.path.join(meminfo_dir, name)
+            for name in os.listdir(meminfo_dir)
+            if os.path.isfile(os.path.join(meminfo_dir, name))
+        ]
 
     def write_report(self, result: dict):
         """Write memory Excel report and preserve parent class JSON report logic
 
         For each step:
           - Get peak point (peak_time) and end point (max relativeTs from records)
-          - Call get_unreleased_by_callchain to aggregate unreleased memory for each point
+          - Call get_unreleased_by_callchain_at to aggregate unreleased memory for both points in one sweep
           - Write to scene_dir/report/memory_report.xlsx with multiple sheets
         """
 
@@ -274,15 +337,12 @@ class MemoryAnalyzer(BaseAnalyzer):
                 if not isinstance(step_data, dict):
                     continue
                 records = step_data.get('records') or []
-                # Peak point
+                # Peak point and end point (max relativeTs from records)
                 peak_time = (step_data.get('peak_time') or 0) if records else 0
-                unreleased_peak = aggregator.get_unreleased_by_callchain(records, time=peak_time) if records else {}
-                all_rows.extend(self._extract_unreleased_rows(unreleased_peak, step_name, 'peak'))
-
-                # End point: get max relativeTs from records
                 end_time = max((r.get('relativeTs', 0) for r in records), default=peak_time) if records else 0
-                unreleased_end = aggregator.get_unreleased_by_callchain(records, time=end_time) if records else {}
-                all_rows.extend(self._extract_unreleased_rows(unreleased_end, step_name, 'end'))
+                unreleased = aggregator.get_unreleased_by_callchain_at(records, [peak_time, end_time])
+                all_rows.extend(self._extract_unreleased_rows(unreleased[peak_time], step_name, 'peak'))
+                all_rows.extend(self._extract_unreleased_rows(unreleased[end_time], step_name, 'end'))
 
             self._write_excel_sheets(writer, all_rows)
             # Write meminfo data
@@ -518,6 +578,8 @@ class MemoryAnalyzer(BaseAnalyzer):
                 step_id = self.step_dir_to_step_id(step_name)
                 self._save_step_data_to_db(step_id, step_data)
 
+            # All steps are written in large transactions by the report database writer; wait for them here
+            self.flush_db_writes()
             self.logger.info('Memory analysis results saved to database: %s', self.get_db_path())
         except Exception as e:
             self.logger.exception('Failed to save memory analysis results to database: %s', str(e))
@@ -526,7 +588,7 @@ class MemoryAnalyzer(BaseAnalyzer):
         """Create unique index for memory_results table"""
         try:
             # Try to drop existing regular index
-            self.exec_sql('DROP INDEX IF EXISTS idx_memory_results_step_id')
+            self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_results_step_id')
             # Create unique index (implements unique constraint effect)
             self.create_index('idx_memory_results_step_id', 'memory_results', 'step_id', unique=True)
         except Exception:
@@ -535,15 +597,15 @@ class MemoryAnalyzer(BaseAnalyzer):
 
     def _create_memory_records_indexes(self):
         """Create indexes for memory_records table to improve query performance"""
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_records_callchainId')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_records_callchainId')
         self.create_index('idx_memory_records_callchainId', 'memory_records', 'callchainId')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_records_relativeTs')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_records_relativeTs')
         self.create_index('idx_memory_records_relativeTs', 'memory_records', 'relativeTs')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_records_componentName')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_records_componentNameId')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_records_componentName')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_records_componentNameId')
         self.create_index('idx_memory_records_componentNameId', 'memory_records', 'componentNameId')
         # 为 componentCategory 创建索引以提高查询效率
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_records_componentCategory')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_records_componentCategory')
         self.create_index('idx_memory_records_componentCategory', 'memory_records', 'componentCategory')
 
     def _create_memory_callchains_view(self):
@@ -567,30 +629,30 @@ class MemoryAnalyzer(BaseAnalyzer):
             LEFT JOIN memory_data_dicts AS file_dict ON raw.fileId = file_dict.dictId
         """
         # 删除旧视图及同名遗留表，确保列定义更新
-        self.exec_sql('DROP VIEW IF EXISTS memory_callchains')
-        self.exec_sql('DROP TABLE IF EXISTS memory_callchains')
-        self.exec_sql(view_sql)
+        self.exec_sql_async('DROP VIEW IF EXISTS memory_callchains')
+        self.exec_sql_async('DROP TABLE IF EXISTS memory_callchains')
+        self.exec_sql_async(view_sql)
 
     def _create_memory_callchains_indexes(self):
         """Create indexes for memory_callchains table to improve query performance"""
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_callchains_callchainId')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_callchains_callchainId')
         self.create_index('idx_memory_callchains_callchainId', 'memory_callchains_raw', 'callchainId')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_callchains_depth')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_callchains_depth')
         self.create_index('idx_memory_callchains_depth', 'memory_callchains_raw', 'depth')
 
     def _create_memory_data_dict_indexes(self):
         """Create indexes for memory_data_dicts table to improve query performance"""
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_data_dicts_dictId')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_data_dicts_dictId')
         self.create_index('idx_memory_data_dicts_step_dict', 'memory_data_dicts', 'step_id, dictId')
         self.create_index('idx_memory_data_dicts_value', 'memory_data_dicts', 'value')
 
     def _create_memory_meminfo_indexes(self):
         """Create indexes for memory_meminfo table to improve query performance"""
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_meminfo_step_id')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_meminfo_step_id')
         self.create_index('idx_memory_meminfo_step_id', 'memory_meminfo', 'step_id')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_meminfo_timestamp_epoch')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_meminfo_timestamp_epoch')
         self.create_index('idx_memory_meminfo_timestamp_epoch', 'memory_meminfo', 'step_id, timestamp_epoch')
-        self.exec_sql('DROP INDEX IF EXISTS idx_memory_meminfo_timestamp')
+        self.exec_sql_async('DROP INDEX IF EXISTS idx_memory_meminfo_timestamp')
         self.create_index('idx_memory_meminfo_timestamp', 'memory_meminfo', 'step_id, timestamp')
 
     def _save_step_data_to_db(self, step_id: int, step_data: dict):
@@ -613,10 +675,10 @@ class MemoryAnalyzer(BaseAnalyzer):
         self.save_model(step_id, result_model, replace=True)
 
         # Delete old records for this step (if exist)
-        self.exec_sql('DELETE FROM memory_records WHERE step_id = ?', (step_id,))
-        self.exec_sql('DELETE FROM memory_callchains_raw WHERE step_id = ?', (step_id,))
-        self.exec_sql('DELETE FROM memory_data_dicts WHERE step_id = ?', (step_id,))
-        self.exec_sql('DELETE FROM memory_meminfo WHERE step_id = ?', (step_id,))
+        self.exec_sql_async('DELETE FROM memory_records WHERE step_id = ?', (step_id,))
+        self.exec_sql_async('DELETE FROM memory_callchains_raw WHERE step_id = ?', (step_id,))
+        self.exec_sql_async('DELETE FROM memory_data_dicts WHERE step_id = ?', (step_id,))
+        self.exec_sql_async('DELETE FROM memory_meminfo WHERE step_id = ?', (step_id,))
 
         # Batch save detailed records
         data_dict = dict(step_data.get('dataDict') or {})
@@ -794,19 +856,10 @@ class MemoryAnalyzer(BaseAnalyzer):
         is packaged into HTML before all data is written to disk.
         """
         try:
-            if self._db_conn is None:
-                return
-
-            # Commit any pending transactions
-            self.commit()
-
-            # Execute WAL checkpoint to merge WAL file into main database
-            # This ensures all data in WAL is written to the main database file
-            try:
-                self.exec_sql('PRAGMA wal_checkpoint(TRUNCATE)')
-                self.logger.debug('WAL checkpoint completed')
-            except Exception as e:
-                self.logger.warning('WAL checkpoint failed (may not be in WAL mode): %s', str(e))
+            # Commit writes queued on the report database writer and execute a WAL checkpoint
+            # to merge the WAL file into the main database
+            self.flush_db_writes(checkpoint=True)
+            self.logger.debug('WAL checkpoint completed')
 
             # Close database connection to ensure all buffers are flushed
             self.close_db_connection()
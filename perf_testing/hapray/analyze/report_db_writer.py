@@ -0,0 +1,320 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from hapray.core.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 单个事务内累计写入的行数上限，超过后提交并开启新事务
+DEFAULT_COMMIT_ROWS = 200000
+# 写队列中待处理的操作数上限，队列满时入队方阻塞（反压）
+DEFAULT_QUEUE_SIZE = 64
+
+_OP_EXECUTE = 'execute'
+_OP_ROWS = 'rows'
+_OP_FLUSH = 'flush'
+_OP_CLOSE = 'close'
+
+
+@dataclass
+class WriterStats:
+    """写入吞吐统计"""
+
+    rows: int = 0
+    batches: int = 0
+    statements: int = 0
+    commits: int = 0
+    errors: int = 0
+    insert_seconds: float = 0.0
+    index_seconds: float = 0.0
+    table_rows: dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'batches': self.batches,
+            'statements': self.statements,
+            'commits': self.commits,
+            'errors': self.errors,
+            'insert_seconds': round(self.insert_seconds, 3),
+            'index_seconds': round(self.index_seconds, 3),
+            'rows_per_second': round(self.rows / self.insert_seconds) if self.insert_seconds > 0 else 0,
+            'table_rows': dict(self.table_rows),
+        }
+
+
+class ReportDbWriter:
+    """hapray_report.db 的单写者持久化服务
+
+    所有写操作进入队列，由专用写线程在同一个连接上按入队顺序执行：WAL + synchronous=NORMAL，
+    多个批次合并到一个大事务中（每 commit_rows 行或 flush() 时提交），行批次使用 executemany。
+    非唯一索引延迟到 close() 时在数据写完后统一创建；唯一索引带有约束语义（INSERT OR REPLACE 依赖它），
+    立即创建。
+
+    execute() / insert_rows() 返回 Future，调用方可以不等待；执行失败时记录日志，
+    并在下一次 flush() / close() 时抛出第一个错误。
+
+    共享写者按数据库路径登记，同一进程中并发分析的多个场景各自使用自己报告目录下的写者，
+    结束时只关闭本场景的写者（close_writers）。
+    """
+
+    _writers: dict[str, 'ReportDbWriter'] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, db_path: str, commit_rows: Optional[int] = None, queue_size: Optional[int] = None):
+        self.db_path = db_path
+        self.commit_rows = commit_rows or int(Config.get('analyze.report_db.commit_rows', DEFAULT_COMMIT_ROWS))
+        self.stats = WriterStats()
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=queue_size or int(Config.get('analyze.report_db.queue_size', DEFAULT_QUEUE_SIZE))
+        )
+        # 索引名 -> CREATE INDEX 语句
+        self._deferred_indexes: dict[str, str] = {}
+        self._pending_error: Optional[BaseException] = None
+        self._closed = False
+        # 保证"检查是否已关闭 + 入队"与 close() 互斥，关闭操作之后不会再有操作入队
+        self._submit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='report-db-writer', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def shared(cls, db_path: str) -> 'ReportDbWriter':
+        """获取 db_path 对应的共享写者（不存在或已关闭时创建）"""
+        key = os.path.abspath(db_path)
+        with cls._registry_lock:
+            writer = cls._writers.get(key)
+            if writer is None or writer.closed:
+                writer = cls(db_path)
+                cls._writers[key] = writer
+            return writer
+
+    @classmethod
+    def existing(cls, db_path: str) -> Optional['ReportDbWriter']:
+        """db_path 对应的仍在运行的共享写者，没有时返回 None"""
+        with cls._registry_lock:
+            writer = cls._writers.get(os.path.abspath(db_path))
+        return writer if writer is not None and not writer.closed else None
+
+    @classmethod
+    def close_writers(cls, db_paths: Iterable[str]) -> dict[str, dict[str, Any]]:
+        """关闭 db_paths 对应的共享写者（其他数据库的写者不受影响），返回 {db_path: 吞吐统计}"""
+        keys = {os.path.abspath(db_path) for db_path in db_paths}
+        with cls._registry_lock:
+            writers = [cls._writers.pop(key) for key in keys if key in cls._writers]
+        summaries = {}
+        for writer in writers:
+            if writer.closed:
+                continue
+            try:
+                writer.close()
+            except Exception as e:
+                logger.error('Failed to close report database writer %s: %s', writer.db_path, str(e))
+            summaries[writer.db_path] = writer.stats.summary()
+        return summaries
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> Future:
+        """执行一条写语句，Future 结果为 lastrowid"""
+        return self._submit(_OP_EXECUTE, (sql, tuple(params)))
+
+    def insert_rows(
+        self, table_name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]], replace: bool = False
+    ) -> Future:
+        """批量写入按 columns 顺序排列的行，Future 结果为写入行数"""
+        action = 'INSERT OR REPLACE' if replace else 'INSERT'
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f'{action} INTO {table_name} ({", ".join(columns)}) VALUES ({placeholders})'
+        rows = rows if isinstance(rows, list) else list(rows)
+        return self._submit(_OP_ROWS, (table_name, sql, rows))
+
+    def create_index(self, index_name: str, table_name: str, columns: str, unique: bool = False) -> Optional[Future]:
+        """创建索引：唯一索引立即创建，普通索引延迟到 close() 时创建"""
+        unique_clause = 'UNIQUE ' if unique else ''
+        sql = f'CREATE {unique_clause}INDEX IF NOT EXISTS {index_name} ON {table_name}({columns})'
+        if unique:
+            self._deferred_indexes.pop(index_name, None)
+            return self.execute(sql)
+        self._deferred_indexes[index_name] = sql
+        return None
+
+    def flush(self, checkpoint: bool = False):
+        """等待已入队的操作执行完成并提交；checkpoint 为 True 时把 WAL 合并回主库
+
+        Raises:
+            之前的异步写操作中第一个失败的异常
+        """
+        self._submit(_OP_FLUSH, checkpoint).result()
+        self._raise_pending_error()
+
+    def close(self):
+        """写完队列中的操作，创建延迟索引，合并 WAL 并关闭连接，输出吞吐统计"""
+        with self._submit_lock:
+            if self._closed:
+                return
+            future = self._enqueue(_OP_CLOSE, list(self._deferred_indexes.values()))
+            self._closed = True
+        future.result()
+        self._thread.join()
+        self._log_summary()
+        self._raise_pending_error()
+
+    def _submit(self, op: str, payload: Any) -> Future:
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError(f'Report database writer is closed: {self.db_path}')
+            return self._enqueue(op, payload)
+
+    def _enqueue(self, op: str, payload: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((op, payload, future))
+        return future
+
+    def _fail_queued(self, error: BaseException):
+        """写线程退出后，让仍在队列中的操作失败，避免调用方永远等待"""
+        while True:
+            try:
+                _op, _payload, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+    def _raise_pending_error(self):
+        error, self._pending_error = self._pending_error, None
+        if error is not None:
+            raise error
+
+    def _log_summary(self):
+        summary = self.stats.summary()
+        logger.info(
+            'Report database writer %s: %d rows in %d batches (%d rows/s), %d statements, %d commits, '
+            'indexes %.2f seconds, %d errors',
+            self.db_path,
+            summary['rows'],
+            summary['batches'],
+            summary['rows_per_second'],
+            summary['statements'],
+            summary['commits'],
+            summary['index_seconds'],
+            summary['errors'],
+        )
+        for table_name, rows in sorted(summary['table_rows'].items(), key=lambda item: item[1], reverse=True):
+            logger.info('  %s: %d rows', table_name, rows)
+
+    # ── 写线程 ──────────────────────────────────────────────────────────
+
+    def _run(self):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+        except Exception as e:
+            logger.error('Failed to open report database %s: %s', self.db_path, str(e))
+            self._stop(e)
+            return
+        pending_rows = 0
+        try:
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('PRAGMA foreign_keys = ON')
+            while True:
+                op, payload, future = self._queue.get()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if op == _OP_ROWS:
+                        self._begin(conn)
+                        result = self._insert_rows(conn, *payload)
+                        pending_rows += result
+                        if pending_rows >= self.commit_rows:
+                            self._commit(conn)
+                            pending_rows = 0
+                    elif op == _OP_EXECUTE:
+                        self._begin(conn)
+                        result = conn.execute(*payload).lastrowid
+                        self.stats.statements += 1
+                    elif op == _OP_FLUSH:
+                        self._commit(conn)
+                        pending_rows = 0
+                        if payload:
+                            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                        result = None
+                    else:
+                        self._commit(conn)
+                        self._build_indexes(conn, payload)
+                        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                        future.set_result(None)
+                        return
+                    future.set_result(result)
+                except Exception as e:
+                    self.stats.errors += 1
+                    logger.error('Report database write failed (%s): %s', op, str(e))
+                    if self._pending_error is None:
+                        self._pending_error = e
+                    future.set_exception(e)
+        except Exception as e:
+            logger.error('Report database writer %s stopped: %s', self.db_path, str(e))
+            self._stop(e)
+        finally:
+            conn.close()
+
+    def _stop(self, error: BaseException):
+        """写线程异常退出：标记为已关闭并让排队的操作失败"""
+        # 先腾出队列空间，让持有 _submit_lock 阻塞在 put() 上的入队方返回
+        self._fail_queued(error)
+        with self._submit_lock:
+            self._closed = True
+        self._fail_queued(error)
+
+    @staticmethod
+    def _begin(conn: sqlite3.Connection):
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+
+    def _commit(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.execute('COMMIT')
+            self.stats.commits += 1
+
+    def _insert_rows(self, conn: sqlite3.Connection, table_name: str, sql: str, rows: list) -> int:
+        start_time = time.time()
+        conn.executemany(sql, rows)
+        self.stats.insert_seconds += time.time() - start_time
+        self.stats.rows += len(rows)
+        self.stats.batches += 1
+        self.stats.table_rows[table_name] = self.stats.table_rows.get(table_name, 0) + len(rows)
+        return len(rows)
+
+    def _build_indexes(self, conn: sqlite3.Connection, index_sqls: list[str]):
+        start_time = time.time()
+        for sql in index_sqls:
+            try:
+                conn.execute(sql)
+            except sqlite3.Error as e:
+                self.stats.errors += 1
+                logger.error('Failed to create deferred index (%s): %s', sql, str(e))
+        self.stats.index_seconds += time.time() - start_time
@@ -19,11 +19,15 @@ import re
 import sqlite3
 from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
 
 from hapray.analyze.base_analyzer import BaseAnalyzer
 from hapray.core.common.exe_utils import ExeUtils
 
+# Backreferences are renumbered when patterns are joined into one alternation
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
 
 class SymbolStatisticAnalyzer(BaseAnalyzer):
     """
@@ -99,34 +103,170 @@ class SymbolStatisticAnalyzer(BaseAnalyzer):
         # Note: By default, regex supports fuzzy matching (contains match)
         # No need to add ^ and $ anchors unless explicitly specified
 
-    def _merge_time_ranges(self, time_ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
-        """Merge overlapping time ranges.
+    def _compile_patterns(self) -> list[re.Pattern]:
+        """Compile all symbol patterns; invalid regexes are skipped (they never matched before either)."""
+        compiled = []
+        for pattern in self.symbol_patterns:
+            try:
+                compiled.append(re.compile(self._convert_pattern_to_regex(pattern)))
+            except re.error as e:
+                self.logger.warning(f'Invalid symbol pattern "{pattern}": {e}')
+        return compiled
+
+    @staticmethod
+    def _combine_patterns(compiled: list[re.Pattern]) -> Optional[re.Pattern]:
+        """Combine patterns into one alternation so each name is searched once.
+
+        Returns None when patterns cannot be combined safely (backreferences would
+        be renumbered, global inline flags are only allowed at the start).
+        """
+        if not compiled or any(_BACKREFERENCE.search(p.pattern) for p in compiled):
+            return None
+        try:
+            return re.compile('|'.join(f'(?:{p.pattern})' for p in compiled))
+        except re.error:
+            return None
 
-        Args:
-            time_ranges: List of (start_time, end_time) tuples
+    def _time_range_filter(self) -> tuple[str, list]:
+        """SQL condition (and params) restricting callstack rows to the configured time ranges."""
+        if not self.time_ranges:
+            return '', []
+        params = []
+        for tr in self.time_ranges:
+            params.extend([tr['startTime'], tr['endTime']])
+        return ' AND (' + ' OR '.join(['(c.ts BETWEEN ? AND ?)'] * len(self.time_ranges)) + ')', params
+
+    def _match_event_names(self, cursor: sqlite3.Cursor, time_filter: str, params: list) -> dict[str, int]:
+        """Match patterns against each distinct callstack name once.
 
         Returns:
-            List of merged (start_time, end_time) tuples
+            {event_name: index of the first pattern that matches it}
         """
-        if not time_ranges:
-            return []
+        compiled = self._compile_patterns()
+        combined = self._combine_patterns(compiled)
+        cursor.execute(f'SELECT DISTINCT c.name FROM callstack c WHERE c.name IS NOT NULL{time_filter}', params)
+
+        matched = {}
+        for (name,) in cursor:
+            if combined is not None and not combined.search(name):
+                continue
+            for index, regex in enumerate(compiled):
+                if regex.search(name):
+                    matched[name] = index
+                    break
+        return matched
+
+    def _query_event_ranges(
+        self, conn: sqlite3.Connection, event_names: dict[str, int], time_filter: str, params: list
+    ) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """Fetch (start, end) of all matched events in one callstack scan.
+
+        Events are ordered by the first pattern that matches them, then by first appearance,
+        and duplicate time ranges of the same event are dropped.
+        """
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS symbol_statistic_names (name TEXT PRIMARY KEY)')
+        conn.execute('DELETE FROM symbol_statistic_names')
+        conn.executemany('INSERT INTO symbol_statistic_names (name) VALUES (?)', ((name,) for name in event_names))
+        rows = pd.read_sql_query(
+            f"""
+            SELECT c.name AS event_name, c.ts AS start_time, c.ts + c.dur AS end_time
+            FROM callstack c
+            JOIN symbol_statistic_names m ON m.name = c.name
+            WHERE c.name IS NOT NULL AND c.dur IS NOT NULL{time_filter}
+            """,
+            conn,
+            params=params,
+        )
+        conn.execute('DROP TABLE symbol_statistic_names')
+        rows = rows.drop_duplicates()
+
+        event_ranges = {}
+        for event_name, group in rows.groupby('event_name', sort=False):
+            event_ranges[event_name] = (group['start_time'].to_numpy(), group['end_time'].to_numpy())
+        ordered = sorted(event_ranges, key=lambda name: event_names[name])
+        return {name: event_ranges[name] for name in ordered}
+
+    @staticmethod
+    def _merge_time_ranges(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Merge overlapping (and touching) time ranges.
 
-        # Sort by start time
-        sorted_ranges = sorted(time_ranges, key=lambda x: x[0])
-        merged = [sorted_ranges[0]]
+        Args:
+            starts: Range start times
+            ends: Range end times
 
-        for current_start, current_end in sorted_ranges[1:]:
-            last_start, last_end = merged[-1]
+        Returns:
+            (merged_starts, merged_ends), sorted by start time
+        """
+        if len(starts) == 0:
+            return starts, ends
+
+        order = np.argsort(starts, kind='stable')
+        starts = starts[order]
+        running_end = np.maximum.accumulate(ends[order])
+        # A range opens a new group when it starts after everything before it has ended
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = starts[1:] > running_end[:-1]
+        group_starts = np.flatnonzero(new_group)
+        group_ends = np.append(group_starts[1:], len(starts)) - 1
+        return starts[group_starts], running_end[group_ends]
+
+    @staticmethod
+    def _load_perf_samples(conn: sqlite3.Connection, start_time: int, end_time: int) -> pd.DataFrame:
+        """Load perf samples within [start_time, end_time], sorted by timestamp, with thread names."""
+        samples = pd.read_sql_query(
+            """
+            SELECT ps.timeStamp AS ts, ps.thread_id, ps.event_count
+            FROM perf_sample ps
+            WHERE ps.timeStamp >= ? AND ps.timeStamp <= ?
+            """,
+            conn,
+            params=[start_time, end_time],
+        )
+        samples = samples.sort_values('ts', kind='stable', ignore_index=True)
+        samples['event_count'] = samples['event_count'].fillna(0).astype('int64')
+        threads = pd.read_sql_query('SELECT thread_id, thread_name FROM perf_thread', conn).drop_duplicates('thread_id')
+        return samples.merge(threads, on='thread_id', how='left', sort=False)
+
+    @staticmethod
+    def _sum_event_counts(
+        sample_ts: np.ndarray, thread_codes: np.ndarray, event_counts: np.ndarray, starts: np.ndarray, ends: np.ndarray
+    ) -> list[tuple[int, int]]:
+        """Sum event_count per thread over samples falling in the (disjoint) merged ranges.
 
-            # If current range overlaps with last merged range
-            if current_start <= last_end:
-                # Merge by extending the end time
-                merged[-1] = (last_start, max(last_end, current_end))
-            else:
-                # No overlap, add as new range
-                merged.append((current_start, current_end))
+        Returns:
+            [(thread code, total event count)], threads ordered by the first range they appear in, then thread_id
+        """
+        lo = np.searchsorted(sample_ts, starts, side='left')
+        hi = np.searchsorted(sample_ts, ends, side='right')
+        # Difference array: +1 at each range's first sample, -1 after its last one
+        coverage = np.bincount(lo, minlength=len(sample_ts) + 1) - np.bincount(hi, minlength=len(sample_ts) + 1)
+        selected = np.flatnonzero(np.cumsum(coverage[:-1]) > 0)
+        if len(selected) == 0:
+            return []
 
-        return merged
+        codes = thread_codes[selected]
+        counts = event_counts[selected]
+        range_index = np.searchsorted(lo, selected, side='right') - 1
+        order = np.lexsort((range_index, codes))
+        codes, counts, range_index = codes[order], counts[order], range_index[order]
+        boundaries = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        totals = np.add.reduceat(counts, boundaries)
+        first_range = range_index[boundaries]
+        return [
+            (int(codes[i]), int(totals[k])) for k, i in sorted(enumerate(boundaries), key=lambda x: first_range[x[0]])
+        ]
+
+    @staticmethod
+    def _thread_labels(samples: pd.DataFrame, thread_codes: np.ndarray) -> list[str]:
+        """'thread_name (thread_id)' for each thread code."""
+        _, first_rows = np.unique(thread_codes, return_index=True)
+        labels = []
+        for tid, name in samples[['thread_id', 'thread_name']].iloc[first_rows].itertuples(index=False):
+            thread_id = int(tid) if pd.notna(tid) else None
+            thread_name = name if isinstance(name, str) and name else 'unknown'
+            labels.append(f'{thread_name} ({thread_id})')
+        return labels
 
     def _analyze_impl(
         self, step_dir: str, trace_db_path: str, perf_db_path: str, app_pids: list
@@ -134,10 +274,11 @@ class SymbolStatisticAnalyzer(BaseAnalyzer):
         """Analyze symbols in perf database for the step.
 
         Process:
-        1. Query all time ranges (ts, dur) for symbols matching pattern from callstack
-        2. Merge overlapping time ranges
-        3. Query perf_sample for event_count values where timeStamp falls in merged ranges
-        4. Aggregate by event name and thread
+        1. Match all patterns against each distinct callstack name in one scan
+        2. Query all time ranges (ts, dur) of the matched events in one callstack scan
+        3. Merge overlapping time ranges per event
+        4. Load perf_sample once and sum event_count per thread over the merged ranges
+           (binary search on the sorted sample timestamps)
         """
         if not os.path.exists(trace_db_path):
             self.logger.warning(f'Trace DB not found for step {step_dir}')
@@ -145,119 +286,46 @@ class SymbolStatisticAnalyzer(BaseAnalyzer):
 
         try:
             with sqlite3.connect(trace_db_path) as conn:
+                time_filter, params = self._time_range_filter()
+                event_names = self._match_event_names(conn.cursor(), time_filter, params)
+                event_ranges = self._query_event_ranges(conn, event_names, time_filter, params) if event_names else {}
 
-                def regexp(expr, item):
-                    if item is None:
-                        return False
-                    try:
-                        return re.search(expr, item) is not None
-                    except Exception:
-                        return False
-
-                conn.create_function('REGEXP', 2, regexp)
-                cursor = conn.cursor()
-
-                # Collect all matching events across all patterns (to avoid duplicates)
-                all_event_time_ranges = {}
-
-                for pattern in self.symbol_patterns:
-                    # Convert pattern to regex (supports wildcards and regex patterns)
-                    regex_pattern = self._convert_pattern_to_regex(pattern)
-
-                    # Step 1: Query all time ranges from callstack for this pattern
-                    query = """
-                    SELECT DISTINCT
-                        c.name AS event_name,
-                        c.ts AS start_time,
-                        c.ts + c.dur AS end_time,
-                        c.callid
-                    FROM callstack c
-                    WHERE c.name IS NOT NULL
-                    AND c.name REGEXP ?
-                    """
-                    params = [regex_pattern]
-
-                    if self.time_ranges:
-                        time_range_conditions = ' OR '.join(['(c.ts BETWEEN ? AND ?)'] * len(self.time_ranges))
-                        query += f' AND ({time_range_conditions})'
-                        for tr in self.time_ranges:
-                            params.extend([tr['startTime'], tr['endTime']])
-
-                    cursor.execute(query, params)
-                    callstack_rows = cursor.fetchall()
-
-                    if not callstack_rows:
-                        continue
-
-                    # Group by event_name (accumulate across patterns)
-                    for row in callstack_rows:
-                        event_name = row[0]
-                        start_time = row[1]
-                        end_time = row[2]
-
-                        if event_name not in all_event_time_ranges:
-                            all_event_time_ranges[event_name] = []
-                        # Avoid duplicate time ranges for the same event
-                        time_range_tuple = (start_time, end_time)
-                        if time_range_tuple not in all_event_time_ranges[event_name]:
-                            all_event_time_ranges[event_name].append(time_range_tuple)
-
-                # Step 2 & 3: For each event, merge time ranges and query perf_sample
-                total_matches = 0
-                for event_name, time_ranges_list in all_event_time_ranges.items():
-                    merged_ranges = self._merge_time_ranges(time_ranges_list)
-
+                merged_ranges = {}
+                for event_name, (starts, ends) in event_ranges.items():
+                    merged_ranges[event_name] = self._merge_time_ranges(starts, ends)
                     self.logger.info(
-                        f'Event "{event_name}": {len(time_ranges_list)} ranges merged to {len(merged_ranges)}'
+                        f'Event "{event_name}": {len(starts)} ranges merged to {len(merged_ranges[event_name][0])}'
                     )
 
-                    # Query perf_sample for each merged range and aggregate by thread
-                    thread_loads = {}
-
-                    for start_time, end_time in merged_ranges:
-                        perf_query = """
-                        SELECT
-                            ps.thread_id,
-                            pt.thread_name,
-                            pt.process_id,
-                            SUM(ps.event_count) AS total_event_count
-                        FROM perf_sample ps
-                        LEFT JOIN perf_thread pt ON ps.thread_id = pt.thread_id
-                        WHERE ps.timeStamp >= ? AND ps.timeStamp <= ?
-                        GROUP BY ps.thread_id
-                        """
-
-                        cursor.execute(perf_query, [start_time, end_time])
-                        perf_rows = cursor.fetchall()
-
-                        # Accumulate event counts by thread
-                        for perf_row in perf_rows:
-                            thread_id = perf_row[0]
-                            thread_name = perf_row[1] or 'unknown'
-                            process_id = perf_row[2] or 0
-                            event_count = perf_row[3] or 0
-
-                            thread_key = (thread_id, thread_name, process_id)
-                            if thread_key not in thread_loads:
-                                thread_loads[thread_key] = 0
-                            thread_loads[thread_key] += event_count
-
-                    # Step 4: Add to statistics
-                    for (thread_id, thread_name, _process_id), total_load in thread_loads.items():
-                        self.statistics.append(
-                            {
-                                'step': step_dir,
-                                'event_name': event_name,
-                                'thread': f'{thread_name} ({thread_id})',
-                                'load': total_load,
-                            }
-                        )
-                        total_matches += 1
+                total_matches = 0
+                if merged_ranges:
+                    window_start = min(int(starts[0]) for starts, _ in merged_ranges.values())
+                    window_end = max(int(ends[-1]) for _, ends in merged_ranges.values())
+                    samples = self._load_perf_samples(conn, window_start, window_end)
+                    sample_ts = samples['ts'].to_numpy()
+                    event_counts = samples['event_count'].to_numpy()
+                    # Thread codes ascend with thread_id, matching the former GROUP BY thread_id order
+                    thread_codes, _ = pd.factorize(samples['thread_id'], sort=True, use_na_sentinel=False)
+                    thread_labels = self._thread_labels(samples, thread_codes)
+
+                    for event_name, (starts, ends) in merged_ranges.items():
+                        for code, total_load in self._sum_event_counts(
+                            sample_ts, thread_codes, event_counts, starts, ends
+                        ):
+                            self.statistics.append(
+                                {
+                                    'step': step_dir,
+                                    'event_name': event_name,
+                                    'thread': thread_labels[code],
+                                    'load': total_load,
+                                }
+                            )
+                            total_matches += 1
 
             self.logger.info(f'Analyzed {total_matches} symbol statistics for step {step_dir}')
             return {'analyzed': True, 'matches': total_matches}
 
-        except sqlite3.Error as e:
+        except (sqlite3.Error, pd.errors.DatabaseError) as e:
             self.logger.error(f'Database error in step {step_dir}: {str(e)}')
             return {'error': str(e)}
         except Exception as e:
@@ -34,6 +34,8 @@ REDUNDANCY_TYPE_LABELS = {
 class ThreadAnalyzer(BaseAnalyzer):
     """Analyzer for redundant thread analysis (wakeup chain + optimization opportunities)."""
 
+    cacheable = True
+
     def __init__(self, scene_dir: str, report_path: str = 'redundant_thread_analysis', **kwargs):
         super().__init__(scene_dir, report_path)
 
@@ -331,13 +331,13 @@ class UIAnalyzer(BaseAnalyzer):
 
         animation_regions = []
 
-        # 对每个XCompose组件进行图像比较
-        for component in xcompose_components:
+        # 一次批量比较所有XCompose组件区域（每张截图只解码一次）
+        comparison_results = self.image_comparator.compare_regions_batch(
+            screenshot1_path, screenshot2_path, [component['bounds_rect'] for component in xcompose_components]
+        )
+        for component, comparison_result in zip(xcompose_components, comparison_results):
             bounds_rect = component['bounds_rect']
 
-            # 比较该区域的图像
-            comparison_result = self.image_comparator.compare_regions(screenshot1_path, screenshot2_path, bounds_rect)
-
             if comparison_result:
                 # 如果相似度低于阈值，认为是动画
                 similarity_threshold = 85.0  # 可调整的阈值
@@ -20,6 +20,9 @@ from typing import Any, Optional
 
 from hapray.analyze.base_analyzer import BaseAnalyzer
 from hapray.core.common.frame.frame_core_analyzer import FrameAnalyzerCore
+from hapray.core.common.profiler import record_cache_stats
+from hapray.core.common.step_context import TID_TO_INFO
+from hapray.core.config.config import Config
 
 
 class UnifiedFrameAnalyzer(BaseAnalyzer):
@@ -44,6 +47,16 @@ class UnifiedFrameAnalyzer(BaseAnalyzer):
     4. 优化性能，共享缓存和数据库连接
     """
 
+    requires = (TID_TO_INFO,)
+    cacheable = True
+    step_state_attrs = (
+        'frame_loads_results',
+        'empty_frame_results',
+        'frame_drop_results',
+        'vsync_anomaly_results',
+        'rs_skip_results',
+    )
+
     def __init__(self, scene_dir: str, top_frames_count: int = 10):
         """
         初始化统一帧分析器
@@ -70,6 +83,12 @@ class UnifiedFrameAnalyzer(BaseAnalyzer):
         self.vsync_anomaly_results = {}
         self.rs_skip_results = {}
 
+    def cache_config(self) -> dict[str, Any]:
+        return {
+            'top_frames_count': self.top_frames_count,
+            'frame_analysis.disk_cache': bool(Config.get('frame_analysis.disk_cache', False)),
+        }
+
     def _analyze_impl(
         self, step_dir: str, trace_db_path: str, perf_db_path: str, app_pids: list
     ) -> Optional[dict[str, Any]]:
@@ -102,6 +121,7 @@ class UnifiedFrameAnalyzer(BaseAnalyzer):
                 perf_db_path=perf_db_path,
                 app_pids=app_pids,
                 step_dir=step_dir,
+                use_disk_cache=bool(Config.get('frame_analysis.disk_cache', False)),
             )
 
             # 1. 帧负载分析
@@ -144,8 +164,9 @@ class UnifiedFrameAnalyzer(BaseAnalyzer):
             logging.error('Unified frame analysis failed for step %s: %s', step_dir, str(e))
             return None
         finally:
-            # 关闭数据库连接
+            # 记录缓存命中率并关闭数据库连接
             if 'core_analyzer' in locals():
+                record_cache_stats('FrameCacheManager', core_analyzer.cache_manager.get_cache_hit_stats())
                 core_analyzer.close_connections()
 
     def _analyze_frame_loads(self, core_analyzer: FrameAnalyzerCore, step_dir: str) -> Optional[dict[str, Any]]:
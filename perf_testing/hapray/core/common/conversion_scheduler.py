@@ -0,0 +1,269 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import psutil
+
+from hapray.core.common.exe_utils import ExeUtils
+from hapray.core.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 自动选择并发数时的上限：trace_streamer 本身是多线程的，过多并发只会互相争抢 CPU 和磁盘
+DEFAULT_MAX_CONVERSION_WORKERS = 4
+DEFAULT_MEMORY_FACTOR = 4
+DEFAULT_MEMORY_FRACTION = 0.7
+
+
+@dataclass
+class ConversionJob:
+    """单个 trace_streamer 转换任务"""
+
+    step_dir: str
+    data_file: str
+    output_db: str
+    estimated_memory: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class StepDatabases:
+    """步骤转换完成后的数据库路径"""
+
+    step_dir: str
+    trace_db: str
+    perf_db: str
+    # 该步骤所有转换任务的执行耗时之和（不含排队等待）
+    conversion_time: float = 0.0
+
+
+def get_step_db_paths(scene_dir: str, step_dir: str) -> tuple[str, str, str, str]:
+    """获取步骤的原始数据和数据库路径
+
+    Returns:
+        (htrace_file, trace_db, perf_file, perf_db)
+    """
+    htrace_file = os.path.join(scene_dir, 'htrace', step_dir, 'trace.htrace')
+    trace_db = os.path.join(scene_dir, 'htrace', step_dir, 'trace.db')
+    perf_file = os.path.join(scene_dir, 'hiperf', step_dir, 'perf.data')
+    perf_db = os.path.join(scene_dir, 'hiperf', step_dir, 'perf.db')
+    return htrace_file, trace_db, perf_file, perf_db
+
+
+def link_perf_db_to_trace_db(step_dir: str, trace_db: str, perf_db: str):
+    """perf.db 不存在但 trace.db 存在时，创建 perf.db -> trace.db 的硬链接"""
+    if os.path.exists(perf_db) or not os.path.exists(trace_db):
+        return
+    logger.info('Creating hard link from perf_db to trace_db for %s...', step_dir)
+    os.makedirs(os.path.dirname(perf_db), exist_ok=True)
+    try:
+        os.link(trace_db, perf_db)
+        logger.info('Hard link created: %s -> %s', perf_db, trace_db)
+    except OSError as e:
+        logger.error('Failed to create hard link from %s to %s: %s', perf_db, trace_db, e)
+
+
+class MemoryGate:
+    """按估算内存占用限制并发：已占用 + 新任务 <= 预算 时才放行
+
+    按申请顺序（先到先得）放行，保证靠前步骤的转换先完成；
+    没有其他任务在运行时总是放行，避免单个超大文件永远得不到执行。
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._in_use = 0
+        self._running = 0
+        self._waiting = deque()
+        self._condition = threading.Condition()
+
+    def acquire(self, amount: int):
+        with self._condition:
+            ticket = object()
+            self._waiting.append(ticket)
+            while self._waiting[0] is not ticket or (self._running and self._in_use + amount > self.budget):
+                self._condition.wait()
+            self._waiting.popleft()
+            self._in_use += amount
+            self._running += 1
+            self._condition.notify_all()
+
+    def release(self, amount: int):
+        with self._condition:
+            self._in_use -= amount
+            self._running -= 1
+            self._condition.notify_all()
+
+
+class ConversionScheduler:
+    """trace_streamer 转换调度器
+
+    所有步骤的 trace.htrace / perf.data 转换任务在分析开始前统一排队（按步骤顺序），
+    由线程池并发执行（每个任务是一个 trace_streamer 子进程）。并发数同时受 max_workers
+    和内存预算限制：每个任务的内存估算为输入文件大小 × memory_factor，预算为空闲内存 × memory_fraction。
+
+    schedule_steps 为每个步骤返回一个 Future，该步骤的所有数据库就绪后完成，
+    调用方据此在其他步骤仍在转换时开始该步骤的分析。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        memory_factor: Optional[float] = None,
+        memory_fraction: Optional[float] = None,
+    ):
+        """初始化转换调度器，未指定的参数从 analyze.conversion 配置读取
+
+        Args:
+            max_workers: 并发转换数上限，0/None 表示自动选择
+            memory_factor: 内存估算系数（相对输入文件大小）
+            memory_fraction: 可用于转换的空闲内存比例
+        """
+        max_workers = max_workers or int(Config.get('analyze.conversion.max_workers', 0) or 0)
+        self.max_workers = max_workers or min(os.cpu_count() or 1, DEFAULT_MAX_CONVERSION_WORKERS)
+        self.memory_factor = memory_factor or float(
+            Config.get('analyze.conversion.memory_factor', DEFAULT_MEMORY_FACTOR)
+        )
+        memory_fraction = memory_fraction or float(
+            Config.get('analyze.conversion.memory_fraction', DEFAULT_MEMORY_FRACTION)
+        )
+        self.memory_budget = int(psutil.virtual_memory().available * memory_fraction)
+        self._gate = MemoryGate(self.memory_budget)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True):
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def schedule_steps(self, scene_dir: str, step_dirs: list[str]) -> dict[str, Future]:
+        """为所有步骤排队转换任务
+
+        Args:
+            scene_dir: 场景目录
+            step_dirs: 步骤目录名列表（按此顺序排队）
+
+        Returns:
+            dict: {step_dir: Future[StepDatabases]}
+        """
+        step_jobs = {step_dir: self._collect_jobs(scene_dir, step_dir) for step_dir in step_dirs}
+        job_count = sum(len(jobs) for jobs in step_jobs.values())
+        if job_count:
+            self._executor = self._executor or ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='trace-convert'
+            )
+            logger.info(
+                'Scheduling %d conversions for %d steps (max %d concurrent, memory budget %.1f MB)',
+                job_count,
+                len(step_dirs),
+                self.max_workers,
+                self.memory_budget / (1024 * 1024),
+            )
+
+        step_futures = {}
+        for step_dir, jobs in step_jobs.items():
+            _, trace_db, _, perf_db = get_step_db_paths(scene_dir, step_dir)
+            step_future = Future()
+            step_futures[step_dir] = step_future
+            if not jobs:
+                link_perf_db_to_trace_db(step_dir, trace_db, perf_db)
+                step_future.set_result(StepDatabases(step_dir, trace_db, perf_db))
+                continue
+            self._track_step(
+                step_future,
+                step_dir,
+                trace_db=trace_db,
+                perf_db=perf_db,
+                jobs=jobs,
+                job_futures=[self._submit(job) for job in jobs],
+            )
+        return step_futures
+
+    def _collect_jobs(self, scene_dir: str, step_dir: str) -> list[ConversionJob]:
+        """收集步骤需要执行的转换任务（数据库已存在时跳过）"""
+        htrace_file, trace_db, perf_file, perf_db = get_step_db_paths(scene_dir, step_dir)
+        jobs = []
+        for data_file, output_db in ((perf_file, perf_db), (htrace_file, trace_db)):
+            if os.path.exists(output_db) or not os.path.exists(data_file):
+                continue
+            estimated = int(os.path.getsize(data_file) * self.memory_factor)
+            jobs.append(ConversionJob(step_dir, data_file, output_db, estimated))
+        return jobs
+
+    def _submit(self, job: ConversionJob) -> Future:
+        return self._executor.submit(self._run_job, job)
+
+    def _run_job(self, job: ConversionJob) -> bool:
+        self._gate.acquire(job.estimated_memory)
+        try:
+            logger.info('Converting %s to db for %s...', os.path.basename(job.data_file), job.step_dir)
+            start_time = time.time()
+            success = ExeUtils.convert_data_to_db(job.data_file, job.output_db)
+            job.elapsed = time.time() - start_time
+            if success:
+                logger.info(
+                    'Conversion of %s for %s completed in %.2f seconds',
+                    os.path.basename(job.data_file),
+                    job.step_dir,
+                    job.elapsed,
+                )
+            else:
+                logger.error('Failed to convert %s to db for %s', os.path.basename(job.data_file), job.step_dir)
+            return success
+        finally:
+            self._gate.release(job.estimated_memory)
+
+    @staticmethod
+    def _track_step(
+        step_future: Future,
+        step_dir: str,
+        *,
+        trace_db: str,
+        perf_db: str,
+        jobs: list[ConversionJob],
+        job_futures: list[Future],
+    ):
+        """步骤的所有转换任务完成后（无论成败）完成步骤 Future"""
+        pending = [len(job_futures)]
+        lock = threading.Lock()
+
+        def on_job_done(_job_future: Future):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            try:
+                link_perf_db_to_trace_db(step_dir, trace_db, perf_db)
+            finally:
+                conversion_time = sum(job.elapsed for job in jobs)
+                logger.info('Data conversion phase for %s completed in %.2f seconds', step_dir, conversion_time)
+                step_future.set_result(StepDatabases(step_dir, trace_db, perf_db, conversion_time))
+
+        for job_future in job_futures:
+            job_future.add_done_callback(on_job_done)
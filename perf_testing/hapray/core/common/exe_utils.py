@@ -21,7 +21,6 @@ import shutil
 import sqlite3
 import subprocess
 import sys
-import time
 from typing import Optional, Union
 
 from hapray.core.common.common_utils import CommonUtils
@@ -549,9 +548,8 @@ class ExeUtils:
                 logger.error('Output DB file not created: %s', output_db)
                 return False
 
-            # Wait a moment for file system to flush
-            time.sleep(0.5)
-
+            # subprocess.run has returned, so trace_streamer has closed the DB; the integrity check below
+            # opens it directly instead of sleeping for the file system to settle
             # Verify database integrity
             if not ExeUtils._check_db_integrity(output_db):
                 logger.error('Generated database is corrupted: %s', output_db)
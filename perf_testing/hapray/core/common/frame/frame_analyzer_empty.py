@@ -22,6 +22,7 @@ from typing import Optional
 
 import pandas as pd
 
+from ..profiler import record_timings
 from .frame_constants import TOP_FRAMES_FOR_CALLCHAIN
 from .frame_core_cache_manager import FrameCacheManager
 from .frame_core_load_calculator import FrameLoadCalculator
@@ -606,6 +607,7 @@ class EmptyFrameAnalyzer:
             total_time: 总耗时
             timing_stats: 各阶段耗时统计
         """
+        record_timings('EmptyFrameAnalyzer', timing_stats)
         # logging.info('空帧分析总耗时: %.3f秒', total_time)
         # logging.info(
         # '各阶段耗时占比: '
@@ -820,90 +822,50 @@ class EmptyFrameAnalyzer:
         sorted_frames = sorted(non_system_frames, key=lambda x: x['frame_load'], reverse=True)
         top_n_frames = sorted_frames[:TOP_FRAMES_FOR_CALLCHAIN]
 
-        # logging.info(f'开始对Top {len(top_n_frames)}帧进行唤醒链分析...')
+        wakeup_index = self.cache_manager.get_wakeup_graph_index() if self.cache_manager else None
+        # vsync列只转换一次，供所有Top帧匹配
+        trace_vsync = pd.to_numeric(trace_df['vsync'], errors='coerce') if 'vsync' in trace_df.columns else None
 
         # 只对Top N帧进行唤醒链分析
+        batch_frames = []
+        batch_requests = []
         for frame_data in top_n_frames:
-            # 找到对应的原始帧数据
-            # 优先使用vsync匹配（如果有vsync，一定能匹配到frame_slice中的帧）
-            vsync = frame_data.get('vsync')
-            matching_frames = pd.DataFrame()  # 初始化为空DataFrame
-
-            # 确保vsync不是'unknown'字符串，并且trace_df中有vsync列
-            if vsync is not None and vsync != 'unknown' and 'vsync' in trace_df.columns:
-                try:
-                    # 确保vsync是数值类型
-                    vsync_value = int(vsync) if not isinstance(vsync, (int, float)) else vsync
-                    # 使用vsync匹配（最可靠的方式）
-                    trace_vsync = pd.to_numeric(trace_df['vsync'], errors='coerce')
-                    frame_mask = trace_vsync == vsync_value
-                    matching_frames = trace_df[frame_mask]
-                    if not matching_frames.empty:
-                        # logging.debug(f'唤醒链分析：使用vsync匹配成功: vsync={vsync_value}, ts={frame_data["ts"]}, 找到{len(matching_frames)}个匹配帧')
-                        pass
-                    else:
-                        # logging.warning(f'唤醒链分析：vsync匹配失败: vsync={vsync_value}, ts={frame_data["ts"]}')
-                        pass
-                except (ValueError, TypeError):
-                    # logging.warning(f'唤醒链分析：vsync类型转换失败: vsync={vsync}, error={e}, 使用备用匹配方式')
-                    pass
-                    matching_frames = pd.DataFrame()  # 重置为空
-
-            # 如果vsync匹配失败，使用ts、dur、tid匹配
-            if matching_frames.empty:
-                frame_mask = (
-                    (trace_df['ts'] == frame_data['ts'])
-                    & (trace_df['dur'] == frame_data['dur'])
-                    & (trace_df['tid'] == frame_data['thread_id'])
-                )
-                matching_frames = trace_df[frame_mask]
-
-            if not matching_frames.empty:
-                original_frame = matching_frames.iloc[0]
-                # 确保original_frame转换为字典格式，包含所有必要字段
-                frame_dict = original_frame.to_dict() if isinstance(original_frame, pd.Series) else original_frame
-
-                # 确保有itid字段（唤醒链分析需要）
-                # 检查itid是否存在且不是NaN（pandas的NaN值需要特殊处理）
-                frame_itid_value = frame_dict.get('itid')
-                # 检查itid是否为NaN或None
-                if 'itid' not in frame_dict or frame_itid_value is None or pd.isna(frame_itid_value):
-                    # 如果itid是NaN或不存在，尝试从tid查询
-                    tid = frame_dict.get('tid')
-                    if tid and pd.notna(tid) and trace_conn:
-                        try:
-                            cursor = trace_conn.cursor()
-                            cursor.execute('SELECT id FROM thread WHERE tid = ? LIMIT 1', (int(tid),))
-                            result = cursor.fetchone()
-                            if result:
-                                frame_dict['itid'] = result[0]
-                                # logging.debug(f'通过tid查询到itid: tid={tid}, itid={result[0]}')
-                        except Exception:
-                            # logging.warning(f'查询itid失败: tid={tid}, error={e}')
-                            pass
-                else:
-                    # 确保itid是整数类型（不是NaN）
-                    frame_dict['itid'] = int(frame_itid_value)
+            frame_dict = self._match_original_frame(frame_data, trace_df, trace_vsync)
+            if frame_dict is None:
+                frame_data['wakeup_threads'] = []
+                continue
 
+            if wakeup_index is None:
+                # 无法构建唤醒关系索引时，逐帧查询数据库
                 try:
-                    # 调用简化的唤醒链分析（只获取线程列表，不计算CPU）
-                    # logging.debug(f'开始唤醒链分析: ts={frame_data["ts"]}, tid={frame_data.get("thread_id")}, itid={frame_dict.get("itid")}, frame_dict keys={list(frame_dict.keys())[:10]}')
+                    frame_dict['itid'] = self._resolve_frame_itid(frame_dict, trace_conn)
                     wakeup_threads = self._get_related_threads_simple(frame_dict, trace_conn)
                     frame_data['wakeup_threads'] = wakeup_threads if wakeup_threads else []
-                    if not wakeup_threads:
-                        # logging.warning(f'唤醒链分析结果为空: ts={frame_data["ts"]}, tid={frame_data.get("thread_id")}, itid={frame_dict.get("itid")}, frame_dict={frame_dict}')
-                        pass
-                    else:
-                        # logging.info(f'唤醒链分析成功: ts={frame_data["ts"]}, 找到 {len(related_threads)} 个相关线程')
-                        pass
                 except Exception:
-                    # logging.warning(f'唤醒链分析失败: ts={frame_data["ts"]}, error={e}, traceback={traceback.format_exc()}')
-                    pass
                     frame_data['wakeup_threads'] = []
-            else:
-                # logging.warning(f'未找到匹配的原始帧（唤醒链）: ts={frame_data["ts"]}, dur={frame_data["dur"]}, '
-                # f'thread_id={frame_data.get("thread_id")}, trace_df中有{len(trace_df)}帧')
+                continue
+
+            frame_itid = self._resolve_frame_itid(frame_dict, trace_conn, wakeup_index)
+            if not frame_itid or pd.isna(frame_itid):
+                # 缺少itid，跳过唤醒链分析
                 frame_data['wakeup_threads'] = []
+                continue
+            batch_frames.append((frame_data, frame_itid))
+            batch_requests.append(
+                {
+                    'itid': frame_itid,
+                    'ts': frame_dict.get('ts') or frame_dict.get('start_time', 0),
+                    'app_pid': frame_dict.get('pid') or frame_dict.get('app_pid'),
+                }
+            )
+
+        # 所有Top帧共享同一个唤醒关系索引，一次性追溯唤醒链
+        if batch_requests:
+            from .frame_wakeup_chain import find_wakeup_chains_batch  # noqa: PLC0415
+
+            chains = find_wakeup_chains_batch(trace_conn, batch_requests, wakeup_index=wakeup_index)
+            for (frame_data, frame_itid), chain in zip(batch_frames, chains):
+                frame_data['wakeup_threads'] = self._build_wakeup_threads(frame_itid, chain, wakeup_index)
 
         # 对于非Top N帧，设置空的wakeup_threads
         for frame_data in frame_loads:
@@ -912,6 +874,104 @@ class EmptyFrameAnalyzer:
 
         # logging.info(f'完成Top {len(top_n_frames)}帧的唤醒链分析')
 
+    @staticmethod
+    def _match_original_frame(
+        frame_data: dict, trace_df: pd.DataFrame, trace_vsync: Optional[pd.Series]
+    ) -> Optional[dict]:
+        """找到帧负载数据对应的原始帧（优先vsync匹配，失败时使用ts、dur、tid匹配）
+
+        Returns:
+            Optional[dict]: 原始帧字典，未匹配到时返回None
+        """
+        matching_frames = pd.DataFrame()
+        vsync = frame_data.get('vsync')
+        # 确保vsync不是'unknown'字符串，并且trace_df中有vsync列
+        if vsync is not None and vsync != 'unknown' and trace_vsync is not None:
+            try:
+                # 确保vsync是数值类型
+                vsync_value = int(vsync) if not isinstance(vsync, (int, float)) else vsync
+                matching_frames = trace_df[trace_vsync == vsync_value]
+            except (ValueError, TypeError):
+                matching_frames = pd.DataFrame()
+
+        if matching_frames.empty:
+            frame_mask = (
+                (trace_df['ts'] == frame_data['ts'])
+                & (trace_df['dur'] == frame_data['dur'])
+                & (trace_df['tid'] == frame_data['thread_id'])
+            )
+            matching_frames = trace_df[frame_mask]
+
+        if matching_frames.empty:
+            return None
+        return matching_frames.iloc[0].to_dict()
+
+    @staticmethod
+    def _resolve_frame_itid(frame_dict: dict, trace_conn, wakeup_index=None):
+        """获取帧的itid；itid为NaN或不存在时通过tid查找thread.id
+
+        Returns:
+            itid，无法确定时返回原值（可能为None或NaN）
+        """
+        frame_itid = frame_dict.get('itid')
+        if frame_itid is not None and not pd.isna(frame_itid):
+            return int(frame_itid)
+
+        tid = frame_dict.get('tid')
+        if not tid or pd.isna(tid):
+            return frame_itid
+        if wakeup_index is not None:
+            thread_id = wakeup_index.resolve_thread_id(int(tid))
+            return thread_id if thread_id is not None else frame_itid
+        if trace_conn:
+            try:
+                cursor = trace_conn.cursor()
+                cursor.execute('SELECT id FROM thread WHERE tid = ? LIMIT 1', (int(tid),))
+                result = cursor.fetchone()
+                if result:
+                    return result[0]
+            except Exception:
+                pass
+        return frame_itid
+
+    @staticmethod
+    def _build_wakeup_threads(frame_itid: int, related_itids_ordered: list, wakeup_index) -> list:
+        """根据唤醒链和唤醒关系索引中的线程信息构建wakeup_threads
+
+        Args:
+            frame_itid: 帧所在线程的itid
+            related_itids_ordered: [(itid, depth), ...]，按唤醒链顺序
+            wakeup_index: 唤醒关系索引
+
+        Returns:
+            线程列表（按唤醒链顺序）
+        """
+        # 确保至少包含当前帧的线程
+        if frame_itid not in {itid for itid, _ in related_itids_ordered}:
+            related_itids_ordered.insert(0, (frame_itid, 0))
+
+        # 注意：使用 thread_id 而不是 tid，以保持与 sample_callchains 中字段命名的一致性
+        wakeup_threads = []
+        for itid, depth in related_itids_ordered:
+            thread_info = wakeup_index.get_thread_info(itid)
+            if not thread_info:
+                continue
+            raw_name = thread_info['thread_name']
+            if raw_name is None or not str(raw_name).strip():
+                continue
+            wakeup_threads.append(
+                {
+                    'itid': itid,
+                    'thread_id': thread_info['tid'],
+                    'thread_name': str(raw_name).strip(),
+                    'pid': thread_info['pid'],
+                    'process_name': thread_info['process_name'],
+                    'is_system_thread': thread_info['is_system_thread'],
+                    'wakeup_depth': depth,
+                }
+            )
+        return wakeup_threads
+
     def _get_related_threads_simple(self, frame, trace_conn) -> list:
         """获取帧相关的线程列表（简化版唤醒链分析）
 
@@ -1896,7 +1956,7 @@ class EmptyFrameAnalyzer:
             recalc_start = time.time()
 
             # 注意：不使用时间扩展（±1ms），与 frame_load 计算保持一致
-            # 在 _calculate_all_frame_loads_batch 中已经移除了时间扩展，避免负载偏高
+            # 在 _calculate_process_level_loads 中已经移除了时间扩展，避免负载偏高
             # 因此去重计算也应该使用原始时间范围，确保一致性
 
             # 优化：合并4次查询为1次，在应用层分组计算
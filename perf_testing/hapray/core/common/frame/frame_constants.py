@@ -58,6 +58,10 @@ PERF_DB_SIZE_ERROR_MB = 1000  # 性能数据库大小错误阈值（MB）
 PERF_RECORDS_WARNING = 1_000_000  # 性能记录数警告阈值
 PERF_RECORDS_ERROR = 5_000_000  # 性能记录数错误阈值
 
+# ==================== 磁盘缓存 ====================
+FRAME_DISK_CACHE_DIRNAME = '.hapray_frame_cache'  # 磁盘缓存目录名（位于数据库所在目录下）
+FRAME_DISK_CACHE_VERSION = 1  # 查询/标准化逻辑变化时递增，使旧缓存失效
+
 # ==================== 分析配置 ====================
 TOP_FRAMES_FOR_CALLCHAIN = 10  # 进行调用链分析的Top帧数量
 HIGH_LOAD_THRESHOLD = 80  # 高负载帧阈值（百分比）
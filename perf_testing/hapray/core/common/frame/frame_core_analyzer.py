@@ -52,6 +52,8 @@ class FrameAnalyzerCore:
         perf_db_path: Optional[str] = None,
         app_pids: Optional[list] = None,
         step_dir: Optional[str] = None,
+        *,
+        use_disk_cache: bool = False,
     ):
         """
         初始化FrameAnalyzerCore
@@ -62,6 +64,7 @@ class FrameAnalyzerCore:
             perf_db_path: perf数据库文件路径
             app_pids: 应用进程ID列表
             step_dir: 步骤标识符
+            use_disk_cache: 是否启用查询结果的磁盘缓存
         """
         # 保存数据库路径和参数
         self.trace_db_path = trace_db_path
@@ -70,7 +73,7 @@ class FrameAnalyzerCore:
         self.step_dir = step_dir
 
         # 初始化缓存管理器（包含数据库连接初始化）
-        self.cache_manager = FrameCacheManager(trace_db_path, perf_db_path, app_pids)
+        self.cache_manager = FrameCacheManager(trace_db_path, perf_db_path, app_pids, use_disk_cache=use_disk_cache)
 
         # 初始化各个专门的分析器
         self.load_calculator = FrameLoadCalculator(debug_vsync_enabled, self.cache_manager)
@@ -176,8 +179,7 @@ class FrameAnalyzerCore:
             frame_loads = self.load_calculator.calculate_all_frame_loads_fast(trace_df, perf_df)
 
             # 阶段3：保存到缓存
-            for frame_load in frame_loads:
-                self.cache_manager.add_frame_load(frame_load)
+            self.cache_manager.add_frame_loads(frame_loads)
 
             # 阶段4：获取统计信息
             statistics = self.cache_manager.get_frame_load_statistics()
@@ -22,6 +22,8 @@ from typing import Any, Callable, Optional
 
 import pandas as pd
 
+from .. import profiler
+from ..step_context import TID_TO_INFO, StepContext, load_tid_to_info
 from .frame_constants import (
     HIGH_LOAD_THRESHOLD,
     PERF_DB_SIZE_ERROR_MB,
@@ -32,6 +34,7 @@ from .frame_constants import (
     PROCESS_TYPE_SCENEBOARD,
     PROCESS_TYPE_UI,
 )
+from .frame_disk_cache import FrameDiskCache
 from .frame_perf_accessor import FramePerfAccessor
 from .frame_trace_accessor import FrameTraceAccessor
 from .frame_utils import clean_frame_data, validate_app_pids
@@ -211,17 +214,26 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
             logging.warning('检查trace.db中的perf表失败: %s', str(e))
             return False
 
-    def __init__(self, trace_db_path: str = None, perf_db_path: str = None, app_pids: list = None):
+    def __init__(
+        self,
+        trace_db_path: str = None,
+        perf_db_path: str = None,
+        app_pids: list = None,
+        *,
+        use_disk_cache: bool = False,
+    ):
         """初始化FrameCacheManager
 
         Args:
             trace_db_path: trace数据库文件路径
             perf_db_path: perf数据库文件路径
             app_pids: 应用进程ID列表
+            use_disk_cache: 是否启用磁盘列式缓存（帧、perf采样、调用链、文件数据）
         """
         self.trace_db_path = trace_db_path
         self.perf_db_path = perf_db_path
         self.app_pids = app_pids if app_pids is not None else []
+        self.disk_cache = FrameDiskCache(enabled=use_disk_cache)
 
         # 建立数据库连接
         self.trace_conn: Optional[sqlite3.Connection] = None
@@ -229,7 +241,7 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
 
         if trace_db_path and os.path.exists(trace_db_path):
             try:
-                self.trace_conn = sqlite3.connect(trace_db_path)
+                self.trace_conn = profiler.connect(trace_db_path)
             except Exception as e:
                 logging.error('建立trace数据库连接失败: %s', str(e))
 
@@ -237,7 +249,7 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
             try:
                 # 检查性能数据库文件大小
                 self._check_perf_db_size(perf_db_path)
-                self.perf_conn = sqlite3.connect(perf_db_path)
+                self.perf_conn = profiler.connect(perf_db_path)
             except Exception as e:
                 logging.error('建立perf数据库连接失败: %s', str(e))
         elif self.trace_conn and self._trace_db_has_perf_tables():
@@ -252,6 +264,7 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         # 性能优化：为热点表建立索引（幂等）。trace.db/perf.db 由 trace_streamer 生成时不带索引，
         # 导致唤醒链、帧负载、调用链等逐线程/逐帧查询退化为全表扫描（instant/thread_state/
         # perf_callchain 均为百万级）。建索引后这些查询走索引，是两大瓶颈提速的基础。
+        # 建索引会修改数据库文件，必须在磁盘缓存首次计算指纹（首次查询）之前完成，否则下次运行必然未命中。
         ensure_perf_trace_indexes(self.trace_conn)
         if self.perf_conn is not None and self.perf_conn is not self.trace_conn:
             ensure_perf_trace_indexes(self.perf_conn)
@@ -273,6 +286,7 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         self._frames_cache = None
         self._perf_samples_cache = None
         self._first_frame_timestamp_cache = None
+        self._wakeup_graph_index_cache = None
 
         # 缓存命中率统计
         self._cache_hit_stats = {
@@ -310,7 +324,12 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
             logging.warning('trace_conn未建立，无法获取帧数据')
             return pd.DataFrame()
         # 获取所有数据，不进行 app_pids 过滤
-        frames_df = FrameTraceAccessor.get_frames_data(self, app_pids=None)
+        frames_df = self.disk_cache.get_or_load(
+            'frames',
+            self.trace_db_path,
+            self.app_pids,
+            lambda: FrameTraceAccessor.get_frames_data(self, app_pids=None),
+        )
         # 更新PID和TID缓存
         pids, tids = FrameTraceAccessor.extract_pid_tid_info(frames_df)
         self._pid_cache = pids
@@ -352,7 +371,9 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         if not self.perf_conn:
             logging.warning('perf_conn未建立，无法获取性能采样数据')
             return pd.DataFrame()
-        return FramePerfAccessor.get_perf_samples(self)
+        return self.disk_cache.get_or_load(
+            'perf_samples', self.perf_db_path, self.app_pids, lambda: FramePerfAccessor.get_perf_samples(self)
+        )
 
     @cached('_callchain_cache', 'callchain')
     def get_callchain_cache(self) -> pd.DataFrame:
@@ -366,7 +387,9 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         if not self.perf_conn:
             logging.warning('perf_conn未建立，无法获取调用链缓存')
             return pd.DataFrame()
-        return FramePerfAccessor.get_callchain_cache(self)
+        return self.disk_cache.get_or_load(
+            'callchain', self.perf_db_path, self.app_pids, lambda: FramePerfAccessor.get_callchain_cache(self)
+        )
 
     @cached('_files_cache', 'files')
     def get_files_cache(self) -> pd.DataFrame:
@@ -380,7 +403,9 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         if not self.perf_conn:
             logging.warning('perf_conn未建立，无法获取文件缓存')
             return pd.DataFrame()
-        return FramePerfAccessor.get_files_cache(self)
+        return self.disk_cache.get_or_load(
+            'files', self.perf_db_path, self.app_pids, lambda: FramePerfAccessor.get_files_cache(self)
+        )
 
     def get_callchain_index(self) -> dict:
         """获取 {callchain_id: [record_dict, ...]} 索引（带缓存）。
@@ -431,6 +456,24 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         self._files_index_cache = index
         return index
 
+    def get_wakeup_graph_index(self):
+        """获取 trace.db 的唤醒关系索引（带缓存，每个 trace.db 只构建一次）
+
+        Returns:
+            Optional[WakeupGraphIndex]: trace_conn 未建立或构建失败时返回 None
+        """
+        if self._wakeup_graph_index_cache is not None:
+            return self._wakeup_graph_index_cache
+        if not self.trace_conn:
+            return None
+        from .frame_wakeup_chain import WakeupGraphIndex  # noqa: PLC0415
+
+        try:
+            self._wakeup_graph_index_cache = WakeupGraphIndex.build(self.trace_conn)
+        except Exception as e:
+            logging.warning('构建唤醒关系索引失败: %s', str(e))
+        return self._wakeup_graph_index_cache
+
     @cached('_tid_to_info_cache', 'tid_to_info')
     def get_tid_to_info(self) -> dict:
         """获取tid到线程信息的映射（带缓存）
@@ -442,27 +485,11 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         Returns:
             dict: {tid: {'thread_name': str, 'process_name': str}} 的字典
         """
-        if not self.trace_conn:
-            logging.warning('trace_conn未建立，无法获取线程信息')
-            return {}
-
-        tid_to_info = {}
-        try:
-            trace_cursor = self.trace_conn.cursor()
-            # 查询所有线程信息，不仅限于应用进程
-            # 因为perf_sample可能包含系统线程或其他进程的线程
-            trace_cursor.execute("""
-                SELECT DISTINCT t.tid, t.name as thread_name, p.name as process_name
-                FROM thread t
-                INNER JOIN process p ON t.ipid = p.ipid
-            """)
-
-            for tid, thread_name, process_name in trace_cursor.fetchall():
-                tid_to_info[tid] = {'thread_name': thread_name, 'process_name': process_name}
-        except Exception as e:
-            logging.warning('查询线程信息失败: %s', str(e))
-
-        return tid_to_info
+        # 分析器调度器为本步骤构建了共享数据集时直接复用，避免各分析器重复查询
+        context = StepContext.current()
+        if context is not None and context.trace_db_path == self.trace_db_path:
+            return context.get(TID_TO_INFO)
+        return load_tid_to_info(self.trace_conn)
 
     def get_total_load_for_pids(self, app_pids: list[int], time_ranges: Optional[list[tuple[int, int]]] = None) -> int:
         """获取指定进程的总负载（重写父类方法，使用trace_conn关联thread表）
@@ -1101,6 +1128,20 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
 
         self._frame_loads_cache.insert(insert_pos, cleaned_data)
 
+    def add_frame_loads(self, frame_loads: list) -> None:
+        """批量添加帧负载数据到缓存
+
+        结果顺序与逐条调用 add_frame_load 相同（按帧负载降序，负载相同时后添加的在前），
+        但只排序一次，避免逐条插入的 O(n^2) 开销。
+
+        Args:
+            frame_loads: 帧负载数据列表
+        """
+        cleaned_loads = [clean_frame_data(frame_load_data) for frame_load_data in frame_loads]
+        merged = cleaned_loads[::-1] + self._frame_loads_cache
+        merged.sort(key=lambda item: item.get('frame_load', 0), reverse=True)
+        self._frame_loads_cache = merged
+
     def get_frame_loads(self) -> list:
         """获取所有帧负载数据
 
@@ -1167,6 +1208,7 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
         self._tid_cache = None
         self._frame_loads_cache.clear()
         self._first_frame_timestamp_cache = None
+        self._wakeup_graph_index_cache = None
         # 重置缓存命中率统计
         self.reset_cache_hit_stats()
 
@@ -1235,6 +1277,9 @@ class FrameCacheManager(FramePerfAccessor, FrameTraceAccessor):  # pylint: disab
             'total_requests': total_requests,
             'hit_rate_percent': round(overall_hit_rate, 2),
         }
+        # 磁盘缓存命中情况（仅启用磁盘缓存时统计）
+        if self.disk_cache.enabled:
+            stats['disk'] = dict(self.disk_cache.stats)
 
         return stats
 
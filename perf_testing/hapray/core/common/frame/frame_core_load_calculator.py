@@ -22,6 +22,7 @@ import traceback
 from collections import defaultdict
 from typing import TYPE_CHECKING, Any, Optional
 
+import numpy as np
 import pandas as pd
 
 from .frame_constants import (
@@ -354,6 +355,48 @@ def calculate_process_instructions(
         return 0, 0
 
 
+# ============================================================================
+# 区间连接工具函数（帧窗口 × perf采样）
+# ============================================================================
+
+
+def build_sample_prefix_index(timestamps: np.ndarray, event_counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """按时间戳排序采样并构建 event_count 前缀和
+
+    Args:
+        timestamps: 采样时间戳数组
+        event_counts: 采样 event_count 数组（与 timestamps 一一对应）
+
+    Returns:
+        (sorted_timestamps, prefix)，prefix[k] 为前 k 个采样的 event_count 之和，长度为采样数 + 1
+    """
+    order = np.argsort(timestamps, kind='stable')
+    prefix = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(event_counts[order], out=prefix[1:])
+    return timestamps[order], prefix
+
+
+def sum_samples_in_windows(
+    sorted_timestamps: np.ndarray, prefix: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> np.ndarray:
+    """对每个闭区间 [start, end] 求区间内采样的 event_count 之和（两次 searchsorted + 前缀和相减）"""
+    lo = np.searchsorted(sorted_timestamps, starts, side='left')
+    hi = np.searchsorted(sorted_timestamps, ends, side='right')
+    return np.maximum(prefix[hi] - prefix[lo], 0)
+
+
+def _frame_windows(frames: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """帧时间窗口 [ts, ts + dur]；ts/dur 为NaN的帧返回空窗口（start > end）"""
+    ts = pd.to_numeric(frames['ts'], errors='coerce')
+    dur = pd.to_numeric(frames['dur'], errors='coerce')
+    invalid = (ts.isna() | dur.isna()).to_numpy()
+    starts = ts.fillna(0).to_numpy(dtype=np.int64)
+    ends = starts + dur.fillna(0).to_numpy(dtype=np.int64)
+    starts[invalid] = 1
+    ends[invalid] = 0
+    return starts, ends
+
+
 class FrameLoadCalculator:
     """帧负载计算器
 
@@ -804,8 +847,7 @@ class FrameLoadCalculator:
     def calculate_all_frame_loads_fast(self, frames: pd.DataFrame, perf_df: pd.DataFrame) -> list[dict[str, Any]]:
         """快速计算所有帧的负载值，不分析调用链
 
-        注意：如果启用了进程级CPU计算，将使用数据库查询而不是perf_df
-        优化：使用批量查询，一次性获取所有帧的perf_sample数据，在内存中按帧分组计算
+        基于 calculate_frame_loads_columnar 的列式结果，转换为逐帧字典列表（兼容 add_frame_load 等下游接口）
 
         Args:
             frames: 帧数据DataFrame
@@ -814,7 +856,30 @@ class FrameLoadCalculator:
         Returns:
             List[Dict]: 帧负载数据列表
         """
-        frame_loads = []
+        frame_load_table = self.calculate_frame_loads_columnar(frames, perf_df)
+        frame_loads = frame_load_table.to_dict('records')
+        for frame_load in frame_loads:
+            frame_load['sample_callchains'] = []  # 空列表，不保存调用链
+        return frame_loads
+
+    def calculate_frame_loads_columnar(self, frames: pd.DataFrame, perf_df: pd.DataFrame) -> pd.DataFrame:
+        """区间连接计算所有帧的负载，返回列式帧负载表
+
+        将perf采样按线程/进程排序并构建 event_count 前缀和，对所有帧窗口一次性 searchsorted，
+        每帧负载 = 前缀和[窗口右端] - 前缀和[窗口左端]，不再逐帧遍历或逐帧查询数据库。
+
+        注意：如果启用了进程级CPU计算，采样从数据库批量查询（所有app_pids的线程，含系统线程）；
+        否则使用perf_df按帧所在线程统计。
+
+        Args:
+            frames: 帧数据DataFrame
+            perf_df: perf样本DataFrame
+
+        Returns:
+            pd.DataFrame: 帧负载表，列与 calculate_all_frame_loads_fast 的字典字段一致（不含 sample_callchains）
+        """
+        if frames is None or frames.empty:
+            return self._build_frame_load_table(pd.DataFrame(), np.zeros(0, dtype=np.int64))
 
         # 检查是否使用进程级CPU计算
         use_process_level = (
@@ -825,117 +890,50 @@ class FrameLoadCalculator:
             and self.cache_manager.app_pids
         )
 
+        loads = None
         if use_process_level:
             app_pids = self.cache_manager.app_pids
             logging.info(f'使用进程级CPU计算（PIDs={app_pids}），共{len(frames)}帧')
-
-            # 优化：使用批量查询方法
             try:
-                frame_loads = self._calculate_all_frame_loads_batch(frames, app_pids)
-                logging.info(f'批量查询完成，共计算{len(frame_loads)}帧的负载')
-                return frame_loads
+                loads = self._calculate_process_level_loads(frames, app_pids)
+                if loads is None:
+                    logging.warning('未找到进程的线程，返回空结果')
+                    return self._build_frame_load_table(frames.iloc[0:0], np.zeros(0, dtype=np.int64))
+                logging.info(f'批量区间连接完成，共计算{len(loads)}帧的负载')
             except Exception as e:
-                logging.warning(f'批量查询失败，回退到逐帧查询: {e}')
-                # 回退到原有的逐帧查询方法
-                pass
+                logging.warning(f'进程级批量计算失败，回退到单线程计算: {e}')
+                loads = None
         else:
             logging.info(f'使用单线程CPU计算，共{len(frames)}帧')
 
-        # 批量计算开始（原有方法或回退方法）
-        for i, (_, frame) in enumerate(frames.iterrows()):
-            # 根据配置选择计算方法
-            if use_process_level:
-                try:
-                    # 计算所有app_pids的CPU总和（支持ArkWeb的多进程架构）
-                    frame_load = self.calculate_frame_load_multi_process(
-                        frame, self.cache_manager.trace_conn, self.cache_manager.perf_conn, app_pids
-                    )
-                except Exception as e:
-                    if i < 5:  # 只记录前5个错误，避免日志过多
-                        logging.warning(f'帧{i}进程级CPU计算失败，回退到单线程: {e}')
-                    frame_load = self._calculate_single_thread_load(frame, perf_df)
-            else:
-                # 使用单线程计算（快速但不准确）
-                frame_load = self._calculate_single_thread_load(frame, perf_df)
-
-            # 检查并记录NaN值
-            nan_fields = []
-            if pd.isna(frame['ts']):
-                nan_fields.append('ts')
-            if pd.isna(frame['dur']):
-                nan_fields.append('dur')
-            if pd.isna(frame['tid']):
-                nan_fields.append('tid')
-            if pd.isna(frame.get('type')):
-                nan_fields.append('type')
-            if pd.isna(frame.get('flag')):
-                nan_fields.append('flag')
-            if pd.isna(frame.get('is_main_thread')):
-                nan_fields.append('is_main_thread')
-
-            if nan_fields:
-                logging.warning(
-                    '帧数据包含NaN值，字段: %s, 索引: %d, 进程: %s, 线程: %s',
-                    ', '.join(nan_fields),
-                    i,
-                    frame.get('process_name', 'unknown'),
-                    frame.get('thread_name', 'unknown'),
-                )
+        if loads is None:
+            loads = self._calculate_thread_level_loads(frames, perf_df)
 
-            # 确保时间戳字段正确，处理NaN值
-            # 注意：一帧是针对整个进程的，不是某个线程，因此不保存thread_id
-            # 每个sample_callchain都有自己的thread_id
-            # 处理thread_name和callstack_id的NaN值
-            thread_name = frame.get('thread_name', '')
-            if pd.isna(thread_name):
-                thread_name = ''
-            callstack_id = frame.get('callstack_id')
-            if pd.isna(callstack_id):
-                callstack_id = None
-
-            frame_loads.append(
-                {
-                    'ts': int(frame['ts']) if pd.notna(frame['ts']) else 0,  # 确保时间戳是整数
-                    'dur': int(frame['dur']) if pd.notna(frame['dur']) else 0,  # 确保持续时间是整数
-                    'frame_load': frame_load,
-                    'thread_id': int(frame['tid']) if pd.notna(frame['tid']) else 0,  # 添加thread_id字段，用于帧匹配
-                    'thread_name': thread_name,  # 线程名称（用于JSON输出）
-                    'empty_frame_thread': thread_name,  # 空刷产生的线程（区分sample_callchains中的thread_name，保持向后兼容）
-                    'callstack_id': callstack_id,  # 调用栈ID（用于JSON输出）
-                    'process_name': frame.get('process_name', 'unknown'),
-                    'type': int(frame.get('type', 0)) if pd.notna(frame.get('type')) else 0,  # 确保类型是整数
-                    'vsync': frame.get('vsync', 'unknown'),
-                    'flag': int(frame.get('flag', 0)) if pd.notna(frame.get('flag')) else 0,  # 确保flag是整数
-                    'is_main_thread': int(frame.get('is_main_thread', 0))
-                    if pd.notna(frame.get('is_main_thread'))
-                    else 0,  # 确保主线程标志是整数
-                    'sample_callchains': [],  # 空列表，不保存调用链
-                }
-            )
+        self._log_nan_frames(frames)
+        return self._build_frame_load_table(frames, loads)
 
-        return frame_loads
-
-    def _calculate_all_frame_loads_batch(self, frames: pd.DataFrame, app_pids: list[int]) -> list[dict[str, Any]]:
-        """批量计算所有帧的负载（优化方法：一次性查询所有perf_sample数据）
+    def _calculate_process_level_loads(self, frames: pd.DataFrame, app_pids: list[int]) -> Optional[np.ndarray]:
+        """进程级负载：一次性查询所有app_pids线程的perf_sample，按帧窗口区间求和
 
         Args:
             frames: 帧数据DataFrame
             app_pids: 应用进程ID列表
 
         Returns:
-            List[Dict]: 帧负载数据列表
+            Optional[np.ndarray]: 每帧负载；未找到进程线程时返回None
         """
-        if frames.empty:
-            return []
-
         trace_conn = self.cache_manager.trace_conn
         perf_conn = self.cache_manager.perf_conn
 
-        # 步骤1：计算所有帧的时间范围（不使用时间扩展，避免负载偏高）
-        min_ts = int(frames['ts'].min())
-        max_ts = int((frames['ts'] + frames['dur']).max())
+        # 步骤1：计算所有帧的时间窗口（不使用时间扩展，避免负载偏高）
+        starts, ends = _frame_windows(frames)
+        valid = starts <= ends
+        if not valid.any():
+            return np.zeros(len(frames), dtype=np.int64)
+        min_ts = int(starts[valid].min())
+        max_ts = int(ends[valid].max())
 
-        # 步骤2：一次性获取所有进程的线程ID，并建立PID到线程ID的映射
+        # 步骤2：一次性获取所有进程的线程ID
         trace_cursor = trace_conn.cursor()
         placeholders = ','.join('?' * len(app_pids))
         trace_cursor.execute(
@@ -947,31 +945,31 @@ class FrameLoadCalculator:
         """,
             app_pids,
         )
-
-        # 建立PID到线程ID列表的映射
-        pid_to_threads = defaultdict(list)
-        all_thread_tids = set()
+        pid_to_threads = defaultdict(set)
         for pid, tid in trace_cursor.fetchall():
-            pid_to_threads[pid].append(tid)
-            all_thread_tids.add(tid)
+            pid_to_threads[pid].add(tid)
 
-        if not all_thread_tids:
-            logging.warning('未找到进程的线程，返回空结果')
-            return []
+        # 同一 tid 可能属于多个 pid（tid 复用），app_pids 也可能重复：按出现次数加权，与逐进程累加等价
+        tid_weights: dict[int, int] = defaultdict(int)
+        for pid in app_pids:
+            for tid in pid_to_threads.get(pid, ()):
+                tid_weights[tid] += 1
+        if not tid_weights:
+            return None
 
-        # 步骤3：获取线程信息（用于区分系统线程）
-        self.cache_manager.get_tid_to_info() if self.cache_manager else {}
+        # 步骤3：获取线程信息（预热缓存，供后续调用链分析区分系统线程）
+        self.cache_manager.get_tid_to_info()
 
         # 步骤4：一次性查询所有线程在时间范围内的perf_sample数据
         perf_cursor = perf_conn.cursor()
-
-        # 检查perf_sample表的时间戳字段名
         perf_cursor.execute('PRAGMA table_info(perf_sample)')
         columns = [row[1] for row in perf_cursor.fetchall()]
         timestamp_field = 'timestamp_trace' if 'timestamp_trace' in columns else 'timeStamp'
 
-        thread_placeholders = ','.join('?' * len(all_thread_tids))
-        batch_query = f"""
+        thread_tids = list(tid_weights)
+        thread_placeholders = ','.join('?' * len(thread_tids))
+        samples = pd.read_sql_query(
+            f"""
             SELECT
                 ps.thread_id,
                 ps.{timestamp_field} as ts,
@@ -979,81 +977,106 @@ class FrameLoadCalculator:
             FROM perf_sample ps
             WHERE ps.thread_id IN ({thread_placeholders})
             AND ps.{timestamp_field} >= ? AND ps.{timestamp_field} <= ?
-        """
-        params = list(all_thread_tids) + [min_ts, max_ts]
-        perf_cursor.execute(batch_query, params)
-
-        # 步骤5：在内存中构建perf_sample索引（按thread_id和时间戳）
-        # 使用字典存储：{thread_id: [(ts, event_count), ...]}
-        perf_samples_by_thread = defaultdict(list)
-        for thread_id, ts, event_count in perf_cursor.fetchall():
-            perf_samples_by_thread[thread_id].append((ts, event_count))
-
-        # 性能优化：在帧循环之前，对每个线程一次性预建「排序时间戳数组 + event_count 前缀和」。
-        # 之前的实现对每个 (帧 × pid × 线程) 都重建 timestamps 列表并用 sum(range) 求区间和，
-        # 复杂度 O(帧数 × 线程数 × 样本数)。改为预建后，每帧每线程仅需两次二分 + 一次前缀和相减（O(1)）。
-        # 计算结果完全等价（同样是时间范围内 event_count 之和），无任何精度损失。
-        thread_ts_index: dict[int, tuple[list, list]] = {}
-        for thread_id, samples in perf_samples_by_thread.items():
-            samples.sort(key=lambda x: x[0])
-            timestamps = [s[0] for s in samples]
-            prefix = [0] * (len(samples) + 1)
-            for k, (_ts, ec) in enumerate(samples):
-                prefix[k + 1] = prefix[k] + ec
-            thread_ts_index[thread_id] = (timestamps, prefix)
-
-        # 步骤6：对每个帧计算负载（在内存中分组计算）
-        frame_loads = []
-        for _i, (_, frame) in enumerate(frames.iterrows()):
-            frame_start = int(frame['ts'])
-            frame_end = int(frame['ts']) + int(frame['dur'])
-            # 注意：不使用时间扩展，直接使用原始时间范围，避免负载偏高
-
-            total_load = 0
-
-            # 对每个进程分别计算（使用预加载的PID到线程映射）
-            for pid in app_pids:
-                pid_thread_tids = pid_to_threads.get(pid, [])
-
-                # 计算该进程所有线程的负载
-                for thread_id in pid_thread_tids:
-                    idx = thread_ts_index.get(thread_id)
-                    if not idx:
-                        continue
+        """,
+            perf_conn,
+            params=thread_tids + [min_ts, max_ts],
+        )
 
-                    # 使用二分查找定位时间范围，前缀和 O(1) 求区间内 event_count 之和
-                    timestamps, prefix = idx
-                    start_idx = bisect.bisect_left(timestamps, frame_start)
-                    end_idx = bisect.bisect_right(timestamps, frame_end)
-                    total_load += prefix[end_idx] - prefix[start_idx]
-
-            # 构建帧负载数据
-            # 处理thread_name和callstack_id的NaN值
-            thread_name = frame.get('thread_name', '')
-            if pd.isna(thread_name):
-                thread_name = ''
-            callstack_id = frame.get('callstack_id')
-            if pd.isna(callstack_id):
-                callstack_id = None
-
-            frame_loads.append(
-                {
-                    'ts': int(frame['ts']) if pd.notna(frame['ts']) else 0,
-                    'dur': int(frame['dur']) if pd.notna(frame['dur']) else 0,
-                    'frame_load': int(total_load),
-                    'thread_id': int(frame['tid']) if pd.notna(frame['tid']) else 0,
-                    'thread_name': thread_name,  # 线程名称（用于JSON输出）
-                    'empty_frame_thread': thread_name,  # 空刷产生的线程（区分sample_callchains中的thread_name，保持向后兼容）
-                    'callstack_id': callstack_id,  # 调用栈ID（用于JSON输出）
-                    'process_name': frame.get('process_name', 'unknown'),
-                    'type': int(frame.get('type', 0)) if pd.notna(frame.get('type')) else 0,
-                    'vsync': frame.get('vsync', 'unknown'),
-                    'flag': int(frame.get('flag', 0)) if pd.notna(frame.get('flag')) else 0,
-                    'is_main_thread': int(frame.get('is_main_thread', 0))
-                    if pd.notna(frame.get('is_main_thread'))
-                    else 0,
-                    'sample_callchains': [],
-                }
+        # 步骤5：所有线程的采样合并为一条按时间排序的数组 + 加权前缀和，对所有帧一次性区间求和
+        weights = samples['thread_id'].map(tid_weights).fillna(0).to_numpy(dtype=np.int64)
+        event_counts = samples['event_count'].fillna(0).to_numpy(dtype=np.int64) * weights
+        sorted_ts, prefix = build_sample_prefix_index(samples['ts'].to_numpy(dtype=np.int64), event_counts)
+        loads = sum_samples_in_windows(sorted_ts, prefix, starts, ends)
+        loads[~valid] = 0
+        return loads
+
+    @staticmethod
+    def _calculate_thread_level_loads(frames: pd.DataFrame, perf_df: pd.DataFrame) -> np.ndarray:
+        """单线程负载：按帧所在线程，对该线程的perf采样做区间求和
+
+        Args:
+            frames: 帧数据DataFrame，需包含 'ts', 'dur', 'tid'
+            perf_df: perf样本DataFrame，需包含 'thread_id', 'timestamp_trace', 'event_count'
+
+        Returns:
+            np.ndarray: 每帧负载
+        """
+        loads = np.zeros(len(frames), dtype=np.int64)
+        required = {'thread_id', 'timestamp_trace', 'event_count'}
+        if perf_df is None or perf_df.empty or not required.issubset(perf_df.columns) or 'tid' not in frames:
+            return loads
+
+        samples = perf_df.dropna(subset=['thread_id', 'timestamp_trace'])
+        sample_groups = samples.groupby('thread_id', sort=False).indices
+        sample_ts = samples['timestamp_trace'].to_numpy(dtype=np.int64)
+        sample_counts = samples['event_count'].fillna(0).to_numpy(dtype=np.int64)
+
+        starts, ends = _frame_windows(frames)
+        frame_tids = pd.to_numeric(frames['tid'], errors='coerce').reset_index(drop=True)
+        for tid, frame_positions in frame_tids.groupby(frame_tids).indices.items():
+            sample_positions = sample_groups.get(tid)
+            if sample_positions is None:
+                continue
+            sorted_ts, prefix = build_sample_prefix_index(sample_ts[sample_positions], sample_counts[sample_positions])
+            loads[frame_positions] = sum_samples_in_windows(
+                sorted_ts, prefix, starts[frame_positions], ends[frame_positions]
             )
 
-        return frame_loads
+        loads[starts > ends] = 0
+        return loads
+
+    @staticmethod
+    def _build_frame_load_table(frames: pd.DataFrame, loads: np.ndarray) -> pd.DataFrame:
+        """根据帧数据和负载数组构建列式帧负载表（处理NaN值，整数字段统一为int）
+
+        注意：一帧是针对整个进程的，不是某个线程，因此 thread_id 仅用于帧匹配，
+        每个sample_callchain都有自己的thread_id
+        """
+        row_count = len(frames)
+
+        def int_column(name: str) -> np.ndarray:
+            if name not in frames:
+                return np.zeros(row_count, dtype=np.int64)
+            return pd.to_numeric(frames[name], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+        def raw_column(name: str, default: Any) -> np.ndarray:
+            if name not in frames:
+                return np.full(row_count, default, dtype=object)
+            return frames[name].to_numpy(dtype=object)
+
+        thread_name = frames['thread_name'].fillna('') if 'thread_name' in frames else pd.Series([''] * row_count)
+        thread_name = thread_name.to_numpy(dtype=object)
+        if 'callstack_id' in frames:
+            callstack_id = frames['callstack_id'].astype(object).where(frames['callstack_id'].notna(), None)
+            callstack_id = callstack_id.to_numpy(dtype=object)
+        else:
+            callstack_id = np.full(row_count, None, dtype=object)
+
+        return pd.DataFrame(
+            {
+                'ts': int_column('ts'),  # 确保时间戳是整数
+                'dur': int_column('dur'),  # 确保持续时间是整数
+                'frame_load': np.asarray(loads, dtype=np.int64),
+                'thread_id': int_column('tid'),  # 用于帧匹配
+                'thread_name': thread_name,  # 线程名称（用于JSON输出）
+                'empty_frame_thread': thread_name,  # 空刷产生的线程（区分sample_callchains中的thread_name，保持向后兼容）
+                'callstack_id': callstack_id,  # 调用栈ID（用于JSON输出）
+                'process_name': raw_column('process_name', 'unknown'),
+                'type': int_column('type'),
+                'vsync': raw_column('vsync', 'unknown'),
+                'flag': int_column('flag'),
+                'is_main_thread': int_column('is_main_thread'),
+            }
+        )
+
+    @staticmethod
+    def _log_nan_frames(frames: pd.DataFrame) -> None:
+        """汇总记录包含NaN值的帧（按字段统计，避免逐帧日志）"""
+        nan_counts = {
+            field: int(frames[field].isna().sum())
+            for field in ('ts', 'dur', 'tid', 'type', 'flag', 'is_main_thread')
+            if field in frames
+        }
+        nan_counts = {field: count for field, count in nan_counts.items() if count}
+        if nan_counts:
+            logging.warning('帧数据包含NaN值（字段: 帧数）: %s', nan_counts)
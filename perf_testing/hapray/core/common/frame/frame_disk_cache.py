@@ -0,0 +1,247 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .frame_constants import FRAME_DISK_CACHE_DIRNAME, FRAME_DISK_CACHE_VERSION
+
+# 计算数据库指纹时读取的首尾字节数
+_FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+_META_FILENAME = 'meta.json'
+_INDEX_FILENAME = 'index.npy'
+
+
+class FrameDiskCache:
+    """帧分析查询结果的磁盘列式缓存
+
+    FrameCacheManager 的内存缓存只在对象生命周期内有效，每次 update/report 都要重新查询 SQLite。
+    本类把查询结果按列保存为 .npy 文件，再次分析同一个数据库时直接加载，跳过 SQL 查询：
+
+    1. 缓存键 = 数据库内容指纹（文件大小 + 首尾 1MB 内容的 sha1，SQLite 文件头含写事务计数器）
+       + 数据类型 + app_pids + 查询版本号，拷贝场景目录后缓存依然有效
+    2. 数值列以 copy-on-write 方式内存映射加载（mmap_mode='c'），下游原地修改不会写回缓存文件
+    3. 字符串等 object 列单独序列化，加载时读入内存
+    4. 写入时先写临时目录再原子重命名，并清理同一数据库同类数据的旧条目
+
+    缓存目录默认位于数据库所在目录下的 FRAME_DISK_CACHE_DIRNAME 子目录。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, enabled: bool = True):
+        """初始化磁盘缓存
+
+        Args:
+            cache_dir: 缓存根目录，None 表示使用数据库所在目录
+            enabled: 是否启用磁盘缓存
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self._fingerprints: dict[str, Optional[str]] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0}
+
+    # ==================== Public 接口 ====================
+
+    def get_or_load(
+        self, kind: str, db_path: Optional[str], app_pids: Optional[list], loader: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """优先从磁盘缓存加载，未命中时调用 loader 查询数据库并写入缓存
+
+        Args:
+            kind: 数据类型（如 'frames'、'perf_samples'）
+            db_path: 数据来源的数据库文件路径
+            app_pids: 应用进程ID列表（参与缓存键计算）
+            loader: 缓存未命中时获取数据的函数
+
+        Returns:
+            pd.DataFrame: 查询结果
+        """
+        if not self.enabled or not db_path:
+            return loader()
+
+        cached_df = self.load(kind, db_path, app_pids)
+        if cached_df is not None:
+            return cached_df
+
+        df = loader()
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            self.save(kind, db_path, app_pids, df)
+        return df
+
+    def load(self, kind: str, db_path: str, app_pids: Optional[list]) -> Optional[pd.DataFrame]:
+        """从磁盘缓存加载数据
+
+        Returns:
+            Optional[pd.DataFrame]: 命中时返回 DataFrame，否则返回 None
+        """
+        entry_dir = self._entry_dir(kind, db_path, app_pids)
+        if entry_dir is None or not os.path.isfile(os.path.join(entry_dir, _META_FILENAME)):
+            self.stats['misses'] += 1
+            return None
+
+        start_time = time.time()
+        try:
+            with open(os.path.join(entry_dir, _META_FILENAME), encoding='utf-8') as f:
+                meta = json.load(f)
+            columns = {}
+            for column in meta['columns']:
+                columns[column['name']] = self._load_column(entry_dir, column)
+            index = None
+            if meta.get('has_index'):
+                index = np.load(os.path.join(entry_dir, _INDEX_FILENAME), allow_pickle=True)
+            df = pd.DataFrame(columns, index=index, copy=False)
+        except Exception as e:
+            logging.warning('读取帧分析磁盘缓存失败 (%s): %s，将重新查询数据库', entry_dir, str(e))
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        logging.info('[磁盘缓存] 命中 %s: %d 行, 耗时 %.3f 秒', kind, len(df), time.time() - start_time)
+        return df
+
+    def save(self, kind: str, db_path: str, app_pids: Optional[list], df: pd.DataFrame) -> bool:
+        """将数据写入磁盘缓存
+
+        Returns:
+            bool: 是否写入成功
+        """
+        entry_dir = self._entry_dir(kind, db_path, app_pids)
+        if entry_dir is None:
+            return False
+
+        unsupported = [str(name) for name, dtype in df.dtypes.items() if not isinstance(dtype, np.dtype)]
+        if unsupported:
+            logging.debug('列 %s 为扩展类型，跳过 %s 的磁盘缓存', unsupported, kind)
+            return False
+
+        tmp_dir = f'{entry_dir}.tmp-{uuid.uuid4().hex}'
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            columns_meta = []
+            for i, name in enumerate(df.columns):
+                values = df[name].to_numpy()
+                is_object = bool(values.dtype == object)
+                file_name = f'c{i}.npy'
+                np.save(os.path.join(tmp_dir, file_name), values, allow_pickle=is_object)
+                columns_meta.append({'name': name, 'file': file_name, 'object': is_object})
+
+            has_index = not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1)
+            if has_index:
+                index_values = df.index.to_numpy()
+                np.save(
+                    os.path.join(tmp_dir, _INDEX_FILENAME),
+                    index_values,
+                    allow_pickle=bool(index_values.dtype == object),
+                )
+
+            meta = {
+                'version': FRAME_DISK_CACHE_VERSION,
+                'kind': kind,
+                'db_path': os.path.abspath(db_path),
+                'rows': len(df),
+                'columns': columns_meta,
+                'has_index': has_index,
+            }
+            with open(os.path.join(tmp_dir, _META_FILENAME), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            self._remove_stale_entries(kind, meta['db_path'], entry_dir)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except Exception as e:
+            logging.warning('写入帧分析磁盘缓存失败 (%s): %s', entry_dir, str(e))
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        self.stats['writes'] += 1
+        logging.info('[磁盘缓存] 已写入 %s: %d 行 -> %s', kind, len(df), entry_dir)
+        return True
+
+    # ==================== Private 方法 ====================
+
+    def _entry_dir(self, kind: str, db_path: str, app_pids: Optional[list]) -> Optional[str]:
+        """计算缓存条目目录，数据库不可访问时返回 None"""
+        fingerprint = self._fingerprint(db_path)
+        if fingerprint is None:
+            return None
+        key_source = json.dumps(
+            {
+                'db': fingerprint,
+                'kind': kind,
+                'app_pids': sorted(str(pid) for pid in (app_pids or [])),
+                'version': FRAME_DISK_CACHE_VERSION,
+            },
+            sort_keys=True,
+        )
+        digest = hashlib.sha1(key_source.encode('utf-8')).hexdigest()[:20]
+        root = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(db_path)), FRAME_DISK_CACHE_DIRNAME)
+        return os.path.join(root, f'{kind}-{digest}')
+
+    def _fingerprint(self, db_path: str) -> Optional[str]:
+        """计算数据库文件指纹（同一对象内按路径缓存）"""
+        if db_path in self._fingerprints:
+            return self._fingerprints[db_path]
+
+        fingerprint = None
+        try:
+            stat = os.stat(db_path)
+            digest = hashlib.sha1(str(stat.st_size).encode())
+            with open(db_path, 'rb') as f:
+                digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+                if stat.st_size > _FINGERPRINT_SAMPLE_BYTES:
+                    f.seek(max(stat.st_size - _FINGERPRINT_SAMPLE_BYTES, _FINGERPRINT_SAMPLE_BYTES))
+                    digest.update(f.read(_FINGERPRINT_SAMPLE_BYTES))
+            fingerprint = digest.hexdigest()
+        except OSError as e:
+            logging.debug('无法计算数据库指纹 %s: %s', db_path, str(e))
+
+        self._fingerprints[db_path] = fingerprint
+        return fingerprint
+
+    @staticmethod
+    def _load_column(entry_dir: str, column: dict) -> np.ndarray:
+        """加载单列数据：数值列内存映射，object 列读入内存"""
+        path = os.path.join(entry_dir, column['file'])
+        if column.get('object'):
+            return np.load(path, allow_pickle=True)
+        return np.load(path, mmap_mode='c')
+
+    @staticmethod
+    def _remove_stale_entries(kind: str, db_path: str, entry_dir: str):
+        """删除同一数据库同类数据的旧条目（数据库内容已变化）"""
+        root = os.path.dirname(entry_dir)
+        if not os.path.isdir(root):
+            return
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if not name.startswith(f'{kind}-') or path == entry_dir or '.tmp-' in name:
+                continue
+            try:
+                with open(os.path.join(path, _META_FILENAME), encoding='utf-8') as f:
+                    stale = json.load(f).get('db_path') == db_path
+            except (OSError, ValueError):
+                stale = True
+            if stale:
+                with contextlib.suppress(OSError):
+                    shutil.rmtree(path)
@@ -20,6 +20,8 @@ from bisect import bisect_left
 from collections import defaultdict, deque
 from typing import Any, Optional
 
+import numpy as np
+
 # 注意：移除模块级别的日志配置，避免导入时的冲突
 # 从frame_empty_common和frame_utils导入函数（使用相对导入）
 from .frame_core_load_calculator import calculate_process_instructions, calculate_thread_instructions
@@ -27,6 +29,9 @@ from .frame_utils import is_system_thread
 
 logger = logging.getLogger(__name__)
 
+# 唤醒链反向追溯的时间窗口：帧开始前50ms
+WAKEUP_SEARCH_BACKTRACK_NS = 50_000_000
+
 
 def find_frame_last_event(
     trace_conn,
@@ -156,6 +161,7 @@ def filter_threads_executed_in_frame(
     itids: set[int],
     frame_start: int,
     frame_end: int,
+    *,
     callstack_cache: Optional[set[int]] = None,
     thread_state_cache: Optional[set[int]] = None,
 ) -> set[int]:
@@ -243,14 +249,213 @@ def filter_threads_executed_in_frame(
         return itids  # 如果出错，返回所有线程
 
 
+class WakeupGraphIndex:
+    """trace.db 的唤醒关系索引（每个 trace.db 构建一次，供所有帧的唤醒链追溯复用）
+
+    一次性加载 instant 表中的 sched_wakeup/sched_waking 事件，按被唤醒线程（ref）分组，
+    每个线程对应一段按时间排序的 (ts, wakeup_from) 数组；查找"某时间窗口内最近一次唤醒"
+    只需两次 searchsorted，不再逐帧、逐层查询数据库或线性过滤缓存列表。
+    同时缓存 thread/process 表，用于应用进程线程集合、tid -> thread.id 和线程详情查询。
+    """
+
+    def __init__(self, wakeup_refs: np.ndarray, wakeup_ts: np.ndarray, wakeup_from: np.ndarray, thread_rows: list):
+        """
+        Args:
+            wakeup_refs: 被唤醒线程 itid（已按 ref、ts 排序）
+            wakeup_ts: 唤醒时间戳
+            wakeup_from: 唤醒者线程 itid
+            thread_rows: [(id, itid, tid, thread_name, pid, process_name), ...]，pid 为 None 表示无对应进程
+        """
+        self._ts = wakeup_ts
+        self._wakers = wakeup_from
+        self._slices: dict[int, tuple[int, int]] = {}
+        if len(wakeup_refs):
+            refs, starts = np.unique(wakeup_refs, return_index=True)
+            ends = np.append(starts[1:], len(wakeup_refs))
+            self._slices = {int(ref): (int(lo), int(hi)) for ref, lo, hi in zip(refs, starts, ends)}
+
+        self._thread_info: dict[int, dict[str, Any]] = {}
+        self._tid_to_id: dict[int, int] = {}
+        self._pid_to_itids: dict[int, set] = defaultdict(set)
+        for thread_id, itid, tid, thread_name, pid, process_name in thread_rows:
+            if tid is not None and tid not in self._tid_to_id:
+                self._tid_to_id[tid] = thread_id
+            if pid is None:
+                continue
+            self._thread_info[itid] = {
+                'tid': tid,
+                'thread_name': thread_name,
+                'pid': pid,
+                'process_name': process_name,
+                'is_system_thread': is_system_thread(process_name, thread_name),
+            }
+            self._pid_to_itids[pid].add(itid)
+        self._app_waker_arrays: dict[int, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, trace_conn) -> 'WakeupGraphIndex':
+        """从 trace 数据库构建唤醒关系索引"""
+        start_time = time.time()
+        cursor = trace_conn.cursor()
+        cursor.execute("""
+            SELECT i.ref, i.ts, i.wakeup_from
+            FROM instant i
+            WHERE i.name IN ('sched_wakeup', 'sched_waking')
+            AND i.ref_type = 'itid'
+            AND i.wakeup_from IS NOT NULL
+            ORDER BY i.ref, i.ts
+        """)
+        rows = cursor.fetchall()
+        if rows:
+            refs, ts, wakers = (np.asarray(column, dtype=np.int64) for column in zip(*rows))
+        else:
+            refs = ts = wakers = np.zeros(0, dtype=np.int64)
+
+        cursor.execute("""
+            SELECT t.id, t.itid, t.tid, t.name, p.pid, p.name
+            FROM thread t
+            LEFT JOIN process p ON t.ipid = p.ipid
+            ORDER BY t.id
+        """)
+        index = cls(refs, ts, wakers, cursor.fetchall())
+        logger.info(
+            '[预加载] 唤醒关系索引: %d 条唤醒事件，%d 个线程，耗时 %.3f 秒',
+            len(rows),
+            len(index._slices),
+            time.time() - start_time,
+        )
+        return index
+
+    def get_app_thread_itids(self, app_pid: Optional[int]) -> set:
+        """获取应用进程的所有线程 itid"""
+        if not app_pid:
+            return set()
+        return self._pid_to_itids.get(app_pid, set())
+
+    def resolve_thread_id(self, tid: int) -> Optional[int]:
+        """tid -> thread.id（与 SELECT id FROM thread WHERE tid = ? LIMIT 1 一致）"""
+        return self._tid_to_id.get(tid)
+
+    def get_thread_info(self, itid: int) -> Optional[dict[str, Any]]:
+        """获取线程详情 {tid, thread_name, pid, process_name, is_system_thread}"""
+        return self._thread_info.get(itid)
+
+    def latest_waker(
+        self, itid: int, search_start: int, search_end: int, app_pid: Optional[int] = None
+    ) -> Optional[tuple[int, int]]:
+        """查找 [search_start, search_end] 内唤醒 itid 的最近一次事件
+
+        如果指定了 app_pid，优先返回应用进程线程发起的唤醒，没有时再使用任意线程。
+
+        Returns:
+            (wakeup_from, ts)，未找到时返回 None
+        """
+        bounds = self._slices.get(itid)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        ts = self._ts[lo:hi]
+        left = int(np.searchsorted(ts, search_start, side='left'))
+        right = int(np.searchsorted(ts, search_end, side='right'))
+        if left >= right:
+            return None
+
+        candidates = np.arange(left, right)
+        app_wakers = self._get_app_waker_array(app_pid)
+        if app_wakers is not None:
+            app_candidates = candidates[np.isin(self._wakers[lo + left : lo + right], app_wakers)]
+            if len(app_candidates):
+                candidates = app_candidates
+
+        # 时间最近的事件；同一时间戳有多条时取最先记录的一条
+        latest_ts = ts[candidates[-1]]
+        pos = int(candidates[np.searchsorted(ts[candidates], latest_ts, side='left')])
+        return int(self._wakers[lo + pos]), int(ts[pos])
+
+    def _get_app_waker_array(self, app_pid: Optional[int]) -> Optional[np.ndarray]:
+        if not app_pid:
+            return None
+        if app_pid not in self._app_waker_arrays:
+            itids = self.get_app_thread_itids(app_pid)
+            self._app_waker_arrays[app_pid] = np.fromiter(itids, dtype=np.int64) if itids else None
+        return self._app_waker_arrays[app_pid]
+
+
+def _trace_wakeup_chain_with_index(
+    wakeup_index: WakeupGraphIndex, start_itid: int, frame_start: int, max_depth: int, app_pid: Optional[int]
+) -> list[tuple[int, int]]:
+    """基于 WakeupGraphIndex 反向 BFS 追溯唤醒链（与 find_wakeup_chain 的追溯规则一致）"""
+    search_start = frame_start - WAKEUP_SEARCH_BACKTRACK_NS
+    visited = set()
+    queue = deque([(start_itid, 0, frame_start)])
+    related_threads_ordered = [(start_itid, 0)]
+
+    while queue:
+        current_itid, depth, current_ts = queue.popleft()
+        if depth >= max_depth or current_itid in visited:
+            continue
+        visited.add(current_itid)
+
+        waker = wakeup_index.latest_waker(current_itid, search_start, current_ts, app_pid)
+        if waker is None:
+            continue
+        waker_itid, wakeup_ts = waker
+        if waker_itid and waker_itid not in visited:
+            related_threads_ordered.append((waker_itid, depth + 1))
+            queue.append((waker_itid, depth + 1, wakeup_ts))
+
+    return related_threads_ordered
+
+
+def find_wakeup_chains_batch(
+    trace_conn,
+    frames: list[dict[str, Any]],
+    max_depth: int = 20,
+    wakeup_index: Optional[WakeupGraphIndex] = None,
+) -> list[list[tuple[int, int]]]:
+    """批量追溯多个帧的唤醒链（共享同一个唤醒关系索引）
+
+    Args:
+        trace_conn: trace 数据库连接（未提供 wakeup_index 时用于构建索引）
+        frames: 帧列表，每项包含 itid、ts（帧开始时间），可选 app_pid
+        max_depth: 最大搜索深度
+        wakeup_index: 预先构建的唤醒关系索引
+
+    Returns:
+        与 frames 一一对应的唤醒链列表，每条为 [(itid, depth), ...]
+    """
+    if not frames:
+        return []
+    if wakeup_index is None:
+        wakeup_index = WakeupGraphIndex.build(trace_conn)
+
+    # 追溯结果只取决于 (起始线程, 帧开始时间, app_pid)，相同起点的帧复用结果
+    resolved: dict[tuple, list[tuple[int, int]]] = {}
+    chains = []
+    for frame in frames:
+        key = (frame['itid'], frame['ts'], frame.get('app_pid'))
+        if key not in resolved:
+            try:
+                resolved[key] = _trace_wakeup_chain_with_index(
+                    wakeup_index, frame['itid'], frame['ts'], max_depth, frame.get('app_pid')
+                )
+            except Exception as e:
+                logger.warning('查找唤醒链失败 (itid=%s): %s', frame['itid'], str(e))
+                resolved[key] = [(frame['itid'], 0)]
+        chains.append(list(resolved[key]))
+    return chains
+
+
 def find_wakeup_chain(
     trace_conn,
     start_itid: int,
     frame_start: int,
     frame_end: int,
+    *,
     max_depth: int = 20,
     instant_cache: Optional[dict] = None,
     app_pid: Optional[int] = None,
+    wakeup_index: Optional[WakeupGraphIndex] = None,
 ) -> list[tuple[int, int]]:
     """通过线程唤醒关系找到所有相关的线程（唤醒链）
 
@@ -264,14 +469,19 @@ def find_wakeup_chain(
         frame_end: 帧结束时间
         max_depth: 最大搜索深度（默认10）
         instant_cache: instant表数据缓存 {(ref, ts_range): [(wakeup_from, ts), ...]}
+        app_pid: 应用进程ID（优先沿应用进程线程追溯）
+        wakeup_index: 唤醒关系索引，提供时不再查询数据库（多帧分析请使用 find_wakeup_chains_batch）
 
     Returns:
         所有相关线程的 itid 列表，按唤醒链顺序（从起始线程到最远的唤醒线程）
         每个元素为 (itid, depth)，depth 表示在唤醒链中的深度（0为起始线程）
     """
     try:
+        if wakeup_index is not None:
+            return _trace_wakeup_chain_with_index(wakeup_index, start_itid, frame_start, max_depth, app_pid)
+
         # 扩展时间范围：往前追溯50ms，确保能找到完整的唤醒链（参考RN实现）
-        search_start = frame_start - 50_000_000  # 50ms in nanoseconds
+        search_start = frame_start - WAKEUP_SEARCH_BACKTRACK_NS
         search_end = frame_end
 
         # 如果提供了app_pid，预先查询应用进程的所有线程itid（用于优先查找）
@@ -70,138 +70,37 @@ class MemoryAggregator:
         Returns:
             { callchainId: { 'totalBytes': int, 'allocs': [ ...未释放分配详情... ] } }
         """
-        if not records:
-            return {}
-
-        # 仅处理截止到 time 的事件，并按时间升序
-        filtered = [r for r in records if r.get('relativeTs', 0) <= time]
-        if not filtered:
-            return {}
+        return self.get_unreleased_by_callchain_at(records, [time])[time]
 
-        filtered.sort(key=lambda r: r.get('relativeTs', 0))
-
-        # 地址 -> 活跃分配栈（LIFO），用于处理可能的重复地址/部分释放
-        addr_to_active_allocs: dict[int, list[dict[str, Any]]] = defaultdict(list)
-
-        def is_alloc(evt_type: Any) -> bool:
-            return evt_type in ('AllocEvent', 'MmapEvent', 0)
-
-        def is_free(evt_type: Any) -> bool:
-            return evt_type in ('FreeEvent', 'MunmapEvent', 1)
-
-        for rec in filtered:
-            addr = rec.get('addr')
-            if addr is None:
-                continue
-
-            # heapSize 存储规则：申请为正数，释放为负数
-            size = rec.get('heapSize') or 0
-
-            # 忽略异常数据
-            if not size:
-                continue
-
-            if size > 0:
-                # 记录一次分配作为活跃块，后续 free 按 LIFO 消耗
-                active = {
-                    'addr': addr,
-                    'size': size,  # 剩余未释放大小（初始化为分配大小）
-                    'pid': rec.get('pid'),
-                    'process': rec.get('process'),
-                    'tid': rec.get('tid'),
-                    'thread': rec.get('thread'),
-                    'fileId': rec.get('fileId'),
-                    'file': rec.get('file'),
-                    'symbolId': rec.get('symbolId'),
-                    'symbol': rec.get('symbol'),
-                    'callchainId': rec.get('callchainId'),
-                    'relativeTs': rec.get('relativeTs'),
-                    'componentCategory': rec.get('componentCategory'),
-                    'categoryName': rec.get('categoryName'),
-                    'subCategoryName': rec.get('subCategoryName'),
-                }
-                addr_to_active_allocs[addr].append(active)
-            elif size < 0:
-                # 释放：按 LIFO 从该地址的活跃分配中扣减（heapSize 为负数，取绝对值）
-                remaining = abs(size)
-                stack = addr_to_active_allocs.get(addr)
-                if not stack:
-                    continue
+    def get_unreleased_by_callchain_at(
+        self, records: list[dict[str, Any]], times: list[int]
+    ) -> dict[int, dict[int, dict[str, Any]]]:
+        """一次扫描得到多个时间点的未释放内存（按 callchain_id 聚合）
 
-                while remaining > 0 and stack:
-                    top = stack[-1]
-                    if top['size'] > remaining:
-                        top['size'] -= remaining
-                        remaining = 0
-                    else:
-                        remaining -= top['size']
-                        stack.pop()
-                # 如果该地址已完全释放，清理空列表
-                if not stack:
-                    addr_to_active_allocs.pop(addr, None)
-
-        # 聚合：按分配时的 callchainId 汇总
-        result: dict[int, dict[str, Any]] = {}
+        记录只排序一次，按时间顺序增量维护活跃分配，依次在各时间点生成快照，
+        不再为每个时间点重复过滤、排序全部记录。
 
-        for allocs in addr_to_active_allocs.values():
-            for alloc in allocs:
-                if alloc['size'] <= 0:
-                    continue
-                callchain_id = alloc.get('callchainId')
-                if callchain_id is None:
-                    continue
-                group = result.setdefault(callchain_id, {'totalBytes': 0, 'allocs': []})
-                group['totalBytes'] += alloc['size']
-                group['allocs'].append(alloc)
-
-        # 在同一 callchainId 下按 (pid, tid) 聚合：
-        # - 去除 addr 字段
-        # - 新增 count 统计次数
-        # - size 汇总
-        # - relativeTs 取最小（最早出现）
-        for callchain_id, group in result.items():
-            merged: dict[tuple[int, int], dict[str, Any]] = {}
-            for alloc in group['allocs']:
-                pid = alloc.get('pid')
-                tid = alloc.get('tid')
-                key = (pid, tid)
-                existing = merged.get(key)
-                if existing is None:
-                    merged[key] = {
-                        # 基础标识
-                        'pid': pid,
-                        'process': alloc.get('process'),
-                        'tid': tid,
-                        'thread': alloc.get('thread'),
-                        'fileId': alloc.get('fileId'),
-                        'file': alloc.get('file'),
-                        'symbolId': alloc.get('symbolId'),
-                        'symbol': alloc.get('symbol'),
-                        'callchainId': callchain_id,
-                        'relativeTs': alloc.get('relativeTs'),
-                        'componentCategory': alloc.get('componentCategory'),
-                        'categoryName': alloc.get('categoryName'),
-                        'subCategoryName': alloc.get('subCategoryName'),
-                        # 聚合指标
-                        'size': alloc.get('size', 0),
-                        'count': 1,
-                    }
-                else:
-                    existing['size'] = (existing.get('size') or 0) + (alloc.get('size') or 0)
-                    existing['count'] = (existing.get('count') or 0) + 1
-                    # relativeTs 取最早
-                    rts = alloc.get('relativeTs')
-                    if rts is not None and (existing.get('relativeTs') is None or rts < existing.get('relativeTs')):
-                        existing['relativeTs'] = rts
+        Args:
+            records: 平铺后的内存记录（由 MemoryRecordGenerator 生成）
+            times: 时间点列表（与 relativeTs 单位一致）
 
-            # 回写合并后的列表，并按 size 降序
-            merged_list = list(merged.values())
-            merged_list.sort(key=lambda a: a.get('size', 0), reverse=True)
-            group['allocs'] = merged_list
-            # totalBytes 按合并后 size 汇总，避免与原列表不一致
-            group['totalBytes'] = sum(a.get('size', 0) for a in merged_list)
+        Returns:
+            { time: get_unreleased_by_callchain(records, time) 的结果 }
+        """
+        snapshots: dict[int, dict[int, dict[str, Any]]] = {}
+        if not records:
+            return {time: {} for time in times}
 
-        return result
+        # 按时间升序（稳定排序，同一时间的记录保持原有顺序）
+        sorted_records = sorted(records, key=lambda r: r.get('relativeTs', 0))
+        tracker = LiveAllocationTracker()
+        position = 0
+        for time in sorted(set(times)):
+            while position < len(sorted_records) and sorted_records[position].get('relativeTs', 0) <= time:
+                tracker.apply(sorted_records[position])
+                position += 1
+            snapshots[time] = tracker.snapshot_by_callchain()
+        return snapshots
 
     def _aggregate_by_process(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """按进程聚合"""
@@ -499,3 +398,112 @@ class MemoryAggregator:
             'eventNum': len(sorted_records),
             'start_ts': sorted_records[0].get('relativeTs', 0) if sorted_records else 0,
         }
+
+
+class LiveAllocationTracker:
+    """增量式活跃分配（未释放内存）跟踪器
+
+    按时间顺序逐条 apply 内存记录，维护 地址 -> 活跃分配栈（LIFO），
+    可在任意时刻调用 snapshot_by_callchain 得到当前未释放内存的聚合结果。
+    """
+
+    # 活跃分配保留的记录字段
+    _ALLOC_FIELDS = (
+        'pid',
+        'process',
+        'tid',
+        'thread',
+        'fileId',
+        'file',
+        'symbolId',
+        'symbol',
+        'callchainId',
+        'relativeTs',
+        'componentCategory',
+        'categoryName',
+        'subCategoryName',
+    )
+
+    def __init__(self):
+        # 地址 -> 活跃分配栈（LIFO），用于处理可能的重复地址/部分释放
+        self._addr_to_active_allocs: dict[int, list[dict[str, Any]]] = defaultdict(list)
+
+    def apply(self, rec: dict[str, Any]):
+        """应用一条内存记录（heapSize 申请为正数，释放为负数）"""
+        addr = rec.get('addr')
+        if addr is None:
+            return
+
+        size = rec.get('heapSize') or 0
+        # 忽略异常数据
+        if not size:
+            return
+
+        if size > 0:
+            # 记录一次分配作为活跃块，后续 free 按 LIFO 消耗；size 为剩余未释放大小
+            active = {'addr': addr, 'size': size}
+            for field in self._ALLOC_FIELDS:
+                active[field] = rec.get(field)
+            self._addr_to_active_allocs[addr].append(active)
+            return
+
+        # 释放：按 LIFO 从该地址的活跃分配中扣减（heapSize 为负数，取绝对值）
+        remaining = -size
+        stack = self._addr_to_active_allocs.get(addr)
+        if not stack:
+            return
+
+        while remaining > 0 and stack:
+            top = stack[-1]
+            if top['size'] > remaining:
+                top['size'] -= remaining
+                remaining = 0
+            else:
+                remaining -= top['size']
+                stack.pop()
+        # 如果该地址已完全释放，清理空列表
+        if not stack:
+            self._addr_to_active_allocs.pop(addr, None)
+
+    def snapshot_by_callchain(self) -> dict[int, dict[str, Any]]:
+        """按分配时的 callchainId 聚合当前未释放内存
+
+        同一 callchainId 下按 (pid, tid) 合并：去除 addr 字段，新增 count，size 汇总，
+        relativeTs 取最早；合并后的列表按 size 降序。
+
+        Returns:
+            { callchainId: { 'totalBytes': int, 'allocs': [ ...未释放分配详情... ] } }
+        """
+        grouped: dict[int, dict[tuple, dict[str, Any]]] = {}
+        for allocs in self._addr_to_active_allocs.values():
+            for alloc in allocs:
+                if alloc['size'] <= 0:
+                    continue
+                callchain_id = alloc.get('callchainId')
+                if callchain_id is None:
+                    continue
+                merged = grouped.setdefault(callchain_id, {})
+                key = (alloc.get('pid'), alloc.get('tid'))
+                existing = merged.get(key)
+                if existing is None:
+                    entry = {field: alloc.get(field) for field in self._ALLOC_FIELDS}
+                    entry['size'] = alloc['size']
+                    entry['count'] = 1
+                    merged[key] = entry
+                else:
+                    existing['size'] = (existing.get('size') or 0) + alloc['size']
+                    existing['count'] += 1
+                    # relativeTs 取最早
+                    rts = alloc.get('relativeTs')
+                    if rts is not None and (existing.get('relativeTs') is None or rts < existing.get('relativeTs')):
+                        existing['relativeTs'] = rts
+
+        result: dict[int, dict[str, Any]] = {}
+        for callchain_id, merged in grouped.items():
+            merged_list = list(merged.values())
+            merged_list.sort(key=lambda a: a.get('size', 0), reverse=True)
+            result[callchain_id] = {
+                'totalBytes': sum(a.get('size', 0) for a in merged_list),
+                'allocs': merged_list,
+            }
+        return result
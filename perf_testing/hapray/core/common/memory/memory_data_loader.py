@@ -15,8 +15,102 @@ limitations under the License.
 
 import logging
 import sqlite3
+from collections.abc import Iterator
 from typing import Any
 
+import numpy as np
+
+# native_hook 事件字段（与查询列顺序一致）
+NATIVE_HOOK_EVENT_FIELDS = (
+    'id',
+    'callchain_id',
+    'ipid',
+    'itid',
+    'event_type',
+    'sub_type_id',
+    'start_ts',
+    'end_ts',
+    'dur',
+    'addr',
+    'heap_size',
+    'last_lib_id',
+    'last_symbol_id',
+)
+# 流式读取 native_hook 时每批的行数
+NATIVE_HOOK_BATCH_SIZE = 100_000
+
+
+class NativeHookEventBatch:
+    """一批 native_hook 事件的列式存储
+
+    整数列保存为 int64 数组（含 NULL 的列额外保存一个布尔掩码），event_type 等文本列保存为
+    去重后的 object 数组，内存占用仅为逐行 dict 的几分之一。
+    """
+
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, rows: list[tuple]):
+        self._length = len(rows)
+        self._columns = {}
+        interned: dict[str, str] = {}
+        for field, values in zip(NATIVE_HOOK_EVENT_FIELDS, zip(*rows)):
+            self._columns[field] = self._pack_column(values, interned)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, field: str) -> list:
+        """获取一列的 Python 值列表（NULL 还原为 None）"""
+        values, null_mask = self._columns[field]
+        values = values.tolist()
+        if null_mask is not None:
+            for i in np.flatnonzero(null_mask).tolist():
+                values[i] = None
+        return values
+
+    def __iter__(self) -> Iterator[dict]:
+        """逐行产出事件 dict（临时对象，不在批内常驻）"""
+        columns = [self.column(field) for field in NATIVE_HOOK_EVENT_FIELDS]
+        for row in zip(*columns):
+            yield dict(zip(NATIVE_HOOK_EVENT_FIELDS, row))
+
+    @staticmethod
+    def _pack_column(values: tuple, interned: dict[str, str]) -> tuple[np.ndarray, Any]:
+        if any(isinstance(v, str) for v in values):
+            return np.array(
+                [interned.setdefault(v, v) if isinstance(v, str) else v for v in values], dtype=object
+            ), None
+        try:
+            return np.array(values, dtype=np.int64), None
+        except (TypeError, OverflowError):
+            null_mask = np.array([v is None for v in values], dtype=bool)
+            try:
+                packed = np.array([0 if v is None else v for v in values], dtype=np.int64)
+            except OverflowError:
+                return np.array(values, dtype=object), None
+            return packed, null_mask
+
+
+class NativeHookEvents:
+    """native_hook 事件集合：由若干 NativeHookEventBatch 组成，可多次迭代
+
+    迭代时逐行产出 dict（与原先 list[dict] 的元素格式一致），因此 MemoryRecordGenerator 等
+    下游代码无需修改；但任意时刻只有当前一行的 dict 存活。
+    """
+
+    def __init__(self, batches: list[NativeHookEventBatch]):
+        self.batches = batches
+
+    def __len__(self) -> int:
+        return sum(len(batch) for batch in self.batches)
+
+    def __bool__(self) -> bool:
+        return any(len(batch) for batch in self.batches)
+
+    def __iter__(self) -> Iterator[dict]:
+        for batch in self.batches:
+            yield from batch
+
 
 class MemoryDataLoader:
     """内存数据加载器
@@ -116,14 +210,15 @@ class MemoryDataLoader:
                 conn.close()
 
     @staticmethod
-    def _query_native_hook_events(conn: sqlite3.Connection, app_pids: list) -> list[dict]:
+    def _query_native_hook_events(conn: sqlite3.Connection, app_pids: list) -> NativeHookEvents:
         """查询 native_hook 表中的事件，仅包含 pid 属于 app_pids 的进程
 
-        当 app_pids 为空时返回空列表。
+        事件以列式批次保存（NativeHookEvents），迭代时逐行产出 dict。
+        当 app_pids 为空或没有匹配的进程时返回空集合。
         """
         if not app_pids:
             logging.warning('❌ app_pids 为空，无法查询 native_hook 事件！')
-            return []
+            return NativeHookEvents([])
 
         logging.info('查询 native_hook 事件，app_pids: %s', app_pids)
 
@@ -144,45 +239,13 @@ class MemoryDataLoader:
             for ipid, pid, name in all_processes:
                 logging.error('     ipid=%s, pid=%s, name=%s', ipid, pid, name)
 
-            return []
+            return NativeHookEvents([])
 
         logging.info('✓ 在 process 表中找到 %d 个匹配的进程:', len(matched_processes))
         for ipid, pid, name in matched_processes:
             logging.info('  ipid=%s, pid=%s, name=%s', ipid, pid, name)
 
-        placeholders = ','.join(['?'] * len(app_pids))
-        sql = f"""
-            SELECT
-                nh.id, nh.callchain_id, nh.ipid, nh.itid, nh.event_type, nh.sub_type_id,
-                nh.start_ts, nh.end_ts, nh.dur, nh.addr, nh.heap_size,
-                nh.last_lib_id, nh.last_symbol_id
-            FROM native_hook AS nh
-            JOIN process AS p ON nh.ipid = p.ipid
-            WHERE p.pid IN ({placeholders})
-            ORDER BY nh.start_ts
-        """
-        cursor = conn.cursor()
-        cursor.execute(sql, app_pids)
-
-        events = []
-        for row in cursor.fetchall():
-            events.append(
-                {
-                    'id': row[0],
-                    'callchain_id': row[1],
-                    'ipid': row[2],
-                    'itid': row[3],
-                    'event_type': row[4],
-                    'sub_type_id': row[5],
-                    'start_ts': row[6],
-                    'end_ts': row[7],
-                    'dur': row[8],
-                    'addr': row[9],
-                    'heap_size': row[10],
-                    'last_lib_id': row[11],
-                    'last_symbol_id': row[12],
-                }
-            )
+        events = NativeHookEvents(list(MemoryDataLoader.iter_native_hook_event_batches(conn, app_pids)))
 
         if not events:
             logging.warning('⚠️  虽然 process 表中有匹配的进程，但 native_hook 表中没有对应的事件！')
@@ -195,6 +258,43 @@ class MemoryDataLoader:
 
         return events
 
+    @staticmethod
+    def iter_native_hook_event_batches(
+        conn: sqlite3.Connection, app_pids: list, batch_size: int = NATIVE_HOOK_BATCH_SIZE
+    ) -> Iterator[NativeHookEventBatch]:
+        """流式读取 native_hook 事件（按 start_ts 升序），每次产出一个列式批次
+
+        使用游标 fetchmany 分批读取，不一次性物化全部行。
+
+        Args:
+            conn: 数据库连接
+            app_pids: 应用进程ID列表
+            batch_size: 每批行数
+
+        Yields:
+            NativeHookEventBatch
+        """
+        if not app_pids:
+            return
+        placeholders = ','.join(['?'] * len(app_pids))
+        columns = ', '.join(f'nh.{field}' for field in NATIVE_HOOK_EVENT_FIELDS)
+        sql = f"""
+            SELECT {columns}
+            FROM native_hook AS nh
+            JOIN process AS p ON nh.ipid = p.ipid
+            WHERE p.pid IN ({placeholders})
+            ORDER BY nh.start_ts
+        """
+        cursor = conn.cursor()
+        # 关闭 row_factory，fetchmany 直接返回 tuple
+        cursor.row_factory = None
+        cursor.execute(sql, app_pids)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield NativeHookEventBatch(rows)
+
     @staticmethod
     def _query_processes(conn: sqlite3.Connection) -> list[dict]:
         """查询进程信息"""
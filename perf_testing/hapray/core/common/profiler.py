@@ -0,0 +1,419 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any, Optional
+
+import psutil
+
+from hapray.core.config.config import Config
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TRACE_FILENAME = 'hapray_profile_trace.json'
+PROFILE_SUMMARY_FILENAME = 'hapray_profile_summary.json'
+# 汇总中 SQL 语句的截断长度与条数
+SQL_TEXT_LENGTH = 120
+TOP_SQL_COUNT = 20
+
+_MB = 1024 * 1024
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _rss_bytes() -> tuple[int, int]:
+    """当前进程的 (当前 RSS, 峰值 RSS)，平台不提供峰值时以当前值代替"""
+    info = psutil.Process().memory_info()
+    peak = getattr(info, 'peak_wset', None)
+    if peak is None:
+        # Linux 下 ru_maxrss 单位为 KB
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource is not None else info.rss
+    return info.rss, max(peak, info.rss)
+
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE.sub(' ', sql).strip()[:SQL_TEXT_LENGTH]
+
+
+class Profiler:
+    """分析流水线的统一埋点：嵌套 span、SQL 耗时/行数、RSS、缓存命中率
+
+    - span()：记录一个阶段的起止时间（Chrome trace 'X' 事件，同一线程内按时间自然嵌套），
+      结束时附带当前 RSS 与该阶段内峰值 RSS 的增长
+    - record_sql()：按规范化后的 SQL 汇总执行次数、耗时与返回行数（ProfiledConnection 自动调用）
+    - record_cache_stats()：累计各组件缓存的 hits / misses
+    - record_timings()：并入组件内部已有的分阶段耗时统计（如空帧分析的 timing_stats）
+
+    导出为 Chrome trace-event JSON（chrome://tracing / Perfetto 可直接打开）和报告目录下的汇总表。
+    进程池模式下 worker 通过 drain() 取出本进程的数据，由主进程 merge()。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self.events: list[dict[str, Any]] = []
+        self.thread_names: dict[tuple[int, int], str] = {}
+        # 规范化 SQL -> {count, seconds, rows}
+        self.sql: dict[str, dict[str, float]] = {}
+        # 组件 -> 数据类型 -> {hits, misses}
+        self.cache: dict[str, dict[str, dict[str, int]]] = {}
+        # 组件 -> 阶段 -> 累计秒数
+        self.timings: dict[str, dict[str, float]] = {}
+
+    def _now_us(self) -> float:
+        return (time.perf_counter_ns() - self._origin_ns) / 1000
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = 'phase', **args) -> Iterator[dict[str, Any]]:
+        """记录一个阶段；yield 的 dict 可在阶段内补充参数"""
+        thread = threading.current_thread()
+        _rss, peak_before = _rss_bytes()
+        start_us = self._now_us()
+        extra: dict[str, Any] = {}
+        try:
+            yield extra
+        finally:
+            end_us = self._now_us()
+            rss, peak_after = _rss_bytes()
+            event_args = {
+                **args,
+                **extra,
+                'rss_mb': round(rss / _MB, 1),
+                'peak_rss_growth_mb': round((peak_after - peak_before) / _MB, 1),
+            }
+            with self._lock:
+                self.thread_names.setdefault((self._pid, thread.ident), thread.name)
+                self.events.append(
+                    {
+                        'name': name,
+                        'cat': category,
+                        'ph': 'X',
+                        'ts': start_us,
+                        'dur': end_us - start_us,
+                        'pid': self._pid,
+                        'tid': thread.ident,
+                        'args': event_args,
+                    }
+                )
+                self.events.append(
+                    {
+                        'name': 'memory',
+                        'ph': 'C',
+                        'ts': end_us,
+                        'pid': self._pid,
+                        'args': {'rss_mb': event_args['rss_mb']},
+                    }
+                )
+
+    def record_sql(self, sql: str, seconds: float, rows: int = 0):
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self.sql.setdefault(key, {'count': 0, 'seconds': 0.0, 'rows': 0})
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['rows'] += rows
+
+    def record_fetch(self, sql: str, seconds: float, rows: int):
+        """把结果集读取的耗时与行数计入已记录的 SQL"""
+        with self._lock:
+            stats = self.sql.get(normalize_sql(sql))
+            if stats is not None:
+                stats['seconds'] += seconds
+                stats['rows'] += rows
+
+    def record_cache_stats(self, component: str, stats: dict[str, Any]):
+        """并入 {数据类型: {'hits': int, 'misses': int, ...}} 形式的缓存统计，其余条目忽略"""
+        with self._lock:
+            component_stats = self.cache.setdefault(component, {})
+            for data_type, value in stats.items():
+                if not isinstance(value, dict) or 'hits' not in value or 'misses' not in value:
+                    continue
+                counts = component_stats.setdefault(data_type, {'hits': 0, 'misses': 0})
+                counts['hits'] += value['hits']
+                counts['misses'] += value['misses']
+
+    def record_timings(self, component: str, timings: dict[str, Any]):
+        """并入 {阶段: 秒数} 形式的耗时统计，非数值条目（计数等）忽略"""
+        with self._lock:
+            component_timings = self.timings.setdefault(component, {})
+            for phase, seconds in timings.items():
+                if isinstance(seconds, float):
+                    component_timings[phase] = component_timings.get(phase, 0.0) + seconds
+
+    # ── 跨进程合并 ──────────────────────────────────────────────────────
+
+    def drain(self) -> dict[str, Any]:
+        """取出并清空已记录的数据（时间戳换算为 epoch 微秒，便于不同进程对齐）"""
+        offset_us = time.time() * 1e6 - self._now_us()
+        with self._lock:
+            data = {
+                'events': [{**event, 'ts': event['ts'] + offset_us} for event in self.events],
+                'thread_names': [[pid, tid, name] for (pid, tid), name in self.thread_names.items()],
+                'sql': self.sql,
+                'cache': self.cache,
+                'timings': self.timings,
+            }
+            self.events, self.thread_names, self.sql, self.cache, self.timings = [], {}, {}, {}, {}
+        return data
+
+    def merge(self, data: dict[str, Any]):
+        """并入 drain() 的结果"""
+        offset_us = time.time() * 1e6 - self._now_us()
+        with self._lock:
+            self.events.extend({**event, 'ts': event['ts'] - offset_us} for event in data.get('events', []))
+            for pid, tid, name in data.get('thread_names', []):
+                self.thread_names.setdefault((pid, tid), name)
+            for key, stats in data.get('sql', {}).items():
+                merged = self.sql.setdefault(key, {'count': 0, 'seconds': 0.0, 'rows': 0})
+                for field, value in stats.items():
+                    merged[field] += value
+        for component, stats in data.get('cache', {}).items():
+            self.record_cache_stats(component, stats)
+        for component, timings in data.get('timings', {}).items():
+            self.record_timings(component, timings)
+
+    # ── 导出 ────────────────────────────────────────────────────────────
+
+    def chrome_trace(self) -> dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+            metadata = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                for (pid, tid), name in self.thread_names.items()
+            ]
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            events = [event for event in self.events if event['ph'] == 'X']
+            sql = {key: dict(stats) for key, stats in self.sql.items()}
+            cache = {component: dict(stats) for component, stats in self.cache.items()}
+            timings = {component: dict(values) for component, values in self.timings.items()}
+
+        spans: dict[tuple[str, str], dict[str, Any]] = {}
+        for event in events:
+            stats = spans.setdefault(
+                (event['cat'], event['name']),
+                {'category': event['cat'], 'name': event['name'], 'count': 0, 'seconds': 0.0, 'max_seconds': 0.0},
+            )
+            seconds = event['dur'] / 1e6
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['peak_rss_growth_mb'] = max(stats.get('peak_rss_growth_mb', 0.0), event['args']['peak_rss_growth_mb'])
+        span_rows = sorted(spans.values(), key=lambda row: row['seconds'], reverse=True)
+        for row in span_rows:
+            row['seconds'] = round(row['seconds'], 3)
+            row['max_seconds'] = round(row['max_seconds'], 3)
+
+        sql_rows = [
+            {'sql': key, 'count': stats['count'], 'seconds': round(stats['seconds'], 3), 'rows': stats['rows']}
+            for key, stats in sorted(sql.items(), key=lambda item: item[1]['seconds'], reverse=True)[:TOP_SQL_COUNT]
+        ]
+
+        cache_rows = []
+        for component, stats in sorted(cache.items()):
+            for data_type, counts in sorted(stats.items()):
+                total = counts['hits'] + counts['misses']
+                cache_rows.append(
+                    {
+                        'component': component,
+                        'data_type': data_type,
+                        'hits': counts['hits'],
+                        'misses': counts['misses'],
+                        'hit_rate_percent': round(counts['hits'] / total * 100, 2) if total else 0.0,
+                    }
+                )
+
+        _rss, peak = _rss_bytes()
+        return {
+            'peak_rss_mb': round(peak / _MB, 1),
+            'spans': span_rows,
+            'sql': sql_rows,
+            'sql_total_seconds': round(sum(stats['seconds'] for stats in sql.values()), 3),
+            'cache': cache_rows,
+            'timings': {
+                component: {phase: round(seconds, 3) for phase, seconds in values.items()}
+                for component, values in timings.items()
+            },
+        }
+
+    def export(self, report_dir: str) -> dict[str, Any]:
+        """写出 Chrome trace 与汇总表，并把汇总表打印到日志，返回汇总"""
+        os.makedirs(report_dir, exist_ok=True)
+        with open(os.path.join(report_dir, PROFILE_TRACE_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        summary = self.summary()
+        with open(os.path.join(report_dir, PROFILE_SUMMARY_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        self._log_summary(summary)
+        return summary
+
+    @staticmethod
+    def _log_summary(summary: dict[str, Any]):
+        logger.info('Profile summary (peak RSS %.1f MB):', summary['peak_rss_mb'])
+        logger.info('  %-10s %-40s %6s %10s %10s %12s', 'category', 'span', 'count', 'total(s)', 'max(s)', 'peak+(MB)')
+        for row in summary['spans']:
+            logger.info(
+                '  %-10s %-40s %6d %10.3f %10.3f %12.1f',
+                row['category'],
+                row['name'][:40],
+                row['count'],
+                row['seconds'],
+                row['max_seconds'],
+                row['peak_rss_growth_mb'],
+            )
+        if summary['sql']:
+            logger.info('  SQL total %.3f seconds, slowest statements:', summary['sql_total_seconds'])
+            for row in summary['sql'][:5]:
+                logger.info('    %8.3fs %6dx %10d rows  %s', row['seconds'], row['count'], row['rows'], row['sql'])
+        for row in summary['cache']:
+            logger.info(
+                '  cache %s.%s: %d hits / %d misses (%.1f%%)',
+                row['component'],
+                row['data_type'],
+                row['hits'],
+                row['misses'],
+                row['hit_rate_percent'],
+            )
+
+
+# 当前分析运行的 Profiler；每次 analyze_data 运行（以及进程池 worker）各自持有一个，
+# 分析线程通过 contextvars.copy_context() 继承，未开启 analyze.profiling 时为 None
+_current_profiler: contextvars.ContextVar[Optional[Profiler]] = contextvars.ContextVar('hapray_profiler', default=None)
+
+
+def get_profiler() -> Optional[Profiler]:
+    """当前上下文的 Profiler，未开启记录时返回 None"""
+    return _current_profiler.get()
+
+
+def start_profiler() -> Optional[Profiler]:
+    """在当前上下文开始新一轮记录（进程池 worker 初始化时调用），未开启 analyze.profiling 时不记录"""
+    profiler = Profiler() if profiling_enabled() else None
+    _current_profiler.set(profiler)
+    return profiler
+
+
+@contextlib.contextmanager
+def profiling_run() -> Iterator[Optional[Profiler]]:
+    """一次 analyze_data 运行的记录范围，退出时恢复外层上下文的 Profiler"""
+    token = _current_profiler.set(Profiler() if profiling_enabled() else None)
+    try:
+        yield _current_profiler.get()
+    finally:
+        _current_profiler.reset(token)
+
+
+def span(name: str, category: str = 'phase', **args):
+    """get_profiler().span() 的简写，未开启记录时为空操作"""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return contextlib.nullcontext({})
+    return profiler.span(name, category, **args)
+
+
+def record_cache_stats(component: str, stats: dict[str, Any]):
+    """get_profiler().record_cache_stats() 的简写，未开启记录时为空操作"""
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.record_cache_stats(component, stats)
+
+
+def record_timings(component: str, timings: dict[str, Any]):
+    """get_profiler().record_timings() 的简写，未开启记录时为空操作"""
+    profiler = _current_profiler.get()
+    if profiler is not None:
+        profiler.record_timings(component, timings)
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """记录 execute 耗时以及 fetchall / fetchmany 的耗时与行数"""
+
+    _sql = ''
+
+    def execute(self, sql, parameters=()):
+        self._sql = sql
+        start_time = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.profiler.record_sql(sql, time.perf_counter() - start_time)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._sql = sql
+        start_time = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.profiler.record_sql(sql, time.perf_counter() - start_time)
+
+    def fetchall(self):
+        start_time = time.perf_counter()
+        rows = super().fetchall()
+        self._record_fetch(start_time, len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        start_time = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._record_fetch(start_time, len(rows))
+        return rows
+
+    def _record_fetch(self, start_time: float, rows: int):
+        self.connection.profiler.record_fetch(self._sql, time.perf_counter() - start_time, rows)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """cursor() / execute() 返回 ProfiledCursor 的连接，通过 connect() 创建，记录到创建时的 Profiler"""
+
+    profiler: Profiler
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connect(database: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect 的替代，查询耗时与行数计入当前 Profiler；未开启记录时返回普通连接"""
+    profiler = _current_profiler.get()
+    if profiler is None:
+        return sqlite3.connect(database, **kwargs)
+    conn = sqlite3.connect(database, factory=ProfiledConnection, **kwargs)
+    conn.profiler = profiler
+    return conn
+
+
+def profiling_enabled() -> bool:
+    return bool(Config.get('analyze.profiling', True))
@@ -0,0 +1,201 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import base64
+import logging
+import re
+import struct
+import zlib
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, TextIO, Union
+
+# 流式压缩时每次读取的原始字节数（同时也是并行压缩的分块大小）
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+# deflate 回溯窗口大小，并行压缩时每个分块以前一分块末尾 32KB 作为预置字典
+_DEFLATE_WINDOW = 32 * 1024
+# gzip 头：魔数 + deflate + 无标志位 + mtime=0 + 无额外标志 + OS=unknown
+_GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+
+
+def iter_gzip_chunks(
+    stream: BinaryIO, level: int, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1
+) -> Iterator[bytes]:
+    """分块读取并 gzip 压缩，逐块产出压缩数据
+
+    workers <= 1 时使用单个压缩流；workers > 1 时按 pigz 的方式并行压缩：
+    每个分块独立压缩为原始 deflate 数据（以前一分块末尾 32KB 作为预置字典，Z_SYNC_FLUSH 字节对齐结尾），
+    按顺序拼接后追加空的结束块，外层只有一个 gzip 成员，任何 gzip 解压器都能正常解码。
+    同时在途的分块数不超过 2 × workers，内存占用与文件大小无关。
+
+    Args:
+        stream: 二进制输入流
+        level: 压缩级别
+        chunk_size: 每次读取的字节数
+        workers: 压缩线程数
+    """
+    if workers <= 1:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        while chunk := stream.read(chunk_size):
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+        return
+
+    yield _GZIP_HEADER
+    crc = 0
+    total_size = 0
+    previous_tail = b''
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-gzip') as executor:
+        while True:
+            chunk = stream.read(chunk_size)
+            if chunk:
+                crc = zlib.crc32(chunk, crc)
+                total_size += len(chunk)
+                pending.append(executor.submit(_deflate_chunk, chunk, previous_tail, level))
+                previous_tail = chunk[-_DEFLATE_WINDOW:]
+            # 维持有限的在途分块，按提交顺序产出
+            while pending and (len(pending) >= workers * 2 or not chunk):
+                yield pending.popleft().result()
+            if not chunk:
+                break
+    yield zlib.compressobj(level, zlib.DEFLATED, -15).flush()
+    yield struct.pack('<II', crc, total_size & 0xFFFFFFFF)
+
+
+def _deflate_chunk(chunk: bytes, dictionary: bytes, level: int) -> bytes:
+    """将单个分块压缩为非结束的原始 deflate 数据（zlib 压缩期间释放 GIL）"""
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def iter_base64_chunks(chunks: Iterable[bytes]) -> Iterator[str]:
+    """对字节块流做 base64 编码，输出与一次性编码完全一致
+
+    每次只编码 3 字节对齐的部分，余下的不足 3 字节留到下一块，最后一块再补齐 padding。
+    """
+    remainder = b''
+    for chunk in chunks:
+        data = remainder + chunk if remainder else chunk
+        aligned = len(data) - len(data) % 3
+        remainder = data[aligned:]
+        if aligned:
+            yield base64.b64encode(data[:aligned]).decode('ascii')
+    if remainder:
+        yield base64.b64encode(remainder).decode('ascii')
+
+
+class GzipBase64FilePayload:
+    """文件的 gzip + base64 流式载荷
+
+    写入时分块读取、压缩、编码并直接写到输出流，内存占用与文件大小无关。
+    可重复写入（例如模板中同一占位符出现多次），每次都会重新读取文件。
+    """
+
+    def __init__(self, path: str, level: int, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1):
+        self.path = path
+        self.level = level
+        self.chunk_size = chunk_size
+        self.workers = workers
+        # 最近一次写入的统计：原始字节数 / 压缩字节数 / base64 字符数
+        self.original_size = 0
+        self.compressed_size = 0
+        self.encoded_size = 0
+
+    def write_to(self, out: TextIO) -> None:
+        self.original_size = 0
+        self.compressed_size = 0
+        self.encoded_size = 0
+        with open(self.path, 'rb') as f:
+            for text in iter_base64_chunks(
+                self._count_compressed(iter_gzip_chunks(f, self.level, self.chunk_size, self.workers))
+            ):
+                out.write(text)
+                self.encoded_size += len(text)
+            self.original_size = f.tell()
+
+        compression_ratio = (1 - self.compressed_size / self.original_size) * 100 if self.original_size > 0 else 0
+        logging.info(
+            'Streamed %s: %d bytes (compressed: %d, base64: %d, compression ratio: %.1f%%, workers: %d)',
+            self.path,
+            self.original_size,
+            self.compressed_size,
+            self.encoded_size,
+            compression_ratio,
+            self.workers,
+        )
+
+    def _count_compressed(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self.compressed_size += len(chunk)
+            yield chunk
+
+
+PlaceholderValue = Union[str, GzipBase64FilePayload]
+
+
+def write_template_with_placeholders(template: str, placeholders: dict[str, PlaceholderValue], out: TextIO) -> int:
+    """将模板写入输出流，并把其中所有占位符替换为对应的值
+
+    一次扫描模板找出所有占位符，模板片段与占位符的值依次写出，不构造替换后的完整字符串；
+    值为 GzipBase64FilePayload 时流式写入。流式载荷读取或压缩失败时记录错误，
+    回退已写出的部分并把该占位符替换为空字符串，报告其余部分照常写出。
+
+    Args:
+        template: HTML 模板内容
+        placeholders: 占位符 -> 字符串或流式载荷
+        out: 文本输出流（含流式载荷时需可 seek，以便失败时回退）
+
+    Returns:
+        int: 替换的占位符个数
+    """
+    if not placeholders:
+        out.write(template)
+        return 0
+
+    # 较长的占位符优先匹配，避免一个占位符是另一个的前缀时被截断
+    names = sorted(placeholders, key=len, reverse=True)
+    pattern = re.compile('|'.join(re.escape(name) for name in names))
+    position = 0
+    replaced = 0
+    for match in pattern.finditer(template):
+        out.write(template[position : match.start()])
+        value = placeholders[match.group(0)]
+        if isinstance(value, GzipBase64FilePayload):
+            _write_payload_or_empty(value, out)
+        else:
+            out.write(value)
+        position = match.end()
+        replaced += 1
+    out.write(template[position:])
+    logging.debug('Replaced %d placeholder occurrences', replaced)
+    return replaced
+
+
+def _write_payload_or_empty(payload: GzipBase64FilePayload, out: TextIO) -> None:
+    """写入流式载荷；失败时截掉已写出的部分，相当于替换为空字符串"""
+    start = out.tell()
+    try:
+        payload.write_to(out)
+    except Exception as e:
+        logging.error('Failed to embed %s, using empty data instead: %s', payload.path, str(e))
+        out.seek(start)
+        out.truncate()
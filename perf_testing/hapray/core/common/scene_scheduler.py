@@ -0,0 +1,271 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+import psutil
+
+from hapray.core.common.conversion_scheduler import MemoryGate
+from hapray.core.config.config import Config, ConfigObject
+
+logger = logging.getLogger(__name__)
+
+SCENE_EXECUTOR_THREAD = 'thread'
+SCENE_EXECUTOR_PROCESS = 'process'
+# 自动选择并发数时的上限：每个场景内部的步骤分析和 trace_streamer 转换本身已经是并发的
+DEFAULT_MAX_SCENE_WORKERS = 4
+DEFAULT_SCENE_MEMORY_FACTOR = 2
+DEFAULT_SCENE_MEMORY_FRACTION = 0.7
+# 参与场景内存估算的输入文件
+_SCENE_INPUT_SUFFIXES = ('.htrace', '.data', '.db')
+_SCENE_INPUT_DIRS = ('htrace', 'hiperf')
+
+
+@dataclass
+class SceneTiming:
+    """单个场景的执行情况"""
+
+    scene: str
+    case_dir: str
+    estimated_memory_mb: float = 0.0
+    # 等待内存预算放行的时间
+    wait_seconds: float = 0.0
+    report_seconds: float = 0.0
+    report_ok: Optional[bool] = None
+    post_seconds: float = 0.0
+    post_ok: Optional[bool] = None
+    error: str = ''
+
+
+def estimate_scene_memory(case_dir: str, memory_factor: float) -> int:
+    """场景报告生成的内存估算 = htrace/hiperf 下原始数据与数据库文件大小之和 × memory_factor"""
+    total = 0
+    for sub_dir in _SCENE_INPUT_DIRS:
+        for root, _dirs, files in os.walk(os.path.join(case_dir, sub_dir)):
+            for name in files:
+                if name.endswith(_SCENE_INPUT_SUFFIXES):
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        continue
+    return int(total * memory_factor)
+
+
+def _init_scene_worker(config_data: ConfigObject, log_level: int):
+    """进程池 initializer：恢复运行期配置（so_dir、符号恢复等 execute 中写入的值）"""
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+    Config.restore(config_data)
+
+
+def _update_scene_report(report_generator: Any, case_dir: str, time_ranges: Optional[list[dict]]) -> tuple[bool, float]:
+    """在 worker 中生成单个场景的报告，返回 (是否成功, 耗时)"""
+    start_time = time.time()
+    success = report_generator.update_report(case_dir, time_ranges)
+    return bool(success), time.time() - start_time
+
+
+class SceneScheduler:
+    """场景级报告生成调度器
+
+    每个场景的 ReportGenerator.update_report 作为一个任务提交到进程池（默认，场景之间内存隔离，
+    不受 GIL 限制）或线程池。并发数同时受 max_workers 和内存预算限制：场景的内存估算为
+    htrace/hiperf 输入文件大小 × memory_factor，按场景顺序先到先得放行。
+
+    post_report（如符号恢复）在主进程的单独线程中按场景逐个执行：pipeline 模式下某个场景的报告一生成
+    就开始它的后处理，与其他场景的报告生成重叠；否则在全部报告生成后按场景顺序执行。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        executor: Optional[str] = None,
+        memory_budget_mb: Optional[float] = None,
+        memory_factor: Optional[float] = None,
+        pipeline: Optional[bool] = None,
+    ):
+        """初始化场景调度器，未指定的参数从 update 配置读取
+
+        Args:
+            max_workers: 并发场景数上限，0/None 表示自动选择
+            executor: 'process' 或 'thread'
+            memory_budget_mb: 场景内存预算（MB），0/None 表示空闲内存 × memory_fraction
+            memory_factor: 内存估算系数（相对输入文件大小）
+            pipeline: 后处理是否与其他场景的报告生成重叠执行
+        """
+        max_workers = max_workers or int(Config.get('update.scene_workers', 0) or 0)
+        self.max_workers = max_workers or min(os.cpu_count() or 1, DEFAULT_MAX_SCENE_WORKERS)
+        self.executor = executor or Config.get('update.scene_executor', SCENE_EXECUTOR_PROCESS)
+        self.memory_factor = memory_factor or float(Config.get('update.memory_factor', DEFAULT_SCENE_MEMORY_FACTOR))
+        memory_budget_mb = memory_budget_mb or float(Config.get('update.memory_budget_mb', 0) or 0)
+        if memory_budget_mb:
+            self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        else:
+            memory_fraction = float(Config.get('update.memory_fraction', DEFAULT_SCENE_MEMORY_FRACTION))
+            self.memory_budget = int(psutil.virtual_memory().available * memory_fraction)
+        self.pipeline = bool(Config.get('update.pipeline', True)) if pipeline is None else pipeline
+        self.timings: list[SceneTiming] = []
+
+    def _create_executor(self, scene_count: int) -> Executor:
+        max_workers = min(self.max_workers, scene_count)
+        if self.executor == SCENE_EXECUTOR_PROCESS:
+            return ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_scene_worker,
+                initargs=(Config.snapshot(), logging.getLogger().getEffectiveLevel()),
+            )
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scene-report')
+
+    def run(
+        self,
+        case_dirs: list[str],
+        report_generator: Any,
+        time_ranges: Optional[list[dict]] = None,
+        post_report: Optional[Callable[[str], Any]] = None,
+    ) -> list[SceneTiming]:
+        """为所有场景生成报告并执行后处理
+
+        Args:
+            case_dirs: 场景目录列表（按此顺序放行）
+            report_generator: ReportGenerator，进程池模式下需可 pickle
+            time_ranges: 时间范围过滤
+            post_report: 场景报告生成后（无论成败）执行的后处理，返回 False 表示失败
+
+        Returns:
+            list[SceneTiming]: 按场景顺序的执行情况
+        """
+        self.timings = [SceneTiming(os.path.basename(case_dir), case_dir) for case_dir in case_dirs]
+        if not case_dirs:
+            return self.timings
+
+        gate = MemoryGate(self.memory_budget)
+        post_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='scene-post') if post_report is not None else None
+        )
+        logger.info(
+            'Scheduling %d scenes (%s executor, max %d concurrent, memory budget %.1f MB, pipeline=%s)',
+            len(case_dirs),
+            self.executor,
+            min(self.max_workers, len(case_dirs)),
+            self.memory_budget / (1024 * 1024),
+            self.pipeline,
+        )
+
+        def on_report_done(future: Future, timing: SceneTiming, estimated: int):
+            gate.release(estimated)
+            try:
+                timing.report_ok, timing.report_seconds = future.result()
+            except Exception as e:
+                timing.report_ok = False
+                timing.error = str(e)
+                logger.error('Error updating report %s: %s', timing.scene, str(e))
+            else:
+                if timing.report_ok:
+                    logger.info('Report updated successfully: %s (%.2f seconds)', timing.scene, timing.report_seconds)
+                else:
+                    logger.error('Report update failed: %s', timing.scene)
+            if post_executor is not None and self.pipeline:
+                post_executor.submit(self._run_post_report, post_report, timing)
+
+        with self._create_executor(len(case_dirs)) as executor:
+            for timing in self.timings:
+                estimated = estimate_scene_memory(timing.case_dir, self.memory_factor)
+                timing.estimated_memory_mb = round(estimated / (1024 * 1024), 1)
+                wait_start = time.time()
+                gate.acquire(estimated)
+                timing.wait_seconds = time.time() - wait_start
+                logger.info('Updating report: %s', timing.scene)
+                if time_ranges:
+                    logger.info('Using time ranges for %s: %s', timing.scene, time_ranges)
+                try:
+                    future = executor.submit(_update_scene_report, report_generator, timing.case_dir, time_ranges)
+                except Exception:
+                    gate.release(estimated)
+                    raise
+                future.add_done_callback(
+                    lambda f, timing=timing, estimated=estimated: on_report_done(f, timing, estimated)
+                )
+        # 退出 with 时等待所有报告任务及其回调完成
+
+        if post_executor is not None:
+            if not self.pipeline:
+                for timing in self.timings:
+                    post_executor.submit(self._run_post_report, post_report, timing)
+            post_executor.shutdown(wait=True)
+
+        return self.timings
+
+    @staticmethod
+    def _run_post_report(post_report: Callable[[str], Any], timing: SceneTiming):
+        start_time = time.time()
+        try:
+            timing.post_ok = post_report(timing.case_dir) is not False
+        except Exception as e:
+            timing.post_ok = False
+            logger.exception('Post-report processing failed for %s: %s', timing.scene, str(e))
+        timing.post_seconds = time.time() - start_time
+
+    def log_summary(self):
+        if not self.timings:
+            return
+        total_report = sum(timing.report_seconds for timing in self.timings)
+        total_post = sum(timing.post_seconds for timing in self.timings)
+        logger.info(
+            'Scene timing summary: %d scenes, report %.2f seconds, post-processing %.2f seconds (sums)',
+            len(self.timings),
+            total_report,
+            total_post,
+        )
+        logger.info('  %-40s %10s %10s %10s %10s  %s', 'scene', 'report(s)', 'post(s)', 'wait(s)', 'est(MB)', 'status')
+        # 按报告耗时排序，最慢的在前面
+        for timing in sorted(self.timings, key=lambda t: t.report_seconds + t.post_seconds, reverse=True):
+            status = 'ok' if timing.report_ok else 'report failed'
+            if timing.post_ok is False:
+                status += ', post failed'
+            logger.info(
+                '  %-40s %10.2f %10.2f %10.2f %10.1f  %s',
+                timing.scene[:40],
+                timing.report_seconds,
+                timing.post_seconds,
+                timing.wait_seconds,
+                timing.estimated_memory_mb,
+                status,
+            )
+
+    def save_summary(self, path: str):
+        data = {
+            'executor': self.executor,
+            'max_workers': self.max_workers,
+            'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+            'pipeline': self.pipeline,
+            'scenes': [
+                {
+                    **asdict(timing),
+                    'wait_seconds': round(timing.wait_seconds, 3),
+                    'report_seconds': round(timing.report_seconds, 3),
+                    'post_seconds': round(timing.post_seconds, 3),
+                }
+                for timing in self.timings
+            ],
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,204 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import contextlib
+import contextvars
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from hapray.core.common import profiler
+
+logger = logging.getLogger(__name__)
+
+# 共享数据集名称
+APP_PIDS = 'app_pids'
+PROCESS_THREAD_MAPS = 'process_thread_maps'
+TID_TO_INFO = 'tid_to_info'
+
+_current_context: contextvars.ContextVar[Optional['StepContext']] = contextvars.ContextVar(
+    'hapray_step_context', default=None
+)
+
+
+@dataclass
+class ProcessThreadMaps:
+    """trace.db 中 process / thread 表的映射
+
+    - proc_by_pid:   {pid -> {name, ipid}}
+    - proc_by_ipid:  {ipid -> {pid, name}}
+    - thread_by_id:  {thread.id -> {tid, name, ipid, proc_pid, proc_name}}（thread.id 即 callstack.callid）
+    - thread_by_tid: {tid -> {id, name, ipid, proc_pid, proc_name}}
+    """
+
+    proc_by_pid: dict = field(default_factory=dict)
+    proc_by_ipid: dict = field(default_factory=dict)
+    thread_by_id: dict = field(default_factory=dict)
+    thread_by_tid: dict = field(default_factory=dict)
+
+
+def load_process_thread_maps(conn: sqlite3.Connection) -> ProcessThreadMaps:
+    """加载进程/线程映射表，便于把 pid/tid 转成名字"""
+    maps = ProcessThreadMaps()
+    for pid, name, ipid in conn.execute('SELECT pid, name, ipid FROM process'):
+        maps.proc_by_pid[pid] = {'name': name, 'ipid': ipid}
+        if ipid is not None:
+            maps.proc_by_ipid[ipid] = {'pid': pid, 'name': name}
+
+    for thread_id, tid, name, ipid in conn.execute('SELECT id, tid, name, ipid FROM thread'):
+        proc_info = maps.proc_by_ipid.get(ipid, {}) if ipid is not None else {}
+        maps.thread_by_id[thread_id] = {
+            'tid': tid,
+            'name': name,
+            'ipid': ipid,
+            'proc_pid': proc_info.get('pid'),
+            'proc_name': proc_info.get('name'),
+        }
+        if tid is not None:
+            maps.thread_by_tid[tid] = {
+                'id': thread_id,
+                'name': name,
+                'ipid': ipid,
+                'proc_pid': proc_info.get('pid'),
+                'proc_name': proc_info.get('name'),
+            }
+    return maps
+
+
+def load_tid_to_info(conn: Optional[sqlite3.Connection]) -> dict:
+    """tid 到线程名/进程名的映射：{tid: {'thread_name': str, 'process_name': str}}
+
+    查询所有线程信息，不仅限于应用进程，因为 perf_sample 可能包含系统线程或其他进程的线程。
+    """
+    if not conn:
+        logging.warning('trace_conn未建立，无法获取线程信息')
+        return {}
+
+    tid_to_info = {}
+    try:
+        cursor = conn.execute("""
+            SELECT DISTINCT t.tid, t.name as thread_name, p.name as process_name
+            FROM thread t
+            INNER JOIN process p ON t.ipid = p.ipid
+        """)
+        for tid, thread_name, process_name in cursor.fetchall():
+            tid_to_info[tid] = {'thread_name': thread_name, 'process_name': process_name}
+    except Exception as e:
+        logging.warning('查询线程信息失败: %s', str(e))
+    return tid_to_info
+
+
+class StepContext:
+    """单个步骤内各分析器共享的数据集与分析结果
+
+    数据集按名称注册构建函数，首次 get() 时构建（同一数据集并发请求时只构建一次），之后直接复用；
+    调度器把每个分析器的步骤结果 publish_result() 到这里，依赖它的分析器通过 result_of() 读取。
+    分析器执行期间通过 activate() 把上下文设为当前上下文，下层代码用 StepContext.current() 获取。
+    """
+
+    _builders: dict[str, Callable[['StepContext'], Any]] = {}
+
+    def __init__(self, scene_dir: str, step_dir: str, trace_db_path: str, perf_db_path: str):
+        self.scene_dir = scene_dir
+        self.step_dir = step_dir
+        self.trace_db_path = trace_db_path
+        self.perf_db_path = perf_db_path
+        self._datasets: dict[str, Any] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._results: dict[str, Any] = {}
+        # 每个数据集的构建耗时（秒）
+        self.build_times: dict[str, float] = {}
+
+    @classmethod
+    def register_dataset(cls, name: str, builder: Callable[['StepContext'], Any]):
+        """注册数据集构建函数，builder 接收 StepContext 返回数据集"""
+        cls._builders[name] = builder
+
+    @staticmethod
+    def current() -> Optional['StepContext']:
+        return _current_context.get()
+
+    @staticmethod
+    def current_for(step_dir: str, trace_db_path: str) -> Optional['StepContext']:
+        """当前上下文属于该步骤和 trace.db 时返回它，否则返回 None（调用方自行加载）"""
+        context = _current_context.get()
+        if context is None or context.step_dir != step_dir or context.trace_db_path != trace_db_path:
+            return None
+        return context
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator['StepContext']:
+        token = _current_context.set(self)
+        try:
+            yield self
+        finally:
+            _current_context.reset(token)
+
+    def get(self, name: str) -> Any:
+        if name in self._datasets:
+            return self._datasets[name]
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._datasets:
+                builder = self._builders.get(name)
+                if builder is None:
+                    raise KeyError(f'Unknown step dataset: {name}')
+                start_time = time.time()
+                with profiler.span(name, 'dataset', step=self.step_dir):
+                    self._datasets[name] = builder(self)
+                self.build_times[name] = time.time() - start_time
+                logger.debug('Built dataset %s for %s in %.3f seconds', name, self.step_dir, self.build_times[name])
+        return self._datasets[name]
+
+    def prefetch(self, names: Iterable[str]):
+        """预先构建数据集，构建失败的数据集留给使用方 get() 时再报错"""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning('Failed to build dataset %s for %s: %s', name, self.step_dir, str(e))
+
+    def publish_result(self, analyzer_name: str, result: Any):
+        self._results[analyzer_name] = result
+
+    def has_result(self, analyzer_name: str) -> bool:
+        return analyzer_name in self._results
+
+    def result_of(self, analyzer_name: str) -> Any:
+        """已完成的分析器在本步骤的结果，未执行或没有结果时返回 None"""
+        return self._results.get(analyzer_name)
+
+    def open_trace_db(self) -> sqlite3.Connection:
+        return profiler.connect(self.trace_db_path)
+
+
+def _build_process_thread_maps(context: StepContext) -> ProcessThreadMaps:
+    with contextlib.closing(context.open_trace_db()) as conn:
+        return load_process_thread_maps(conn)
+
+
+def _build_tid_to_info(context: StepContext) -> dict:
+    with contextlib.closing(context.open_trace_db()) as conn:
+        return load_tid_to_info(conn)
+
+
+StepContext.register_dataset(PROCESS_THREAD_MAPS, _build_process_thread_maps)
+StepContext.register_dataset(TID_TO_INFO, _build_tid_to_info)
@@ -203,6 +203,21 @@ class Config:
         except AttributeError:
             return default
 
+    @classmethod
+    def snapshot(cls) -> ConfigObject:
+        """获取当前配置数据（包含运行期通过 set 写入的值），用于传递给子进程"""
+        if cls._instance is None:
+            Config()
+        return cls._instance.data
+
+    @classmethod
+    def restore(cls, data: ConfigObject):
+        """使用 snapshot 得到的配置数据覆盖当前配置（子进程初始化时调用）"""
+        if cls._instance is None:
+            Config()
+        with cls._lock:
+            cls._instance._data = data
+
     @classmethod
     def set(cls, key_path: str, value: Any):
         """
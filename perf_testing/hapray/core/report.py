@@ -34,6 +34,11 @@ from hapray.analyze.symbol_statistic_analyzer import SymbolStatisticAnalyzer
 from hapray.core.common.excel_utils import ExcelReportSaver
 from hapray.core.common.exe_utils import ExeUtils
 from hapray.core.common.report_paths import find_testcase_dirs_under_report_root
+from hapray.core.common.report_stream import (
+    GzipBase64FilePayload,
+    PlaceholderValue,
+    write_template_with_placeholders,
+)
 from hapray.core.common.root_cause_integration import (
     embed_root_cause_into_hapray_html,
     merge_root_cause_into_result,
@@ -47,6 +52,8 @@ from hapray.mode.mode import Mode
 # HTML 生成阶段会对多个大字段反复压缩，故统一降到 6 以大幅缩短报告生成时间，体积代价可忽略。
 _REPORT_ZLIB_LEVEL = 6
 _REPORT_GZIP_LEVEL = 6
+# 内嵌数据库自动选择压缩线程数时的上限
+_REPORT_EMBED_MAX_WORKERS = 4
 
 
 def _hiperf_step_sort_key(step_dir_name: str) -> int:
@@ -1095,14 +1102,17 @@ class ReportGenerator:
             return '', ''
 
     @staticmethod
-    def _build_db_data(scene_dir: str) -> str:
+    def _build_db_data(scene_dir: str) -> PlaceholderValue:
         """构建数据库文件数据（gzip+base64编码）
 
+        数据库可能有数百 MB，不再整体读入内存压缩编码，而是返回流式载荷，
+        在写 HTML 时分块读取、压缩（可多线程）、编码并直接写入输出文件。
+
         Args:
             scene_dir: 场景目录路径
 
         Returns:
-            Base64编码的gzip压缩数据库文件字符串，如果文件不存在则返回空字符串
+            数据库文件的 gzip+base64 流式载荷，如果文件不存在则返回空字符串
         """
         # 数据库文件路径
         db_path = os.path.join(scene_dir, 'report', 'hapray_report.db')
@@ -1112,48 +1122,24 @@ class ReportGenerator:
             logging.warning('Database file not found: %s, returning empty string', db_path)
             return ''
 
-        try:
-            # 读取数据库文件
-            with open(db_path, 'rb') as f:
-                db_data = f.read()
-
-            # 使用 gzip 压缩
-            compressed_data = gzip.compress(db_data, compresslevel=_REPORT_GZIP_LEVEL)
-
-            # Base64 编码
-            base64_data = base64.b64encode(compressed_data).decode('ascii')
-
-            # 记录压缩效果
-            original_size = len(db_data)
-            compressed_size = len(compressed_data)
-            base64_size = len(base64_data)
-            compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
-
-            logging.info(
-                'Database file processed: %s -> %d bytes (compressed: %d, base64: %d, compression ratio: %.1f%%)',
-                db_path,
-                original_size,
-                compressed_size,
-                base64_size,
-                compression_ratio,
-            )
-
-            return base64_data
-        except Exception as e:
-            logging.error('Failed to build database data: %s', str(e))
-            return ''
+        workers = int(Config.get('report.embed_compress_workers', 0) or 0)
+        if workers <= 0:
+            workers = min(os.cpu_count() or 1, _REPORT_EMBED_MAX_WORKERS)
+        return GzipBase64FilePayload(db_path, _REPORT_GZIP_LEVEL, workers=workers)
 
     @staticmethod
     def _inject_json_to_html(
-        placeholders: dict[str, str],
+        placeholders: dict[str, PlaceholderValue],
         html_path: str,
         output_path: str,
         patch_flame_graph_full_html: bool = False,
     ) -> None:
         """Inject data into an HTML template (support multiple placeholders)
 
+        模板片段与占位符的值依次流式写入输出文件，不在内存中构造替换后的完整 HTML。
+
         Args:
-            placeholders: 占位符字典，key 为占位符字符串，value 为要替换的值
+            placeholders: 占位符字典，key 为占位符字符串，value 为要替换的值（字符串或流式载荷）
             html_path: HTML 模板文件路径
             output_path: 输出 HTML 文件路径
             patch_flame_graph_full_html: 是否让打包模板支持直接消费完整 HTML 火焰图
@@ -1169,13 +1155,15 @@ class ReportGenerator:
         if patch_flame_graph_full_html:
             html_content = ReportGenerator._patch_flame_graph_runtime_for_full_html(html_content)
 
-        # Replace all placeholders
-        for placeholder, value in placeholders.items():
-            html_content = html_content.replace(placeholder, value)
-
-        # Save the updated HTML
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Replace all placeholders while writing; write to a temp file first so a failure never leaves a truncated report
+        tmp_path = f'{output_path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                write_template_with_placeholders(html_content, placeholders, f)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
         logging.debug('Injected %d placeholders into %s', len(placeholders), output_path)
 
@@ -12,10 +12,21 @@ from pathlib import Path
 from hapray.core.common.exe_utils import ExeUtils
 
 
+def _frame_name(file_path, ip):
+    """有意义的节点名：优先用 文件路径+偏移，回退用十六进制地址"""
+    if ip:
+        ip_str = f'0x{ip:x}'
+        return f'{file_path}+{ip_str}' if file_path else ip_str
+    return 'unknown'
+
+
 def _build_flame_tree(cursor, target_processes):
     """
     构建火焰图树形结构
 
+    每个 callchain 的 event_count 先在 SQL 中汇总，调用链帧按 (callchain_id, depth DESC) 顺序流式读取，
+    逐条插入树中：子节点按名称哈希索引，节点名按 (file_id, ip) 复用同一个字符串对象。
+
     Args:
         cursor: SQLite cursor
         target_processes: 目标进程ID列表，None表示全部
@@ -40,84 +51,55 @@ def _build_flame_tree(cursor, target_processes):
     except Exception:
         pass
 
-    # 查询callchain数据（使用ip+path作为节点名，避免pc.name是INT而非函数名）
-    cursor.execute("""
-        SELECT
-            ps.id as sample_id,
-            ps.callchain_id,
-            ps.event_count,
-            pc.depth,
-            pc.ip,
-            pc.file_id,
-            pc.symbol_id
-        FROM perf_sample ps
-        JOIN perf_callchain pc ON ps.callchain_id = pc.callchain_id
-        ORDER BY ps.callchain_id, pc.depth DESC
-    """)
-    rows = cursor.fetchall()
-
-    # 构建火焰图
-    callchains = {}
-    for row in rows:
-        row[0]
-        callchain_id = row[1]
-        event_count = row[2]
-        depth = row[3]
-        ip = row[4]
-        file_id = row[5]
-        symbol_id = row[6]
-
-        if callchain_id not in callchains:
-            callchains[callchain_id] = {
-                'event_count': event_count,
-                'frames': [],
-            }
+    # 每个 callchain 的采样 event_count 之和
+    cursor.execute('SELECT callchain_id, SUM(event_count) FROM perf_sample GROUP BY callchain_id')
+    callchain_counts = dict(cursor.fetchall())
 
-        # 构建有意义的节点名：优先用 文件路径+偏移，回退用十六进制地址
-        file_path = file_path_map.get(file_id) if file_id is not None else None
-        if ip:
-            ip_str = f'0x{ip:x}'
-            name = f'{file_path}+{ip_str}' if file_path else ip_str
-        else:
-            name = 'unknown'
-
-        callchains[callchain_id]['frames'].append(
-            {
-                'depth': depth,
-                'ip': ip_str if ip else 'unknown',
-                'name': name,
-                'file_id': file_id,
-                'symbol_id': symbol_id,
-            }
-        )
+    # 构建期间节点为 [value, {子节点名: 子节点}]
+    root = [0, {}]
+    # (file_id, ip) -> 节点名（使用ip+path作为节点名，避免pc.name是INT而非函数名）
+    frame_names = {}
+    unique_callchains = 0
+    current_id = None
+    event_count = None
+    node = root
 
-    for data in callchains.values():
-        frames = data['frames']
-        if not frames:
+    cursor.execute("""
+        SELECT callchain_id, depth, ip, file_id
+        FROM perf_callchain
+        ORDER BY callchain_id, depth DESC
+    """)
+    for callchain_id, _depth, ip, file_id in cursor:
+        if callchain_id != current_id:
+            current_id = callchain_id
+            event_count = callchain_counts.get(callchain_id)
+            node = root
+            if event_count is not None:
+                unique_callchains += 1
+        if event_count is None:
             continue
 
-        current = tree
-        for frame in sorted(frames, key=lambda x: x['depth'], reverse=True):
-            name = frame['name']
-            found = None
-            for child in current['children']:
-                if child['name'] == name:
-                    found = child
-                    break
-
-            if found:
-                found['value'] += data['event_count']
-                current = found
-            else:
-                new_node = {
-                    'name': name,
-                    'value': data['event_count'],
-                    'children': [],
-                }
-                current['children'].append(new_node)
-                current = new_node
-
-    logging.info('Built flame tree with %d unique callchains', len(callchains))
+        name = frame_names.get((file_id, ip))
+        if name is None:
+            file_path = file_path_map.get(file_id) if file_id is not None else None
+            name = frame_names[(file_id, ip)] = _frame_name(file_path, ip)
+
+        child = node[1].get(name)
+        if child is None:
+            child = node[1][name] = [0, {}]
+        child[0] += event_count
+        node = child
+
+    # 转换为 {'name', 'value', 'children': [...]} 结构，子节点保持首次出现的顺序
+    stack = [(tree, root[1])]
+    while stack:
+        parent, children = stack.pop()
+        for name, (value, grandchildren) in children.items():
+            child = {'name': name, 'value': value, 'children': []}
+            parent['children'].append(child)
+            stack.append((child, grandchildren))
+
+    logging.info('Built flame tree with %d unique callchains', unique_callchains)
     return tree
 
 
@@ -136,6 +118,45 @@ def _tree_to_list(node, max_depth=100, current_depth=0):
     return result
 
 
+def _resolve_frame_symbol(name_id, file_id, ip, file_symbol_map, file_path_map):
+    """解析帧的 (函数名, 文件路径)：优先 perf_files.symbol，回退 file_path+0x{ip}"""
+    symbol_name = ''
+    if name_id is not None and name_id >= 0 and name_id in file_symbol_map:
+        symbol_name = file_symbol_map[name_id]
+
+    file_path = file_path_map.get(file_id) if file_id is not None else None
+    if not symbol_name:
+        symbol_name = _frame_name(file_path, ip)
+
+    return symbol_name, file_path if file_id is not None else ''
+
+
+class _SymbolTable:
+    """SymbolMap 与 symbolsFileList，按首次出现的顺序分配编号"""
+
+    def __init__(self):
+        self.symbol_map = {}
+        self.file_list = []
+        self._sym_key_to_id = {}
+        self._file_to_idx = {}
+
+    def ids(self, symbol_name, frame_path):
+        """返回 (文件索引, SymbolMap ID)"""
+        # 文件索引
+        if frame_path not in self._file_to_idx:
+            self._file_to_idx[frame_path] = len(self.file_list)
+            self.file_list.append(frame_path)
+        file_idx = self._file_to_idx[frame_path]
+
+        # SymbolMap 条目
+        sym_key = (symbol_name, frame_path)
+        if sym_key not in self._sym_key_to_id:
+            sid = str(len(self.symbol_map))
+            self._sym_key_to_id[sym_key] = sid
+            self.symbol_map[sid] = {'symbol': symbol_name, 'file': file_idx}
+        return file_idx, self._sym_key_to_id[sym_key]
+
+
 def _build_callchain_hierarchy(cursor):
     """
     从 perf.db 的 callchain 数据构建 进程→线程→库→函数 层级结构
@@ -163,7 +184,7 @@ def _build_callchain_hierarchy(cursor):
     except Exception:
         pass
 
-    # 3. 加载所有 callchain 帧
+    # 3. 流式加载所有 callchain 帧，(name, file_id, ip) 相同的帧共享同一个 (函数名, 文件路径)
     try:
         cursor.execute("""
             SELECT callchain_id, depth, ip, file_id, name
@@ -174,38 +195,46 @@ def _build_callchain_hierarchy(cursor):
         logging.warning('perf_callchain table not found')
         return None
 
+    # callchain_id -> [((函数名, 文件路径), 是否叶子帧), ...]
     callchain_frames = {}
-    for row in cursor.fetchall():
-        cc_id = row[0]
-        if cc_id not in callchain_frames:
-            callchain_frames[cc_id] = []
-        callchain_frames[cc_id].append(
-            {
-                'depth': row[1],
-                'ip': row[2],
-                'file_id': row[3],
-                'name': row[4],
-            }
-        )
+    frame_symbols = {}
+    current_id = None
+    frames = None
+    for cc_id, depth, ip, frame_file_id, name_id in cursor:
+        if cc_id != current_id:
+            current_id = cc_id
+            frames = callchain_frames.setdefault(cc_id, [])
+        key = (name_id, frame_file_id, ip)
+        frame_symbol = frame_symbols.get(key)
+        if frame_symbol is None:
+            frame_symbol = frame_symbols[key] = _resolve_frame_symbol(
+                name_id, frame_file_id, ip, file_symbol_map, file_path_map
+            )
+        frames.append((frame_symbol, depth == 0))
 
     if not callchain_frames:
         logging.warning('No callchain data found in perf.db')
         return None
 
-    # 4. 加载采样数据（含线程/进程关系）
+    # 4. 按 (callchain, 线程) 汇总采样：采样数、event_count 之和、event_count > 0 的采样数。
+    # 只处理 CPU cycles 事件（event_type_id 可能是 0 或 1）；按每组第一个采样的顺序输出，
+    # 符号/文件编号与逐条处理采样时一致
     try:
         cursor.execute("""
-            SELECT ps.id, ps.callchain_id, ps.thread_id, ps.event_count, ps.event_type_id,
-                   pt.process_id, pt.thread_name
+            SELECT ps.callchain_id, ps.thread_id, pt.process_id, pt.thread_name,
+                   COUNT(*), SUM(ps.event_count), SUM(ps.event_count > 0)
             FROM perf_sample ps
             LEFT JOIN perf_thread pt ON ps.thread_id = pt.thread_id
+            WHERE ps.event_type_id IS NULL OR ps.event_type_id IN (0, 1)
+            GROUP BY ps.callchain_id, ps.thread_id, pt.process_id, pt.thread_name
+            ORDER BY MIN(ps.rowid)
         """)
+        sample_groups = cursor.fetchall()
     except Exception as e:
         logging.warning('Failed to query samples with thread info: %s', e)
         return None
 
-    samples = cursor.fetchall()
-    if not samples:
+    if not sample_groups:
         logging.warning('No samples found in perf.db')
         return None
 
@@ -230,109 +259,65 @@ def _build_callchain_hierarchy(cursor):
         pass
 
     # 6. 构建层级结构
-    symbol_map = {}
-    sym_key_to_id = {}
-    file_list = []
-    file_to_idx = {}
+    symbols = _SymbolTable()
     proc_map = {}
+    # callchain_id -> [(文件索引, 符号ID, 是否叶子帧), ...]，首次使用时分配编号
+    resolved_callchains = {}
 
-    for sample in samples:
-        _callchain_id = sample[1]
-        thread_id = sample[2]
-        event_count = sample[3]
-        event_type_id = sample[4]
-        process_id = sample[5]
-        thread_name = sample[6] or ''
-
-        # 只处理 CPU cycles 事件（event_type_id 可能是 0 或 1）
-        if event_type_id is not None and event_type_id not in (0, 1):
-            continue
+    for group in sample_groups:
+        callchain_id, thread_id, process_id, thread_name, sample_total, event_count, positive_samples = group
         if process_id is None:
             continue
 
-        frames = callchain_frames.get(_callchain_id, [])
-        if not frames:
-            continue
-
-        process_name = process_names.get(process_id, '')
-
-        for frame in frames:
-            name_id = frame['name']
-            frame_file_id = frame['file_id']
-            ip = frame['ip']
-
-            # 解析函数名
-            symbol_name = ''
-            if name_id is not None and name_id >= 0 and name_id in file_symbol_map:
-                symbol_name = file_symbol_map[name_id]
-
-            if not symbol_name:
-                # 回退：file_path+0x{ip}
-                fpath = file_path_map.get(frame_file_id) if frame_file_id is not None else None
-                if ip:
-                    ip_str = f'0x{ip:x}'
-                    symbol_name = f'{fpath}+{ip_str}' if fpath else ip_str
-                else:
-                    symbol_name = 'unknown'
-
-            if not symbol_name:
+        resolved = resolved_callchains.get(callchain_id)
+        if resolved is None:
+            frames = callchain_frames.get(callchain_id)
+            if not frames:
                 continue
+            resolved = resolved_callchains[callchain_id] = [
+                (*symbols.ids(symbol_name, frame_path), is_leaf) for (symbol_name, frame_path), is_leaf in frames
+            ]
+
+        # 进程
+        if process_id not in proc_map:
+            proc_map[process_id] = {
+                'pid': process_id,
+                'processName': process_names.get(process_id, ''),
+                'eventCount': 0,
+                'threads': {},
+            }
+        proc = proc_map[process_id]
+        # 进程/线程的计数按调用链中的每一帧累加
+        proc['eventCount'] += event_count * len(resolved)
+
+        # 线程
+        if thread_id not in proc['threads']:
+            proc['threads'][thread_id] = {
+                'tid': thread_id,
+                'threadName': thread_name or '',
+                'eventCount': 0,
+                'sampleCount': 0,
+                'libs': {},
+            }
+        thread = proc['threads'][thread_id]
+        thread['eventCount'] += event_count * len(resolved)
+        thread['sampleCount'] += positive_samples * len(resolved)
 
-            # 文件路径
-            frame_path = file_path_map.get(frame_file_id) if frame_file_id is not None else ''
-
-            # 文件索引
-            if frame_path not in file_to_idx:
-                file_to_idx[frame_path] = len(file_list)
-                file_list.append(frame_path)
-            file_idx = file_to_idx[frame_path]
-
-            # SymbolMap 条目
-            sym_key = (symbol_name, frame_path)
-            if sym_key not in sym_key_to_id:
-                sid = str(len(symbol_map))
-                sym_key_to_id[sym_key] = sid
-                symbol_map[sid] = {'symbol': symbol_name, 'file': file_idx}
-            sid = sym_key_to_id[sym_key]
-
-            # 进程
-            if process_id not in proc_map:
-                proc_map[process_id] = {
-                    'pid': process_id,
-                    'processName': process_name,
-                    'eventCount': 0,
-                    'threads': {},
-                }
-            proc = proc_map[process_id]
-            proc['eventCount'] += event_count
-
-            # 线程
-            if thread_id not in proc['threads']:
-                proc['threads'][thread_id] = {
-                    'tid': thread_id,
-                    'threadName': thread_name,
-                    'eventCount': 0,
-                    'sampleCount': 0,
-                    'libs': {},
-                }
-            thread = proc['threads'][thread_id]
-            thread['eventCount'] += event_count
-            if event_count > 0:
-                thread['sampleCount'] += 1
-
+        libs = thread['libs']
+        for file_idx, sid, is_leaf in resolved:
             # 库
-            if file_idx not in thread['libs']:
-                thread['libs'][file_idx] = {'fileId': file_idx, 'eventCount': 0, 'functions': {}}
-            lib = thread['libs'][file_idx]
+            lib = libs.get(file_idx)
+            if lib is None:
+                lib = libs[file_idx] = {'fileId': file_idx, 'eventCount': 0, 'functions': {}}
             lib['eventCount'] += event_count
 
             # 函数 counts: [call_count, self_cost, total_cost]
-            if sid not in lib['functions']:
-                lib['functions'][sid] = {'symbol': int(sid), 'counts': [0, 0, 0]}
-            fn = lib['functions'][sid]
-            fn['counts'][0] += 1  # call_count
+            fn = lib['functions'].get(sid)
+            if fn is None:
+                fn = lib['functions'][sid] = {'symbol': int(sid), 'counts': [0, 0, 0]}
+            fn['counts'][0] += sample_total  # call_count
             fn['counts'][2] += event_count  # total_cost
-            if frame['depth'] == 0:
+            if is_leaf:
                 fn['counts'][1] += event_count  # self_cost（仅叶子帧）
 
     if not proc_map:
@@ -387,14 +372,14 @@ def _build_callchain_hierarchy(cursor):
         'Built callchain hierarchy: %d processes, %d threads, %d symbols, %d files',
         len(processes_list),
         len(new_thread_name_map),
-        len(symbol_map),
-        len(file_list),
+        len(symbols.symbol_map),
+        len(symbols.file_list),
     )
 
     return {
         'processes_list': processes_list,
-        'symbol_map': symbol_map,
-        'file_list': file_list,
+        'symbol_map': symbols.symbol_map,
+        'file_list': symbols.file_list,
         'process_name_map': new_process_name_map,
         'thread_name_map': new_thread_name_map,
         'total_event_count': total_event_count,
@@ -14,6 +14,7 @@ limitations under the License.
 """
 
 import re
+from collections import deque
 from typing import Any, Optional
 
 
@@ -588,8 +589,19 @@ class ArkUITreeParser:
 
 
 class ArkUITreeComparator:
+    """ARK UI组件树差异比较
+
+    比较前自底向上为两棵树的每个节点计算 Merkle 式子树摘要（节点名、属性和子节点摘要的哈希），
+    摘要相同的两个子树再做一次 C 层面的整体相等校验后直接跳过，不再逐个节点、逐个属性比较；
+    属性字典相等时也不再逐个属性比较。
+    子节点先按稳定键（类型、id、bounds_rect）配对，剩余的再按相对位置配对，
+    因此插入或删除一个子节点不会让后面的兄弟节点全部变成差异。
+    """
+
     def __init__(self):
         self.differences = []
+        # id(组件字典) -> 子树摘要
+        self._digests: dict[int, int] = {}
 
     def compare_trees(self, tree1: dict[str, Any], tree2: dict[str, Any]) -> list[dict[str, Any]]:
         """
@@ -603,9 +615,80 @@ class ArkUITreeComparator:
             包含差异信息的列表
         """
         self.differences = []
+        self._digests = {}
+        if tree1 and tree2:
+            self._compute_digests(tree1)
+            self._compute_digests(tree2)
         self._compare_components(tree1, tree2, '')
+        self._digests = {}
         return self.differences
 
+    def _compute_digests(self, comp: dict[str, Any]) -> int:
+        """后序计算子树中每个节点的子树摘要，返回 comp 的摘要
+
+        摘要只用于快速排除不同的子树，摘要相同时由调用方再做相等校验，因此不要求无碰撞，
+        属性摘要也只取属性值；属性插入顺序不同等情况只会导致摘要不同、回退到逐个比较。
+        """
+        attrs = comp.get('attributes', {})
+        try:
+            attrs_digest = hash(tuple(attrs.values()))
+        except TypeError:
+            # canvasBounds 等 dict 类型的属性值不可哈希
+            attrs_digest = hash(
+                tuple(repr(value) if isinstance(value, (dict, list)) else value for value in attrs.values())
+            )
+        # 空子节点不参与比较，用 0 占位以保留位置
+        child_digests = tuple(self._compute_digests(child) if child else 0 for child in comp.get('children', []))
+        digest = hash((comp.get('name', comp.get('type', 'Unknown')), attrs_digest, child_digests))
+        self._digests[id(comp)] = digest
+        return digest
+
+    @staticmethod
+    def _child_key(comp: dict[str, Any]) -> Optional[tuple]:
+        """子节点配对用的稳定键，没有 id 和 bounds_rect 时返回 None"""
+        if not comp:
+            return None
+        attrs = comp.get('attributes', {})
+        comp_id = attrs.get('id')
+        bounds_rect = attrs.get('bounds_rect')
+        if comp_id in (None, '') and not bounds_rect:
+            return None
+        try:
+            key = (comp.get('name', comp.get('type', 'Unknown')), comp_id, bounds_rect)
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _match_children(self, children1: list, children2: list) -> tuple[list[tuple[int, int]], list[int], list[int]]:
+        """
+        配对两组子节点
+
+        Returns:
+            (按 children1 顺序的配对 [(i, j)], children1 中未配对的下标, children2 中未配对的下标)
+        """
+        pairs: dict[int, int] = {}
+        # 先按稳定键配对（相同键按出现顺序一一对应）
+        candidates: dict[tuple, deque] = {}
+        for j, child in enumerate(children2):
+            key = self._child_key(child)
+            if key is not None:
+                candidates.setdefault(key, deque()).append(j)
+        if candidates:
+            for i, child in enumerate(children1):
+                indexes = candidates.get(self._child_key(child))
+                if indexes:
+                    pairs[i] = indexes.popleft()
+
+        # 剩余子节点按相对位置配对
+        matched2 = set(pairs.values())
+        rest1 = [i for i in range(len(children1)) if i not in pairs]
+        rest2 = [j for j in range(len(children2)) if j not in matched2]
+        common = min(len(rest1), len(rest2))
+        for i, j in zip(rest1[:common], rest2[:common]):
+            pairs[i] = j
+        return sorted(pairs.items()), rest1[common:], rest2[common:]
+
     def _compare_components(self, comp1: dict[str, Any], comp2: dict[str, Any], path: str):
         """
         递归比较两个组件及其子组件
@@ -618,27 +701,24 @@ class ArkUITreeComparator:
         if not comp1 or not comp2:
             return
 
+        # 子树完全相同，没有差异
+        digest1 = self._digests.get(id(comp1))
+        if digest1 is not None and digest1 == self._digests.get(id(comp2)) and comp1 == comp2:
+            return
+
         # 构建当前组件路径
         comp_name = comp1.get('name', comp1.get('type', 'Unknown'))
         current_path = f'{path}/{comp_name}' if path else comp_name
 
         # 比较当前组件的attributes
-        attrs_diff = self._compare_attributes(comp1, comp2)
+        if comp1.get('attributes', {}) == comp2.get('attributes', {}):
+            attrs_diff = []
+        else:
+            attrs_diff = self._compare_attributes(comp1, comp2)
         if attrs_diff:
-            attrs1 = comp1.get('attributes', {})
-            component_info = {
-                'type': comp_name,
-                'bounds_rect': attrs1.get('bounds_rect', ''),
-                'path': current_path,
-                'attributes': attrs1,
-                'id': attrs1.get('id', ''),
-            }
-            # Image节点添加url便于展示（支持resource://、pixmapID等格式）
-            if comp_name == 'Image':
-                component_info['url'] = attrs1.get('url') or attrs1.get('src') or attrs1.get('Url') or ''
             self.differences.append(
                 {
-                    'component': component_info,
+                    'component': self._make_component_info(comp1, current_path),
                     'is_animation': True,
                     'comparison_result': attrs_diff,
                     'animate_type': 'attribute_animate',
@@ -648,51 +728,38 @@ class ArkUITreeComparator:
         # 递归比较子组件
         children1 = comp1.get('children', [])
         children2 = comp2.get('children', [])
-
-        # 按照相同索引位置比较子组件（假设结构相同）
-        min_children = min(len(children1), len(children2))
-        for i in range(min_children):
-            self._compare_components(children1[i], children2[i], current_path)
-
-        # 处理多余的子组件（如果结构不同）
-        def _make_component_info(comp: dict, path_suffix: str) -> dict:
-            attrs = comp.get('attributes', {})
-            info = {
-                'type': comp.get('name', comp.get('type', 'Unknown')),
-                'bounds_rect': attrs.get('bounds_rect', ''),
-                'path': path_suffix,
-                'attributes': attrs,
-                'id': attrs.get('id', ''),
-            }
-            if info['type'] == 'Image':
-                info['url'] = attrs.get('url') or attrs.get('src') or attrs.get('Url') or ''
-            return info
-
-        if len(children1) > len(children2):
-            for i in range(len(children2), len(children1)):
-                comp = children1[i]
-                comp_name = comp.get('name', comp.get('type', 'Unknown'))
+        pairs, extra1, extra2 = self._match_children(children1, children2)
+        for i, j in pairs:
+            self._compare_components(children1[i], children2[j], current_path)
+
+        # 处理未配对的子组件（如果结构不同）
+        for children, extra in ((children1, extra1), (children2, extra2)):
+            for i in extra:
+                comp = children[i]
+                child_name = comp.get('name', comp.get('type', 'Unknown'))
                 self.differences.append(
                     {
-                        'component': _make_component_info(comp, f'{current_path}/{comp_name}'),
+                        'component': self._make_component_info(comp, f'{current_path}/{child_name}'),
                         'is_animation': True,
                         'comparison_result': attrs_diff,
                         'animate_type': 'attribute_animate',
                     }
                 )
 
-        elif len(children2) > len(children1):
-            for i in range(len(children1), len(children2)):
-                comp = children2[i]
-                comp_name = comp.get('name', comp.get('type', 'Unknown'))
-                self.differences.append(
-                    {
-                        'component': _make_component_info(comp, f'{current_path}/{comp_name}'),
-                        'is_animation': True,
-                        'comparison_result': attrs_diff,
-                        'animate_type': 'attribute_animate',
-                    }
-                )
+    @staticmethod
+    def _make_component_info(comp: dict[str, Any], path: str) -> dict[str, Any]:
+        attrs = comp.get('attributes', {})
+        info = {
+            'type': comp.get('name', comp.get('type', 'Unknown')),
+            'bounds_rect': attrs.get('bounds_rect', ''),
+            'path': path,
+            'attributes': attrs,
+            'id': attrs.get('id', ''),
+        }
+        # Image节点添加url便于展示（支持resource://、pixmapID等格式）
+        if info['type'] == 'Image':
+            info['url'] = attrs.get('url') or attrs.get('src') or attrs.get('Url') or ''
+        return info
 
     def _compare_attributes(self, comp1: dict[str, Any], comp2: dict[str, Any]) -> list[dict[str, Any]]:
         """
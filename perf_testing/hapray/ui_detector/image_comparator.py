@@ -19,11 +19,32 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+# 每个字节的 1 的个数，numpy 不提供 bitwise_count 时用于 popcount
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """按最后一维统计 uint64 数组中 1 的个数"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+    words = np.ascontiguousarray(words)
+    return _POPCOUNT_TABLE[words.view(np.uint8)].sum(axis=-1, dtype=np.int64)
+
 
 class RegionImageComparator:
+    """基于 dHash 的截图区域比较
+
+    哈希按行优先、高位在前打包为 uint64 数组（hash_size=8 时为一个 uint64），汉明距离为异或后的 popcount。
+    批量比较时每张截图只解码一次并整体转为灰度图，所有区域的哈希与距离一次向量化计算。
+    """
+
     def __init__(self):
         self.hash_size = 8  # dHash尺寸，生成64位哈希值
 
+    @property
+    def hash_bits(self) -> int:
+        return self.hash_size * self.hash_size
+
     def load_and_crop_region(self, image_path, region):
         """
         加载图像并裁剪指定区域
@@ -47,6 +68,73 @@ class RegionImageComparator:
             print(f'加载或裁剪图像时出错: {e}')
             return None
 
+    def load_gray_image(self, image_path):
+        """
+        加载整张图像并转换为灰度数组
+
+        Args:
+            image_path: 图像路径
+
+        Returns:
+            灰度图像数组，失败时返回 None
+        """
+        try:
+            img = Image.open(image_path)
+            img = img.convert('RGB')
+            return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2GRAY)
+        except Exception as e:
+            print(f'加载图像时出错: {e}')
+            return None
+
+    @staticmethod
+    def crop_array(image_array, region):
+        """
+        按 PIL Image.crop 的语义裁剪数组：坐标四舍五入，超出图像的部分填 0
+
+        Args:
+            image_array: 图像数组
+            region: 区域坐标 (x1, y1, x2, y2)
+
+        Returns:
+            裁剪后的数组（区域完全在图像内时为视图）
+        """
+        x1, y1, x2, y2 = (round(value) for value in region)
+        if x2 < x1 or y2 < y1:
+            raise ValueError(f'无效区域: {region}')
+        height, width = image_array.shape[:2]
+        if x1 >= 0 and y1 >= 0 and x2 <= width and y2 <= height:
+            return image_array[y1:y2, x1:x2]
+
+        cropped = np.zeros((y2 - y1, x2 - x1, *image_array.shape[2:]), dtype=image_array.dtype)
+        src_x1, src_y1, src_x2, src_y2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+        if src_x1 < src_x2 and src_y1 < src_y2:
+            cropped[src_y1 - y1 : src_y2 - y1, src_x1 - x1 : src_x2 - x1] = image_array[src_y1:src_y2, src_x1:src_x2]
+        return cropped
+
+    def _resize_for_hash(self, gray):
+        """缩放为 hash_size x (hash_size + 1)，空区域返回 None"""
+        if gray.size == 0:
+            return None
+        return cv2.resize(gray, (self.hash_size + 1, self.hash_size))
+
+    def dhash_batch(self, resized):
+        """
+        向量化计算多个已缩放区域的 dHash
+
+        Args:
+            resized: (N, hash_size, hash_size + 1) 灰度数组
+
+        Returns:
+            (N, words) uint64 数组
+        """
+        # 计算水平梯度差异
+        diff = resized[:, :, 1:] > resized[:, :, :-1]
+        bits = diff.reshape(len(resized), -1)
+        padding = -bits.shape[1] % 64
+        if padding:
+            bits = np.pad(bits, ((0, 0), (0, padding)))
+        return np.packbits(bits, axis=1).view('>u8').astype(np.uint64)
+
     def calculate_dhash(self, image_array):
         """
         计算图像的dHash值
@@ -55,7 +143,7 @@ class RegionImageComparator:
             image_array: 图像数组
 
         Returns:
-            dHash字符串
+            打包后的 dHash（uint64 数组）
         """
         try:
             # 转换为灰度图
@@ -63,32 +151,37 @@ class RegionImageComparator:
 
             # 调整大小为 (hash_size + 1) x hash_size
             resized = cv2.resize(gray, (self.hash_size + 1, self.hash_size))
-
-            # 计算水平梯度差异
-            diff = resized[:, 1:] > resized[:, :-1]
-
-            # 转换为哈希字符串
-            return ''.join(['1' if pixel else '0' for row in diff for pixel in row])
+            return self.dhash_batch(resized[np.newaxis])[0]
 
         except Exception as e:
             print(f'计算dHash时出错: {e}')
             return None
 
+    def hash_to_string(self, packed_hash):
+        """打包的哈希转为 '0'/'1' 字符串（报告中展示用）"""
+        return ''.join(format(int(word), '064b') for word in packed_hash)[: self.hash_bits]
+
     def hamming_distance(self, hash1, hash2):
         """
         计算两个哈希值的汉明距离
 
         Args:
-            hash1: 第一个哈希值
+            hash1: 第一个哈希值（打包的 uint64 数组，或 '0'/'1' 字符串）
             hash2: 第二个哈希值
 
         Returns:
             汉明距离
         """
-        if len(hash1) != len(hash2):
+        if isinstance(hash1, str) or isinstance(hash2, str):
+            if len(hash1) != len(hash2):
+                raise ValueError('哈希值长度不一致')
+            return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+
+        hash1 = np.asarray(hash1, dtype=np.uint64)
+        hash2 = np.asarray(hash2, dtype=np.uint64)
+        if hash1.shape != hash2.shape:
             raise ValueError('哈希值长度不一致')
-
-        return sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+        return int(popcount(np.bitwise_xor(hash1, hash2)))
 
     def compare_regions(self, image1_path, image2_path, region1, region2=None):
         """
@@ -105,36 +198,69 @@ class RegionImageComparator:
         """
         if region2 is None:
             region2 = region1
+        return self.compare_regions_batch(image1_path, image2_path, [region1], [region2])[0]
 
-        # 加载并裁剪区域
-        region1_img = self.load_and_crop_region(image1_path, region1)
-        region2_img = self.load_and_crop_region(image2_path, region2)
+    def compare_regions_batch(self, image1_path, image2_path, regions1, regions2=None):
+        """
+        批量比较两张图像的多个区域：每张图像只解码一次，所有区域的哈希和汉明距离一次计算
 
-        if region1_img is None or region2_img is None:
-            return None
+        Args:
+            image1_path: 第一张图像路径
+            image2_path: 第二张图像路径
+            regions1: 第一张图像的区域列表
+            regions2: 第二张图像的区域列表，如果为None则使用与regions1相同的区域
 
-        # 计算dHash
-        hash1 = self.calculate_dhash(region1_img)
-        hash2 = self.calculate_dhash(region2_img)
+        Returns:
+            与 regions1 一一对应的比较结果字典列表，比较失败的区域为 None
+        """
+        if regions2 is None:
+            regions2 = regions1
+        results = [None] * len(regions1)
 
-        if hash1 is None or hash2 is None:
-            return None
+        gray1 = self.load_gray_image(image1_path)
+        gray2 = self.load_gray_image(image2_path)
+        if gray1 is None or gray2 is None:
+            return results
 
-        # 计算汉明距离
-        distance = self.hamming_distance(hash1, hash2)
+        valid = []
+        resized1, resized2, sizes = [], [], []
+        for i, (region1, region2) in enumerate(zip(regions1, regions2)):
+            try:
+                crop1 = self.crop_array(gray1, region1)
+                crop2 = self.crop_array(gray2, region2)
+                small1 = self._resize_for_hash(crop1)
+                small2 = self._resize_for_hash(crop2)
+            except Exception as e:
+                print(f'裁剪或缩放区域 {region1} / {region2} 时出错: {e}')
+                continue
+            if small1 is None or small2 is None:
+                continue
+            valid.append(i)
+            resized1.append(small1)
+            resized2.append(small2)
+            # 与 RGB 裁剪结果的 shape 一致
+            sizes.append(((*crop1.shape, 3), (*crop2.shape, 3)))
+
+        if not valid:
+            return results
+
+        hashes1 = self.dhash_batch(np.stack(resized1))
+        hashes2 = self.dhash_batch(np.stack(resized2))
+        distances = popcount(np.bitwise_xor(hashes1, hashes2))
 
         # 计算相似度 (0-100)
-        max_distance = len(hash1)
-        similarity = (1 - distance / max_distance) * 100
-
-        return {
-            'hash1': hash1,
-            'hash2': hash2,
-            'hamming_distance': distance,
-            'similarity_percentage': similarity,
-            'region1_size': region1_img.shape,
-            'region2_size': region2_img.shape,
-        }
+        max_distance = self.hash_bits
+        for k, i in enumerate(valid):
+            distance = int(distances[k])
+            results[i] = {
+                'hash1': self.hash_to_string(hashes1[k]),
+                'hash2': self.hash_to_string(hashes2[k]),
+                'hamming_distance': distance,
+                'similarity_percentage': (1 - distance / max_distance) * 100,
+                'region1_size': sizes[k][0],
+                'region2_size': sizes[k][1],
+            }
+        return results
 
     def mark_regions_with_numbers(self, image_path, regions, output_path=None):
         """
@@ -218,9 +344,9 @@ class RegionImageComparator:
 
         results = []
 
-        for i, (region1, region2) in enumerate(zip(regions1, regions2)):
-            print(f'正在比较区域 {i + 1}...')
-            result = self.compare_regions(image1_path, image2_path, region1, region2)
+        print(f'正在比较 {len(regions1)} 个区域...')
+        batch_results = self.compare_regions_batch(image1_path, image2_path, regions1, regions2)
+        for i, (region1, region2, result) in enumerate(zip(regions1, regions2, batch_results)):
             if result:
                 result['region_index'] = i + 1
                 result['region1'] = region1
@@ -0,0 +1,140 @@
+"""
+增量分析缓存：只复用声明了 cacheable 的分析器结果，输入文件、配置变化或依赖不可缓存分析器时重新分析。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+
+import pytest
+
+from hapray.analyze import _run_analyzers
+from hapray.analyze.analysis_cache import AnalysisCache
+from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.core.config.config import Config
+
+STEP = 'step1'
+
+
+class _CountingAnalyzer(BaseAnalyzer):
+    cacheable = True
+
+    def __init__(self, scene_dir: str, calls: dict, option: str = 'a', input_file: str = ''):
+        super().__init__(scene_dir, 'test/counting')
+        self.calls = calls
+        self.option = option
+        self.input_file = input_file
+
+    def cache_config(self):
+        return {'option': self.option}
+
+    def cache_input_files(self, step_dir):
+        return [self.input_file] if self.input_file else []
+
+    def _analyze_impl(self, step_dir, trace_db_path, perf_db_path, app_pids):
+        name = type(self).__name__
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return {'option': self.option, 'run': self.calls[name]}
+
+
+class _SideEffectAnalyzer(_CountingAnalyzer):
+    """只为副作用运行（如调用外部工具），没有步骤结果"""
+
+    cacheable = False
+
+    def _analyze_impl(self, step_dir, trace_db_path, perf_db_path, app_pids):
+        super()._analyze_impl(step_dir, trace_db_path, perf_db_path, app_pids)
+
+
+class _EmptyResultAnalyzer(_CountingAnalyzer):
+    def _analyze_impl(self, step_dir, trace_db_path, perf_db_path, app_pids):
+        super()._analyze_impl(step_dir, trace_db_path, perf_db_path, app_pids)
+
+
+class _DependentAnalyzer(_CountingAnalyzer):
+    depends_on = ('_SideEffectAnalyzer',)
+
+
+@pytest.fixture
+def scene(tmp_path):
+    step_dir = tmp_path / 'hiperf' / STEP
+    step_dir.mkdir(parents=True)
+    (step_dir / 'pids.json').write_text(json.dumps({'pids': [100], 'process_names': ['app']}), encoding='utf-8')
+    trace_db = tmp_path / 'htrace' / STEP / 'trace.db'
+    trace_db.parent.mkdir(parents=True)
+    sqlite3.connect(trace_db).close()
+    return tmp_path, str(trace_db), str(step_dir / 'perf.db')
+
+
+@pytest.fixture
+def incremental():
+    previous = {key: Config.get(key) for key in ('analyze.incremental', 'analyze.analyzer_workers')}
+    Config.set('analyze.incremental', True)
+    Config.set('analyze.analyzer_workers', 1)
+    yield
+    for key, value in previous.items():
+        Config.set(key, value)
+
+
+def _run(scene, analyzers):
+    _scene_dir, trace_db, perf_db = scene
+    _run_analyzers(analyzers, STEP, trace_db, perf_db)
+    return analyzers
+
+
+def test_incremental_is_disabled_by_default():
+    assert Config.get('analyze.incremental') is False
+    assert AnalysisCache.enabled() is False
+
+
+def test_reuses_cacheable_results_and_reruns_side_effect_analyzers(scene, incremental):
+    scene_dir = str(scene[0])
+    calls: dict = {}
+    first = _run(scene, [_CountingAnalyzer(scene_dir, calls), _SideEffectAnalyzer(scene_dir, calls)])
+    second = _run(scene, [_CountingAnalyzer(scene_dir, calls), _SideEffectAnalyzer(scene_dir, calls)])
+
+    assert calls == {'_CountingAnalyzer': 1, '_SideEffectAnalyzer': 2}
+    assert second[0].results[STEP] == first[0].results[STEP] == {'option': 'a', 'run': 1}
+
+
+def test_config_and_input_file_changes_invalidate(scene, incremental):
+    scene_dir = str(scene[0])
+    input_file = scene[0] / 'extra.txt'
+    input_file.write_text('v1', encoding='utf-8')
+    calls: dict = {}
+
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'a', str(input_file))])
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'a', str(input_file))])
+    assert calls['_CountingAnalyzer'] == 1
+
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'b', str(input_file))])
+    assert calls['_CountingAnalyzer'] == 2
+
+    input_file.write_text('version 2', encoding='utf-8')
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'b', str(input_file))])
+    assert calls['_CountingAnalyzer'] == 3
+
+    # 输入文件后来才出现也会重新分析
+    missing = scene[0] / 'later.txt'
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'b', str(missing))])
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'b', str(missing))])
+    assert calls['_CountingAnalyzer'] == 4
+    missing.write_text('now here', encoding='utf-8')
+    _run(scene, [_CountingAnalyzer(scene_dir, calls, 'b', str(missing))])
+    assert calls['_CountingAnalyzer'] == 5
+
+
+def test_empty_results_and_dependents_of_uncacheable_analyzers_are_not_cached(scene, incremental):
+    scene_dir = str(scene[0])
+    calls: dict = {}
+    for _ in range(2):
+        _run(
+            scene,
+            [
+                _EmptyResultAnalyzer(scene_dir, calls),
+                _SideEffectAnalyzer(scene_dir, calls),
+                _DependentAnalyzer(scene_dir, calls),
+            ],
+        )
+    assert calls == {'_EmptyResultAnalyzer': 2, '_SideEffectAnalyzer': 2, '_DependentAnalyzer': 2}
@@ -0,0 +1,138 @@
+"""
+步骤内分析器调度：按 depends_on 构成的 DAG 并发执行，依赖方读取被依赖分析器的结果，共享数据集只构建一次。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+from hapray.analyze import _run_analyzers
+from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.core.common.step_context import StepContext
+from hapray.core.config.config import Config
+
+STEP = 'step1'
+SHARED_DATASET = 'test_shared_dataset'
+
+
+class _RecordingAnalyzer(BaseAnalyzer):
+    requires = (SHARED_DATASET,)
+
+    def __init__(self, scene_dir: str, log: list, barrier: threading.Barrier | None = None):
+        super().__init__(scene_dir, 'test/recording')
+        self.log = log
+        self.barrier = barrier
+
+    def _analyze_impl(self, step_dir, trace_db_path, perf_db_path, app_pids):
+        name = type(self).__name__
+        self.log.append(('start', name))
+        if self.barrier is not None:
+            # 两个互不依赖的分析器同时到达才能通过
+            self.barrier.wait(timeout=10)
+        context = StepContext.current()
+        upstream = {dependency: context.result_of(dependency) for dependency in self.depends_on}
+        self.log.append(('end', name))
+        return {'pids': app_pids, 'dataset': context.get(SHARED_DATASET), 'upstream': upstream}
+
+
+class _SourceA(_RecordingAnalyzer):
+    pass
+
+
+class _SourceB(_RecordingAnalyzer):
+    pass
+
+
+class _Sink(_RecordingAnalyzer):
+    depends_on = ('_SourceA', '_SourceB', '_NotEnabled')
+
+
+class _CycleFirst(_RecordingAnalyzer):
+    depends_on = ('_CycleSecond',)
+
+
+class _CycleSecond(_RecordingAnalyzer):
+    depends_on = ('_CycleFirst',)
+
+
+@pytest.fixture
+def scene(tmp_path):
+    step_dir = tmp_path / 'hiperf' / STEP
+    step_dir.mkdir(parents=True)
+    (step_dir / 'pids.json').write_text(json.dumps({'pids': [100], 'process_names': ['app']}), encoding='utf-8')
+    trace_db = tmp_path / 'htrace' / STEP / 'trace.db'
+    trace_db.parent.mkdir(parents=True)
+    sqlite3.connect(trace_db).close()
+    return str(tmp_path), str(trace_db), str(step_dir / 'perf.db')
+
+
+@pytest.fixture
+def builds():
+    calls = []
+
+    def build(context):
+        calls.append(context.step_dir)
+        return f'dataset-for-{context.step_dir}'
+
+    StepContext.register_dataset(SHARED_DATASET, build)
+    previous = Config.get('analyze.analyzer_workers')
+    Config.set('analyze.analyzer_workers', 4)
+    yield calls
+    Config.set('analyze.analyzer_workers', previous)
+    StepContext._builders.pop(SHARED_DATASET, None)
+
+
+def test_independent_analyzers_run_concurrently_before_dependents(scene, builds):
+    scene_dir, trace_db, perf_db = scene
+    log = []
+    barrier = threading.Barrier(2)
+    sources = [_SourceA(scene_dir, log, barrier), _SourceB(scene_dir, log, barrier)]
+    sink = _Sink(scene_dir, log)
+
+    _run_analyzers([sink, *sources], STEP, trace_db, perf_db)
+
+    assert log[-2:] == [('start', '_Sink'), ('end', '_Sink')]
+    assert builds == [STEP]
+    assert sink.results[STEP]['pids'] == [100]
+    assert sink.results[STEP]['dataset'] == f'dataset-for-{STEP}'
+    assert sink.results[STEP]['upstream'] == {
+        '_SourceA': sources[0].results[STEP],
+        '_SourceB': sources[1].results[STEP],
+        '_NotEnabled': None,
+    }
+
+
+def test_dependency_cycle_falls_back_to_list_order(scene, builds):
+    scene_dir, trace_db, perf_db = scene
+    log = []
+    analyzers = [_CycleSecond(scene_dir, log), _CycleFirst(scene_dir, log)]
+
+    _run_analyzers(analyzers, STEP, trace_db, perf_db)
+
+    assert log == [
+        ('start', '_CycleSecond'),
+        ('end', '_CycleSecond'),
+        ('start', '_CycleFirst'),
+        ('end', '_CycleFirst'),
+    ]
+    assert analyzers[1].results[STEP]['upstream'] == {'_CycleSecond': analyzers[0].results[STEP]}
+
+
+def test_dataset_is_built_once_under_concurrent_access(scene, builds):
+    scene_dir, trace_db, perf_db = scene
+    context = StepContext(scene_dir, STEP, trace_db, perf_db)
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(context.get(SHARED_DATASET))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert values == [f'dataset-for-{STEP}'] * 8
+    assert builds == [STEP]
+    with pytest.raises(KeyError):
+        context.get('unknown_dataset')
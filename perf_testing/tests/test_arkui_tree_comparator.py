@@ -0,0 +1,138 @@
+"""
+ARK UI 组件树差异比较：子树摘要剪枝 + 按稳定键配对子节点，结构不变时与按下标逐个比较的结果一致。
+"""
+
+from __future__ import annotations
+
+import copy
+import random
+
+import pytest
+
+from hapray.ui_detector.arkui_tree_parser import ArkUITreeComparator, compare_arkui_trees
+
+
+def _node(name: str, children: list | None = None, **attributes) -> dict:
+    return {'name': name, 'depth': 0, 'children': children or [], 'attributes': attributes, 'decorators': []}
+
+
+def _card(index: int) -> dict:
+    return _node(
+        'Column',
+        [
+            _node('Image', src=f'resource://card{index}.png', bounds_rect=f'[0,{index * 100}][100,{index * 100 + 80}]'),
+            _node('Text', content=f'title {index}', canvasBounds={'x': 0, 'y': index * 100}),
+        ],
+        id=f'card{index}',
+        bounds_rect=f'[0,{index * 100}][720,{index * 100 + 100}]',
+    )
+
+
+@pytest.fixture
+def tree() -> dict:
+    return _node('root', [_node('Stack', [_card(i) for i in range(5)], id='list'), _node('Row')])
+
+
+def _reference_compare(comp1: dict, comp2: dict, path: str = '') -> list[dict]:
+    """按子节点下标逐个比较的原实现"""
+    if not comp1 or not comp2:
+        return []
+    comparator = ArkUITreeComparator()
+    current_path = f'{path}/{comp1["name"]}' if path else comp1['name']
+    differences = []
+    attrs_diff = comparator._compare_attributes(comp1, comp2)
+    if attrs_diff:
+        differences.append(
+            {
+                'component': comparator._make_component_info(comp1, current_path),
+                'is_animation': True,
+                'comparison_result': attrs_diff,
+                'animate_type': 'attribute_animate',
+            }
+        )
+    children1, children2 = comp1['children'], comp2['children']
+    for child1, child2 in zip(children1, children2):
+        differences.extend(_reference_compare(child1, child2, current_path))
+    for extra in (children1[len(children2) :], children2[len(children1) :]):
+        differences.extend(
+            {
+                'component': comparator._make_component_info(comp, f'{current_path}/{comp["name"]}'),
+                'is_animation': True,
+                'comparison_result': attrs_diff,
+                'animate_type': 'attribute_animate',
+            }
+            for comp in extra
+        )
+    return differences
+
+
+def _iter_nodes(comp: dict):
+    yield comp
+    for child in comp['children']:
+        yield from _iter_nodes(child)
+
+
+def _mutate(tree: dict, rng: random.Random) -> dict:
+    """只修改属性或在末尾增删子节点，保持按下标配对与按键配对等价"""
+    mutated = copy.deepcopy(tree)
+    nodes = list(_iter_nodes(mutated))
+    for _ in range(rng.randint(1, 3)):
+        node = rng.choice(nodes)
+        action = rng.randrange(3)
+        if action == 0:
+            node['attributes']['opacity'] = rng.choice([0.5, 1.0])
+        elif action == 1 and node['attributes']:
+            key = rng.choice(sorted(k for k in node['attributes'] if k not in ('id', 'bounds_rect')) or ['missing'])
+            node['attributes'].pop(key, None)
+        elif node['children']:
+            node['children'].pop()
+        else:
+            node['children'].append(_node('Blank', color='#fff'))
+    return mutated
+
+
+def test_identical_trees_have_no_differences(tree):
+    assert compare_arkui_trees(tree, copy.deepcopy(tree)) == []
+    assert compare_arkui_trees(tree, {}) == []
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_index_based_reference_when_structure_is_stable(tree, seed):
+    rng = random.Random(seed)
+    mutated = _mutate(tree, rng)
+    assert compare_arkui_trees(tree, mutated) == _reference_compare(tree, mutated)
+
+
+def test_attribute_change_reports_component_and_values(tree):
+    changed = copy.deepcopy(tree)
+    image = changed['children'][0]['children'][2]['children'][0]
+    image['attributes']['src'] = 'resource://other.png'
+
+    [difference] = compare_arkui_trees(tree, changed)
+
+    assert difference['component']['path'] == 'root/Stack/Column/Image'
+    assert difference['component']['url'] == 'resource://card2.png'
+    assert difference['comparison_result'] == [
+        {'attribute': 'src', 'value1': 'resource://card2.png', 'value2': 'resource://other.png'}
+    ]
+
+
+def test_inserted_child_does_not_shift_later_siblings(tree):
+    inserted = copy.deepcopy(tree)
+    inserted['children'][0]['children'].insert(0, _card(9))
+
+    differences = compare_arkui_trees(tree, inserted)
+
+    assert [d['component']['id'] for d in differences] == ['card9']
+    assert differences[0]['component']['path'] == 'root/Stack/Column'
+    assert len(_reference_compare(tree, inserted)) > 1
+
+
+def test_children_without_stable_key_pair_by_position(tree):
+    changed = copy.deepcopy(tree)
+    changed['children'].insert(0, _node('Divider'))
+
+    # Divider 与 Row 都没有 id/bounds_rect，按剩余位置配对：Divider 对 Row，多出的 Row 报告为新增
+    differences = compare_arkui_trees(tree, changed)
+    assert [d['component']['path'] for d in differences] == ['root/Row']
+    assert [d['component']['type'] for d in differences] == ['Row']
@@ -0,0 +1,108 @@
+"""
+调用图编译产物：匹配结果与逐个扫描函数名的旧实现一致，产物按 callgraph.json 指纹复用或重新编译。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from hapray.analyze.llm_root_cause.callgraph_store import STORE_DIRNAME, CallgraphStore
+from hapray.analyze.llm_root_cause.callgraph_traverser import CallgraphTraverser
+
+PAGE_FUNCTIONS = [
+    {'name': 'Index.aboutToAppear', 'callers': []},
+    {'name': 'Index.loadFeedList', 'full_name': 'entry.src.Index.loadFeedList', 'callers': ['Index.aboutToAppear']},
+    {'name': 'FeedModel.parse_items', 'callers': ['Index.loadFeedList', 'entry.src.Index.loadFeedList']},
+    {'name': 'FeedModel.parseItemsFast', 'callers': ['Index.loadFeedList']},
+]
+# callers 为空时由 call_sites 反向建边
+UTIL_FUNCTIONS = [
+    {'name': 'Utils.formatDate', 'call_sites': []},
+    {'name': 'FeedModel.render', 'call_sites': [{'callee': 'Utils.formatDate'}, {'callee': 'FeedModel.parse_items'}]},
+    {'name': 'Card.build', 'call_sites': [{'callee': 'FeedModel.render'}]},
+]
+
+
+def _write_callgraph(path, functions):
+    path.write_text(json.dumps({'functions': functions}), encoding='utf-8')
+
+
+@pytest.fixture
+def source_root(tmp_path):
+    _write_callgraph(tmp_path / 'page.callgraph.json', PAGE_FUNCTIONS)
+    _write_callgraph(tmp_path / 'utils.callgraph.json', UTIL_FUNCTIONS)
+    return tmp_path
+
+
+def _reference_matching(keys: list[str], symbol_name: str) -> list[str]:
+    """逐个扫描函数名的原实现"""
+    queries = [symbol_name]
+    if '.' in symbol_name:
+        parts = symbol_name.split('.')
+        queries.extend([parts[-1], '_'.join(p for p in parts if p)])
+    exact, partial = [], []
+    for key in keys:
+        for q in queries:
+            if not q:
+                continue
+            if q in (key, key.rsplit('.', 1)[-1]):
+                exact.append(key)
+                break
+            q_lower = q.lower().replace('.', '').replace('_', '')
+            if q_lower in key.lower().replace('.', '').replace('_', '') and len(q_lower) >= 6:
+                partial.append(key)
+                break
+    return list(dict.fromkeys(exact + partial))[:8]
+
+
+@pytest.mark.parametrize(
+    'symbol_name',
+    [
+        'loadFeedList',
+        'Index.loadFeedList',
+        'parseItems',
+        'FeedModel.parse_items',
+        'feedmodel',
+        'render',
+        'Utils.formatDate',
+        'abc',
+        'notFoundAnywhere',
+        '',
+    ],
+)
+def test_matching_agrees_with_linear_scan(source_root, symbol_name):
+    store = CallgraphStore.open(source_root)
+    keys = [store.key_name(pos) for pos in range(len(store.keys))]
+    assert store.find_matching(symbol_name) == _reference_matching(keys, symbol_name)
+
+
+def test_callers_from_callers_and_call_sites(source_root):
+    traverser = CallgraphTraverser(source_root)
+    assert traverser.find_callers('FeedModel.parse_items', depth=1) == [
+        'Index.loadFeedList',
+        'entry.src.Index.loadFeedList',
+        'FeedModel.render',
+    ]
+    assert traverser.find_callers('Utils.formatDate', depth=3) == ['FeedModel.render', 'Card.build']
+
+
+def test_store_is_reused_until_a_callgraph_changes(source_root):
+    CallgraphStore.open(source_root)
+    meta_path = source_root / STORE_DIRNAME / 'meta.json'
+    assert meta_path.exists()
+
+    reloaded = CallgraphStore.open(source_root)
+    assert isinstance(reloaded.caller_indices, np.memmap)
+    assert reloaded.callers_of('Index.loadFeedList') == ['Index.aboutToAppear']
+
+    page = source_root / 'page.callgraph.json'
+    _write_callgraph(page, [*PAGE_FUNCTIONS, {'name': 'Index.onPageShow', 'callers': []}])
+    os.utime(page, ns=(page.stat().st_atime_ns, page.stat().st_mtime_ns + 1_000_000_000))
+    recompiled = CallgraphStore.open(source_root)
+    assert not isinstance(recompiled.caller_indices, np.memmap)
+    assert recompiled.find_matching('onPageShow') == ['Index.onPageShow']
+    assert CallgraphStore.load(source_root / STORE_DIRNAME, 'stale-fingerprint') is None
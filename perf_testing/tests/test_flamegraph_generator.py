@@ -0,0 +1,119 @@
+"""
+火焰图数据：perf.json 的进程→线程→库→函数层级与逐条处理采样的结果一致，火焰树按调用链汇总采样。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+
+import pytest
+
+from hapray.mode.flamegraph_generator import _build_flame_tree, generate_perf_json_from_db
+
+LIBC, LIBAPP, LIBFOO = '/system/lib/libc.so', '/data/app/libapp.so', 'libfoo.so'
+
+
+@pytest.fixture
+def perf_db(tmp_path):
+    db_path = tmp_path / 'perf.db'
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE perf_files (id INTEGER, path TEXT, symbol TEXT);
+        CREATE TABLE perf_callchain (callchain_id INTEGER, depth INTEGER, ip INTEGER, file_id INTEGER, name INTEGER);
+        CREATE TABLE perf_sample (
+            id INTEGER PRIMARY KEY, callchain_id INTEGER, thread_id INTEGER, event_count INTEGER, event_type_id INTEGER
+        );
+        CREATE TABLE perf_thread (thread_id INTEGER, process_id INTEGER, thread_name TEXT);
+        CREATE TABLE process (pid INTEGER, name TEXT);
+    """)
+    conn.executemany(
+        'INSERT INTO perf_files VALUES (?, ?, ?)', [(1, LIBC, 'memcpy'), (2, LIBAPP, 'render'), (3, LIBFOO, '')]
+    )
+    # 调用链 1: render -> memcpy；调用链 2: render -> libfoo.so+0x30（无符号）
+    conn.executemany(
+        'INSERT INTO perf_callchain VALUES (?, ?, ?, ?, ?)',
+        [(1, 0, 0x10, 1, 1), (1, 1, 0x20, 2, 2), (2, 0, 0x30, 3, 3), (2, 1, 0x20, 2, 2)],
+    )
+    conn.executemany(
+        'INSERT INTO perf_sample (callchain_id, thread_id, event_count, event_type_id) VALUES (?, ?, ?, ?)',
+        [(1, 100, 10, 0), (2, 101, 5, 1), (1, 100, 0, 0), (1, 101, 7, None), (2, 100, 3, 2)],
+    )
+    conn.executemany('INSERT INTO perf_thread VALUES (?, ?, ?)', [(100, 100, 'app'), (101, 100, 'worker')])
+    conn.commit()
+    conn.close()
+    return str(db_path)
+
+
+def test_perf_json_hierarchy(perf_db, tmp_path):
+    output_path = tmp_path / 'out' / 'perf.json'
+    assert generate_perf_json_from_db(perf_db, str(output_path), 'com.example.app')
+    data = json.loads(output_path.read_text(encoding='utf-8'))
+
+    assert data['SymbolMap'] == {
+        '0': {'symbol': 'memcpy', 'file': 0},
+        '1': {'symbol': 'render', 'file': 1},
+        '2': {'symbol': f'{LIBFOO}+0x30', 'file': 2},
+    }
+    assert data['symbolsFileList'] == [LIBC, LIBAPP, LIBFOO]
+    assert data['processNameMap'] == {'100': 'app'}
+    assert data['threadNameMap'] == {'100': 'app', '101': 'worker'}
+    assert data['totalRecordSamples'] == 5
+
+    # event_type_id = 2 的采样不计入；进程/线程计数按调用链帧数累加
+    cpu_cycles = data['recordSampleInfo'][0]
+    assert cpu_cycles['eventCount'] == 44
+    [process] = cpu_cycles['processes']
+    assert (process['pid'], process['eventCount']) == (100, 44)
+    main_thread, worker = process['threads']
+    assert main_thread == {
+        'tid': 100,
+        'eventCount': 20,
+        'sampleCount': 2,
+        'libs': [
+            {'fileId': 0, 'eventCount': 10, 'functions': [{'symbol': 0, 'counts': [2, 10, 10]}]},
+            {'fileId': 1, 'eventCount': 10, 'functions': [{'symbol': 1, 'counts': [2, 0, 10]}]},
+        ],
+    }
+    assert worker == {
+        'tid': 101,
+        'eventCount': 24,
+        'sampleCount': 4,
+        'libs': [
+            {'fileId': 0, 'eventCount': 7, 'functions': [{'symbol': 0, 'counts': [1, 7, 7]}]},
+            {'fileId': 1, 'eventCount': 12, 'functions': [{'symbol': 1, 'counts': [2, 0, 12]}]},
+            {'fileId': 2, 'eventCount': 5, 'functions': [{'symbol': 2, 'counts': [1, 5, 5]}]},
+        ],
+    }
+
+
+def test_flame_tree_sums_samples_per_callchain(perf_db):
+    conn = sqlite3.connect(perf_db)
+    try:
+        tree = _build_flame_tree(conn.cursor(), None)
+    finally:
+        conn.close()
+
+    assert tree == {
+        'name': 'root',
+        'value': 0,
+        'children': [
+            {
+                'name': f'{LIBAPP}+0x20',
+                'value': 25,
+                'children': [
+                    {'name': f'{LIBC}+0x10', 'value': 17, 'children': []},
+                    {'name': f'{LIBFOO}+0x30', 'value': 8, 'children': []},
+                ],
+            }
+        ],
+    }
+
+
+def test_missing_samples_returns_false(tmp_path):
+    db_path = tmp_path / 'empty.db'
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE perf_sample (callchain_id INTEGER, event_count INTEGER)')
+    conn.close()
+    assert not generate_perf_json_from_db(str(db_path), str(tmp_path / 'perf.json'), 'com.example.app')
+    assert not (tmp_path / 'perf.json').exists()
@@ -0,0 +1,104 @@
+"""
+帧分析磁盘缓存：同一数据库重复分析时命中（索引创建不影响指纹），数据库内容变化后失效并清理旧条目。
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hapray.core.common.frame.frame_core_cache_manager import ensure_perf_trace_indexes
+from hapray.core.common.frame.frame_disk_cache import FrameDiskCache
+from hapray.core.config.config import Config
+
+APP_PIDS = [100]
+
+
+@pytest.fixture
+def trace_db(tmp_path):
+    db_path = tmp_path / 'htrace' / 'step1' / 'trace.db'
+    db_path.parent.mkdir(parents=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE thread (id INTEGER, itid INTEGER, tid INTEGER, name TEXT)')
+    conn.executemany('INSERT INTO thread VALUES (?, ?, ?, ?)', [(i, i, 1000 + i, f't{i}') for i in range(100)])
+    conn.commit()
+    conn.close()
+    return str(db_path)
+
+
+def _frames() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'ts': np.arange(10, dtype=np.int64) * 1000,
+            'dur': np.full(10, 16_000_000, dtype=np.int64),
+            'thread_name': [f't{i}' for i in range(10)],
+        }
+    )
+
+
+def _analyze_once(db_path: str) -> tuple[pd.DataFrame, FrameDiskCache, list]:
+    """模拟一次分析：像 FrameCacheManager 一样先建索引，再经磁盘缓存读取帧数据"""
+    conn = sqlite3.connect(db_path)
+    ensure_perf_trace_indexes(conn)
+    conn.close()
+    queries = []
+
+    def loader():
+        queries.append(1)
+        return _frames()
+
+    cache = FrameDiskCache()
+    return cache.get_or_load('frames', db_path, APP_PIDS, loader), cache, queries
+
+
+def _entries(db_path: str) -> list[str]:
+    root = os.path.join(os.path.dirname(db_path), '.hapray_frame_cache')
+    return sorted(os.listdir(root)) if os.path.isdir(root) else []
+
+
+def test_disk_cache_is_disabled_by_default():
+    assert Config.get('frame_analysis.disk_cache') is False
+
+
+def test_rerun_hits_after_index_creation(trace_db):
+    first, first_cache, first_queries = _analyze_once(trace_db)
+    second, second_cache, second_queries = _analyze_once(trace_db)
+
+    assert (len(first_queries), len(second_queries)) == (1, 0)
+    assert first_cache.stats == {'hits': 0, 'misses': 1, 'writes': 1}
+    assert second_cache.stats == {'hits': 1, 'misses': 0, 'writes': 0}
+    assert second.to_dict('list') == first.to_dict('list')
+
+    # 数值列为 copy-on-write 映射，原地修改不写回缓存
+    second.loc[0, 'dur'] = -1
+    third, _cache, _queries = _analyze_once(trace_db)
+    assert third.loc[0, 'dur'] == 16_000_000
+
+
+def test_database_change_invalidates_and_replaces_entry(trace_db):
+    _analyze_once(trace_db)
+    old_entries = _entries(trace_db)
+    assert len(old_entries) == 1
+
+    conn = sqlite3.connect(trace_db)
+    conn.execute("INSERT INTO thread VALUES (100, 100, 1100, 'new')")
+    conn.commit()
+    conn.close()
+
+    _frames_df, cache, queries = _analyze_once(trace_db)
+    assert len(queries) == 1
+    assert cache.stats['misses'] == 1
+    new_entries = _entries(trace_db)
+    assert len(new_entries) == 1
+    assert new_entries != old_entries
+
+
+def test_app_pids_are_part_of_the_key(trace_db):
+    _analyze_once(trace_db)
+    cache = FrameDiskCache()
+    assert cache.load('frames', trace_db, [200]) is None
+    assert cache.load('frames', trace_db, APP_PIDS) is not None
@@ -0,0 +1,111 @@
+"""
+hilog 流式扫描：关键字预过滤 + 分块读取 + 进程池扫描的结果与逐文件整体正则匹配一致（含 detail 模式的「其他」）。
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from hapray.actions import hilog_action
+from hapray.actions.hilog_action import OTHER_MATCHES_KEY, HilogAction, required_literal
+from hapray.core.config.config import Config
+
+PATTERNS = [
+    {
+        'name': 'pixelmap',
+        'regex': r'CreatePixelMapExtended success.*desiredSize\s*:\s*\((\d+),\s*(\d+)\).*imageSize\s*:\s*\((\d+),\s*(\d+)\)',
+        'groups': [1, 2, 3, 4],
+        'conditions': '$1*$2==$3*$4',
+    },
+    {'name': 'slow', 'regex': r'RequestCost cost (\d+)ms', 'groups': [1], 'conditions': ['>100']},
+    # 分支无法提取必含关键字，整块执行正则
+    {'name': 'event', 'regex': r'(?:Foo|Bar)Event'},
+    {'name': 'broken', 'regex': '(unclosed'},
+]
+
+FILE_1 = """\
+01-01 00:00:01 I CreatePixelMapExtended success, desiredSize: (100, 200), imageSize: (200, 100)
+01-01 00:00:02 I createpixelmapextended SUCCESS desiredSize:(10,10) imageSize:(20,20)
+01-01 00:00:03 I RequestCost cost 250ms
+01-01 00:00:04 I requestcost COST 50ms
+01-01 00:00:05 I FooEvent then barevent
+"""
+FILE_2 = """\
+01-01 00:01:00 I RequestCost cost 101ms
+01-01 00:01:01 I CreatePixelMapExtended success desiredSize: (3, 4) imageSize: (2, 6)
+01-01 00:01:02 I BarEvent"""
+
+
+@pytest.fixture
+def hilog_dir(tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'a' / 'hilog.001.txt').write_text(FILE_1, encoding='utf-8')
+    (tmp_path / 'hilog.002.txt').write_text(FILE_2, encoding='utf-8')
+    (tmp_path / 'other.log').write_text('RequestCost cost 999ms\n', encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def workers():
+    previous = Config.get('hilog.workers')
+
+    def set_workers(count: int):
+        Config.set('hilog.workers', count)
+
+    yield set_workers
+    Config.set('hilog.workers', previous)
+
+
+def _analyze(hilog_dir, detail):
+    return HilogAction()._analyze_hilog_files(str(hilog_dir), PATTERNS, detail)
+
+
+def _sorted_values(results: dict) -> dict:
+    """rglob 的文件顺序与文件系统有关，按值排序后比较"""
+    return {name: sorted(values, key=repr) for name, values in results.items()}
+
+
+EXPECTED_RESULTS = {
+    'pixelmap': [['100', '200', '200', '100'], ['3', '4', '2', '6']],
+    'slow': [['101'], ['250']],
+    'event': [['BarEvent'], ['FooEvent'], ['barevent']],
+    'broken': [],
+}
+
+
+@pytest.mark.parametrize('worker_count', [1, 2])
+def test_results_match_whole_file_regex(hilog_dir, workers, worker_count):
+    workers(worker_count)
+    results, detail_data = _analyze(hilog_dir, detail=False)
+
+    assert detail_data is None
+    assert _sorted_values(results) == EXPECTED_RESULTS
+
+
+def test_detail_mode_collects_matched_and_other(hilog_dir, workers, monkeypatch):
+    workers(1)
+    # 极小的块迫使行跨块对齐
+    monkeypatch.setattr(hilog_action, 'HILOG_BLOCK_SIZE', 7)
+    results, detail_data = _analyze(hilog_dir, detail=True)
+
+    assert _sorted_values(results) == EXPECTED_RESULTS
+    assert sorted(detail_data['slow']['matched']) == ['RequestCost cost 101ms', 'RequestCost cost 250ms']
+    assert sorted(detail_data['event']['matched']) == ['BarEvent', 'FooEvent', 'barevent']
+    # 正则匹配到但条件未通过
+    assert detail_data[OTHER_MATCHES_KEY] == [
+        'createpixelmapextended SUCCESS desiredSize:(10,10) imageSize:(20,20)',
+        'requestcost COST 50ms',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('regex', 'literal'),
+    [
+        (r'RequestCost cost (\d+)ms', 'requestcost cost '),
+        (r'(?:Foo|Bar)Event', 'event'),
+        (r'(a|b)', None),
+        ('(unclosed', None),
+    ],
+)
+def test_required_literal(regex, literal):
+    assert required_literal(regex) == literal
@@ -0,0 +1,109 @@
+"""
+截图区域 dHash 比较：批量、打包为 uint64 的实现与逐区域 PIL 裁剪 + 字符串哈希的结果一致。
+"""
+
+from __future__ import annotations
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from hapray.ui_detector import image_comparator
+from hapray.ui_detector.image_comparator import RegionImageComparator
+
+REGIONS = [
+    (0, 0, 64, 48),
+    (10.4, 5.6, 90.5, 70.2),
+    (-20, -10, 30, 40),  # 部分超出图像
+    (100, 60, 180, 140),  # 超出右下边界
+    (200, 200, 260, 250),  # 完全在图像外
+    (5, 5, 5, 30),  # 空区域
+    (30, 20, 10, 40),  # 无效区域
+    (0, 0, 120, 90),
+]
+
+
+def _reference_compare(comparator: RegionImageComparator, image1_path, image2_path, region):
+    """逐区域实现：PIL 裁剪 RGB 区域，计算 '0'/'1' 字符串形式的 dHash"""
+
+    def dhash(image_array):
+        gray = cv2.cvtColor(image_array, cv2.COLOR_RGB2GRAY)
+        resized = cv2.resize(gray, (comparator.hash_size + 1, comparator.hash_size))
+        diff = resized[:, 1:] > resized[:, :-1]
+        return ''.join('1' if pixel else '0' for row in diff for pixel in row)
+
+    crop1 = comparator.load_and_crop_region(image1_path, region)
+    crop2 = comparator.load_and_crop_region(image2_path, region)
+    if crop1 is None or crop2 is None:
+        return None
+    try:
+        hash1, hash2 = dhash(crop1), dhash(crop2)
+    except cv2.error:
+        return None
+    distance = sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
+    return {
+        'hash1': hash1,
+        'hash2': hash2,
+        'hamming_distance': distance,
+        'similarity_percentage': (1 - distance / len(hash1)) * 100,
+        'region1_size': crop1.shape,
+        'region2_size': crop2.shape,
+    }
+
+
+@pytest.fixture
+def screenshots(tmp_path):
+    rng = np.random.default_rng(7)
+    base = rng.integers(0, 256, size=(90, 120, 3), dtype=np.uint8)
+    changed = base.copy()
+    changed[20:60, 30:100] = rng.integers(0, 256, size=(40, 70, 3), dtype=np.uint8)
+    paths = []
+    for name, pixels in (('a.png', base), ('b.png', changed)):
+        path = tmp_path / name
+        Image.fromarray(pixels).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize('hash_size', [8, 16])
+def test_batch_matches_per_region_reference(screenshots, hash_size):
+    comparator = RegionImageComparator()
+    comparator.hash_size = hash_size
+
+    results = comparator.compare_regions_batch(*screenshots, REGIONS)
+
+    assert results == [_reference_compare(comparator, *screenshots, region) for region in REGIONS]
+    assert results[0]['hamming_distance'] > 0
+    assert results[4]['hamming_distance'] == 0
+    assert results[5] is None
+    assert results[6] is None
+
+
+def test_compare_regions_and_multiple_regions_use_batch_results(screenshots):
+    comparator = RegionImageComparator()
+    single = comparator.compare_regions(*screenshots, REGIONS[1])
+    assert single == _reference_compare(comparator, *screenshots, REGIONS[1])
+
+    multiple = comparator.compare_multiple_regions(*screenshots, REGIONS)
+    assert [result['region_index'] for result in multiple] == [1, 2, 3, 4, 5, 8]
+    assert multiple[1]['hash1'] == single['hash1']
+
+
+def test_missing_screenshot_returns_none_per_region(screenshots, tmp_path):
+    comparator = RegionImageComparator()
+    assert comparator.compare_regions_batch(screenshots[0], str(tmp_path / 'missing.png'), REGIONS[:2]) == [None, None]
+
+
+def test_hamming_distance_for_packed_and_string_hashes(monkeypatch):
+    comparator = RegionImageComparator()
+    hash1 = np.array([0xFFFF_0000_0000_0001, 0x0], dtype=np.uint64)
+    hash2 = np.array([0x0000_0000_0000_0001, 0x8000_0000_0000_0003], dtype=np.uint64)
+    assert comparator.hamming_distance(hash1, hash2) == 19
+    assert comparator.hamming_distance('0110', '1100') == 2
+
+    # numpy 不提供 bitwise_count 时回退到按字节查表
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert image_comparator.popcount(np.bitwise_xor(hash1, hash2)) == 19
+    with pytest.raises(ValueError, match='哈希值长度不一致'):
+        comparator.hamming_distance(hash1, hash2[:1])
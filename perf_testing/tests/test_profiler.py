@@ -0,0 +1,106 @@
+"""
+分析流水线埋点：未开启 analyze.profiling 时 span/connect 为空操作，每次分析运行各自持有 Profiler。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from hapray.analyze import PROFILE_STATE_KEY, _merge_step_states
+from hapray.core.common import profiler
+from hapray.core.config.config import Config
+
+
+@pytest.fixture
+def profiling():
+    previous = Config.get('analyze.profiling')
+
+    def set_enabled(enabled: bool):
+        Config.set('analyze.profiling', enabled)
+
+    yield set_enabled
+    Config.set('analyze.profiling', previous)
+
+
+def _record_span(name: str):
+    with profiler.span(name):
+        pass
+
+
+def _span_names(run_profiler: profiler.Profiler) -> set[str]:
+    return {event['name'] for event in run_profiler.events if event['ph'] == 'X'}
+
+
+def test_disabled_profiling_is_a_no_op(profiling, monkeypatch, tmp_path):
+    profiling(False)
+
+    def fail_rss():
+        raise AssertionError('RSS sampled while profiling is disabled')
+
+    monkeypatch.setattr(profiler, '_rss_bytes', fail_rss)
+    with profiler.profiling_run() as run_profiler:
+        assert run_profiler is None
+        with profiler.span('phase') as span_args:
+            span_args['cached'] = False
+        profiler.record_timings('component', {'phase': 1.0})
+        conn = profiler.connect(str(tmp_path / 'plain.db'))
+        try:
+            assert type(conn) is sqlite3.Connection
+            assert conn.execute('SELECT 1').fetchone() == (1,)
+        finally:
+            conn.close()
+
+
+def test_concurrent_runs_record_into_their_own_profiler(profiling, tmp_path):
+    profiling(True)
+    barrier = threading.Barrier(2)
+    profilers = {}
+
+    def run(name: str):
+        with profiler.profiling_run() as run_profiler:
+            with profiler.span(f'{name}-phase'):
+                barrier.wait(timeout=10)
+                # 分析线程通过 copy_context 继承本次运行的 Profiler
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    executor.submit(contextvars.copy_context().run, _record_span, f'{name}-analyzer').result()
+                conn = profiler.connect(str(tmp_path / f'{name}.db'))
+                conn.execute(f'CREATE TABLE {name} (v INTEGER)')
+                conn.execute(f'SELECT * FROM {name}').fetchall()
+                conn.close()
+            profilers[name] = run_profiler
+        assert profiler.get_profiler() is None
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ('scene_a', 'scene_b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert _span_names(profilers['scene_a']) == {'scene_a-phase', 'scene_a-analyzer'}
+    assert _span_names(profilers['scene_b']) == {'scene_b-phase', 'scene_b-analyzer'}
+    assert set(profilers['scene_a'].sql) == {'CREATE TABLE scene_a (v INTEGER)', 'SELECT * FROM scene_a'}
+    assert set(profilers['scene_b'].sql) == {'CREATE TABLE scene_b (v INTEGER)', 'SELECT * FROM scene_b'}
+
+
+def test_worker_profile_merges_into_current_run(profiling):
+    profiling(True)
+    worker_data = {}
+
+    def worker():
+        worker_profiler = profiler.start_profiler()
+        with profiler.span('worker-step', 'step'):
+            pass
+        worker_data.update(worker_profiler.drain())
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(timeout=10)
+
+    with profiler.profiling_run() as run_profiler:
+        _merge_step_states([], 'step1', {PROFILE_STATE_KEY: worker_data})
+    assert _span_names(run_profiler) == {'worker-step'}
@@ -0,0 +1,105 @@
+"""
+报告数据库单写者服务：并发场景互不影响、关闭后不再接受写入、exec_sql 保持同步语义。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+from hapray.analyze import _finalize_analyzers
+from hapray.analyze.base_analyzer import BaseAnalyzer
+from hapray.analyze.report_db_writer import ReportDbWriter
+
+
+class _RowsAnalyzer(BaseAnalyzer):
+    def __init__(self, scene_dir: str):
+        super().__init__(scene_dir, 'test/rows')
+        self.create_table('rows', 'id INTEGER PRIMARY KEY, value INTEGER')
+
+    def _analyze_impl(self, step_dir, trace_db_path, perf_db_path, app_pids):
+        return None
+
+
+def _count_rows(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT COUNT(*) FROM rows').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_finalize_closes_only_own_scene_writer(tmp_path):
+    analyzer_a = _RowsAnalyzer(str(tmp_path / 'scene_a'))
+    analyzer_b = _RowsAnalyzer(str(tmp_path / 'scene_b'))
+    analyzer_a.batch_insert_data('rows', [{'value': i} for i in range(100)])
+
+    started = threading.Event()
+    errors = []
+
+    def write_scene_b():
+        try:
+            for i in range(200):
+                analyzer_b.insert_data('rows', {'value': i})
+                started.set()
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+            started.set()
+
+    writer_thread = threading.Thread(target=write_scene_b)
+    writer_thread.start()
+    started.wait(timeout=10)
+    # 场景 A 结束时场景 B 仍在写入
+    _finalize_analyzers([analyzer_a])
+    writer_thread.join(timeout=30)
+
+    assert not writer_thread.is_alive()
+    assert errors == []
+    assert ReportDbWriter.existing(analyzer_a.get_db_path()) is None
+    assert ReportDbWriter.existing(analyzer_b.get_db_path()) is not None
+
+    _finalize_analyzers([analyzer_b])
+    assert _count_rows(analyzer_a.get_db_path()) == 100
+    assert _count_rows(analyzer_b.get_db_path()) == 200
+
+
+def test_submit_after_close_raises(tmp_path):
+    writer = ReportDbWriter(str(tmp_path / 'report.db'))
+    writer.execute('CREATE TABLE t (v INTEGER)')
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.execute('INSERT INTO t VALUES (1)')
+
+
+def test_concurrent_submit_and_close_never_loses_queued_ops(tmp_path):
+    for attempt in range(20):
+        writer = ReportDbWriter(str(tmp_path / f'report_{attempt}.db'), queue_size=4)
+        writer.execute('CREATE TABLE t (v INTEGER)').result()
+        futures = []
+
+        def submit(writer=writer, futures=futures):
+            for i in range(50):
+                try:
+                    futures.append(writer.execute('INSERT INTO t VALUES (?)', (i,)))
+                except RuntimeError:
+                    return
+
+        thread = threading.Thread(target=submit)
+        thread.start()
+        writer.close()
+        thread.join(timeout=10)
+        # 入队成功的操作都在写线程退出前执行完毕
+        for future in futures:
+            assert future.result(timeout=10) is not None
+
+
+def test_exec_sql_returns_cursor_after_flushing_queued_writes(tmp_path):
+    analyzer = _RowsAnalyzer(str(tmp_path / 'scene'))
+    analyzer.batch_insert_data('rows', [{'value': 1}, {'value': 2}])
+    cursor = analyzer.exec_sql('SELECT SUM(value) FROM rows')
+    assert isinstance(cursor, sqlite3.Cursor)
+    assert cursor.fetchone()[0] == 3
+    analyzer.close_db_connection()
+    _finalize_analyzers([analyzer])
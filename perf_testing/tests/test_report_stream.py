@@ -0,0 +1,78 @@
+"""
+HTML 报告的流式占位符替换：数据库载荷可正确解码，读取或压缩失败时回退为空数据且报告照常生成。
+"""
+
+from __future__ import annotations
+
+import base64
+import gzip
+import io
+import os
+
+import pytest
+
+from hapray.core.common import report_stream
+from hapray.core.common.report_stream import GzipBase64FilePayload, write_template_with_placeholders
+from hapray.core.report import ReportGenerator
+
+TEMPLATE = '<html><script>const json="JSON_DATA_PLACEHOLDER";const db="DB_DATA_PLACEHOLDER";</script></html>'
+
+
+def _db_value(html: str) -> str:
+    return html.split('const db="', 1)[1].split('"', 1)[0]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_streamed_payload_round_trips(tmp_path, workers):
+    db_path = tmp_path / 'hapray_report.db'
+    data = os.urandom(50_000) + b'abc' * 200_000
+    db_path.write_bytes(data)
+    out = io.StringIO()
+
+    payload = GzipBase64FilePayload(str(db_path), 6, chunk_size=64 * 1024, workers=workers)
+    write_template_with_placeholders(TEMPLATE, {'JSON_DATA_PLACEHOLDER': '{}', 'DB_DATA_PLACEHOLDER': payload}, out)
+
+    html = out.getvalue()
+    assert 'const json="{}"' in html
+    assert gzip.decompress(base64.b64decode(_db_value(html))) == data
+
+
+def test_payload_failure_falls_back_to_empty_data(tmp_path, monkeypatch):
+    db_path = tmp_path / 'hapray_report.db'
+    db_path.write_bytes(b'x' * 300_000)
+
+    def failing_chunks(stream, level, chunk_size=0, workers=1):
+        yield b'partial-compressed-data'
+        raise OSError('disk read failed')
+
+    monkeypatch.setattr(report_stream, 'iter_gzip_chunks', failing_chunks)
+    out = io.StringIO()
+    payload = GzipBase64FilePayload(str(db_path), 6)
+    write_template_with_placeholders(TEMPLATE, {'JSON_DATA_PLACEHOLDER': '{}', 'DB_DATA_PLACEHOLDER': payload}, out)
+
+    assert out.getvalue() == TEMPLATE.replace('JSON_DATA_PLACEHOLDER', '{}').replace('DB_DATA_PLACEHOLDER', '')
+
+
+def test_html_report_written_when_db_cannot_be_read(tmp_path):
+    template_path = tmp_path / 'template.html'
+    template_path.write_text(TEMPLATE, encoding='utf-8')
+    output_path = tmp_path / 'report' / 'hapray_report.html'
+    output_path.parent.mkdir()
+    output_path.write_text('stale report', encoding='utf-8')
+
+    # 数据库路径是目录，打开时失败
+    unreadable = tmp_path / 'report' / 'hapray_report.db'
+    unreadable.mkdir()
+    ReportGenerator._inject_json_to_html(
+        placeholders={
+            'JSON_DATA_PLACEHOLDER': '{"ok": true}',
+            'DB_DATA_PLACEHOLDER': GzipBase64FilePayload(str(unreadable), 6),
+        },
+        html_path=str(template_path),
+        output_path=str(output_path),
+    )
+
+    html = output_path.read_text(encoding='utf-8')
+    assert html != 'stale report'
+    assert '{"ok": true}' in html
+    assert _db_value(html) == ''
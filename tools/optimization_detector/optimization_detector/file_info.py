@@ -15,6 +15,7 @@ limitations under the License.
 
 import hashlib
 import logging
+import mmap
 import os
 import shutil
 import sys
@@ -25,6 +26,7 @@ from enum import Enum
 from typing import Optional
 
 import arpy
+import numpy as np
 from elftools.elf.elffile import ELFFile
 
 from optimization_detector.hap_parser import HapMetadata, HapParser
@@ -141,37 +143,52 @@ class FileInfo:
 
         return data
 
-    def extract_dot_text(self) -> list[int]:
-        """Extract .text segment data"""
+    def extract_dot_text(self) -> np.ndarray:
+        """Extract .text segment data as a uint8 array
+
+        .so 文件的 .text 段直接以只读内存映射的 ndarray 视图返回（零拷贝），不再构造逐字节的 Python int 列表。
+        """
         if self.file_type == FileType.SO:
             return self._extract_so_dot_text(self.absolute_path)
         if self.file_type == FileType.AR:
             return self._extract_archive_dot_text()
-        return []
+        return np.empty(0, dtype=np.uint8)
 
-    def _extract_so_dot_text(self, file_path) -> list[int]:
+    def _extract_so_dot_text(self, file_path) -> np.ndarray:
         try:
             with open(file_path, 'rb') as f:
                 elf = ELFFile(f)
                 section = elf.get_section_by_name(self.TEXT_SECTION)
                 if section:
-                    return list(section.data())
+                    return self._map_section_data(f, section)
         except Exception as e:
             logging.error('Failed to extract .text section from %s: %s', file_path, e)
-        return []
+        return np.empty(0, dtype=np.uint8)
 
-    def _extract_archive_dot_text(self) -> list[int]:
-        text_data = []
+    @staticmethod
+    def _map_section_data(f, section) -> np.ndarray:
+        """段数据原样存放在文件中时内存映射文件并返回该段的 uint8 视图，否则（压缩段等）回退到 section.data()
+
+        映射在文件关闭后依然有效，随返回数组一起释放。
+        """
+        size = section['sh_size']
+        if section.compressed or section['sh_type'] == 'SHT_NOBITS' or size == 0:
+            return np.frombuffer(section.data(), dtype=np.uint8)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(mapped, dtype=np.uint8, count=size, offset=section['sh_offset'])
+
+    def _extract_archive_dot_text(self) -> np.ndarray:
+        text_parts = []
         try:
             ar = arpy.Archive(self.absolute_path)
             for name in ar.namelist():
                 elf = ELFFile(ar.open(name))
                 section = elf.get_section_by_name(self.TEXT_SECTION)
                 if section:
-                    text_data.extend(list(section.data()))
+                    text_parts.append(np.frombuffer(section.data(), dtype=np.uint8))
         except Exception as e:
             logging.error('Failed to extract archive file %s: %s', self.absolute_path, e)
-        return text_data
+        return np.concatenate(text_parts) if text_parts else np.empty(0, dtype=np.uint8)
 
     def _get_file_size(self) -> int:
         return os.path.getsize(self.absolute_path)
@@ -8,7 +8,7 @@ import logging
 import math
 import traceback
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 import numpy as np
 
@@ -170,13 +170,15 @@ class LtoDetector:
             logging.debug('Feature extraction failed for %s: %s', so_path, e)
             return None
 
-    def detect_chunk_based(self, file_info: FileInfo, chunks: list[bytes], opt_level: Optional[str] = None) -> dict:
+    def detect_chunk_based(
+        self, file_info: FileInfo, chunks: Union[np.ndarray, list[bytes]], opt_level: Optional[str] = None
+    ) -> dict:
         """
         基于 chunk 的 LTO 检测（每个 chunk 单独预测，然后统计）
 
         Args:
             file_info: FileInfo对象
-            chunks: 从 .text 段提取的 chunks 列表
+            chunks: 从 .text 段提取的 chunks（(n_chunks, chunk_size) 的 uint8 矩阵或 bytes 列表）
             opt_level: 优化级别（已废弃，保留以兼容）
 
         Returns:
@@ -215,7 +217,7 @@ class LtoDetector:
                 'distribution': {},
             }
 
-        if not chunks or len(chunks) == 0:
+        if chunks is None or len(chunks) == 0:
             return {
                 'score': None,
                 'prediction': 'No chunks',
@@ -1,8 +1,9 @@
 import logging
 import multiprocessing
 import os
-from collections import Counter
-from functools import partial
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from importlib.resources import files
 from pathlib import Path
 from typing import Optional
@@ -10,10 +11,13 @@ from typing import Optional
 import numpy as np
 import pandas as pd
 import tensorflow as tf
-from elftools.elf.elffile import ELFFile
 from tqdm import tqdm
 
 from optimization_detector.file_info import FILE_STATUS_MAPPING, FileInfo
+from optimization_detector.text_chunks import CHUNK_SIZE, prepare_file_chunks, split_text_chunks
+
+# 推理队列累计到 batch_size × 该值行 chunk 后统一推理一次
+_INFERENCE_FLUSH_BATCHES = 32
 
 
 class TimeoutError(Exception):
@@ -22,12 +26,60 @@ class TimeoutError(Exception):
     pass
 
 
+class _ChunkBatchQueue:
+    """跨文件打包 chunk 的推理队列
+
+    各文件的 chunk 矩阵依次入队，累计达到 flush_rows 行后拼接成一个大数组统一推理（模型内部按 batch_size 整批计算），
+    再按各文件的行数把预测结果拆回。小文件不再各自产生不满的批次，推理调用次数与文件数无关。
+    """
+
+    def __init__(self, predict, flush_rows: int):
+        self._predict = predict
+        self._flush_rows = flush_rows
+        self._pending: list[tuple[str, np.ndarray]] = []
+        self._pending_rows = 0
+        # file_id -> [(prediction, confidence), ...]
+        self.results: dict[str, list[tuple]] = {}
+        # file_id -> 推理失败原因
+        self.errors: dict[str, str] = {}
+
+    def put(self, file_id: str, chunks: np.ndarray):
+        self._pending.append((file_id, chunks))
+        self._pending_rows += len(chunks)
+        if self._pending_rows >= self._flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        self._pending_rows = 0
+
+        try:
+            data = pending[0][1] if len(pending) == 1 else np.concatenate([chunks for _, chunks in pending])
+            y_predict = self._predict(data)
+        except Exception as e:
+            logging.error('Batched inference failed for %d files: %s', len(pending), e)
+            for file_id, _ in pending:
+                self.errors[file_id] = f'Analysis error: {str(e)}'
+            return
+
+        predictions = np.argmax(y_predict, axis=1)
+        confidences = y_predict[np.arange(len(predictions)), predictions]
+        offset = 0
+        for file_id, chunks in pending:
+            end = offset + len(chunks)
+            self.results[file_id] = list(zip(predictions[offset:end], confidences[offset:end], strict=True))
+            offset = end
+
+
 class OptimizationDetector:
     def __init__(
         self, workers: int = 1, timeout: Optional[int] = None, enable_lto: bool = True, enable_opt: bool = True
     ):
         self.parallel = workers > 1
-        self.workers = min(workers, multiprocessing.cpu_count() - 1)
+        self.workers = max(1, min(workers, multiprocessing.cpu_count() - 1))
         self.timeout = timeout
         self.enable_lto = enable_lto
         self.enable_opt = enable_opt
@@ -142,67 +194,62 @@ class OptimizationDetector:
         return [('optimization', self._collect_results(flags, file_infos, lto_results))]
 
     @staticmethod
-    def _extract_features(file_info: FileInfo, features: int = 2048) -> Optional[list[int]]:
-        """Extract features from file, returns None if no data, empty list if error, list if success"""
+    def _extract_features(file_info: FileInfo, features: int = CHUNK_SIZE) -> Optional[np.ndarray]:
+        """Extract features from file, returns None if no data or error, (n_chunks, features) uint8 matrix if success"""
         try:
             data = file_info.extract_dot_text()
-            if not data or len(data) == 0:
+            chunks = split_text_chunks(data, features)
+            if chunks is None:
                 logging.info('_extract_features: No data extracted from %s', file_info.absolute_path)
                 return None
-
-            sequences = []
-            for counter in range(0, len(data), features):
-                seq = data[counter : counter + features]
-                if len(seq) < features:
-                    seq = np.pad(seq, (0, features - len(seq)), 'constant')
-                sequences.append(seq)
             logging.info(
                 '_extract_features: Extracted %d chunks from %d bytes for %s',
-                len(sequences),
+                len(chunks),
                 len(data),
                 file_info.absolute_path,
             )
-            return sequences
+            return chunks
         except Exception as e:
-            # 如果提取失败，返回 None（会在 _run_analysis 中捕获异常）
+            # 如果提取失败，返回 None
             logging.error('_extract_features: Exception for %s: %s', file_info.absolute_path, e)
             return None
 
     def apply_model(self, data, model):
         if not data.size:
             return None
-        # 根据是否有 GPU 调整批处理大小
-        batch_size = 512 if self.use_gpu else 256  # GPU 可以使用更大的批处理大小
-        return model.predict(data, batch_size=batch_size, verbose=0)
-
-    def _run_inference(
-        self, file_info: FileInfo, features: int = 2048, features_array: Optional[list] = None
-    ) -> list[tuple[int, float]]:
-        """Run opt model on chunks. features_array 由 _run_analysis 传入时可复用，避免重复提取。"""
-        if features_array is None:
-            features_array = self._extract_features(file_info, features)
-        if features_array is None or not len(features_array):
-            return []
-
-        def chunkify(lst, n):
-            return [lst[i::n] for i in range(n)]
+        return model.predict(data, batch_size=self._inference_batch_size(), verbose=0)
 
-        nped_features_array = list(map(partial(np.array, dtype=np.uint8), chunkify(features_array, self.workers * 10)))
-
-        # For TensorFlow models, avoid multiprocessing (TF models can't be pickled safely)
-        # Use simple list comprehension instead
-        y_predict_list = [self.apply_model(data, self.model) for data in nped_features_array]
-
-        results = []
+    def _inference_batch_size(self) -> int:
+        # 根据是否有 GPU 调整批处理大小
+        return 512 if self.use_gpu else 256  # GPU 可以使用更大的批处理大小
+
+    def _load_model(self):
+        """Lazy load model"""
+        if self.model is not None:
+            return
+        # 使用 GPU 策略（如果可用）
+        if self.use_gpu:
+            # 使用 MirroredStrategy 进行多 GPU 推理（如果有多个 GPU）
+            if len(self.gpus) > 1:
+                strategy = tf.distribute.MirroredStrategy()
+                with strategy.scope():
+                    self.model = tf.keras.models.load_model(str(self.flags_model))
+                    self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
+                logging.info('Model loaded with multi-GPU support (%d GPUs)', len(self.gpus))
+            else:
+                # 单 GPU，直接加载
+                self.model = tf.keras.models.load_model(str(self.flags_model))
+                self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
+                logging.info('Model loaded with GPU acceleration')
+        else:
+            # CPU 模式
+            self.model = tf.keras.models.load_model(str(self.flags_model))
+            self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
+            logging.info('Model loaded with CPU')
 
-        for y_predict in y_predict_list:
-            if y_predict is None:
-                continue
-            for _predict in y_predict:
-                prediction = np.argmax(_predict)
-                confidence = _predict[prediction]
-                results.append((prediction, confidence))
-        return results
+    def _predict_chunks(self, data: np.ndarray):
+        self._load_model()
+        return self.apply_model(data, self.model)
 
     def _detect_lto(
         self, file_infos: list[FileInfo], flags_results: dict, chunks_by_file_id: Optional[dict] = None
@@ -229,13 +276,11 @@ class OptimizationDetector:
                 # 复用 opt 阶段已切分的 chunks（与 opt 同一套 chunk），无则再按需提取
                 raw_chunks = chunks_by_file_id.get(file_info.file_id)
                 if raw_chunks is None:
-                    raw_chunks = self._extract_features(file_info, features=2048)
-                if raw_chunks is None:
-                    raw_chunks = []
+                    raw_chunks = self._extract_features(file_info, features=CHUNK_SIZE)
 
-                if raw_chunks and len(raw_chunks) > 0:
-                    chunk_bytes = [bytes(chunk) for chunk in raw_chunks]
-                    lto_result = self.lto_detector.detect_chunk_based(file_info, chunk_bytes, opt_level)
+                if raw_chunks is not None and len(raw_chunks) > 0:
+                    # chunk 矩阵按行直接传入，不再逐块转换为 bytes
+                    lto_result = self.lto_detector.detect_chunk_based(file_info, raw_chunks, opt_level)
                 else:
                     lto_result = self.lto_detector.detect(file_info, opt_level)
 
@@ -247,107 +292,43 @@ class OptimizationDetector:
 
         return lto_results
 
-    def _run_analysis(
-        self, file_info: FileInfo
-    ) -> tuple[FileInfo, Optional[list[tuple[int, float]]], Optional[str], Optional[list]]:
-        """Run optimization flag detection on a single file with optional timeout.
-        Returns: (file_info, flags, error_reason, chunks)
-        - flags: None means skip (too few chunks), [] means no data, list means success
-        - error_reason: None means no error, str means failure reason
-        - chunks: .text 段按 2048 字节切分的列表（与 opt 一致），供 LTO 复用，避免重复切分
+    def _iter_prepared_files(self, file_infos: list[FileInfo]):
+        """并发读取 ELF、提取 .text 并切分 chunk，按输入顺序产出 prepare_file_chunks 的结果
+
+        parallel 时使用进程池（ELF 解析和切分是纯 Python/NumPy 计算，线程池受 GIL 限制），否则单个工作线程。
+        在途文件数不超过 2 × workers，避免推理跟不上时 chunk 在内存中堆积。
+        timeout 为单个文件的特征提取等待时间，超时的文件记为失败。
+        TensorFlow 模型无法安全 pickle，推理始终在主进程中进行。
         """
-        try:
-            # 检查chunk数量，如果小于1个chunk，跳过预测
-            MIN_CHUNKS = 5
-            # 先尝试直接打开 ELF 文件，以便捕获更详细的错误信息
-            try:
-                with open(file_info.absolute_path, 'rb') as f:
-                    elf = ELFFile(f)
-                    section = elf.get_section_by_name('.text')
-                    if not section:
-                        error_msg = 'No .text section found in ELF file'
-                        return file_info, [], error_msg, None
-            except Exception as e:
-                # 捕获 ELF 文件读取异常（如 Magic number does not match）
-                error_msg = f'Failed to read ELF file: {str(e)}'
-                logging.error('Error reading ELF file %s: %s', file_info.absolute_path, e)
-                return file_info, [], error_msg, None
-
-            # 如果 ELF 文件读取成功，再尝试提取 .text 段数据（只提取一次，与 LTO 共用）
-            text_data = file_info.extract_dot_text()
-            if not text_data:
-                # 检查文件类型
-                if file_info.file_type.value == 0xFF:  # NOT_SUPPORT
-                    error_msg = 'File type not supported (not .so or .a)'
-                else:
-                    error_msg = 'No .text section data extracted (section exists but data is empty)'
-                logging.info('No text data for %s: %s', file_info.absolute_path, error_msg)
-                return file_info, [], error_msg, None
-
-            # 提取特征（只做一次，与 LTO 技术栈一致：同一套 chunk）
-            logging.info('Extracted %d bytes from .text section for %s', len(text_data), file_info.absolute_path)
-            features_array = self._extract_features(file_info, features=2048)
-            if features_array is not None:
-                logging.info('Extracted %d chunks from %s', len(features_array), file_info.absolute_path)
-            # 只有当有数据但chunk数量不足时才跳过预测
-            if features_array is not None and len(features_array) < MIN_CHUNKS:
-                logging.info(
-                    'Skipping file with too few chunks (%d < %d): %s',
-                    len(features_array),
-                    MIN_CHUNKS,
-                    file_info.absolute_path,
-                )
-                return file_info, None, None, None
-            if features_array is None:
-                return file_info, [], None, None
-        except Exception as e:
-            error_msg = f'Failed to extract features: {str(e)}'
-            logging.error('Error extracting features from %s: %s', file_info.absolute_path, e)
-            return file_info, [], error_msg, None
-
-        # Lazy load model
-        if self.model is None:
-            # 使用 GPU 策略（如果可用）
-            if self.use_gpu:
-                # 使用 MirroredStrategy 进行多 GPU 推理（如果有多个 GPU）
-                if len(self.gpus) > 1:
-                    strategy = tf.distribute.MirroredStrategy()
-                    with strategy.scope():
-                        self.model = tf.keras.models.load_model(str(self.flags_model))
-                        self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
-                    logging.info('Model loaded with multi-GPU support (%d GPUs)', len(self.gpus))
-                else:
-                    # 单 GPU，直接加载
-                    self.model = tf.keras.models.load_model(str(self.flags_model))
-                    self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
-                    logging.info('Model loaded with GPU acceleration')
-            else:
-                # CPU 模式
-                self.model = tf.keras.models.load_model(str(self.flags_model))
-                self.model.compile(optimizer=self.model.optimizer, loss=self.model.loss, metrics=['accuracy'])
-                logging.info('Model loaded with CPU')
+        if self.parallel and len(file_infos) > 1:
+            logging.info('Using %d parallel workers', self.workers)
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+            max_in_flight = self.workers * 2
+        else:
+            executor = ThreadPoolExecutor(max_workers=1)
+            max_in_flight = 1
 
+        pending = deque()
         try:
-            if self.timeout is None:
-                result = self._run_inference(file_info, features_array=features_array)
-                return file_info, result, None, features_array
-            from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
-            from concurrent.futures import TimeoutError as FutureTimeoutError  # noqa: PLC0415
-
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(self._run_inference, file_info, features_array=features_array)
-                try:
-                    result = future.result(timeout=self.timeout)
-                    return file_info, result, None, features_array
-                except FutureTimeoutError:
-                    error_msg = f'Analysis timeout after {self.timeout} seconds'
-                    logging.warning('File analysis timeout after %d seconds: %s', self.timeout, file_info.absolute_path)
-                    future.cancel()
-                    return file_info, [], error_msg, None
+            for file_info in file_infos:
+                pending.append((file_info, executor.submit(prepare_file_chunks, file_info)))
+                if len(pending) >= max_in_flight:
+                    yield self._wait_prepared(*pending.popleft())
+            while pending:
+                yield self._wait_prepared(*pending.popleft())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _wait_prepared(self, file_info: FileInfo, future: Future) -> tuple:
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logging.warning('File analysis timeout after %d seconds: %s', self.timeout, file_info.absolute_path)
+            future.cancel()
+            return file_info, None, f'Analysis timeout after {self.timeout} seconds', False
         except Exception as e:
-            error_msg = f'Analysis error: {str(e)}'
             logging.error('Error analyzing file %s: %s', file_info.absolute_path, e)
-            return file_info, [], error_msg, None
+            return file_info, None, f'Analysis error: {str(e)}', False
 
     def _analyze_files(self, file_infos: list[FileInfo]) -> tuple[int, int, dict, dict]:
         """Returns (files_with_results, failures, flags_results, chunks_by_file_id).
@@ -369,26 +350,41 @@ class OptimizationDetector:
         os.makedirs(FileInfo.CACHE_DIR, exist_ok=True)
 
         if remaining_files:
-            process_func = partial(self._run_analysis)
-            if self.parallel and len(remaining_files) > 1:
-                logging.info('Using %d parallel workers', self.workers)
-                results = list(
-                    tqdm(
-                        map(process_func, remaining_files),
-                        total=len(remaining_files),
-                        desc='Analyzing binaries optimization',
+            # 特征提取由 worker 池并发完成；各文件的 chunk 进入同一个推理队列，攒满整批后统一推理
+            queue = _ChunkBatchQueue(self._predict_chunks, self._inference_batch_size() * _INFERENCE_FLUSH_BATCHES)
+            prepared = []
+            for file_info, chunks, error_reason, skipped in tqdm(
+                self._iter_prepared_files(remaining_files),
+                total=len(remaining_files),
+                desc='Analyzing binaries optimization',
+            ):
+                if chunks is not None:
+                    # 收集 chunks 供 LTO 复用（与 opt 技术栈一致，不重复切分）
+                    chunks_by_file_id[file_info.file_id] = chunks
+                    queue.put(file_info.file_id, chunks)
+                prepared.append((file_info, error_reason, skipped))
+            queue.flush()
+
+            # flags: None 表示跳过（chunk 太少），[] 表示无数据或失败，list 表示成功
+            results = []
+            for file_info, error_reason, skipped in prepared:
+                if skipped:
+                    results.append((file_info, None, None))
+                elif error_reason or file_info.file_id not in chunks_by_file_id:
+                    results.append((file_info, [], error_reason))
+                else:
+                    results.append(
+                        (
+                            file_info,
+                            queue.results.get(file_info.file_id, []),
+                            queue.errors.get(file_info.file_id),
+                        )
                     )
-                )
-            else:
-                results = [process_func(fi) for fi in tqdm(remaining_files, desc='Analyzing binaries optimization')]
 
-            # Save intermediate results，并收集 chunks 供 LTO 复用（与 opt 技术栈一致，不重复切分）
-            chunks_by_file_id = {}
-            for file_info, flags, error_reason, chunks in results:
+            # Save intermediate results
+            for file_info, flags, error_reason in results:
                 flags_path = os.path.join(FileInfo.CACHE_DIR, f'flags_{file_info.file_id}.csv')
                 error_path = os.path.join(FileInfo.CACHE_DIR, f'error_{file_info.file_id}.txt')
-                if chunks is not None and len(chunks) > 0:
-                    chunks_by_file_id[file_info.file_id] = chunks
 
                 if flags is None:
                     # 跳过预测（chunk数量太少），创建skip标记文件
@@ -407,11 +403,11 @@ class OptimizationDetector:
                     with open(error_path, 'w', encoding='UTF-8') as f:
                         f.write(error_reason)
                 elif not flags and flags is not None and not os.path.exists(error_path):
-                    # 没有数据但没有错误信息，这种情况不应该发生（应该在 _run_analysis 中已经捕获）
+                    # 没有数据但没有错误信息，这种情况不应该发生（应该在 prepare_file_chunks 中已经捕获）
                     # 但为了安全起见，仍然尝试提取失败原因
                     try:
                         text_data = file_info.extract_dot_text()
-                        if not text_data:
+                        if len(text_data) == 0:
                             # 检查文件类型
                             if file_info.file_type.value == 0xFF:  # NOT_SUPPORT
                                 fallback_error_reason = 'File type not supported (not .so or .a)'
@@ -0,0 +1,95 @@
+"""
+Copyright (c) 2025 Huawei Device Co., Ltd.
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+ http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import logging
+from typing import Optional
+
+import numpy as np
+from elftools.elf.elffile import ELFFile
+
+from optimization_detector.file_info import FileInfo, FileType
+
+# .text 段切分的 chunk 大小（字节），opt 模型与 LTO 检测共用
+CHUNK_SIZE = 2048
+# chunk 数量少于该值时跳过预测
+MIN_CHUNKS = 5
+
+
+def split_text_chunks(data: np.ndarray, features: int = CHUNK_SIZE) -> Optional[np.ndarray]:
+    """将 .text 段数据按 features 字节切分为 (n_chunks, features) 的 uint8 矩阵，末尾不足部分补 0
+
+    长度恰好是 features 整数倍时直接 reshape 为视图（零拷贝），否则只做一次整块拷贝到补零后的矩阵。
+
+    Returns:
+        np.ndarray: chunk 矩阵；无数据时返回 None
+    """
+    if data is None or len(data) == 0:
+        return None
+    values = np.asarray(data, dtype=np.uint8)
+    if len(values) % features == 0:
+        return values.reshape(-1, features)
+    chunks = np.zeros((-(-len(values) // features), features), dtype=np.uint8)
+    chunks.reshape(-1)[: len(values)] = values
+    return chunks
+
+
+def prepare_file_chunks(file_info: FileInfo, features: int = CHUNK_SIZE) -> tuple:
+    """读取 ELF、提取 .text 段并切分 chunk（不涉及模型，可在子进程中执行）
+
+    Returns:
+        (file_info, chunks, error_reason, skipped)
+        - chunks: chunk 矩阵，None 表示无数据或失败
+        - error_reason: None 表示无错误，str 为失败原因
+        - skipped: chunk 数量不足 MIN_CHUNKS，跳过预测
+    """
+    try:
+        # 先尝试直接打开 ELF 文件，以便捕获更详细的错误信息
+        try:
+            with open(file_info.absolute_path, 'rb') as f:
+                elf = ELFFile(f)
+                if not elf.get_section_by_name(FileInfo.TEXT_SECTION):
+                    return file_info, None, 'No .text section found in ELF file', False
+        except Exception as e:
+            # 捕获 ELF 文件读取异常（如 Magic number does not match）
+            logging.error('Error reading ELF file %s: %s', file_info.absolute_path, e)
+            return file_info, None, f'Failed to read ELF file: {str(e)}', False
+
+        # 如果 ELF 文件读取成功，再提取 .text 段数据（只提取一次，与 LTO 共用）
+        text_data = file_info.extract_dot_text()
+        if len(text_data) == 0:
+            # 检查文件类型
+            if file_info.file_type == FileType.NOT_SUPPORT:
+                error_msg = 'File type not supported (not .so or .a)'
+            else:
+                error_msg = 'No .text section data extracted (section exists but data is empty)'
+            logging.info('No text data for %s: %s', file_info.absolute_path, error_msg)
+            return file_info, None, error_msg, False
+
+        logging.info('Extracted %d bytes from .text section for %s', len(text_data), file_info.absolute_path)
+        chunks = split_text_chunks(text_data, features)
+        logging.info('Extracted %d chunks from %s', len(chunks), file_info.absolute_path)
+        # 只有当有数据但chunk数量不足时才跳过预测
+        if len(chunks) < MIN_CHUNKS:
+            logging.info(
+                'Skipping file with too few chunks (%d < %d): %s',
+                len(chunks),
+                MIN_CHUNKS,
+                file_info.absolute_path,
+            )
+            return file_info, None, None, True
+        return file_info, chunks, None, False
+    except Exception as e:
+        logging.error('Error extracting features from %s: %s', file_info.absolute_path, e)
+        return file_info, None, f'Failed to extract features: {str(e)}', False